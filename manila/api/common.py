@@ -95,6 +95,36 @@ def _get_marker_param(request):
     return request.GET['marker']
 
 
+def _get_offset_param(request):
+    """Extract integer offset from request or fail."""
+    try:
+        offset = int(request.GET.get('offset', 0))
+    except ValueError:
+        msg = _('offset param must be an integer')
+        raise webob.exc.HTTPBadRequest(explanation=msg)
+    if offset < 0:
+        msg = _('offset param must be positive')
+        raise webob.exc.HTTPBadRequest(explanation=msg)
+    return offset
+
+
+def get_pagination_filters(request, max_limit=CONF.osapi_max_limit):
+    """Return limit, offset and marker filters for a DB query from request.
+
+    :param request: ``wsgi.Request`` possibly containing 'offset', 'limit'
+                    and 'marker' GET variables. They have the same meaning
+                    and restrictions as for :func:`limited` and
+                    :func:`get_pagination_params`.
+    :kwarg max_limit: The maximum number of items a query may return
+    :returns: dict with 'limit' and 'offset' keys and 'marker' key if
+              marker was provided
+    """
+    params = get_pagination_params(request)
+    params['limit'] = min(max_limit, params.get('limit') or max_limit)
+    params['offset'] = _get_offset_param(request)
+    return params
+
+
 def limited(items, request, max_limit=CONF.osapi_max_limit):
     """Return a slice of items according to requested offset and limit.
 
@@ -107,11 +137,7 @@ def limited(items, request, max_limit=CONF.osapi_max_limit):
                     will cause exc.HTTPBadRequest() exceptions to be raised.
     :kwarg max_limit: The maximum number of items to return from 'items'
     """
-    try:
-        offset = int(request.GET.get('offset', 0))
-    except ValueError:
-        msg = _('offset param must be an integer')
-        raise webob.exc.HTTPBadRequest(explanation=msg)
+    offset = _get_offset_param(request)
 
     try:
         limit = int(request.GET.get('limit', max_limit))
@@ -123,10 +149,6 @@ def limited(items, request, max_limit=CONF.osapi_max_limit):
         msg = _('limit param must be positive')
         raise webob.exc.HTTPBadRequest(explanation=msg)
 
-    if offset < 0:
-        msg = _('offset param must be positive')
-        raise webob.exc.HTTPBadRequest(explanation=msg)
-
     limit = min(max_limit, limit or max_limit)
     range_end = offset + limit
     return items[offset:range_end]
@@ -214,6 +236,8 @@ class ViewBuilder(object):
         """Return href string with proper limit and marker params."""
         params = request.params.copy()
         params["marker"] = identifier
+        # NOTE: the marker already points past the skipped items.
+        params.pop("offset", None)
         prefix = self._update_link_prefix(request.application_url,
                                           CONF.osapi_share_base_URL)
         url = os.path.join(prefix,
@@ -243,7 +267,8 @@ class ViewBuilder(object):
     def _get_collection_links(self, request, items, id_key="uuid"):
         """Retrieve 'next' link, if applicable."""
         links = []
-        limit = int(request.params.get("limit", 0))
+        limit = int(request.params.get("limit", 0)) or CONF.osapi_max_limit
+        limit = min(limit, CONF.osapi_max_limit)
         if limit and limit == len(items):
             last_item = items[-1]
             if id_key in last_item:
@@ -18,13 +18,20 @@ Module dedicated functions/classes dealing with rate limiting requests.
 """
 
 import collections
+import contextlib
 import copy
+import hashlib
 import math
+import os
 import re
+import socket
 import time
 
+from oslo_concurrency import lockutils
+from oslo_config import cfg
 from oslo_serialization import jsonutils
 from oslo_utils import importutils
+import six
 from six.moves import http_client
 import webob.dec
 import webob.exc
@@ -35,6 +42,7 @@ from manila.i18n import _
 from manila import quota
 from manila import wsgi as base_wsgi
 
+CONF = cfg.CONF
 QUOTAS = quota.QUOTAS
 
 
@@ -94,6 +102,7 @@ class Limit(object):
         self.verb = verb
         self.uri = uri
         self.regex = regex
+        self._pattern = re.compile(regex)
         self.value = int(value)
         self.unit = unit
         self.unit_string = self.display_unit().lower()
@@ -120,7 +129,7 @@ class Limit(object):
         @param verb: string http verb (POST, GET, etc.)
         @param url: string URL
         """
-        if self.verb != verb or not re.match(self.regex, url):
+        if self.verb != verb or not self._pattern.match(url):
             return
 
         now = self._get_time()
@@ -150,6 +159,17 @@ class Limit(object):
         self.remaining = math.floor(((cap - water) / cap) * val)
         self.next_request = now
 
+    def __getstate__(self):
+        # NOTE: compiled patterns can not be copied on python 2.7, so the
+        # pattern is compiled again for copies of a limit.
+        state = self.__dict__.copy()
+        del state['_pattern']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._pattern = re.compile(self.regex)
+
     def _get_time(self):
         """Retrieve the current time. Broken out for testability."""
         return time.time()
@@ -345,6 +365,83 @@ class Limiter(object):
         return result
 
 
+class SharedLimiter(Limiter):
+    """Rate-limit checking class which shares limits between processes.
+
+    The state of the limits of each user is stored in a file under
+    `state_path` and guarded by an inter-process lock, so that all API
+    workers of a node enforce the same limits.
+    """
+
+    # Limit attributes which are stored in the state files.
+    STATE_ATTRS = ('water_level', 'last_request', 'next_request', 'remaining')
+
+    def __init__(self, limits, state_path=None, **kwargs):
+        """Initialize the new `SharedLimiter`.
+
+        @param limits: List of `Limit` objects
+        @param state_path: Directory where the state of limits is stored,
+        defaults to the 'limits' directory under the state_path option
+        """
+        super(SharedLimiter, self).__init__(limits, **kwargs)
+        self.state_path = state_path or os.path.join(CONF.state_path,
+                                                     'limits')
+        if not os.path.exists(self.state_path):
+            os.makedirs(self.state_path)
+
+    def get_limits(self, username=None):
+        """Return the limits for a given user."""
+        with self._shared_state(username, save=False):
+            return super(SharedLimiter, self).get_limits(username)
+
+    def check_for_delay(self, verb, url, username=None):
+        """Check the given verb/user/user triplet for limit.
+
+        @return: Tuple of delay (in seconds) and error message (or None, None)
+        """
+        with self._shared_state(username):
+            return super(SharedLimiter, self).check_for_delay(
+                verb, url, username)
+
+    @contextlib.contextmanager
+    def _shared_state(self, username, save=True):
+        name = hashlib.sha1(
+            six.text_type(username or '').encode('utf-8')).hexdigest()
+        path = os.path.join(self.state_path, name)
+
+        with lockutils.lock(name, lock_file_prefix='manila-limits-',
+                            external=True, lock_path=self.state_path):
+            limits = self.levels[username]
+            self._load_state(path, limits)
+            yield
+            if save:
+                self._save_state(path, limits)
+
+    def _load_state(self, path, limits):
+        try:
+            with open(path) as state_file:
+                state = jsonutils.loads(state_file.read())
+        except (IOError, ValueError):
+            return
+
+        # NOTE: state stored for a different set of limits is ignored.
+        if len(state) != len(limits):
+            return
+
+        for limit, limit_state in zip(limits, state):
+            for attr, value in zip(self.STATE_ATTRS, limit_state):
+                setattr(limit, attr, value)
+
+    def _save_state(self, path, limits):
+        state = [[getattr(limit, attr) for attr in self.STATE_ATTRS]
+                 for limit in limits]
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as state_file:
+            state_file.write(jsonutils.dumps(state))
+        os.rename(tmp_path, path)
+
+
 class WsgiLimiter(object):
     """Rate-limit checking from a WSGI application.
 
@@ -406,24 +503,43 @@ class WsgiLimiterProxy(object):
         @param limiter_address: IP/port combination of where to request limit
         """
         self.limiter_address = limiter_address
+        # Idle connections to the limiter, reused by later checks
+        self._connections = []
 
     def check_for_delay(self, verb, path, username=None):
         body = jsonutils.dumps({"verb": verb, "path": path})
         headers = {"Content-Type": "application/json"}
-
-        conn = http_client.HTTPConnection(self.limiter_address)
-
-        if username:
-            conn.request("POST", "/%s" % (username), body, headers)
+        url = "/%s" % username if username else "/"
+
+        if self._connections:
+            conn = self._connections.pop()
+            try:
+                resp = self._request(conn, url, body, headers)
+            except (http_client.HTTPException, socket.error):
+                # NOTE: the limiter may have closed the idle connection,
+                # retry on a new one.
+                conn.close()
+                conn = None
         else:
-            conn.request("POST", "/", body, headers)
+            conn = None
+
+        if conn is None:
+            conn = http_client.HTTPConnection(self.limiter_address)
+            resp = self._request(conn, url, body, headers)
 
-        resp = conn.getresponse()
+        # NOTE: the response has to be read before the connection is reused.
+        content = resp.read()
+        self._connections.append(conn)
 
         if 200 >= resp.status < 300:
             return None, None
 
-        return resp.getheader("X-Wait-Seconds"), resp.read() or None
+        return resp.getheader("X-Wait-Seconds"), content or None
+
+    @staticmethod
+    def _request(conn, url, body, headers):
+        conn.request("POST", url, body, headers)
+        return conn.getresponse()
 
     # Note: This method gets called before the class is instantiated,
     # so this must be either a static method or a class method.  It is
@@ -25,12 +25,14 @@ from webob import exc
 from manila.api import common
 from manila.api.openstack import wsgi
 from manila.api.views import share_networks as share_networks_views
+from manila.common import constants
 from manila.db import api as db_api
 from manila import exception
 from manila.i18n import _, _LE, _LW
 from manila import policy
 from manila import quota
 from manila.share import rpcapi as share_rpcapi
+from manila import utils
 
 RESOURCE_NAME = 'share_network'
 RESOURCES_NAME = 'share_networks'
@@ -117,61 +119,61 @@ class ShareNetworkController(wsgi.Controller):
                 policy.check_policy(context, RESOURCE_NAME,
                                     'get_all_share_networks')
 
-        if 'security_service_id' in search_opts:
-            networks = db_api.share_network_get_all_by_security_service(
-                context, search_opts['security_service_id'])
-        elif ('project_id' in search_opts and
-              search_opts['project_id'] != context.project_id):
-            networks = db_api.share_network_get_all_by_project(
-                context, search_opts['project_id'])
-        elif 'all_tenants' in search_opts:
-            networks = db_api.share_network_get_all(context)
-        else:
-            networks = db_api.share_network_get_all_by_project(
-                context,
-                context.project_id)
-
         date_parsing_error_msg = '''%s is not in yyyy-mm-dd format.'''
-        if 'created_since' in search_opts:
-            try:
-                created_since = timeutils.parse_strtime(
-                    search_opts['created_since'],
-                    fmt="%Y-%m-%d")
-            except ValueError:
-                msg = date_parsing_error_msg % search_opts['created_since']
-                raise exc.HTTPBadRequest(explanation=msg)
-            networks = [network for network in networks
-                        if network['created_at'] >= created_since]
-        if 'created_before' in search_opts:
-            try:
-                created_before = timeutils.parse_strtime(
-                    search_opts['created_before'],
-                    fmt="%Y-%m-%d")
-            except ValueError:
-                msg = date_parsing_error_msg % search_opts['created_before']
-                raise exc.HTTPBadRequest(explanation=msg)
-            networks = [network for network in networks
-                        if network['created_at'] <= created_before]
+        filters = {}
+        for key in ('created_since', 'created_before'):
+            if key in search_opts:
+                value = search_opts.pop(key)
+                try:
+                    filters[key] = timeutils.parse_strtime(
+                        value, fmt="%Y-%m-%d")
+                except ValueError:
+                    msg = date_parsing_error_msg % value
+                    raise exc.HTTPBadRequest(explanation=msg)
+        all_tenants = 'all_tenants' in search_opts
         opts_to_remove = [
             'all_tenants',
-            'created_since',
-            'created_before',
             'limit',
             'offset',
-            'security_service_id',
+            'marker',
         ]
         for opt in opts_to_remove:
             search_opts.pop(opt, None)
-        if search_opts:
-            for key, value in search_opts.items():
+        for key in constants.SHARE_NETWORK_EXACT_FILTER_KEYS:
+            if key in search_opts:
+                value = search_opts.pop(key)
                 if key in ['ip_version', 'segmentation_id']:
                     value = int(value)
+                filters[key] = value
+
+        # NOTE: pagination is done by the database unless there are filters
+        # left that can only be applied here.
+        pagination = common.get_pagination_filters(req)
+        security_service_id = search_opts.pop('security_service_id', None)
+        if not search_opts:
+            filters.update(pagination)
+
+        if security_service_id:
+            networks = db_api.share_network_get_all_by_security_service(
+                context, security_service_id, filters=filters)
+        elif ('project_id' in filters and
+              filters['project_id'] != context.project_id):
+            networks = db_api.share_network_get_all_by_project(
+                context, filters.pop('project_id'), filters=filters)
+        elif all_tenants:
+            networks = db_api.share_network_get_all(context, filters=filters)
+        else:
+            networks = db_api.share_network_get_all_by_project(
+                context, context.project_id, filters=filters)
+
+        if search_opts:
+            for key, value in search_opts.items():
                 networks = [network for network in networks
                             if network[key] == value]
+            networks = utils.paginate(networks, **pagination)
 
-        limited_list = common.limited(networks, req)
         return self._view_builder.build_share_networks(
-            req, limited_list, is_detail)
+            req, networks, is_detail)
 
     def index(self, req):
         """Returns a summary list of share networks."""
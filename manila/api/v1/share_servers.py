@@ -18,6 +18,7 @@ import six
 import webob
 from webob import exc
 
+from manila.api import common
 from manila.api.openstack import wsgi
 from manila.api.views import share_servers as share_servers_views
 from manila.common import constants
@@ -25,6 +26,7 @@ from manila.db import api as db_api
 from manila import exception
 from manila.i18n import _
 from manila import share
+from manila import utils
 
 LOG = log.getLogger(__name__)
 
@@ -47,7 +49,23 @@ class ShareServerController(wsgi.Controller):
         search_opts = {}
         search_opts.update(req.GET)
 
-        share_servers = db_api.share_server_get_all(context)
+        # NOTE: share servers are paginated only if it was requested, and
+        # by the database unless there are filters left that can only be
+        # applied here.
+        pagination = {}
+        if any(key in search_opts for key in constants.PAGINATION_KEYS):
+            pagination = common.get_pagination_filters(req)
+        for key in constants.PAGINATION_KEYS:
+            search_opts.pop(key, None)
+        filters = {}
+        for key in (constants.SHARE_SERVER_EXACT_FILTER_KEYS +
+                    ('project_id', 'share_network')):
+            if key in search_opts:
+                filters[key] = search_opts.pop(key)
+        if not search_opts:
+            filters.update(pagination)
+
+        share_servers = db_api.share_server_get_all(context, filters=filters)
         for s in share_servers:
             s.project_id = s.share_network['project_id']
             if s.share_network['name']:
@@ -57,11 +75,9 @@ class ShareServerController(wsgi.Controller):
         if search_opts:
             for k, v in search_opts.items():
                 share_servers = [s for s in share_servers if
-                                 (hasattr(s, k) and
-                                  s[k] == v or k == 'share_network' and
-                                  v in [s.share_network['name'],
-                                        s.share_network['id']])]
-        return self._view_builder.build_share_servers(share_servers)
+                                 (hasattr(s, k) and s[k] == v)]
+            share_servers = utils.paginate(share_servers, **pagination)
+        return self._view_builder.build_share_servers(req, share_servers)
 
     @wsgi.Controller.authorize
     def show(self, req, id):
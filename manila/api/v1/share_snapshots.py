@@ -88,6 +88,7 @@ class ShareSnapshotMixin(object):
         # Remove keys that are not related to share attrs
         search_opts.pop('limit', None)
         search_opts.pop('offset', None)
+        search_opts.pop('marker', None)
         sort_key = search_opts.pop('sort_key', 'created_at')
         sort_dir = search_opts.pop('sort_dir', 'desc')
 
@@ -99,6 +100,7 @@ class ShareSnapshotMixin(object):
 
         common.remove_invalid_options(context, search_opts,
                                       self._get_snapshots_search_options())
+        search_opts.update(common.get_pagination_filters(req))
 
         snapshots = self.share_api.get_all_snapshots(
             context,
@@ -111,11 +113,10 @@ class ShareSnapshotMixin(object):
         snapshots = list(filter(lambda x: x.get('status') is not None,
                                 snapshots))
 
-        limited_list = common.limited(snapshots, req)
         if is_detail:
-            snapshots = self._view_builder.detail_list(req, limited_list)
+            snapshots = self._view_builder.detail_list(req, snapshots)
         else:
-            snapshots = self._view_builder.summary_list(req, limited_list)
+            snapshots = self._view_builder.summary_list(req, snapshots)
         return snapshots
 
     def _get_snapshots_search_options(self):
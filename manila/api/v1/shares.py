@@ -117,6 +117,7 @@ class ShareMixin(object):
         # Remove keys that are not related to share attrs
         search_opts.pop('limit', None)
         search_opts.pop('offset', None)
+        search_opts.pop('marker', None)
         sort_key = search_opts.pop('sort_key', 'created_at')
         sort_dir = search_opts.pop('sort_dir', 'desc')
 
@@ -137,17 +138,16 @@ class ShareMixin(object):
 
         common.remove_invalid_options(
             context, search_opts, self._get_share_search_options())
+        search_opts.update(common.get_pagination_filters(req))
 
         shares = self.share_api.get_all(
             context, search_opts=search_opts, sort_key=sort_key,
             sort_dir=sort_dir)
 
-        limited_list = common.limited(shares, req)
-
         if is_detail:
-            shares = self._view_builder.detail_list(req, limited_list)
+            shares = self._view_builder.detail_list(req, shares)
         else:
-            shares = self._view_builder.summary_list(req, limited_list)
+            shares = self._view_builder.summary_list(req, shares)
         return shares
 
     def _get_share_search_options(self):
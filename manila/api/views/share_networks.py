@@ -19,7 +19,7 @@ from manila.api import common
 class ViewBuilder(common.ViewBuilder):
     """Model a server API response as a python dictionary."""
 
-    _collection_name = 'share_networks'
+    _collection_name = 'share-networks'
     _detail_version_modifiers = ["add_gateway", "add_mtu"]
 
     def build_share_network(self, request, share_network):
@@ -29,10 +29,17 @@ class ViewBuilder(common.ViewBuilder):
             request, share_network)}
 
     def build_share_networks(self, request, share_networks, is_detail=True):
-        return {'share_networks':
-                [self._build_share_network_view(
+        share_networks_dict = {
+            'share_networks': [
+                self._build_share_network_view(
                     request, share_network, is_detail)
-                 for share_network in share_networks]}
+                for share_network in share_networks]
+        }
+        share_networks_links = self._get_collection_links(
+            request, share_networks, self._collection_name)
+        if share_networks_links:
+            share_networks_dict['share_networks_links'] = share_networks_links
+        return share_networks_dict
 
     def _build_share_network_view(self, request, share_network,
                                   is_detail=True):
@@ -19,7 +19,7 @@ from manila.api import common
 class ViewBuilder(common.ViewBuilder):
     """Model a server API response as a python dictionary."""
 
-    _collection_name = 'share_servers'
+    _collection_name = 'share-servers'
 
     def build_share_server(self, share_server):
         """View of a share server."""
@@ -28,12 +28,17 @@ class ViewBuilder(common.ViewBuilder):
                 self._build_share_server_view(share_server, detailed=True)
         }
 
-    def build_share_servers(self, share_servers):
-        return {
+    def build_share_servers(self, request, share_servers):
+        share_servers_dict = {
             'share_servers':
                 [self._build_share_server_view(share_server)
                  for share_server in share_servers]
         }
+        share_servers_links = self._get_collection_links(
+            request, share_servers, self._collection_name)
+        if share_servers_links:
+            share_servers_dict['share_servers_links'] = share_servers_links
+        return share_servers_dict
 
     def build_share_server_details(self, details):
         return {'details': details}
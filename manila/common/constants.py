@@ -153,6 +153,33 @@ REPLICA_STATE_ACTIVE = 'active'
 REPLICA_STATE_IN_SYNC = 'in_sync'
 REPLICA_STATE_OUT_OF_SYNC = 'out_of_sync'
 
+# Keys of share and snapshot listing filters that are applied by the
+# database as exact matches against columns of the given resources.
+SHARE_EXACT_FILTER_KEYS = (
+    'display_name', 'snapshot_id', 'share_proto', 'size', 'user_id',
+    'consistency_group_id', 'source_cgsnapshot_member_id', 'task_state',
+    'replication_type',
+)
+SHARE_INSTANCE_EXACT_FILTER_KEYS = (
+    'status', 'host', 'share_network_id', 'share_type_id',
+    'access_rules_status', 'availability_zone_id',
+)
+SNAPSHOT_EXACT_FILTER_KEYS = (
+    'display_name', 'share_id', 'size', 'share_proto',
+)
+SNAPSHOT_INSTANCE_EXACT_FILTER_KEYS = (
+    'status',
+)
+SHARE_NETWORK_EXACT_FILTER_KEYS = (
+    'name', 'description', 'project_id', 'nova_net_id', 'neutron_net_id',
+    'neutron_subnet_id', 'network_type', 'segmentation_id', 'cidr',
+    'ip_version',
+)
+SHARE_SERVER_EXACT_FILTER_KEYS = (
+    'host', 'status', 'share_network_id',
+)
+PAGINATION_KEYS = ('limit', 'offset', 'marker')
+
 
 class ExtraSpecs(object):
 
@@ -44,6 +44,11 @@ data_opts = [
         default=False,
         help="Chooses whether hash of each file should be checked on data "
              "copying."),
+    cfg.IntOpt(
+        'data_copy_workers',
+        default=4,
+        min=1,
+        help="Number of files copied concurrently on data copying."),
 
 ]
 
@@ -54,7 +59,7 @@ CONF.register_opts(data_opts)
 class DataManager(manager.Manager):
     """Receives requests to handle data and sends responses."""
 
-    RPC_API_VERSION = '1.0'
+    RPC_API_VERSION = '1.1'
 
     def __init__(self, service_name=None, *args, **kwargs):
         super(DataManager, self).__init__(*args, **kwargs)
@@ -71,7 +76,8 @@ class DataManager(manager.Manager):
 
     def migration_start(self, context, ignore_list, share_id,
                         share_instance_id, dest_share_instance_id,
-                        connection_info_src, connection_info_dest):
+                        connection_info_src, connection_info_dest,
+                        writable_passes=0):
 
         LOG.debug(
             "Received request to migrate share content from share instance "
@@ -91,12 +97,12 @@ class DataManager(manager.Manager):
             copy = data_utils.Copy(
                 os.path.join(mount_path, share_instance_id),
                 os.path.join(mount_path, dest_share_instance_id),
-                ignore_list, CONF.check_hash)
+                ignore_list, CONF.check_hash, CONF.data_copy_workers)
 
             self._copy_share_data(
                 context, copy, share_ref, share_instance_id,
                 dest_share_instance_id, connection_info_src,
-                connection_info_dest)
+                connection_info_dest, writable_passes=writable_passes)
         except exception.ShareDataCopyCancelled:
             share_rpcapi.migration_complete(
                 context, share_instance_ref, dest_share_instance_id)
@@ -152,7 +158,16 @@ class DataManager(manager.Manager):
 
     def _copy_share_data(
             self, context, copy, src_share, share_instance_id,
-            dest_share_instance_id, connection_info_src, connection_info_dest):
+            dest_share_instance_id, connection_info_src, connection_info_dest,
+            writable_passes=0):
+        """Copy the data of a share instance to another.
+
+        If writable_passes is set, the data is first copied that many times
+        while the source share instance is still writable, each pass after
+        the first copying only what changed since the previous one. The
+        source is then made read-only by the share service and a last pass
+        copies the remaining changes.
+        """
 
         copied = False
         mount_path = CONF.mount_tmp_location
@@ -220,7 +235,20 @@ class DataManager(manager.Manager):
             {'task_state': constants.TASK_STATE_DATA_COPYING_IN_PROGRESS})
 
         try:
-            copy.run()
+            for copy_pass in range(writable_passes):
+                copy.run()
+                if copy.cancelled:
+                    break
+                LOG.info(_LI("Completed pass %(pass)d of %(passes)d of "
+                             "copying data from share instance "
+                             "%(share_instance_id)s while it is writable."),
+                         {'pass': copy_pass + 1, 'passes': writable_passes,
+                          'share_instance_id': share_instance_id})
+            else:
+                if writable_passes:
+                    share_rpc.ShareAPI().migration_change_to_read_only(
+                        context, share_instance)
+                copy.run()
 
             self.db.share_update(
                 context, src_share['id'],
@@ -13,7 +13,9 @@
 #    under the License.
 
 import os
+import sys
 
+import eventlet
 from oslo_log import log
 import six
 
@@ -23,10 +25,14 @@ from manila import utils
 
 LOG = log.getLogger(__name__)
 
+# Number of directories created or items removed by each 'mkdir' or 'rm'
+# call
+BATCH_SIZE = 100
+
 
 class Copy(object):
 
-    def __init__(self, src, dest, ignore_list, check_hash=False):
+    def __init__(self, src, dest, ignore_list, check_hash=False, workers=1):
         self.src = src
         self.dest = dest
         self.total_size = 0
@@ -39,6 +45,11 @@ class Copy(object):
         self.initialized = False
         self.completed = False
         self.check_hash = check_hash
+        self.workers = workers
+        # Type, size and modification time of the items copied by previous
+        # runs, so that a new run only copies what changed since then
+        self.manifest = {}
+        self.removed = []
 
     def get_progress(self):
 
@@ -82,7 +93,14 @@ class Copy(object):
         self.cancelled = True
 
     def run(self):
+        """Copy the items changed since the previous run.
+
+        The first run copies everything. The following ones copy only files
+        whose type, size or modification time changed, and remove from the
+        destination the items removed from the source.
+        """
 
+        self.completed = False
         self.get_total_size(self.src)
         self.initialized = True
         self.copy_data(self.src)
@@ -92,59 +110,101 @@ class Copy(object):
         LOG.info(six.text_type(self.get_progress()))
 
     def get_total_size(self, path):
+        """Walk the tree once, recording its directories and files.
+
+        Directories are recorded before their contents, and files changed
+        since the previous run along with their sizes, so that neither
+        copying nor progress reporting needs to list directories or stat
+        files again. Items in the ignore list are pruned from the walk.
+        """
+        self.total_size = 0
+        self.current_size = 0
+        self.current_copy = None
+        self.files = []
+        self.dirs = []
+        self.removed = []
         if self.cancelled:
             return
-        out, err = utils.execute(
-            "ls", "-pA1", "--group-directories-first", path,
-            run_as_root=True)
-        for line in out.split('\n'):
+        cmd = ["find", path, "-mindepth", "1"]
+        for name in self.ignore_list:
+            cmd.extend(["-name", name, "-prune", "-o"])
+        cmd.extend(["-printf", "%y %s %T@ %P\\0"])
+        out, err = utils.execute(*cmd, run_as_root=True)
+        found = set()
+        for line in out.split('\0'):
             if self.cancelled:
                 return
             if len(line) == 0:
                 continue
-            src_item = os.path.join(path, line)
-            if line[-1] == '/':
-                if line[0:-1] in self.ignore_list:
-                    continue
-                self.get_total_size(src_item)
-            else:
-                if line in self.ignore_list:
-                    continue
-                size, err = utils.execute("stat", "-c", "%s", src_item,
-                                          run_as_root=True)
+            item_type, size, mtime, relative_path = line.split(' ', 3)
+            found.add(relative_path)
+            copied = self.manifest.get(relative_path)
+            if item_type == 'd':
+                if copied and copied[0] != 'd':
+                    self.removed.append(relative_path)
+                self.dirs.append(relative_path)
+            elif copied != (item_type, size, mtime):
+                # NOTE: only regular files are overwritten in place by cp
+                if copied and (item_type != 'f' or copied[0] != 'f'):
+                    self.removed.append(relative_path)
+                self.files.append({'path': relative_path, 'size': int(size),
+                                   'manifest': (item_type, size, mtime)})
                 self.total_size += int(size)
+        self.removed.extend(relative_path for relative_path in self.manifest
+                            if relative_path not in found)
+        for relative_path in self.removed:
+            self.manifest.pop(relative_path, None)
 
     def copy_data(self, path):
         if self.cancelled:
             return
-        out, err = utils.execute(
-            "ls", "-pA1", "--group-directories-first", path,
-            run_as_root=True)
-        for line in out.split('\n'):
-            if self.cancelled:
-                return
-            if len(line) == 0:
-                continue
-            src_item = os.path.join(path, line)
-            dest_item = src_item.replace(self.src, self.dest)
-            if line[-1] == '/':
-                if line[0:-1] in self.ignore_list:
-                    continue
-                utils.execute("mkdir", "-p", dest_item, run_as_root=True)
-                self.copy_data(src_item)
-            else:
-                if line in self.ignore_list:
-                    continue
-                size, err = utils.execute("stat", "-c", "%s", src_item,
-                                          run_as_root=True)
-
-                self.current_copy = {'file_path': dest_item,
-                                     'size': int(size)}
-
-                self._copy_and_validate(src_item, dest_item)
-
-                self.current_size += int(size)
-                LOG.info(six.text_type(self.get_progress()))
+        self._execute_batches(["rm", "-rf"], self.removed)
+        self._execute_batches(
+            ["mkdir", "-p"], [relative_path for relative_path in self.dirs
+                              if relative_path not in self.manifest])
+        for relative_path in self.dirs:
+            self.manifest[relative_path] = ('d', None, None)
+
+        # The first error hit while copying stops spawning further copies
+        # and keeps the already spawned ones from starting; it is raised
+        # once the running copies are done.
+        errors = []
+        pool = eventlet.GreenPool(self.workers)
+        for item in self.files:
+            if self.cancelled or errors:
+                break
+            pool.spawn_n(self._copy_file, path, item, errors)
+        pool.waitall()
+        if errors:
+            six.reraise(*errors[0])
+
+    def _copy_file(self, path, item, errors):
+        if self.cancelled or errors:
+            return
+        try:
+            self._copy_item(path, item)
+        except Exception:
+            errors.append(sys.exc_info())
+
+    def _copy_item(self, path, item):
+        src_item = os.path.join(path, item['path'])
+        dest_item = os.path.join(self.dest, item['path'])
+
+        self.current_copy = {'file_path': dest_item,
+                             'size': item['size']}
+
+        self._copy_and_validate(src_item, dest_item)
+
+        self.manifest[item['path']] = item['manifest']
+        self.current_size += item['size']
+        LOG.info(six.text_type(self.get_progress()))
+
+    def _execute_batches(self, cmd, relative_paths):
+        for index in range(0, len(relative_paths), BATCH_SIZE):
+            dest_items = [os.path.join(self.dest, relative_path)
+                          for relative_path
+                          in relative_paths[index:index + BATCH_SIZE]]
+            utils.execute(*(cmd + dest_items), run_as_root=True)
 
     @utils.retry(exception.ShareDataCopyFailed, retries=2)
     def _copy_and_validate(self, src_item, dest_item):
@@ -155,36 +215,26 @@ class Copy(object):
             _validate_item(src_item, dest_item)
 
     def copy_stats(self, path):
-        if self.cancelled:
-            return
-        out, err = utils.execute(
-            "ls", "-pA1", "--group-directories-first", path,
-            run_as_root=True)
-        for line in out.split('\n'):
+        # NOTE(ganso): Should re-apply attributes for folders.
+        # Directories are walked in reverse so that the contents of a
+        # directory are handled before the directory itself.
+        for relative_path in reversed(self.dirs):
             if self.cancelled:
                 return
-            if len(line) == 0:
-                continue
-            src_item = os.path.join(path, line)
-            dest_item = src_item.replace(self.src, self.dest)
-            # NOTE(ganso): Should re-apply attributes for folders.
-            if line[-1] == '/':
-                if line[0:-1] in self.ignore_list:
-                    continue
-                self.copy_stats(src_item)
-                utils.execute("chmod", "--reference=%s" % src_item, dest_item,
-                              run_as_root=True)
-                utils.execute("touch", "--reference=%s" % src_item, dest_item,
-                              run_as_root=True)
-                utils.execute("chown", "--reference=%s" % src_item, dest_item,
-                              run_as_root=True)
+            src_item = os.path.join(path, relative_path)
+            dest_item = os.path.join(self.dest, relative_path)
+            utils.execute("chmod", "--reference=%s" % src_item, dest_item,
+                          run_as_root=True)
+            utils.execute("touch", "--reference=%s" % src_item, dest_item,
+                          run_as_root=True)
+            utils.execute("chown", "--reference=%s" % src_item, dest_item,
+                          run_as_root=True)
 
 
 def _validate_item(src_item, dest_item):
-    src_sum, err = utils.execute(
-        "sha256sum", "%s" % src_item, run_as_root=True)
-    dest_sum, err = utils.execute(
-        "sha256sum", "%s" % dest_item, run_as_root=True)
-    if src_sum.split()[0] != dest_sum.split()[0]:
+    out, err = utils.execute(
+        "sha256sum", "%s" % src_item, "%s" % dest_item, run_as_root=True)
+    src_sum, dest_sum = [line.split()[0] for line in out.splitlines()]
+    if src_sum != dest_sum:
         msg = _("Data corrupted while copying. Aborting data copy.")
         raise exception.ShareDataCopyFailed(reason=msg)
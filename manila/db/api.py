@@ -311,6 +311,11 @@ def share_instances_get_all_by_host(context, host, with_share_data=False):
         context, host, with_share_data=with_share_data)
 
 
+def share_instances_get_size_sum_by_host(context):
+    """Returns sums of sizes of share instances, keyed by host."""
+    return IMPL.share_instances_get_size_sum_by_host(context)
+
+
 def share_instances_get_all_by_share_network(context, share_network_id):
     """Returns list of shares that belong to given share network."""
     return IMPL.share_instances_get_all_by_share_network(context,
@@ -345,6 +350,11 @@ def share_get(context, share_id):
     return IMPL.share_get(context, share_id)
 
 
+def share_get_all_by_ids(context, share_ids):
+    """Get shares with given ids."""
+    return IMPL.share_get_all_by_ids(context, share_ids)
+
+
 def share_get_all(context, filters=None, sort_key=None, sort_dir=None):
     """Get all shares."""
     return IMPL.share_get_all(
@@ -450,6 +460,13 @@ def share_instance_access_delete(context, mapping_id):
     return IMPL.share_instance_access_delete(context, mapping_id)
 
 
+def share_instance_access_delete_all_by_access_ids(context, share_instance_id,
+                                                   access_ids):
+    """Deny access to share instance for several access rules at once."""
+    return IMPL.share_instance_access_delete_all_by_access_ids(
+        context, share_instance_id, access_ids)
+
+
 def share_instance_update_access_status(context, share_instance_id, status):
     """Update access rules status of share instance."""
     return IMPL.share_instance_update_access_status(context, share_instance_id,
@@ -621,6 +638,17 @@ def share_export_locations_update(context, share_instance_id, export_locations,
         context, share_instance_id, export_locations, delete)
 
 
+def share_export_locations_update_bulk(context, export_locations,
+                                       delete=True):
+    """Update export locations of several share instances at once.
+
+    :param export_locations: dict mapping share instance IDs to their
+        export locations.
+    """
+    return IMPL.share_export_locations_update_bulk(
+        context, export_locations, delete)
+
+
 ####################
 
 def export_location_metadata_get(context, export_location_uuid, session=None):
@@ -665,20 +693,22 @@ def share_network_get(context, id):
     return IMPL.share_network_get(context, id)
 
 
-def share_network_get_all(context):
+def share_network_get_all(context, filters=None):
     """Get all share network DB records."""
-    return IMPL.share_network_get_all(context)
+    return IMPL.share_network_get_all(context, filters=filters)
 
 
-def share_network_get_all_by_project(context, project_id):
+def share_network_get_all_by_project(context, project_id, filters=None):
     """Get all share network DB records for the given project."""
-    return IMPL.share_network_get_all_by_project(context, project_id)
+    return IMPL.share_network_get_all_by_project(context, project_id,
+                                                 filters=filters)
 
 
-def share_network_get_all_by_security_service(context, security_service_id):
+def share_network_get_all_by_security_service(context, security_service_id,
+                                              filters=None):
     """Get all share network DB records for the given project."""
     return IMPL.share_network_get_all_by_security_service(
-        context, security_service_id)
+        context, security_service_id, filters=filters)
 
 
 def share_network_add_security_service(context, id, security_service_id):
@@ -701,6 +731,14 @@ def network_allocation_create(context, values):
     return IMPL.network_allocation_create(context, values)
 
 
+def network_allocation_create_if_ip_free(context, values):
+    """Create a network allocation DB record if its IP address is unused.
+
+    :returns: the created record, or None if the IP address is allocated.
+    """
+    return IMPL.network_allocation_create_if_ip_free(context, values)
+
+
 def network_allocation_delete(context, id):
     """Delete a network allocation DB record."""
     return IMPL.network_allocation_delete(context, id)
@@ -723,6 +761,11 @@ def network_allocations_get_by_ip_address(context, ip_address):
     return IMPL.network_allocations_get_by_ip_address(context, ip_address)
 
 
+def network_allocations_get_ip_addresses(context):
+    """Get IP addresses of all network allocations."""
+    return IMPL.network_allocations_get_ip_addresses(context)
+
+
 ##################
 
 
@@ -754,9 +797,9 @@ def share_server_get_all_by_host_and_share_net_valid(context, host,
         context, host, share_net_id, session=session)
 
 
-def share_server_get_all(context):
+def share_server_get_all(context, filters=None):
     """Get all share server DB records."""
-    return IMPL.share_server_get_all(context)
+    return IMPL.share_server_get_all(context, filters=filters)
 
 
 def share_server_get_all_by_host(context, host):
@@ -1021,6 +1064,19 @@ def share_replicas_get_all(context, with_share_server=False,
         with_share_data=with_share_data)
 
 
+def share_replicas_get_all_by_host(context, host, with_share_server=False,
+                                   with_share_data=False,
+                                   exclude_active=False):
+    """Returns all share replicas hosted on a host.
+
+    :param host: backend host; replicas in any of its pools are returned.
+    :param exclude_active: whether 'active' replicas should be skipped.
+    """
+    return IMPL.share_replicas_get_all_by_host(
+        context, host, with_share_server=with_share_server,
+        with_share_data=with_share_data, exclude_active=exclude_active)
+
+
 def share_replicas_get_all_by_share(context, share_id, with_share_server=False,
                                     with_share_data=False):
     """Returns all share replicas for a given share."""
@@ -0,0 +1,34 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""add_share_instances_host_index
+
+Revision ID: d67d9e34560b
+Revises: 48a7beae3117
+Create Date: 2016-08-10 11:12:40.347812
+
+"""
+
+# revision identifiers, used by Alembic.
+revision = 'd67d9e34560b'
+down_revision = '48a7beae3117'
+
+from alembic import op
+
+
+def upgrade():
+    op.create_index(
+        'ix_share_instances_host', 'share_instances', ['host'])
+
+
+def downgrade():
+    op.drop_index('ix_share_instances_host', table_name='share_instances')
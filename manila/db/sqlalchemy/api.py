@@ -39,8 +39,15 @@ from oslo_utils import timeutils
 from oslo_utils import uuidutils
 import six
 from sqlalchemy import and_
+from sqlalchemy import exists
+from sqlalchemy import literal
 from sqlalchemy import or_
+from sqlalchemy import select
+from sqlalchemy.orm import attributes
 from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import lazyload
+from sqlalchemy.orm import subqueryload
+from sqlalchemy.sql.expression import false
 from sqlalchemy.sql.expression import true
 from sqlalchemy.sql import func
 
@@ -255,12 +262,116 @@ def exact_filter(query, model, filters, legal_keys):
             filter_dict[key] = value
 
     # Apply simple exact matches
-    if filter_dict:
-        query = query.filter_by(**filter_dict)
+    for key, value in filter_dict.items():
+        # NOTE: 'filter_by' would target the last joined entity of the
+        # query, so compare against the model's column explicitly.
+        query = query.filter(getattr(model, key) == value)
 
     return query
 
 
+def _paginate_query(query, model, sort_attr, sort_dir, limit=None,
+                    offset=None, marker=None):
+    """Sorts a query and applies marker, limit and offset to it.
+
+    Rows are ordered by the given attribute and then by the model's 'id'
+    so that a marker unambiguously identifies a position in the listing.
+    NULL values of the attribute are ordered as smaller than any other
+    value, so they come first in ascending and last in descending order.
+
+    :param query: query to paginate
+    :param model: model whose 'id' the marker refers to
+    :param sort_attr: attribute to sort by, may belong to a joined model
+    :param sort_dir: direction of sorting, can be 'asc' and 'desc'
+    :param limit: maximum number of rows to return
+    :param offset: number of rows to skip
+    :param marker: 'id' of the last row of the previous page
+    :returns: query with sorting and pagination applied
+    :raises: exception.InvalidInput
+    """
+    sort_dir = sort_dir.lower()
+    if marker is not None:
+        marker_row = query.enable_eagerloads(False).with_entities(
+            sort_attr).filter(model.id == marker).first()
+        if marker_row is None:
+            msg = _("Marker '%s' not found.") % marker
+            raise exception.InvalidInput(reason=msg)
+        marker_value = marker_row[0]
+        # NOTE: comparisons with NULL are never true, so rows with NULL
+        # values and NULL marker values need explicit branches.
+        if marker_value is None:
+            same_value = sort_attr.is_(None)
+            if sort_dir == 'desc':
+                beyond_value = false()
+            else:
+                beyond_value = sort_attr.isnot(None)
+        else:
+            same_value = sort_attr == marker_value
+            if sort_dir == 'desc':
+                beyond_value = or_(sort_attr < marker_value,
+                                   sort_attr.is_(None))
+            else:
+                beyond_value = sort_attr > marker_value
+        if sort_dir == 'desc':
+            same_value = and_(same_value, model.id < marker)
+        else:
+            same_value = and_(same_value, model.id > marker)
+        query = query.filter(or_(beyond_value, same_value))
+
+    query = query.order_by(getattr(sort_attr.isnot(None), sort_dir)(),
+                           getattr(sort_attr, sort_dir)(),
+                           getattr(model.id, sort_dir)())
+    if limit is not None:
+        query = query.limit(limit)
+    if offset:
+        query = query.offset(offset)
+    return query
+
+
+# Relationship paths batch-loaded by listings, relative to the listed model.
+# Every relationship mapped with lazy='immediate' that a listing reaches has
+# to be named here, otherwise it falls back to one SELECT per loaded row.
+_SHARE_INSTANCE_LOAD_PATHS = (
+    'export_locations',
+    'share_type',
+    '_availability_zone',
+)
+_SHARE_LOAD_PATHS = tuple(
+    'instances.%s' % path for path in _SHARE_INSTANCE_LOAD_PATHS)
+_SHARE_SNAPSHOT_LOAD_PATHS = tuple(
+    'instances.share_instance.%s' % path
+    for path in _SHARE_INSTANCE_LOAD_PATHS) + tuple(
+    'share.%s' % path for path in _SHARE_LOAD_PATHS)
+_SHARE_ACCESS_LOAD_PATHS = tuple(
+    'instance_mappings.instance.%s' % path
+    for path in _SHARE_INSTANCE_LOAD_PATHS)
+
+
+def _batch_load(query, model, paths):
+    """Makes a query load the given relationship paths in batches.
+
+    Relationships mapped with lazy='immediate' issue a SELECT per loaded
+    row. subqueryload() replaces that with one SELECT per relationship for
+    the whole result set, which is what listings want.
+
+    :param query: query returning rows of model
+    :param model: model class the paths are relative to
+    :param paths: dotted relationship paths, e.g. 'instances.share_type';
+                  every relationship along a path is batch-loaded
+    :returns: query with loader options applied
+    """
+    for path in paths:
+        option = None
+        entity = model
+        for name in path.split('.'):
+            attr = getattr(entity, name)
+            option = (subqueryload(attr) if option is None
+                      else option.subqueryload(attr))
+            entity = attr.property.mapper.class_
+        query = query.options(option)
+    return query
+
+
 def ensure_model_dict_has_id(model_dict):
     if not model_dict.get('id'):
         model_dict['id'] = uuidutils.generate_uuid()
@@ -726,18 +837,9 @@ def quota_usage_update(context, project_id, user_id, resource, **kwargs):
 ###################
 
 
-def _reservation_create(context, uuid, usage, project_id, user_id, resource,
-                        delta, expire, session=None):
-    reservation_ref = models.Reservation()
-    reservation_ref.uuid = uuid
-    reservation_ref.usage_id = usage['id']
-    reservation_ref.project_id = project_id
-    reservation_ref.user_id = user_id
-    reservation_ref.resource = resource
-    reservation_ref.delta = delta
-    reservation_ref.expire = expire
-    reservation_ref.save(session=session)
-    return reservation_ref
+def _reservations_create(context, values_list, session):
+    # NOTE: all reservations of a request are inserted with one statement.
+    session.bulk_insert_mappings(models.Reservation, values_list)
 
 
 ###################
@@ -761,25 +863,41 @@ def _get_user_quota_usages(context, session, project_id, user_id):
     return {row.resource: row for row in rows}
 
 
-def _get_project_quota_usages(context, session, project_id):
+def _get_quota_usages(context, session, project_id, user_id, resources):
+    """Lock and return the usages of the given resources.
+
+    Only the usage rows of the given resources are locked, with a single
+    query for both the user and the project usages.
+
+    :returns: tuple of usage rows of the user keyed by resource and
+        project usage totals keyed by resource
+    """
     rows = model_query(context, models.QuotaUsage,
                        read_deleted="no",
                        session=session).\
         filter_by(project_id=project_id).\
+        filter(models.QuotaUsage.resource.in_(resources)).\
         with_lockmode('update').\
         all()
-    result = dict()
-    # Get the total count of in_use,reserved
+
+    user_usages = {}
+    project_usages = {}
     for row in rows:
-        if row.resource in result:
-            result[row.resource]['in_use'] += row.in_use
-            result[row.resource]['reserved'] += row.reserved
-            result[row.resource]['total'] += (row.in_use + row.reserved)
+        if (row.user_id == user_id or
+                (row.user_id is None and row.resource in PER_PROJECT_QUOTAS)):
+            user_usages[row.resource] = row
+
+        # Get the total count of in_use,reserved
+        if row.resource in project_usages:
+            project_usages[row.resource]['in_use'] += row.in_use
+            project_usages[row.resource]['reserved'] += row.reserved
+            project_usages[row.resource]['total'] += (row.in_use +
+                                                      row.reserved)
         else:
-            result[row.resource] = dict(in_use=row.in_use,
-                                        reserved=row.reserved,
-                                        total=row.in_use + row.reserved)
-    return result
+            project_usages[row.resource] = dict(
+                in_use=row.in_use, reserved=row.reserved,
+                total=row.in_use + row.reserved)
+    return user_usages, project_usages
 
 
 @require_context
@@ -797,10 +915,8 @@ def quota_reserve(context, resources, project_quotas, user_quotas, deltas,
             user_id = context.user_id
 
         # Get the current usages
-        user_usages = _get_user_quota_usages(context, session,
-                                             project_id, user_id)
-        project_usages = _get_project_quota_usages(context, session,
-                                                   project_id)
+        user_usages, project_usages = _get_quota_usages(
+            context, session, project_id, user_id, list(deltas))
 
         # Handle usage refresh
         work = set(deltas.keys())
@@ -839,8 +955,9 @@ def quota_reserve(context, resources, project_quotas, user_quotas, deltas,
                 user_usages[resource].until_refresh -= 1
                 if user_usages[resource].until_refresh <= 0:
                     refresh = True
-            elif max_age and (user_usages[resource].updated_at -
-                              timeutils.utcnow()).seconds >= max_age:
+            elif max_age and timeutils.delta_seconds(
+                    user_usages[resource].updated_at,
+                    timeutils.utcnow()) >= max_age:
                 refresh = True
 
             # OK, refresh the usage
@@ -931,15 +1048,18 @@ def quota_reserve(context, resources, project_quotas, user_quotas, deltas,
         # Create the reservations
         if not overs:
             reservations = []
+            reservation_values = []
             for res, delta in deltas.items():
-                reservation = _reservation_create(elevated,
-                                                  uuidutils.generate_uuid(),
-                                                  user_usages[res],
-                                                  project_id,
-                                                  user_id,
-                                                  res, delta, expire,
-                                                  session=session)
-                reservations.append(reservation.uuid)
+                reservation_values.append({
+                    'uuid': uuidutils.generate_uuid(),
+                    'usage_id': user_usages[res]['id'],
+                    'project_id': project_id,
+                    'user_id': user_id,
+                    'resource': res,
+                    'delta': delta,
+                    'expire': expire,
+                })
+                reservations.append(reservation_values[-1]['uuid'])
 
                 # Also update the reserved quantity
                 # NOTE(Vek): Again, we are only concerned here about
@@ -956,6 +1076,8 @@ def quota_reserve(context, resources, project_quotas, user_quotas, deltas,
                 if delta > 0:
                     user_usages[res].reserved += delta
 
+            _reservations_create(elevated, reservation_values, session)
+
         # Apply updates to the usages table
         for usage_ref in user_usages.values():
             session.add(usage_ref)
@@ -1187,11 +1309,11 @@ def share_instance_get(context, share_instance_id, session=None,
 @require_admin_context
 def share_instances_get_all(context):
     session = get_session()
-    return model_query(
+    query = model_query(
         context, models.ShareInstance, session=session, read_deleted="no",
-    ).options(
-        joinedload('export_locations'),
-    ).all()
+    )
+    return _batch_load(
+        query, models.ShareInstance, _SHARE_INSTANCE_LOAD_PATHS).all()
 
 
 @require_context
@@ -1214,12 +1336,13 @@ def _set_instances_share_data(context, instances, session):
     if instances and not isinstance(instances, list):
         instances = [instances]
 
+    parent_shares = _share_get_all_by_ids(
+        context, [instance['share_id'] for instance in instances],
+        session=session)
     instances_with_share_data = []
     for instance in instances:
-        try:
-            parent_share = share_get(context, instance['share_id'],
-                                     session=session)
-        except exception.NotFound:
+        parent_share = parent_shares.get(instance['share_id'])
+        if parent_share is None:
             continue
         instance.set_share_data(parent_share)
         instances_with_share_data.append(instance)
@@ -1231,61 +1354,71 @@ def share_instances_get_all_by_host(context, host, with_share_data=False,
                                     session=None):
     """Retrieves all share instances hosted on a host."""
     session = session or get_session()
-    instances = (
-        model_query(context, models.ShareInstance).filter(
-            or_(
-                models.ShareInstance.host == host,
-                models.ShareInstance.host.like("{0}#%".format(host))
-            )
-        ).all()
+    query = model_query(context, models.ShareInstance).filter(
+        or_(
+            models.ShareInstance.host == host,
+            models.ShareInstance.host.like("{0}#%".format(host))
+        )
     )
+    instances = _batch_load(
+        query, models.ShareInstance, _SHARE_INSTANCE_LOAD_PATHS).all()
 
     if with_share_data:
         instances = _set_instances_share_data(context, instances, session)
     return instances
 
 
+@require_admin_context
+def share_instances_get_size_sum_by_host(context):
+    """Returns sums of sizes of share instances, keyed by host."""
+    rows = model_query(
+        context, models.ShareInstance, models.ShareInstance.host,
+        func.sum(models.Share.size), read_deleted="no",
+    ).join(
+        models.Share, models.ShareInstance.share_id == models.Share.id,
+    ).filter(
+        models.Share.deleted == 'False',
+    ).group_by(models.ShareInstance.host).all()
+    return {host: size or 0 for host, size in rows}
+
+
 @require_context
 def share_instances_get_all_by_share_network(context, share_network_id):
     """Returns list of share instances that belong to given share network."""
-    result = (
-        model_query(context, models.ShareInstance).filter(
-            models.ShareInstance.share_network_id == share_network_id,
-        ).all()
+    query = model_query(context, models.ShareInstance).filter(
+        models.ShareInstance.share_network_id == share_network_id,
     )
-    return result
+    return _batch_load(
+        query, models.ShareInstance, _SHARE_INSTANCE_LOAD_PATHS).all()
 
 
 @require_context
 def share_instances_get_all_by_share_server(context, share_server_id):
     """Returns list of share instance with given share server."""
-    result = (
-        model_query(context, models.ShareInstance).filter(
-            models.ShareInstance.share_server_id == share_server_id,
-        ).all()
+    query = model_query(context, models.ShareInstance).filter(
+        models.ShareInstance.share_server_id == share_server_id,
     )
-    return result
+    return _batch_load(
+        query, models.ShareInstance, _SHARE_INSTANCE_LOAD_PATHS).all()
 
 
 @require_context
 def share_instances_get_all_by_share(context, share_id):
     """Returns list of share instances that belong to given share."""
-    result = (
-        model_query(context, models.ShareInstance).filter(
-            models.ShareInstance.share_id == share_id,
-        ).all()
+    query = model_query(context, models.ShareInstance).filter(
+        models.ShareInstance.share_id == share_id,
     )
-    return result
+    return _batch_load(
+        query, models.ShareInstance, _SHARE_INSTANCE_LOAD_PATHS).all()
 
 
 @require_context
 def share_instances_get_all_by_consistency_group_id(context, cg_id):
     """Returns list of share instances that belong to given cg."""
-    result = (
-        model_query(context, models.Share).filter(
-            models.Share.consistency_group_id == cg_id,
-        ).all()
+    query = model_query(context, models.Share).filter(
+        models.Share.consistency_group_id == cg_id,
     )
+    result = _batch_load(query, models.Share, _SHARE_LOAD_PATHS).all()
     instances = []
     for share in result:
         instance = share.instance
@@ -1299,7 +1432,8 @@ def share_instances_get_all_by_consistency_group_id(context, cg_id):
 
 def _share_replica_get_with_filters(context, share_id=None, replica_id=None,
                                     replica_state=None, status=None,
-                                    with_share_server=True, session=None):
+                                    with_share_server=True, host=None,
+                                    exclude_active=False, session=None):
 
     query = model_query(context, models.ShareInstance, session=session,
                         read_deleted="no")
@@ -1307,6 +1441,18 @@ def _share_replica_get_with_filters(context, share_id=None, replica_id=None,
     if share_id is not None:
         query = query.filter(models.ShareInstance.share_id == share_id)
 
+    if host is not None:
+        query = query.filter(
+            or_(
+                models.ShareInstance.host == host,
+                models.ShareInstance.host.like("{0}#%".format(host))
+            )
+        )
+
+    if exclude_active:
+        query = query.filter(models.ShareInstance.replica_state !=
+                             constants.REPLICA_STATE_ACTIVE)
+
     if replica_id is not None:
         query = query.filter(models.ShareInstance.id == replica_id)
 
@@ -1320,17 +1466,24 @@ def _share_replica_get_with_filters(context, share_id=None, replica_id=None,
         query = query.filter(models.ShareInstance.status == status)
 
     if with_share_server:
-        query = query.options(joinedload('share_server'))
+        query = query.options(
+            joinedload('share_server').subqueryload('_backend_details'))
 
-    return query
+    return _batch_load(
+        query, models.ShareInstance, _SHARE_INSTANCE_LOAD_PATHS)
 
 
 def _set_replica_share_data(context, replicas, session):
     if replicas and not isinstance(replicas, list):
         replicas = [replicas]
 
+    parent_shares = _share_get_all_by_ids(
+        context, [replica['share_id'] for replica in replicas],
+        session=session)
     for replica in replicas:
-        parent_share = share_get(context, replica['share_id'], session=session)
+        parent_share = parent_shares.get(replica['share_id'])
+        if parent_share is None:
+            raise exception.NotFound()
         replica.set_share_data(parent_share)
 
     return replicas
@@ -1351,6 +1504,23 @@ def share_replicas_get_all(context, with_share_data=False,
     return result
 
 
+@require_context
+def share_replicas_get_all_by_host(context, host, with_share_data=False,
+                                   with_share_server=False,
+                                   exclude_active=False, session=None):
+    """Returns replica instances hosted on a host."""
+    session = session or get_session()
+
+    result = _share_replica_get_with_filters(
+        context, with_share_server=with_share_server, host=host,
+        exclude_active=exclude_active, session=session).all()
+
+    if with_share_data:
+        result = _set_replica_share_data(context, result, session)
+
+    return result
+
+
 @require_context
 def share_replicas_get_all_by_share(context, share_id,
                                     with_share_data=False,
@@ -1530,6 +1700,30 @@ def share_get(context, share_id, session=None):
     return result
 
 
+@require_context
+def share_get_all_by_ids(context, share_ids):
+    """Returns shares with given IDs, fetched with a single query."""
+    share_ids = set(share_ids)
+    if not share_ids:
+        return []
+    query = _share_get_query(context).filter(models.Share.id.in_(share_ids))
+    return _batch_load(query, models.Share, _SHARE_LOAD_PATHS).all()
+
+
+def _share_get_all_by_ids(context, share_ids, session=None):
+    """Returns shares with given IDs in a dict keyed by share ID.
+
+    All shares are fetched with a single query. Their instances are not
+    loaded, as callers only need the share's own data.
+    """
+    share_ids = set(share_ids)
+    if not share_ids:
+        return {}
+    shares = model_query(context, models.Share, session=session).filter(
+        models.Share.id.in_(share_ids)).options(lazyload('instances')).all()
+    return {share['id']: share for share in shares}
+
+
 def _share_get_all_with_filters(context, project_id=None, share_server_id=None,
                                 consistency_group_id=None, filters=None,
                                 is_public=False, sort_key=None,
@@ -1539,7 +1733,10 @@ def _share_get_all_with_filters(context, project_id=None, share_server_id=None,
     :param context: context to query under
     :param project_id: project id that owns shares
     :param share_server_id: share server that hosts shares
-    :param filters: dict of filters to specify share selection
+    :param filters: dict of filters to specify share selection. Besides
+                    'metadata' and 'extra_specs' it may contain exact match
+                    filters for columns of shares and share instances as
+                    well as 'limit', 'offset' and 'marker' for pagination
     :param is_public: public shares from other projects will be added
                       to result if True
     :param sort_key: key of models.Share to be used for sorting
@@ -1551,12 +1748,13 @@ def _share_get_all_with_filters(context, project_id=None, share_server_id=None,
         sort_key = 'created_at'
     if not sort_dir:
         sort_dir = 'desc'
-    query = (
-        _share_get_query(context).join(
-            models.ShareInstance,
-            models.ShareInstance.share_id == models.Share.id
-        )
-    )
+    query = _share_get_query(context)
+    # NOTE: share instance conditions are applied through EXISTS
+    # subqueries rather than a join, so that each share is a single
+    # row for pagination. All of them have to be met by the same
+    # non-deleted instance, a replicated share matches if one of its
+    # replicas does.
+    instance_filters = []
 
     if project_id:
         if is_public:
@@ -1565,7 +1763,7 @@ def _share_get_all_with_filters(context, project_id=None, share_server_id=None,
         else:
             query = query.filter(models.Share.project_id == project_id)
     if share_server_id:
-        query = query.filter(
+        instance_filters.append(
             models.ShareInstance.share_server_id == share_server_id)
 
     if consistency_group_id:
@@ -1573,21 +1771,37 @@ def _share_get_all_with_filters(context, project_id=None, share_server_id=None,
             models.Share.consistency_group_id == consistency_group_id)
 
     # Apply filters
-    if not filters:
-        filters = {}
+    filters = dict(filters or {})
+    limit = filters.pop('limit', None)
+    offset = filters.pop('offset', None)
+    marker = filters.pop('marker', None)
     if 'metadata' in filters:
-        for k, v in filters['metadata'].items():
+        for k, v in filters.pop('metadata').items():
             query = query.filter(
                 or_(models.Share.share_metadata.any(  # pylint: disable=E1101
                     key=k, value=v)))
     if 'extra_specs' in filters:
-        query = query.join(
-            models.ShareTypeExtraSpecs,
-            models.ShareTypeExtraSpecs.share_type_id ==
-            models.ShareInstance.share_type_id)
-        for k, v in filters['extra_specs'].items():
-            query = query.filter(or_(models.ShareTypeExtraSpecs.key == k,
-                                     models.ShareTypeExtraSpecs.value == v))
+        spec_filters = [
+            or_(models.ShareTypeExtraSpecs.key == k,
+                models.ShareTypeExtraSpecs.value == v)
+            for k, v in filters.pop('extra_specs').items()]
+        instance_filters.append(models.ShareInstance.share_type_id.in_(
+            select([models.ShareTypeExtraSpecs.share_type_id]).where(
+                and_(*spec_filters))))
+    query = exact_filter(query, models.Share, filters,
+                         constants.SHARE_EXACT_FILTER_KEYS)
+    for key in constants.SHARE_INSTANCE_EXACT_FILTER_KEYS:
+        if key not in filters:
+            continue
+        value = filters.pop(key)
+        column_attr = getattr(models.ShareInstance, key)
+        if isinstance(value, (list, tuple, set, frozenset)):
+            instance_filters.append(column_attr.in_(value))
+        else:
+            instance_filters.append(column_attr == value)
+    if instance_filters:
+        query = query.filter(models.Share.instances.any(
+            and_(*instance_filters)))
 
     # Apply sorting
     if sort_dir.lower() not in ('desc', 'asc'):
@@ -1596,19 +1810,21 @@ def _share_get_all_with_filters(context, project_id=None, share_server_id=None,
                     "sort_key": sort_key, "sort_dir": sort_dir}
         raise exception.InvalidInput(reason=msg)
 
-    def apply_sorting(model, query):
-        sort_attr = getattr(model, sort_key)
-        sort_method = getattr(sort_attr, sort_dir.lower())
-        return query.order_by(sort_method())
-
-    try:
-        query = apply_sorting(models.Share, query)
-    except AttributeError:
-        try:
-            query = apply_sorting(models.ShareInstance, query)
-        except AttributeError:
+    sort_attr = getattr(models.Share, sort_key, None)
+    if not isinstance(sort_attr, attributes.InstrumentedAttribute):
+        sort_attr = getattr(models.ShareInstance, sort_key, None)
+        if not isinstance(sort_attr, attributes.InstrumentedAttribute):
             msg = _("Wrong sorting key provided - '%s'.") % sort_key
             raise exception.InvalidInput(reason=msg)
+        # Sort by a single value per share, the lowest one among its
+        # non-deleted instances, so that a marker maps to one position.
+        sort_attr = select([func.min(sort_attr)]).where(
+            and_(models.ShareInstance.share_id == models.Share.id,
+                 models.ShareInstance.deleted == 'False')).as_scalar()
+
+    query = _paginate_query(query, models.Share, sort_attr, sort_dir,
+                            limit=limit, offset=offset, marker=marker)
+    query = _batch_load(query, models.Share, _SHARE_LOAD_PATHS)
 
     # Returns list of shares that satisfy filters.
     query = query.all()
@@ -1681,6 +1897,8 @@ def _share_access_get_query(context, session, values, read_deleted='no'):
     """Get access record."""
     query = model_query(context, models.ShareAccessMapping, session=session,
                         read_deleted=read_deleted)
+    query = _batch_load(
+        query, models.ShareAccessMapping, _SHARE_ACCESS_LOAD_PATHS)
     return query.filter_by(**values)
 
 
@@ -1896,6 +2114,40 @@ def share_instance_access_delete(context, mapping_id):
             )
 
 
+@require_context
+@oslo_db_api.wrap_db_retry(max_retries=5, retry_on_deadlock=True)
+def share_instance_access_delete_all_by_access_ids(context, share_instance_id,
+                                                   access_ids):
+    access_ids = set(access_ids)
+    if not access_ids:
+        return
+
+    session = get_session()
+    with session.begin():
+        (
+            _share_instance_access_query(
+                context, session, instance_id=share_instance_id)
+            .filter(models.ShareInstanceAccessMapping.access_id.in_(
+                access_ids))
+            .soft_delete(synchronize_session=False)
+        )
+
+        still_mapped_ids = set(
+            mapping['access_id'] for mapping in
+            _share_instance_access_query(context, session).filter(
+                models.ShareInstanceAccessMapping.access_id.in_(
+                    access_ids)).all())
+
+        # NOTE: Remove access rules if all mappings were removed.
+        unmapped_ids = access_ids - still_mapped_ids
+        if unmapped_ids:
+            (
+                session.query(models.ShareAccessMapping)
+                .filter(models.ShareAccessMapping.id.in_(unmapped_ids))
+                .soft_delete(synchronize_session=False)
+            )
+
+
 @require_context
 @oslo_db_api.wrap_db_retry(max_retries=5, retry_on_deadlock=True)
 def share_instance_update_access_status(context, share_instance_id, status):
@@ -2119,14 +2371,16 @@ def _share_snapshot_get_all_with_filters(context, project_id=None,
     # Init data
     sort_key = sort_key or 'share_id'
     sort_dir = sort_dir or 'desc'
-    filters = filters or {}
+    filters = dict(filters or {})
+    limit = filters.pop('limit', None)
+    offset = filters.pop('offset', None)
+    marker = filters.pop('marker', None)
     query = model_query(context, models.ShareSnapshot)
 
     if project_id:
         query = query.filter_by(project_id=project_id)
     if share_id:
         query = query.filter_by(share_id=share_id)
-    query = query.options(joinedload('share'))
 
     # Apply filters
     if 'usage' in filters:
@@ -2145,22 +2399,28 @@ def _share_snapshot_get_all_with_filters(context, project_id=None,
                         'key': filters['usage'],
                         'ek': six.text_type(usage_filter_keys)}
             raise exception.InvalidInput(reason=msg)
+    query = exact_filter(query, models.ShareSnapshot, filters,
+                         constants.SNAPSHOT_EXACT_FILTER_KEYS)
+    for key in constants.SNAPSHOT_INSTANCE_EXACT_FILTER_KEYS:
+        if key in filters:
+            query = query.filter(models.ShareSnapshot.instances.any(
+                getattr(models.ShareSnapshotInstance, key) ==
+                filters.pop(key)))
 
     # Apply sorting
-    try:
-        attr = getattr(models.ShareSnapshot, sort_key)
-    except AttributeError:
+    attr = getattr(models.ShareSnapshot, sort_key, None)
+    if not isinstance(attr, attributes.InstrumentedAttribute):
         msg = _("Wrong sorting key provided - '%s'.") % sort_key
         raise exception.InvalidInput(reason=msg)
-    if sort_dir.lower() == 'desc':
-        query = query.order_by(attr.desc())
-    elif sort_dir.lower() == 'asc':
-        query = query.order_by(attr.asc())
-    else:
+    if sort_dir.lower() not in ('desc', 'asc'):
         msg = _("Wrong sorting data provided: sort key is '%(sort_key)s' "
                 "and sort direction is '%(sort_dir)s'.") % {
                     "sort_key": sort_key, "sort_dir": sort_dir}
         raise exception.InvalidInput(reason=msg)
+    query = _paginate_query(query, models.ShareSnapshot, attr, sort_dir,
+                            limit=limit, offset=offset, marker=marker)
+    query = _batch_load(
+        query, models.ShareSnapshot, _SHARE_SNAPSHOT_LOAD_PATHS)
 
     # Returns list of shares that satisfy filters
     return query.all()
@@ -2391,10 +2651,7 @@ def share_export_location_get_by_uuid(context, export_location_uuid,
     return result
 
 
-@require_context
-@oslo_db_api.wrap_db_retry(max_retries=5, retry_on_deadlock=True)
-def share_export_locations_update(context, share_instance_id, export_locations,
-                                  delete):
+def _export_locations_as_dicts(export_locations):
     # NOTE(u_glide):
     # Backward compatibility code for drivers,
     # which return single export_location as string
@@ -2417,69 +2674,196 @@ def share_export_locations_update(context, share_instance_id, export_locations,
             raise exception.ManilaException(
                 _("Wrong export location type '%s'.") % type(export_location))
         export_locations_as_dicts.append(export_location)
-    export_locations = export_locations_as_dicts
-
-    export_locations_paths = [el['path'] for el in export_locations]
+    return export_locations_as_dicts
 
-    session = get_session()
 
-    current_el_rows = _share_export_locations_get(
-        context, share_instance_id, session=session)
+def _export_location_metadata_value_equal(stored, value):
+    # NOTE: metadata values are stored as strings, so booleans read back
+    # either as their string or their integer representation.
+    values = [six.text_type(value)]
+    if isinstance(value, bool):
+        values.append(six.text_type(int(value)))
+    return six.text_type(stored) in values
 
-    def get_path_list_from_rows(rows):
-        return set([l['path'] for l in rows])
 
-    current_el_paths = get_path_list_from_rows(current_el_rows)
+def _share_export_locations_diff(share_instance_id, export_locations,
+                                 current_el_rows, delete, changes):
+    """Computes writes needed to bring export locations up to date.
 
-    def create_indexed_time_dict(key_list):
-        base = timeutils.utcnow()
-        return {
-            # NOTE(u_glide): Incrementing timestamp by microseconds to make
-            # timestamp order match index order.
-            key: base + datetime.timedelta(microseconds=index)
-            for index, key in enumerate(key_list)
-        }
+    Rows are only touched if their order, 'is_admin_only' flag or metadata
+    differ from the requested ones. Writes are added to 'changes'.
 
-    indexed_update_time = create_indexed_time_dict(export_locations_paths)
+    :returns: set of paths of the export locations after the update.
+    """
+    export_locations = _export_locations_as_dicts(export_locations)
+    export_locations_paths = [el['path'] for el in export_locations]
+    current_el_by_path = {row['path']: row for row in current_el_rows}
 
-    for el in current_el_rows:
-        if delete and el['path'] not in export_locations_paths:
-            export_location_metadata_delete(context, el['uuid'])
-            el.soft_delete(session)
+    kept_rows = []
+    for row in current_el_rows:
+        if delete and row['path'] not in export_locations_paths:
+            changes['delete'].append(row['id'])
         else:
-            updated_at = indexed_update_time[el['path']]
-            el.update({
-                'updated_at': updated_at,
-                'deleted': 0,
-            })
-            el.save(session=session)
-            if el['el_metadata']:
-                export_location_metadata_update(
-                    context, el['uuid'], el['el_metadata'], session=session)
+            kept_rows.append(row)
+
+    # NOTE: export locations are ordered by their 'updated_at' field, rows
+    # not reported by the driver stay in front of the reported ones.
+    new_paths = [path for path in export_locations_paths
+                 if path not in current_el_by_path]
+    current_order = [row['path'] for row in kept_rows] + new_paths
+    requested_order = [row['path'] for row in kept_rows
+                       if row['path'] not in export_locations_paths]
+    requested_order += export_locations_paths
+    reorder = current_order != requested_order
+
+    base = timeutils.utcnow()
+    indexed_update_time = {
+        # NOTE(u_glide): Incrementing timestamp by microseconds to make
+        # timestamp order match index order.
+        path: base + datetime.timedelta(microseconds=index)
+        for index, path in enumerate(export_locations_paths)
+    }
 
-    # Now add new export locations
     for el in export_locations:
-        if el['path'] in current_el_paths:
-            # Already updated
+        is_admin_only = el.get('is_admin_only', False)
+        row = current_el_by_path.get(el['path'])
+        if row is None:
+            el_uuid = uuidutils.generate_uuid()
+            changes['create'].append({
+                'uuid': el_uuid,
+                'path': el['path'],
+                'share_instance_id': share_instance_id,
+                'updated_at': indexed_update_time[el['path']],
+                'deleted': 0,
+                'is_admin_only': is_admin_only,
+            })
+            if el.get('metadata'):
+                changes['create_metadata'][el_uuid] = el['metadata']
             continue
 
-        location_ref = models.ShareInstanceExportLocations()
-        location_ref.update({
-            'uuid': uuidutils.generate_uuid(),
-            'path': el['path'],
-            'share_instance_id': share_instance_id,
-            'updated_at': indexed_update_time[el['path']],
-            'deleted': 0,
-            'is_admin_only': el.get('is_admin_only', False),
-        })
-        location_ref.save(session=session)
-        if not el.get('metadata'):
-            continue
-        export_location_metadata_update(
-            context, location_ref['uuid'], el.get('metadata'), session=session)
+        values = {}
+        if reorder:
+            values['updated_at'] = indexed_update_time[el['path']]
+        if bool(row['is_admin_only']) != bool(is_admin_only):
+            values['is_admin_only'] = is_admin_only
+        if values:
+            # NOTE: keep the position of the row unless it has to change.
+            values.setdefault('updated_at', row['updated_at'])
+            values['id'] = row['id']
+            changes['update'].append(values)
+
+        el_metadata = row._el_metadata_bare  # pylint: disable=E1101
+        current_metadata = {meta['key']: meta for meta in el_metadata}
+        for key, value in el['metadata'].items():
+            meta = current_metadata.get(key)
+            if meta is None:
+                changes['create_metadata_rows'].append({
+                    'export_location_id': row['id'],
+                    'key': key,
+                    'value': value,
+                })
+            elif not _export_location_metadata_value_equal(
+                    meta['value'], value):
+                changes['update_metadata_rows'].append({
+                    'id': meta['id'],
+                    'value': value,
+                    'updated_at': base,
+                })
+
+    return set(row['path'] for row in kept_rows).union(new_paths)
+
+
+def _share_export_locations_apply(context, changes, session):
+    """Applies export location writes with bulk statements."""
+    el_model = models.ShareInstanceExportLocations
+    meta_model = models.ShareInstanceExportLocationsMetadata
+
+    if changes['delete']:
+        model_query(
+            context, meta_model, session=session, read_deleted="no",
+        ).filter(
+            meta_model.export_location_id.in_(changes['delete']),
+        ).soft_delete(synchronize_session=False)
+        model_query(
+            context, el_model, session=session, read_deleted="no",
+        ).filter(
+            el_model.id.in_(changes['delete']),
+        ).soft_delete(synchronize_session=False)
 
-    return get_path_list_from_rows(_share_export_locations_get(
-        context, share_instance_id, session=session))
+    if changes['update']:
+        session.bulk_update_mappings(el_model, changes['update'])
+
+    if changes['create']:
+        session.bulk_insert_mappings(el_model, changes['create'])
+
+    metadata_rows = changes['create_metadata_rows']
+    if changes['create_metadata']:
+        created_ids = dict(session.query(el_model.uuid, el_model.id).filter(
+            el_model.uuid.in_(list(changes['create_metadata']))).all())
+        for el_uuid, metadata in changes['create_metadata'].items():
+            metadata_rows.extend([
+                {'export_location_id': created_ids[el_uuid],
+                 'key': key,
+                 'value': value} for key, value in metadata.items()])
+
+    if metadata_rows:
+        session.bulk_insert_mappings(meta_model, metadata_rows)
+
+    if changes['update_metadata_rows']:
+        session.bulk_update_mappings(
+            meta_model, changes['update_metadata_rows'])
+
+
+def _share_export_locations_changes():
+    return {
+        'create': [],
+        'create_metadata': {},
+        'create_metadata_rows': [],
+        'update': [],
+        'update_metadata_rows': [],
+        'delete': [],
+    }
+
+
+@require_context
+@oslo_db_api.wrap_db_retry(max_retries=5, retry_on_deadlock=True)
+def share_export_locations_update(context, share_instance_id, export_locations,
+                                  delete):
+    session = get_session()
+    changes = _share_export_locations_changes()
+
+    with session.begin():
+        current_el_rows = _share_export_locations_get(
+            context, share_instance_id, session=session)
+        paths = _share_export_locations_diff(
+            share_instance_id, export_locations, current_el_rows, delete,
+            changes)
+        _share_export_locations_apply(context, changes, session)
+
+    return paths
+
+
+@require_context
+@oslo_db_api.wrap_db_retry(max_retries=5, retry_on_deadlock=True)
+def share_export_locations_update_bulk(context, export_locations, delete):
+    session = get_session()
+    changes = _share_export_locations_changes()
+    paths = {}
+
+    with session.begin():
+        current_el_rows = {
+            share_instance_id: [] for share_instance_id in export_locations}
+        for row in _share_export_locations_get(
+                context, list(export_locations), session=session):
+            current_el_rows[row['share_instance_id']].append(row)
+
+        for share_instance_id, instance_els in export_locations.items():
+            paths[share_instance_id] = _share_export_locations_diff(
+                share_instance_id, instance_els,
+                current_el_rows[share_instance_id], delete, changes)
+        _share_export_locations_apply(context, changes, session)
+
+    return paths
 
 
 #####################################
@@ -2684,30 +3068,59 @@ def share_network_get(context, id, session=None):
     return result
 
 
+def _network_get_all_with_filters(query, filters=None):
+    """Returns share networks of the query that satisfy filters.
+
+    :param query: share network query to apply filters to
+    :param filters: dict of filters, may contain 'created_since' and
+                    'created_before' datetimes, exact match filters for
+                    share network columns as well as 'limit', 'offset' and
+                    'marker' for pagination
+    :returns: list -- models.ShareNetwork
+    """
+    filters = dict(filters or {})
+    if 'created_since' in filters:
+        query = query.filter(
+            models.ShareNetwork.created_at >= filters.pop('created_since'))
+    if 'created_before' in filters:
+        query = query.filter(
+            models.ShareNetwork.created_at <= filters.pop('created_before'))
+    query = exact_filter(query, models.ShareNetwork, filters,
+                         constants.SHARE_NETWORK_EXACT_FILTER_KEYS)
+    query = _paginate_query(
+        query, models.ShareNetwork, models.ShareNetwork.created_at, 'asc',
+        limit=filters.get('limit'), offset=filters.get('offset'),
+        marker=filters.get('marker'))
+    return query.all()
+
+
 @require_context
-def share_network_get_all(context):
-    return _network_get_query(context).all()
+def share_network_get_all(context, filters=None):
+    return _network_get_all_with_filters(_network_get_query(context),
+                                         filters=filters)
 
 
 @require_context
 def share_network_get_all_by_project(context, project_id, user_id=None,
-                                     session=None):
+                                     session=None, filters=None):
     query = _network_get_query(context, session)
     query = query.filter_by(project_id=project_id)
     if user_id is not None:
         query = query.filter_by(user_id=user_id)
-    return query.all()
+    return _network_get_all_with_filters(query, filters=filters)
 
 
 @require_context
-def share_network_get_all_by_security_service(context, security_service_id):
+def share_network_get_all_by_security_service(context, security_service_id,
+                                              filters=None):
     session = get_session()
-    return model_query(context, models.ShareNetwork, session=session).\
+    query = model_query(context, models.ShareNetwork, session=session).\
         join(models.ShareNetworkSecurityServiceAssociation,
              models.ShareNetwork.id ==
              models.ShareNetworkSecurityServiceAssociation.share_network_id).\
         filter_by(security_service_id=security_service_id, deleted=0).\
-        options(joinedload('share_servers')).all()
+        options(joinedload('share_servers'))
+    return _network_get_all_with_filters(query, filters=filters)
 
 
 @require_context
@@ -2842,8 +3255,37 @@ def share_server_get_all_by_host_and_share_net_valid(context, host,
 
 
 @require_context
-def share_server_get_all(context):
-    return _server_get_query(context).all()
+def share_server_get_all(context, filters=None):
+    """Returns share servers that satisfy filters.
+
+    :param context: context to query under
+    :param filters: dict of filters, may contain exact match filters for
+                    share server columns, 'project_id' and 'share_network'
+                    (name or id) of the share network of a server as well
+                    as 'limit', 'offset' and 'marker' for pagination
+    :returns: list -- models.ShareServer
+    """
+    filters = dict(filters or {})
+    query = _server_get_query(context)
+    if 'project_id' in filters or 'share_network' in filters:
+        query = query.join(
+            models.ShareNetwork,
+            models.ShareNetwork.id == models.ShareServer.share_network_id)
+        if 'project_id' in filters:
+            query = query.filter(
+                models.ShareNetwork.project_id == filters.pop('project_id'))
+        if 'share_network' in filters:
+            share_network = filters.pop('share_network')
+            query = query.filter(or_(
+                models.ShareNetwork.name == share_network,
+                models.ShareNetwork.id == share_network))
+    query = exact_filter(query, models.ShareServer, filters,
+                         constants.SHARE_SERVER_EXACT_FILTER_KEYS)
+    query = _paginate_query(
+        query, models.ShareServer, models.ShareServer.created_at, 'asc',
+        limit=filters.get('limit'), offset=filters.get('offset'),
+        marker=filters.get('marker'))
+    return query.all()
 
 
 @require_context
@@ -3003,6 +3445,60 @@ def network_allocation_create(context, values):
     return alloc_ref
 
 
+def _network_allocation_insert_if_ip_free(values):
+    table = models.NetworkAllocation.__table__
+    ip_in_use = exists().where(and_(
+        table.c.ip_address == values['ip_address'],
+        table.c.deleted == 'False'))
+    columns = sorted(column for column in values if column in table.c)
+    # NOTE: the literals are selected from a one-row derived table, since
+    # MySQL rejects a SELECT that has a WHERE clause but no FROM clause.
+    one_row = select([literal(1).label('one')]).alias('one_row')
+    return table.insert().from_select(
+        columns,
+        select([literal(values[column], type_=table.c[column].type)
+                for column in columns]).select_from(one_row).where(
+                    ~ip_in_use))
+
+
+@require_context
+def network_allocation_create_if_ip_free(context, values):
+    values = ensure_model_dict_has_id(values)
+    values.setdefault('created_at', timeutils.utcnow())
+    values.setdefault('deleted', 'False')
+    table = models.NetworkAllocation.__table__
+    # NOTE: the allocation is inserted with a single INSERT ... SELECT
+    # statement, that inserts nothing if the IP address is in use.
+    insert = _network_allocation_insert_if_ip_free(values)
+
+    session = get_session()
+    with session.begin():
+        result = session.execute(insert)
+        if not result.rowcount:
+            return None
+
+    # NOTE: under READ COMMITTED isolation, concurrent transactions do not
+    # see each other's uncommitted allocations, so the same IP address may
+    # have been inserted twice. A unique constraint cannot rule this out,
+    # as overlapping tenant subnets legitimately reuse IP addresses across
+    # share networks. Instead, an allocation that finds another live one
+    # for its IP address once committed is withdrawn. The later of two
+    # such allocations always sees the other one, so an IP address is never
+    # kept twice; at worst both are withdrawn and the caller moves on.
+    with session.begin():
+        conflicts = session.execute(
+            select([func.count()]).where(and_(
+                table.c.ip_address == values['ip_address'],
+                table.c.deleted == 'False',
+                table.c.id != values['id']))).scalar()
+        allocation = network_allocation_get(
+            context, values['id'], session=session)
+        if conflicts:
+            allocation.soft_delete(session)
+            return None
+        return allocation
+
+
 @require_context
 def network_allocation_delete(context, id):
     session = get_session()
@@ -3030,6 +3526,17 @@ def network_allocations_get_by_ip_address(context, ip_address):
     return result or []
 
 
+@require_context
+def network_allocations_get_ip_addresses(context):
+    rows = model_query(
+        context, models.NetworkAllocation,
+        models.NetworkAllocation.ip_address,
+    ).filter(
+        models.NetworkAllocation.ip_address.isnot(None),
+    ).all()
+    return [row[0] for row in rows]
+
+
 @require_context
 def network_allocations_get_for_share_server(context, share_server_id,
                                              session=None, label=None):
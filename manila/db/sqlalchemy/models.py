@@ -356,7 +356,7 @@ class ShareInstance(BASE, ManilaBase):
     id = Column(String(36), primary_key=True)
     share_id = Column(String(36), ForeignKey('shares.id'))
     deleted = Column(String(36), default='False')
-    host = Column(String(255))
+    host = Column(String(255), index=True)
     status = Column(String(255))
 
     ACCESS_STATUS_PRIORITIES = {
@@ -13,6 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import bisect
+import itertools
+
 import netaddr
 from oslo_config import cfg
 from oslo_log import log
@@ -231,17 +234,34 @@ class StandaloneNetworkPlugin(network.NetworkBaseAPI):
         ips = []
         if amount < 1:
             return ips
-        iterator = netaddr.iter_unique_ips(*self.allowed_cidrs)
-        for ip in iterator:
-            ip = six.text_type(ip)
-            if (ip in self.reserved_addresses or
-                    self.db.network_allocations_get_by_ip_address(context,
-                                                                  ip)):
+
+        # NOTE: all allocated IP addresses are loaded with a single query,
+        # free ones are then looked up in the gaps between them, so the cost
+        # does not depend on the size of the allowed IP ranges.
+        used_ips = set()
+        for ip in itertools.chain(
+                self.reserved_addresses,
+                self.db.network_allocations_get_ip_addresses(context)):
+            try:
+                ip = netaddr.IPAddress(ip)
+            except (netaddr.AddrFormatError, ValueError, TypeError):
                 continue
-            else:
-                ips.append(ip)
-            if len(ips) == amount:
-                return ips
+            if ip.version == self.ip_version:
+                used_ips.add(int(ip))
+        used_ips = sorted(used_ips)
+
+        for ip_range in netaddr.IPSet(self.allowed_cidrs).iter_ipranges():
+            first = bisect.bisect_left(used_ips, ip_range.first)
+            last = bisect.bisect_right(used_ips, ip_range.last)
+            free_start = ip_range.first
+            for used_ip in used_ips[first:last] + [ip_range.last + 1]:
+                for ip in six.moves.range(
+                        free_start, min(used_ip, free_start + amount)):
+                    ips.append(six.text_type(
+                        netaddr.IPAddress(ip, self.ip_version)))
+                    if len(ips) == amount:
+                        return ips
+                free_start = used_ip + 1
         msg = _("No available IP addresses left in CIDRs %(cidrs)s. "
                 "Requested amount of IPs to be provided '%(amount)s', "
                 "available only '%(available)s'.") % {
@@ -280,22 +300,29 @@ class StandaloneNetworkPlugin(network.NetworkBaseAPI):
             share_network = share_network or {}
         self._save_network_info(context, share_network)
         allocations = []
-        ip_addresses = self._get_available_ips(context, allocation_count)
-        for ip_address in ip_addresses:
-            data = {
-                'share_server_id': share_server['id'],
-                'ip_address': ip_address,
-                'status': constants.STATUS_ACTIVE,
-                'label': self.label,
-                'network_type': share_network['network_type'],
-                'segmentation_id': share_network['segmentation_id'],
-                'cidr': share_network['cidr'],
-                'gateway': share_network['gateway'],
-                'ip_version': share_network['ip_version'],
-                'mtu': share_network['mtu'],
-            }
-            allocations.append(
-                self.db.network_allocation_create(context, data))
+        # NOTE: the lock above only protects against allocations made by
+        # other processes on this host, IP addresses taken meanwhile by
+        # other hosts are skipped and the remaining ones looked up again.
+        while len(allocations) < allocation_count:
+            ip_addresses = self._get_available_ips(
+                context, allocation_count - len(allocations))
+            for ip_address in ip_addresses:
+                data = {
+                    'share_server_id': share_server['id'],
+                    'ip_address': ip_address,
+                    'status': constants.STATUS_ACTIVE,
+                    'label': self.label,
+                    'network_type': share_network['network_type'],
+                    'segmentation_id': share_network['segmentation_id'],
+                    'cidr': share_network['cidr'],
+                    'gateway': share_network['gateway'],
+                    'ip_version': share_network['ip_version'],
+                    'mtu': share_network['mtu'],
+                }
+                allocation = self.db.network_allocation_create_if_ip_free(
+                    context, data)
+                if allocation:
+                    allocations.append(allocation)
         return allocations
 
     def deallocate_network(self, context, share_server_id):
@@ -16,6 +16,8 @@
 """
 Filter support
 """
+import inspect
+
 from oslo_log import log
 
 from manila.i18n import _LI
@@ -70,6 +72,7 @@ class BaseFilterHandler(base_handler.BaseHandler):
         """Get objects after filter
 
         :param filter_classes: filters that will be used to filter the
+                               objects, either filter classes or filter
                                objects
         :param objs: objects that will be filtered
         :param filter_properties: client filter properties
@@ -80,8 +83,11 @@ class BaseFilterHandler(base_handler.BaseHandler):
         list_objs = list(objs)
         LOG.debug("Starting with %d host(s)", len(list_objs))
         for filter_cls in filter_classes:
-            cls_name = filter_cls.__name__
-            filter_class = filter_cls()
+            if inspect.isclass(filter_cls):
+                filter_class = filter_cls()
+            else:
+                filter_class = filter_cls
+            cls_name = type(filter_class).__name__
 
             if filter_class.run_filter_for_index(index):
                 objs = filter_class.filter_all(list_objs, filter_properties)
@@ -24,16 +24,18 @@ LOG = log.getLogger(__name__)
 class CapabilitiesFilter(base_host.BaseHostFilter):
     """HostFilter to work with resource (instance & volume) type records."""
 
-    def _satisfies_extra_specs(self, capabilities, resource_type):
-        """Compare capabilities against extra specs.
+    def _compile_extra_specs(self, resource_type):
+        """Split extra specs into capability paths and requirements.
 
-        Check that the capabilities provided by the services satisfy
-        the extra specs associated with the resource type.
+        Scoped (such as vendor-specific) extra specs are skipped, and the
+        'capabilities:' prefix is stripped off, so that this parsing is
+        done once per request rather than once per host.
         """
         extra_specs = resource_type.get('extra_specs', [])
         if not extra_specs:
-            return True
+            return []
 
+        compiled_specs = []
         for key, req in extra_specs.items():
 
             # Either not scoped format, or in capabilities scope
@@ -46,6 +48,27 @@ class CapabilitiesFilter(base_host.BaseHostFilter):
             elif scope[0] == "capabilities":
                 del scope[0]
 
+            compiled_specs.append((key, req, scope))
+        return compiled_specs
+
+    def _match(self, cap_value, req, matches):
+        """Match a capability value, reusing results of equal values."""
+        # NOTE: the type is part of the key because equal values of
+        # different types, such as True and 1, do not match alike.
+        key = (req, type(cap_value), cap_value)
+        try:
+            return matches[key]
+        except KeyError:
+            result = matches[key] = extra_specs_ops.match(cap_value, req)
+        except TypeError:
+            # Unhashable capability values are not cached
+            result = extra_specs_ops.match(cap_value, req)
+        return result
+
+    def _satisfies_compiled_specs(self, capabilities, compiled_specs,
+                                  matches):
+        """Compare capabilities against compiled extra specs."""
+        for key, req, scope in compiled_specs:
             cap = capabilities
             for index in range(len(scope)):
                 try:
@@ -63,7 +86,7 @@ class CapabilitiesFilter(base_host.BaseHostFilter):
 
             # Loop through capability values looking for any match
             for cap_value in cap_list:
-                if extra_specs_ops.match(cap_value, req):
+                if self._match(cap_value, req, matches):
                     break
             else:
                 # Nothing matched, so bail out
@@ -74,6 +97,33 @@ class CapabilitiesFilter(base_host.BaseHostFilter):
                 return False
         return True
 
+    def _satisfies_extra_specs(self, capabilities, resource_type):
+        """Compare capabilities against extra specs.
+
+        Check that the capabilities provided by the services satisfy
+        the extra specs associated with the resource type.
+        """
+        return self._satisfies_compiled_specs(
+            capabilities, self._compile_extra_specs(resource_type), {})
+
+    def filter_all(self, filter_obj_list, filter_properties):
+        """Yield hosts whose capabilities satisfy the extra specs.
+
+        The extra specs are compiled once for all hosts, and each
+        requirement is evaluated once per distinct capability value, as
+        most pools report the same values for the same capabilities.
+        """
+        compiled_specs = self._compile_extra_specs(
+            filter_properties.get('resource_type'))
+        matches = {}
+        for host_state in filter_obj_list:
+            if self._satisfies_compiled_specs(host_state.capabilities,
+                                              compiled_specs, matches):
+                yield host_state
+            else:
+                LOG.debug("%(host_state)s fails resource_type extra_specs "
+                          "requirements", {'host_state': host_state})
+
     def host_passes(self, host_state, filter_properties):
         """Return a list of hosts that can create resource_type."""
         # Note(zhiteng) Currently only Cinder and Nova are using
@@ -56,7 +56,15 @@ host_manager_opts = [
                     'CapacityWeigher',
                     'GoodnessWeigher',
                 ],
-                help='Which weigher class names to use for weighing hosts.')
+                help='Which weigher class names to use for weighing hosts.'),
+    cfg.IntOpt('scheduler_provisioned_capacity_refresh_interval',
+               default=60,
+               min=0,
+               help='Interval, in seconds, at which the scheduler reloads '
+                    'the sums of share sizes per pool from the database. '
+                    'They are used as provisioned capacity of pools whose '
+                    'drivers do not report it, and are kept up to date with '
+                    'the shares placed by this scheduler in between.'),
 ]
 
 CONF = cfg.CONF
@@ -99,13 +107,43 @@ class ReadOnlyDict(IterableUserDict):
             raise TypeError
 
 
+class ProvisionedCapacity(object):
+    """Sums of share sizes per host, as stored in the database.
+
+    Loaded with a single aggregate query, updated as the scheduler places
+    shares, and reloaded once the refresh interval passes to account for
+    deleted and resized shares and for shares placed by other schedulers.
+    """
+
+    def __init__(self):
+        self._sizes = {}
+        self._loaded_at = None
+
+    def refresh(self, context):
+        if self._loaded_at and not timeutils.is_older_than(
+                self._loaded_at,
+                CONF.scheduler_provisioned_capacity_refresh_interval):
+            return
+        self._sizes = db.share_instances_get_size_sum_by_host(
+            context.elevated())
+        self._loaded_at = timeutils.utcnow()
+
+    def get(self, host):
+        return self._sizes.get(host, 0)
+
+    def consume(self, host, size):
+        self._sizes[host] = self.get(host) + size
+
+
 class HostState(object):
     """Mutable and immutable information tracked for a host."""
 
-    def __init__(self, host, capabilities=None, service=None):
+    def __init__(self, host, capabilities=None, service=None,
+                 provisioned_capacity=None):
         self.capabilities = None
         self.service = None
         self.host = host
+        self.provisioned_capacity = provisioned_capacity
         self.update_capabilities(capabilities, service)
 
         self.share_backend_name = None
@@ -223,7 +261,9 @@ class HostState(object):
                 cur_pool = self.pools.get(pool_name, None)
                 if not cur_pool:
                     # Add new pool
-                    cur_pool = PoolState(self.host, pool_cap, pool_name)
+                    cur_pool = PoolState(
+                        self.host, pool_cap, pool_name,
+                        provisioned_capacity=self.provisioned_capacity)
                     self.pools[pool_name] = cur_pool
                 cur_pool.update_from_share_capability(
                     pool_cap, service, context=context)
@@ -241,7 +281,9 @@ class HostState(object):
 
             if len(self.pools) == 0:
                 # No pool was there
-                single_pool = PoolState(self.host, capability, pool_name)
+                single_pool = PoolState(
+                    self.host, capability, pool_name,
+                    provisioned_capacity=self.provisioned_capacity)
                 self._append_backend_info(capability)
                 self.pools[pool_name] = single_pool
             else:
@@ -249,7 +291,9 @@ class HostState(object):
                 try:
                     single_pool = self.pools[pool_name]
                 except KeyError:
-                    single_pool = PoolState(self.host, capability, pool_name)
+                    single_pool = PoolState(
+                        self.host, capability, pool_name,
+                        provisioned_capacity=self.provisioned_capacity)
                     self._append_backend_info(capability)
                     self.pools[pool_name] = single_pool
 
@@ -346,15 +390,21 @@ class HostState(object):
 
 class PoolState(HostState):
 
-    def __init__(self, host, capabilities, pool_name):
+    def __init__(self, host, capabilities, pool_name,
+                 provisioned_capacity=None):
         new_host = share_utils.append_host(host, pool_name)
-        super(PoolState, self).__init__(new_host, capabilities)
+        super(PoolState, self).__init__(
+            new_host, capabilities,
+            provisioned_capacity=provisioned_capacity)
         self.pool_name = pool_name
         # No pools in pool
         self.pools = None
 
     def _estimate_provisioned_capacity(self, host_name, context=None):
         """Estimate provisioned capacity from share sizes on backend."""
+        if self.provisioned_capacity is not None:
+            return self.provisioned_capacity.get(host_name)
+
         provisioned_capacity = 0
 
         instances = db.share_instances_get_all_by_host(
@@ -407,6 +457,11 @@ class PoolState(HostState):
             self.replication_domain = capability.get(
                 'replication_domain')
 
+    def consume_from_share(self, share):
+        super(PoolState, self).consume_from_share(share)
+        if self.provisioned_capacity is not None:
+            self.provisioned_capacity.consume(self.host, share['size'])
+
     def update_pools(self, capability):
         # Do nothing, since we don't have pools within pool, yet
         pass
@@ -423,9 +478,15 @@ class HostManager(object):
         self.filter_handler = base_host_filter.HostFilterHandler(
             'manila.scheduler.filters')
         self.filter_classes = self.filter_handler.get_all_classes()
+        # Filters chosen so far, by tuple of filter class names:
+        # the filter classes, and the filter objects shared by the
+        # requests, as filters keep no state across requests.
+        self._chosen_filter_classes = {}
+        self._chosen_filters = {}
         self.weight_handler = base_host_weigher.HostWeightHandler(
             'manila.scheduler.weighers')
         self.weight_classes = self.weight_handler.get_all_classes()
+        self.provisioned_capacity = ProvisionedCapacity()
 
     def _choose_host_filters(self, filter_cls_names):
         """Choose acceptable filters.
@@ -439,6 +500,9 @@ class HostManager(object):
             filter_cls_names = CONF.scheduler_default_filters
         if not isinstance(filter_cls_names, (list, tuple)):
             filter_cls_names = [filter_cls_names]
+        key = tuple(filter_cls_names)
+        if key in self._chosen_filter_classes:
+            return self._chosen_filter_classes[key]
         good_filters = []
         bad_filters = []
         for filter_name in filter_cls_names:
@@ -453,8 +517,22 @@ class HostManager(object):
         if bad_filters:
             msg = ", ".join(bad_filters)
             raise exception.SchedulerHostFilterNotFound(filter_name=msg)
+        self._chosen_filter_classes[key] = good_filters
         return good_filters
 
+    def _get_host_filters(self, filter_cls_names):
+        """Return the filter objects for the chosen filters."""
+        if filter_cls_names is None:
+            filter_cls_names = CONF.scheduler_default_filters
+        if not isinstance(filter_cls_names, (list, tuple)):
+            filter_cls_names = [filter_cls_names]
+        key = tuple(filter_cls_names)
+        if key not in self._chosen_filters:
+            self._chosen_filters[key] = [
+                filter_cls()
+                for filter_cls in self._choose_host_filters(filter_cls_names)]
+        return self._chosen_filters[key]
+
     def _choose_host_weighers(self, weight_cls_names):
         """Choose acceptable weighers.
 
@@ -487,8 +565,8 @@ class HostManager(object):
     def get_filtered_hosts(self, hosts, filter_properties,
                            filter_class_names=None):
         """Filter hosts and return only ones passing all filters."""
-        filter_classes = self._choose_host_filters(filter_class_names)
-        return self.filter_handler.get_filtered_objects(filter_classes,
+        filters = self._get_host_filters(filter_class_names)
+        return self.filter_handler.get_filtered_objects(filters,
                                                         hosts,
                                                         filter_properties)
 
@@ -527,6 +605,7 @@ class HostManager(object):
         # Get resource usage across the available share nodes:
         topic = CONF.share_topic
         share_services = db.service_get_all_by_topic(context, topic)
+        self.provisioned_capacity.refresh(context)
 
         active_hosts = set()
         for service in share_services:
@@ -544,7 +623,8 @@ class HostManager(object):
                 host_state = self.host_state_cls(
                     host,
                     capabilities=capabilities,
-                    service=dict(service.items()))
+                    service=dict(service.items()),
+                    provisioned_capacity=self.provisioned_capacity)
                 self.host_state_map[host] = host_state
 
             # Update capabilities and attributes in host_state
@@ -138,8 +138,8 @@ class BaseWeightHandler(base_handler.BaseHandler):
                                 minval=weigher.minval,
                                 maxval=weigher.maxval)
 
-            for i, weight in enumerate(weights):
-                obj = weighed_objs[i]
-                obj.weight += weigher.weight_multiplier() * weight
+            multiplier = weigher.weight_multiplier()
+            for obj, weight in six.moves.zip(weighed_objs, weights):
+                obj.weight += multiplier * weight
 
         return sorted(weighed_objs, key=lambda x: x.weight, reverse=True)
@@ -13,6 +13,9 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import collections
+import sys
+
 from oslo_log import log
 import six
 
@@ -29,6 +32,11 @@ class ShareInstanceAccess(object):
     def __init__(self, db, driver):
         self.db = db
         self.driver = driver
+        # NOTE: requests of rule changes for a share instance that were
+        # not sent to the driver yet, keyed by share instance ID. Each
+        # request is a dict that also records the outcome of the driver
+        # call that carried its changes.
+        self._pending_changes = collections.defaultdict(list)
 
     def update_access_rules(self, context, share_instance_id, add_rules=None,
                             delete_rules=None, share_server=None):
@@ -42,32 +50,125 @@ class ShareInstanceAccess(object):
         - rules which should be deleted. If "all" is provided - all rules will
         be deleted.
         :param share_server: Share server model or None
+
+        Changes requested while another update of the same share instance
+        is in progress are queued and coalesced with other pending changes
+        into a single driver call. The exception raised while applying
+        the changes of a request is re-raised to its caller, whichever
+        request's call applied them.
         """
         share_instance = self.db.share_instance_get(
             context, share_instance_id, with_share_data=True)
         share_id = share_instance["share_id"]
 
+        request = {
+            'add_rules': add_rules or [],
+            'delete_rules': delete_rules or [],
+            'done': False,
+            'exc_info': None,
+        }
+        self._pending_changes[share_instance_id].append(request)
+
         @utils.synchronized(
             "update_access_rules_for_share_%s" % share_id, external=True)
-        def _update_access_rules_locked(*args, **kwargs):
-            return self._update_access_rules(*args, **kwargs)
+        def _update_access_rules_locked(context, share_instance_id,
+                                        share_server):
+            while not request['done']:
+                changes = self._pop_pending_changes(share_instance_id)
+                try:
+                    self._apply_pending_changes(
+                        context, share_instance_id, changes, share_server)
+                except Exception:
+                    # NOTE: the exception is recorded in the requests
+                    # whose changes failed to be applied, and re-raised
+                    # to their callers.
+                    pass
 
         _update_access_rules_locked(
             context=context,
             share_instance_id=share_instance_id,
-            add_rules=add_rules,
-            delete_rules=delete_rules,
             share_server=share_server,
         )
+        if request['exc_info']:
+            six.reraise(*request['exc_info'])
+
+    def _apply_pending_changes(self, context, share_instance_id, changes,
+                               share_server):
+        """Apply a batch of queued changes and record its outcome."""
+        add_rules, delete_rules, requests = changes
+        try:
+            self._update_access_rules(
+                context, share_instance_id, add_rules=add_rules,
+                delete_rules=delete_rules, share_server=share_server,
+                requests=requests)
+        except Exception:
+            self._set_requests_outcome(requests, sys.exc_info())
+            raise
+
+    @staticmethod
+    def _set_requests_outcome(requests, exc_info=None):
+        for request in requests:
+            if not request['done']:
+                request['done'] = True
+                request['exc_info'] = exc_info
+
+    @staticmethod
+    def _is_incremental_change(add_rules, delete_rules):
+        return bool(add_rules or delete_rules) and (
+            six.text_type(delete_rules).lower() != "all")
+
+    def _pop_pending_changes(self, share_instance_id):
+        """Merge queued rule changes that can be sent in one driver call.
+
+        Requests to delete all rules and requests without any rule changes
+        (full resync) are never merged with other requests.
+
+        :returns: tuple (add_rules, delete_rules, requests) or None if
+        nothing is queued, requests being the list of merged requests
+        """
+        pending = self._pending_changes.get(share_instance_id)
+        if not pending:
+            return None
+
+        request = pending.pop(0)
+        requests = [request]
+        add_rules = request['add_rules']
+        delete_rules = request['delete_rules']
+        if self._is_incremental_change(add_rules, delete_rules):
+            add_rules = list(add_rules)
+            delete_rules = list(delete_rules)
+            while pending and self._is_incremental_change(
+                    pending[0]['add_rules'], pending[0]['delete_rules']):
+                request = pending.pop(0)
+                requests.append(request)
+                add_rules.extend(request['add_rules'])
+                delete_rules.extend(request['delete_rules'])
+
+            delete_rules = list(
+                collections.OrderedDict(
+                    (rule['id'], rule) for rule in delete_rules).values())
+            delete_ids = set(rule['id'] for rule in delete_rules)
+            # NOTE: rules denied before being applied are only
+            # passed to the driver for deletion.
+            add_rules = [
+                rule for rule in collections.OrderedDict(
+                    (rule['id'], rule) for rule in add_rules).values()
+                if rule['id'] not in delete_ids]
+
+        if not pending:
+            self._pending_changes.pop(share_instance_id, None)
+        return add_rules, delete_rules, requests
 
     def _update_access_rules(self, context, share_instance_id, add_rules=None,
-                             delete_rules=None, share_server=None):
+                             delete_rules=None, share_server=None,
+                             requests=()):
         # Reget share instance
         share_instance = self.db.share_instance_get(
             context, share_instance_id, with_share_data=True)
 
         # NOTE (rraja): preserve error state to trigger maintenance mode
-        if share_instance['access_rules_status'] != constants.STATUS_ERROR:
+        if share_instance['access_rules_status'] not in (
+                constants.STATUS_ERROR, constants.STATUS_UPDATING):
             self.db.share_instance_update_access_status(
                 context,
                 share_instance_id,
@@ -143,7 +244,16 @@ class ShareInstanceAccess(object):
         share_instance = self.db.share_instance_get(context, share_instance_id,
                                                     with_share_data=True)
 
-        if self._check_needs_refresh(context, rules, share_instance):
+        pending_changes = self._pop_pending_changes(share_instance_id)
+        if pending_changes is not None:
+            # NOTE: apply changes which were requested during this
+            # update in one batch before checking whether a resync is needed.
+            # The changes of this update are applied at this point, so
+            # failures of the next batch are reported to its requests only.
+            self._set_requests_outcome(requests)
+            self._apply_pending_changes(context, share_instance_id,
+                                        pending_changes, share_server)
+        elif self._check_needs_refresh(context, rules, share_instance):
             self._update_access_rules(context, share_instance_id,
                                       share_server=share_server)
         else:
@@ -157,6 +267,8 @@ class ShareInstanceAccess(object):
                          "share instance: %s"),
                      share_instance['id'])
 
+        self._set_requests_outcome(requests)
+
     @staticmethod
     def _validate_access_keys(access_rules, add_rules, delete_rules,
                               access_keys):
@@ -231,8 +343,5 @@ class ShareInstanceAccess(object):
         if not access_rules:
             return
 
-        for rule in access_rules:
-            access_mapping = self.db.share_instance_access_get(
-                context, rule['id'], share_instance_id)
-
-            self.db.share_instance_access_delete(context, access_mapping['id'])
+        self.db.share_instance_access_delete_all_by_access_ids(
+            context, share_instance_id, [rule['id'] for rule in access_rules])
@@ -1266,6 +1266,20 @@ class API(base.Base):
         is_public = search_opts.pop('is_public', False)
         is_public = strutils.bool_from_string(is_public, strict=True)
 
+        # NOTE: filters matching columns of shares and share instances are
+        # applied by the database. Pagination is done by the database too,
+        # unless there are filters left that can only be applied here.
+        for key in (constants.SHARE_EXACT_FILTER_KEYS +
+                    constants.SHARE_INSTANCE_EXACT_FILTER_KEYS):
+            if key in search_opts:
+                filters[key] = search_opts.pop(key)
+        pagination = {key: search_opts.pop(key)
+                      for key in constants.PAGINATION_KEYS
+                      if key in search_opts}
+        if not set(search_opts).difference(('all_tenants', 'share_server_id')):
+            filters.update(pagination)
+            pagination = {}
+
         # Get filtered list of shares
         if 'share_server_id' in search_opts:
             # NOTE(vponomaryov): this is project_id independent
@@ -1291,6 +1305,8 @@ class API(base.Base):
                 if all(s.get(k, None) == v for k, v in search_opts.items()):
                     results.append(s)
             shares = results
+        if pagination:
+            shares = utils.paginate(shares, **pagination)
         return shares
 
     def get_snapshot(self, context, snapshot_id):
@@ -1306,6 +1322,9 @@ class API(base.Base):
 
         # Read and remove key 'all_tenants' if was provided
         all_tenants = search_opts.pop('all_tenants', None)
+        pagination = {key: search_opts.pop(key)
+                      for key in constants.PAGINATION_KEYS
+                      if key in search_opts}
 
         string_args = {'sort_key': sort_key, 'sort_dir': sort_dir}
         string_args.update(search_opts)
@@ -1315,18 +1334,27 @@ class API(base.Base):
                         "'%(v)s'.") % {'k': k, 'v': string_args[k]}
                 raise exception.InvalidInput(reason=msg)
 
+        # NOTE: 'usage' and filters matching snapshot columns are applied
+        # by the database along with pagination, unless there are filters
+        # left that can only be applied here.
+        filters = {}
+        for key in (('usage', ) + constants.SNAPSHOT_EXACT_FILTER_KEYS +
+                    constants.SNAPSHOT_INSTANCE_EXACT_FILTER_KEYS):
+            if key in search_opts:
+                filters[key] = search_opts.pop(key)
+        if not search_opts:
+            filters.update(pagination)
+            pagination = {}
+
         if (context.is_admin and all_tenants):
             snapshots = self.db.share_snapshot_get_all(
-                context, filters=search_opts,
+                context, filters=filters,
                 sort_key=sort_key, sort_dir=sort_dir)
         else:
             snapshots = self.db.share_snapshot_get_all_by_project(
-                context, context.project_id, filters=search_opts,
+                context, context.project_id, filters=filters,
                 sort_key=sort_key, sort_dir=sort_dir)
 
-        # Remove key 'usage' if provided
-        search_opts.pop('usage', None)
-
         if search_opts:
             results = []
             not_found = object()
@@ -1337,6 +1365,8 @@ class API(base.Base):
                 else:
                     results.append(snapshot)
             snapshots = results
+        if pagination:
+            snapshots = utils.paginate(snapshots, **pagination)
         return snapshots
 
     def allow_access(self, ctx, share, access_type, access_to,
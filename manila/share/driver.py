@@ -108,6 +108,17 @@ share_opts = [
         deprecated_name='migration_readonly_support',
         help="Specify whether read only access rule mode is supported in this "
              "backend."),
+    cfg.IntOpt(
+        'migration_writable_copy_passes',
+        default=0,
+        min=0,
+        help="Number of data copy passes done while the source share is still "
+             "writable during host-assisted migration. Passes after the "
+             "first one only copy files changed since the previous pass. The "
+             "share is then made read-only for a last pass, so that it stays "
+             "read-only for as long as copying the latest changes takes "
+             "rather than the whole share. Ignored unless "
+             "migration_readonly_rules_support is enabled."),
     cfg.StrOpt(
         "admin_network_config_group",
         help="If share driver requires to setup admin network for share, then "
@@ -595,6 +606,21 @@ class ShareDriver(object):
         """
         raise NotImplementedError()
 
+    def ensure_shares(self, context, shares):
+        """Invoked to ensure that many shares are exported at once.
+
+        Share manager calls this method on service start, before falling
+        back to calling ensure_share() for every share. Drivers able to
+        verify many exports with a single backend request should implement
+        it.
+
+        :param shares: list of dicts with 'share' (share instance) and
+            'share_server' (share server or None) keys
+        :return None or dict mapping share instance IDs to lists with export
+            locations, for shares whose export locations should be updated
+        """
+        raise NotImplementedError()
+
     def allow_access(self, context, share, access, share_server=None):
         """Allow access to the share."""
         raise NotImplementedError()
@@ -1563,6 +1589,34 @@ class ShareDriver(object):
         """
         raise NotImplementedError()
 
+    def update_replica_states(self, context, replicas):
+        """Report the replica_state of many replicas at once.
+
+        Share manager calls this method periodically, with all the replicas
+        of the host it should poll, before falling back to calling
+        update_replica_state() for every replica. Drivers able to get the
+        state of many replicas with a few backend requests should implement
+        it.
+
+        .. note::
+            Unlike update_replica_state(), this call is not serialized with
+            other operations on the replicas of a share, so drivers should
+            only report states here. Replicas that need their replication
+            relationships fixed should be left out of the result, they are
+            then updated with update_replica_state().
+
+        :param context: Current context
+        :param replicas: List of dictionaries, one per replica, with the
+            arguments update_replica_state() would be called with:
+            'replica_list', 'replica', 'access_rules', 'replica_snapshots'
+            and 'share_server'.
+        :return: dict mapping IDs of replicas to their replica_state, which
+            can be 'in_sync', 'out_of_sync' or 'error'. Replicas left out of
+            the dict, or mapped to None, are updated with
+            update_replica_state().
+        """
+        raise NotImplementedError()
+
     def update_replica_state(self, context, replica_list, replica,
                              access_rules, replica_snapshots,
                              share_server=None):
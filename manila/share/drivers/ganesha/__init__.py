@@ -121,8 +121,8 @@ class GaneshaNASHelper(NASHelperBase):
         """Subclass this to create FSAL block."""
         return {}
 
-    def _allow_access(self, base_path, share, access):
-        """Allow access to the share."""
+    def _get_export(self, base_path, share, access):
+        """Return the name and config of the export for an access rule."""
         if access['access_type'] != 'ip':
             raise exception.InvalidShareAccess('Only IP access type allowed')
         cf = {}
@@ -141,7 +141,11 @@ class GaneshaNASHelper(NASHelperBase):
                 'FSAL': self._fsal_hook(base_path, share, access)
             }
         })
-        self.ganesha.add_export(export_name, cf)
+        return export_name, cf
+
+    def _allow_access(self, base_path, share, access):
+        """Allow access to the share."""
+        self.ganesha.add_export(*self._get_export(base_path, share, access))
 
     def _deny_access(self, base_path, share, access):
         """Deny access to the share."""
@@ -155,7 +159,11 @@ class GaneshaNASHelper(NASHelperBase):
             self.ganesha.reset_exports()
             self.ganesha.restart_service()
 
-        for rule in add_rules:
-            self._allow_access(base_path, share, rule)
-        for rule in delete_rules:
-            self._deny_access(base_path, share, rule)
+        if add_rules:
+            self.ganesha.add_exports(
+                [self._get_export(base_path, share, rule)
+                 for rule in add_rules])
+        if delete_rules:
+            self.ganesha.remove_exports(
+                ["%s--%s" % (share['name'], rule['id'])
+                 for rule in delete_rules])
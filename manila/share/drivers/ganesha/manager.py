@@ -20,6 +20,7 @@ import sys
 
 from oslo_log import log
 from oslo_serialization import jsonutils
+from oslo_utils import excutils
 import six
 
 from manila import exception
@@ -30,66 +31,56 @@ from manila import utils
 
 LOG = log.getLogger(__name__)
 IWIDTH = 4
+# number of export ids reserved in the export database at once
+EXPORT_ID_BATCH = 10
+
+
+# matches, in order of precedence: a quoted string (with backslash
+# escapes), an unterminated quote, a comment, and a run of plain text
+_TOKENRX = re.compile(r'"(?:[^"\\]|\\.)*"|"|#[^\n]*|[^"#]+', re.S)
+_JSONIFY_SUBS = [(re.compile(pat), sub) for pat, sub in [
+    # add omitted "=" signs to block openings
+    ('([^=\s])\s*{', '\\1={'),
+    # delete trailing semicolons in blocks
+    (';\s*}', '}'),
+    # add omitted semicolons after blocks
+    ('}\s*([^}\s])', '};\\1'),
+    # separate syntactically significant characters
+    ('([;{}=])', ' \\1 ')]]
+_NUMBERRX = re.compile('\A-?[1-9]\d*(\.\d+)?\Z')
 
 
 def _conf2json(conf):
     """Convert Ganesha config to JSON."""
 
-    # tokenize config string
-    token_list = [six.StringIO()]
-    state = {
-        'in_quote': False,
-        'in_comment': False,
-        'escape': False,
-    }
-
-    cbk = []
-    for char in conf:
-        if state['in_quote']:
-            if not state['escape']:
-                if char == '"':
-                    state['in_quote'] = False
-                    cbk.append(lambda: token_list.append(six.StringIO()))
-                elif char == '\\':
-                    cbk.append(lambda: state.update({'escape': True}))
-        else:
-            if char == "#":
-                state['in_comment'] = True
-            if state['in_comment']:
-                if char == "\n":
-                    state['in_comment'] = False
-            else:
-                if char == '"':
-                    token_list.append(six.StringIO())
-                    state['in_quote'] = True
-        state['escape'] = False
-        if not state['in_comment']:
-            token_list[-1].write(char)
-        while cbk:
-            cbk.pop(0)()
-
-    if state['in_quote']:
-        raise RuntimeError("Unterminated quoted string")
+    # tokenize config string: quoted strings are tokens of their own,
+    # comments are dropped, plain text in between makes up one token
+    token_list = []
+    text = []
+    for match in _TOKENRX.finditer(conf):
+        tok = match.group()
+        if tok == '"':
+            raise RuntimeError("Unterminated quoted string")
+        elif tok[0] == '"':
+            token_list.append(''.join(text))
+            text = []
+            token_list.append(tok)
+        elif tok[0] != '#':
+            text.append(tok)
+    token_list.append(''.join(text))
 
     # jsonify tokens
     js_token_list = ["{"]
     for tok in token_list:
-        tok = tok.getvalue()
+        if not tok:
+            continue
 
         if tok[0] == '"':
             js_token_list.append(tok)
             continue
 
-        for pat, s in [
-                # add omitted "=" signs to block openings
-                ('([^=\s])\s*{', '\\1={'),
-                # delete trailing semicolons in blocks
-                (';\s*}', '}'),
-                # add omitted semicolons after blocks
-                ('}\s*([^}\s])', '};\\1'),
-                # separate syntactically significant characters
-                ('([;{}=])', ' \\1 ')]:
-            tok = re.sub(pat, s, tok)
+        for rx, sub in _JSONIFY_SUBS:
+            tok = rx.sub(sub, tok)
 
         # map tokens to JSON equivalents
         for word in tok.split():
@@ -97,8 +88,7 @@ def _conf2json(conf):
                 word = ":"
             elif word == ";":
                 word = ','
-            elif (word in ['{', '}'] or
-                  re.search('\A-?[1-9]\d*(\.\d+)?\Z', word)):
+            elif word in ['{', '}'] or _NUMBERRX.search(word):
                 pass
             else:
                 word = jsonutils.dumps(word)
@@ -199,6 +189,8 @@ class GaneshaManager(object):
         self.ganesha_db_path = kwargs['ganesha_db_path']
         self.execute('mkdir', '-p', os.path.dirname(self.ganesha_db_path))
         self.ganesha_service = kwargs['ganesha_service_name']
+        # export ids reserved in the export database, not yet handed out
+        self._export_ids = []
         # Here we are to make sure that an SQLite database of the
         # required scheme exists at self.ganesha_db_path.
         # The following command gets us there -- provided the file
@@ -238,15 +230,46 @@ class GaneshaManager(object):
         """Generate the index file for current exports."""
         @utils.synchronized("ganesha-index-" + self.tag, external=True)
         def _mkindex():
-            files = filter(lambda f: self.confrx.search(f) and
-                           f != "INDEX.conf",
-                           self.execute('ls', self.ganesha_export_dir,
-                                        run_as_root=False)[0].split("\n"))
-            index = "".join(map(lambda f: "%include " + os.path.join(
-                    self.ganesha_export_dir, f) + "\n", files))
+            index = "".join(line + "\n" for line in self._list_index())
             self._write_conf_file("INDEX", index)
         _mkindex()
 
+    def _list_index(self):
+        """Return the index lines of the export files in export dir."""
+        files = filter(lambda f: self.confrx.search(f) and
+                       f != "INDEX.conf",
+                       self.execute('ls', self.ganesha_export_dir,
+                                    run_as_root=False)[0].split("\n"))
+        return ["%include " + os.path.join(self.ganesha_export_dir, f)
+                for f in files]
+
+    def _update_index(self, add=(), remove=()):
+        """Add and remove exports to/from the index file.
+
+        Unlike _mkindex, the export directory is not listed (unless
+        there is no index file yet): the current index is read, patched
+        and written back atomically.
+        """
+        if not (add or remove):
+            return
+
+        @utils.synchronized("ganesha-index-" + self.tag, external=True)
+        def _update_index():
+            add_lines = ["%include " + self._getpath(name) for name in add]
+            drop_lines = set(add_lines + [
+                "%include " + self._getpath(name) for name in remove])
+            try:
+                lines = self.execute(
+                    "cat", self._getpath("INDEX"), makelog=False,
+                    message='reading index')[0].split("\n")
+            except exception.GaneshaCommandFailure:
+                lines = self._list_index()
+            lines = [line for line in lines
+                     if line and line not in drop_lines] + add_lines
+            self._write_conf_file(
+                "INDEX", "".join(line + "\n" for line in lines))
+        _update_index()
+
     def _read_export_file(self, name):
         """Return the dict of the export identified by name."""
         return parseconf(self.execute("cat", self._getpath(name),
@@ -279,43 +302,73 @@ class GaneshaManager(object):
         """Remove an export from Ganesha runtime with given export id."""
         self._dbus_send_ganesha("RemoveExport", "uint16:%d" % xid)
 
-    def add_export(self, name, confdict):
-        """Add an export to Ganesha specified by confdict."""
+    def _add_export(self, name, confdict):
+        """Add an export to Ganesha without updating the index."""
         xid = confdict["EXPORT"]["Export_Id"]
-        undos = []
-        _mkindex_called = False
+        path = self._write_export_file(name, confdict)
         try:
-            path = self._write_export_file(name, confdict)
-            undos.append(lambda: self._rm_export_file(name))
-
             self._dbus_send_ganesha("AddExport", "string:" + path,
                                     "string:EXPORT(Export_Id=%d)" % xid)
-            undos.append(lambda: self._remove_export_dbus(xid))
-
-            _mkindex_called = True
-            self._mkindex()
         except Exception:
-            for u in undos:
-                u()
-            if not _mkindex_called:
-                self._mkindex()
-            raise
+            with excutils.save_and_reraise_exception():
+                self._rm_export_file(name)
+
+    def add_export(self, name, confdict):
+        """Add an export to Ganesha specified by confdict."""
+        self.add_exports([(name, confdict)])
+
+    def add_exports(self, exports):
+        """Add exports to Ganesha, updating the index once.
+
+        If adding an export fails, the exports added before it are kept.
+
+        :param exports: list of (name, confdict) pairs.
+        """
+        added = []
+        try:
+            for name, confdict in exports:
+                self._add_export(name, confdict)
+                added.append((name, confdict["EXPORT"]["Export_Id"]))
+        finally:
+            try:
+                self._update_index(add=[name for name, xid in added])
+            except Exception:
+                with excutils.save_and_reraise_exception():
+                    for name, xid in added:
+                        self._rm_export_file(name)
+                        self._remove_export_dbus(xid)
 
     def remove_export(self, name):
         """Remove an export from Ganesha."""
+        self.remove_exports([name])
+
+    def remove_exports(self, names):
+        """Remove exports from Ganesha, updating the index once."""
+        removed = []
         try:
-            confdict = self._read_export_file(name)
-            self._remove_export_dbus(confdict["EXPORT"]["Export_Id"])
+            for name in names:
+                try:
+                    confdict = self._read_export_file(name)
+                    self._remove_export_dbus(confdict["EXPORT"]["Export_Id"])
+                finally:
+                    self._rm_export_file(name)
+                    removed.append(name)
         finally:
-            self._rm_export_file(name)
-            self._mkindex()
+            self._update_index(remove=removed)
 
     def get_export_id(self, bump=True):
-        """Get a new export id."""
+        """Get a new export id.
+
+        Export ids are reserved in the export database EXPORT_ID_BATCH at
+        a time, and handed out from memory until they run out.
+        """
         # XXX overflowing the export id (16 bit unsigned integer)
         # is not handled
+        if bump and self._export_ids:
+            return self._export_ids.pop(0)
         if bump:
-            bumpcode = 'update ganesha set value = value + 1;'
+            bumpcode = ('update ganesha set value = value + %d;' %
+                        EXPORT_ID_BATCH)
         else:
             bumpcode = ''
         out = self.execute(
@@ -328,7 +381,12 @@ class GaneshaManager(object):
                       "Ganesha node %(tag)s: %(db)s."),
                       {'tag': self.tag, 'db': self.ganesha_db_path})
             raise exception.InvalidSqliteDB()
-        return int(match.groups()[0])
+        export_id = int(match.groups()[0])
+        if bump:
+            self._export_ids = list(
+                range(export_id - EXPORT_ID_BATCH + 2, export_id + 1))
+            return export_id - EXPORT_ID_BATCH + 1
+        return export_id
 
     def restart_service(self):
         """Restart the Ganesha service."""
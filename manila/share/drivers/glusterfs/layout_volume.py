@@ -23,8 +23,10 @@ import string
 import tempfile
 import xml.etree.cElementTree as etree
 
+import eventlet
 from oslo_config import cfg
 from oslo_log import log
+from oslo_utils import timeutils
 import six
 
 from manila import exception
@@ -59,6 +61,15 @@ glusterfs_volume_mapped_opts = [
                     'In latter example, the number that matches "#{size}", '
                     'that is, 3, is an indication that the size of volume '
                     'is 3G.'),
+    cfg.IntOpt('glusterfs_volume_wipe_workers',
+               default=4,
+               help='Number of released GlusterFS volumes wiped '
+                    'concurrently in the background.'),
+    cfg.IntOpt('glusterfs_volume_mark_refresh_interval',
+               default=300,
+               help='Interval, in seconds, after which the share marks of '
+                    'GlusterFS volumes used by others are read again, to '
+                    'pick up volumes they have released.'),
 ]
 
 
@@ -75,6 +86,10 @@ CONF.register_opts(glusterfs_volume_mapped_opts)
 PATTERN_DICT = {'size': {'pattern': '(?P<size>\d+)', 'trans': int}}
 USER_MANILA_SHARE = 'user.manila-share'
 USER_CLONED_FROM = 'user.manila-cloned-from'
+# Prefix of the value of USER_MANILA_SHARE for volumes which are
+# released but not yet wiped; it's followed by the identity of the
+# releasing service, which is the only one to wipe the volume.
+WIPE_PENDING = 'WIPE-PENDING'
 UUID_RE = re.compile('\A[\da-f]{8}-([\da-f]{4}-){3}[\da-f]{12}\Z', re.I)
 
 
@@ -86,10 +101,20 @@ class GlusterfsVolumeMappedLayout(layout.GlusterfsShareLayoutBase):
         super(GlusterfsVolumeMappedLayout, self).__init__(
             driver, *args, **kwargs)
         self.gluster_used_vols = set()
+        # Inventory of the volumes matching the volume pattern:
+        # maps <server>:/<volname> to the last known value of the
+        # USER_MANILA_SHARE option of the volume.
+        self.gluster_vol_marks = {}
+        self.gluster_vol_marks_read_at = None
+        self.gluster_wiping_vols = set()
         self.configuration.append_config_values(
             common.glusterfs_common_opts)
         self.configuration.append_config_values(
             glusterfs_volume_mapped_opts)
+        self.wipe_pending_mark = '%s:%s@%s' % (
+            WIPE_PENDING, CONF.host, self.configuration.config_group)
+        self._wipe_pool = eventlet.GreenPool(
+            self.configuration.glusterfs_volume_wipe_workers)
         self.gluster_nosnap_vols_dict = {}
         self.volume_pattern = self._compile_volume_pattern()
         self.volume_pattern_keys = self.volume_pattern.groupindex.keys()
@@ -156,8 +181,9 @@ class GlusterfsVolumeMappedLayout(layout.GlusterfsShareLayoutBase):
                 'minvers': gluster_version_min_str})
         self.glusterfs_versions = glusterfs_versions
 
-        gluster_volumes_initial = set(
-            self._fetch_gluster_volumes(filter_used=False))
+        # Load the volume inventory.
+        self._fetch_gluster_volumes()
+        gluster_volumes_initial = set(self.gluster_vol_marks)
         if not gluster_volumes_initial:
             # No suitable volumes are found on the Gluster end.
             # Raise exception.
@@ -172,6 +198,9 @@ class GlusterfsVolumeMappedLayout(layout.GlusterfsShareLayoutBase):
 
         self._check_mount_glusterfs()
 
+        # Resume the wiping of volumes released before a restart.
+        self._schedule_pending_gluster_vol_wipes()
+
     def _glustermanager(self, gluster_address, req_volume=True):
         """Create GlusterManager object for gluster_address."""
 
@@ -197,9 +226,22 @@ class GlusterfsVolumeMappedLayout(layout.GlusterfsShareLayoutBase):
         Return a dict with keys of the form <server>:/<volname>
         and values being dicts that map names of named groups
         to their extracted value.
+
+        If filter_used is set, volumes which are bound to a share
+        or pending to be wiped are left out. The USER_MANILA_SHARE
+        option is queried only for volumes not yet in the inventory,
+        the marks of known volumes are tracked as we change them.
+        Marks of volumes in use by others are read again every
+        glusterfs_volume_mark_refresh_interval seconds.
         """
 
         volumes_dict = {}
+        listed_vols = set()
+        refresh_marks = filter_used and (
+            self.gluster_vol_marks_read_at is None or
+            timeutils.is_older_than(
+                self.gluster_vol_marks_read_at,
+                self.configuration.glusterfs_volume_mark_refresh_interval))
         for srvaddr in self.configuration.glusterfs_servers:
             gluster_mgr = self._glustermanager(srvaddr, False)
             if gluster_mgr.user:
@@ -216,9 +258,21 @@ class GlusterfsVolumeMappedLayout(layout.GlusterfsShareLayoutBase):
                 comp_vol.update({'volume': volname})
                 gluster_mgr_vol = self._glustermanager(comp_vol)
                 if filter_used:
-                    vshr = gluster_mgr_vol.get_vol_option(
-                        USER_MANILA_SHARE) or ''
-                    if UUID_RE.search(vshr):
+                    qualified = gluster_mgr_vol.qualified
+                    listed_vols.add(qualified)
+                    vshr = self.gluster_vol_marks.get(qualified)
+                    if vshr is None:
+                        vshr = self.gluster_vol_marks.setdefault(
+                            qualified,
+                            gluster_mgr_vol.get_vol_option(
+                                USER_MANILA_SHARE) or '')
+                    elif (refresh_marks and self._is_used_mark(vshr) and
+                            qualified not in self.gluster_used_vols and
+                            qualified not in self.gluster_wiping_vols):
+                        vshr = gluster_mgr_vol.get_vol_option(
+                            USER_MANILA_SHARE) or ''
+                        self.gluster_vol_marks[qualified] = vshr
+                    if self._is_used_mark(vshr):
                         continue
                 pattern_dict = {}
                 for key in self.volume_pattern_keys:
@@ -229,23 +283,55 @@ class GlusterfsVolumeMappedLayout(layout.GlusterfsShareLayoutBase):
                         trans = PATTERN_DICT[key].get('trans', lambda x: x)
                         pattern_dict[key] = trans(keymatch)
                 volumes_dict[gluster_mgr_vol.qualified] = pattern_dict
+        if filter_used:
+            # Forget about the volumes which are gone.
+            for vol in set(self.gluster_vol_marks) - listed_vols:
+                del self.gluster_vol_marks[vol]
+        if refresh_marks:
+            self.gluster_vol_marks_read_at = timeutils.utcnow()
         return volumes_dict
 
+    @staticmethod
+    def _is_used_mark(mark):
+        """Tell if a USER_MANILA_SHARE value keeps a volume out of pool."""
+        return mark.startswith(WIPE_PENDING) or bool(UUID_RE.search(mark))
+
     @utils.synchronized("glusterfs_native", external=False)
     def _pop_gluster_vol(self, size=None):
         """Pick an unbound volume.
 
         Do a _fetch_gluster_volumes() first to get the complete
-        list of usable volumes.
+        list of usable volumes, and pick one of them with
+        _choose_gluster_vol(). As the inventory of volumes might be
+        out of date with respect to changes made by others, the mark
+        of the chosen volume is checked before handing it out.
+        Return the volume chosen (in <host>:/<volname> format).
+        """
+
+        voldict = self._fetch_gluster_volumes()
+        # Retry the wipes which failed so far.
+        self._schedule_pending_gluster_vol_wipes()
+        while True:
+            vol = self._choose_gluster_vol(voldict, size)
+            vshr = self._glustermanager(vol).get_vol_option(
+                USER_MANILA_SHARE) or ''
+            if not self._is_used_mark(vshr):
+                break
+            self.gluster_vol_marks[vol] = vshr
+            del voldict[vol]
+        self.gluster_used_vols.add(vol)
+        return vol
+
+    def _choose_gluster_vol(self, voldict, size=None):
+        """Choose an unbound volume from voldict.
+
         Keep only the unbound ones (ones that are not yet used to
         back a share).
         If size is given, try to pick one which has a size specification
         (according to the 'size' named group of the volume pattern),
         and its size is greater-than-or-equal to the given size.
-        Return the volume chosen (in <host>:/<volname> format).
         """
 
-        voldict = self._fetch_gluster_volumes()
         # calculate the set of unused volumes
         unused_vols = set(voldict) - self.gluster_used_vols
 
@@ -320,9 +406,7 @@ class GlusterfsVolumeMappedLayout(layout.GlusterfsShareLayoutBase):
         chosen_host = random.choice(list(chosen_hostmap.keys()))
         # Within a host's volumes, choose alphabetically first,
         # to make it predictable.
-        vol = sorted(chosen_hostmap[chosen_host])[0]
-        self.gluster_used_vols.add(vol)
-        return vol
+        return sorted(chosen_hostmap[chosen_host])[0]
 
     @utils.synchronized("glusterfs_native", external=False)
     def _push_gluster_vol(self, exp_locn):
@@ -333,6 +417,54 @@ class GlusterfsVolumeMappedLayout(layout.GlusterfsShareLayoutBase):
             LOG.error(msg)
             raise exception.GlusterfsException(msg)
 
+    def _set_gluster_vol_mark(self, gluster_mgr, mark):
+        """Set USER_MANILA_SHARE on the volume and in the inventory."""
+        gluster_mgr.set_vol_option(USER_MANILA_SHARE, mark)
+        self.gluster_vol_marks[gluster_mgr.qualified] = mark
+
+    def _schedule_pending_gluster_vol_wipes(self):
+        """Wipe the volumes we released, as recorded in the inventory.
+
+        Volumes released by other services sharing the pool are
+        left for them to wipe.
+        """
+        for vol, vshr in list(self.gluster_vol_marks.items()):
+            if (vshr == self.wipe_pending_mark and
+                    vol not in self.gluster_wiping_vols):
+                self._schedule_gluster_vol_wipe(self._glustermanager(vol))
+
+    def _schedule_gluster_vol_wipe(self, gluster_mgr):
+        """Wipe a released volume in the background."""
+        if gluster_mgr.qualified in self.gluster_wiping_vols:
+            return
+        self.gluster_wiping_vols.add(gluster_mgr.qualified)
+        self._wipe_pool.spawn_n(self._wipe_released_gluster_vol, gluster_mgr)
+
+    def _wipe_released_gluster_vol(self, gluster_mgr):
+        """Wipe a released volume and put it back in the pool.
+
+        On failure the volume stays marked as pending to be wiped,
+        so it's not handed out and the wipe is retried on the
+        next _pop_gluster_vol(). The volume is not wiped if its
+        mark was changed by others meanwhile.
+        """
+        try:
+            vshr = gluster_mgr.get_vol_option(USER_MANILA_SHARE) or ''
+            if vshr != self.wipe_pending_mark:
+                LOG.warning(_LW("Released gluster volume %(vol)s is "
+                                "marked as %(mark)s meanwhile, not "
+                                "wiping it."),
+                            {'vol': gluster_mgr.qualified, 'mark': vshr})
+                self.gluster_vol_marks[gluster_mgr.qualified] = vshr
+                return
+            self._wipe_gluster_vol(gluster_mgr)
+            self._set_gluster_vol_mark(gluster_mgr, 'NONE')
+        except Exception:
+            LOG.exception(_LE("Error wiping released gluster volume "
+                              "%s, will retry later."), gluster_mgr.qualified)
+        finally:
+            self.gluster_wiping_vols.discard(gluster_mgr.qualified)
+
     def _wipe_gluster_vol(self, gluster_mgr):
 
         # Create a temporary mount.
@@ -394,7 +526,7 @@ class GlusterfsVolumeMappedLayout(layout.GlusterfsShareLayoutBase):
         export = self.driver._setup_via_manager(
             {'share': share, 'manager': gmgr})
 
-        gmgr.set_vol_option(USER_MANILA_SHARE, share['id'])
+        self._set_gluster_vol_mark(gmgr, share['id'])
         self.private_storage.update(share['id'], {'volume': vol})
 
         # TODO(deepakcs): Enable quota and set it to the share size.
@@ -409,7 +541,8 @@ class GlusterfsVolumeMappedLayout(layout.GlusterfsShareLayoutBase):
         """Delete a share on the GlusterFS volume.
 
         1 Manila share = 1 GlusterFS volume. Put the gluster
-        volume back in the available list.
+        volume back in the available list once it's wiped in
+        the background.
         """
         gmgr = self._share_manager(share)
         if not gmgr:
@@ -428,11 +561,14 @@ class GlusterfsVolumeMappedLayout(layout.GlusterfsShareLayoutBase):
                 # management of those volumes which were
                 # created by us (as snapshot clones) ...
                 gmgr.gluster_call('volume', 'delete', gmgr.volume)
+                self.gluster_vol_marks.pop(gmgr.qualified, None)
             else:
                 # ... for volumes that come from the pool, we return
-                # them to the pool (after some purification rituals)
-                self._wipe_gluster_vol(gmgr)
-                gmgr.set_vol_option(USER_MANILA_SHARE, 'NONE')
+                # them to the pool (after some purification rituals,
+                # which are done in the background; the mark keeps
+                # the volume out of the pool until they're done)
+                self._set_gluster_vol_mark(gmgr, self.wipe_pending_mark)
+                self._schedule_gluster_vol_wipe(gmgr)
 
             self._push_gluster_vol(gmgr.qualified)
         except exception.GlusterfsException:
@@ -512,6 +648,7 @@ class GlusterfsVolumeMappedLayout(layout.GlusterfsShareLayoutBase):
             gmgr.gluster_call(*args, log=_LE("Creating share from snapshot"))
 
         self.gluster_used_vols.add(gmgr.qualified)
+        self.gluster_vol_marks[gmgr.qualified] = share['id']
         self.private_storage.update(share['id'], {'volume': gmgr.qualified})
 
         return export
@@ -586,7 +723,7 @@ class GlusterfsVolumeMappedLayout(layout.GlusterfsShareLayoutBase):
         gmgr = self._share_manager(share)
         self.gluster_used_vols.add(gmgr.qualified)
 
-        gmgr.set_vol_option(USER_MANILA_SHARE, share['id'])
+        self._set_gluster_vol_mark(gmgr, share['id'])
 
     # Debt...
 
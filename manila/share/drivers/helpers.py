@@ -14,7 +14,6 @@
 # under the License.
 
 import os
-import re
 
 from oslo_log import log
 
@@ -172,6 +171,7 @@ class NFSHelper(NASHelperBase):
         local_path = os.path.join(self.configuration.share_mount_path,
                                   share_name)
         out, err = self._ssh_exec(server, ['sudo', 'exportfs'])
+        exported_hosts = self._get_host_list(out, local_path)
         # Recovery mode
         if not (add_rules or delete_rules):
 
@@ -179,22 +179,11 @@ class NFSHelper(NASHelperBase):
                 access_rules, ('ip',),
                 (const.ACCESS_LEVEL_RO, const.ACCESS_LEVEL_RW))
 
-            hosts = self._get_host_list(out, local_path)
-            for host in hosts:
-                self._ssh_exec(server, ['sudo', 'exportfs', '-u',
-                                        ':'.join((host, local_path))])
-            self._sync_nfs_temp_and_perm_files(server)
-            for access in access_rules:
-                rules_options = '%s,no_subtree_check'
-                if access['access_level'] == const.ACCESS_LEVEL_RW:
-                    rules_options = ','.join((rules_options, 'no_root_squash'))
-                self._ssh_exec(
-                    server,
-                    ['sudo', 'exportfs', '-o',
-                     rules_options % access['access_level'],
-                     ':'.join((self._get_parsed_access_to(access['access_to']),
-                               local_path))])
-            self._sync_nfs_temp_and_perm_files(server)
+            hosts_to_remove = exported_hosts
+            hosts_to_add = [
+                (self._get_parsed_access_to(access['access_to']),
+                 access['access_level'])
+                for access in access_rules]
         # Adding/Deleting specific rules
         else:
 
@@ -202,6 +191,7 @@ class NFSHelper(NASHelperBase):
                 add_rules, ('ip',),
                 (const.ACCESS_LEVEL_RO, const.ACCESS_LEVEL_RW))
 
+            hosts_to_remove = []
             for access in delete_rules:
                 access['access_to'] = self._get_parsed_access_to(
                     access['access_to'])
@@ -218,17 +208,14 @@ class NFSHelper(NASHelperBase):
                                       'type': access['access_type'],
                                       'to': access['access_to']})
                     continue
-                self._ssh_exec(server, ['sudo', 'exportfs', '-u',
-                               ':'.join((access['access_to'], local_path))])
-            if delete_rules:
-                self._sync_nfs_temp_and_perm_files(server)
+                hosts_to_remove.append(access['access_to'])
+
+            hosts_to_add = []
             for access in add_rules:
                 access['access_to'] = self._get_parsed_access_to(
                     access['access_to'])
-                found_item = re.search(
-                    re.escape(local_path) + '[\s\n]*' + re.escape(
-                        access['access_to']), out)
-                if found_item is not None:
+                if (access['access_to'] in exported_hosts and
+                        access['access_to'] not in hosts_to_remove):
                     LOG.warning(_LW("Access rule %(type)s:%(to)s already "
                                     "exists for share %(name)s") % {
                         'to': access['access_to'],
@@ -236,25 +223,37 @@ class NFSHelper(NASHelperBase):
                         'name': share_name
                     })
                 else:
-                    rules_options = '%s,no_subtree_check'
-                    if access['access_level'] == const.ACCESS_LEVEL_RW:
-                        rules_options = ','.join((rules_options,
-                                                 'no_root_squash'))
-                    self._ssh_exec(
-                        server,
-                        ['sudo', 'exportfs', '-o',
-                         rules_options % access['access_level'],
-                         ':'.join((access['access_to'], local_path))])
-            if add_rules:
-                self._sync_nfs_temp_and_perm_files(server)
+                    hosts_to_add.append((access['access_to'],
+                                         access['access_level']))
+
+        # NOTE: exportfs accepts several exports per call, so the whole
+        # change set costs one call per access level instead of one per
+        # rule, followed by a single sync.
+        if hosts_to_remove:
+            self._ssh_exec(
+                server, ['sudo', 'exportfs', '-u'] +
+                [':'.join((host, local_path)) for host in hosts_to_remove])
+        for access_level in (const.ACCESS_LEVEL_RW, const.ACCESS_LEVEL_RO):
+            exports = [':'.join((host, local_path))
+                       for host, level in hosts_to_add
+                       if level == access_level]
+            if not exports:
+                continue
+            rules_options = '%s,no_subtree_check' % access_level
+            if access_level == const.ACCESS_LEVEL_RW:
+                rules_options = ','.join((rules_options, 'no_root_squash'))
+            self._ssh_exec(
+                server, ['sudo', 'exportfs', '-o', rules_options] + exports)
+        if not (add_rules or delete_rules) or hosts_to_remove or hosts_to_add:
+            self._sync_nfs_temp_and_perm_files(server)
 
     def _get_host_list(self, output, local_path):
         entries = []
         output = output.replace('\n\t\t', ' ')
         lines = output.split('\n')
         for line in lines:
-            items = line.split(' ')
-            if local_path == items[0]:
+            items = line.split()
+            if len(items) > 1 and local_path == items[0]:
                 entries.append(items[1])
         return entries
 
@@ -586,9 +586,7 @@ class HitachiHNASDriver(driver.ShareDriver):
         """
         self._check_fs_mounted()
 
-        self.hnas.vvol_create(share_id)
-
-        self.hnas.quota_add(share_id, share_size)
+        self.hnas.vvol_create_with_quota(share_id, share_size)
 
         LOG.debug("Share created with id %(shr)s, size %(size)sG.",
                   {'shr': share_id, 'size': share_size})
@@ -800,9 +798,7 @@ class HitachiHNASDriver(driver.ShareDriver):
 
         self._check_fs_mounted()
 
-        self.hnas.vvol_create(share['id'])
-
-        self.hnas.quota_add(share['id'], share['size'])
+        self.hnas.vvol_create_with_quota(share['id'], share['size'])
 
         try:
             self.hnas.tree_clone(src_path, dest_path)
@@ -293,11 +293,13 @@ class HNASSSHBackend(object):
                 raise
 
     def vvol_create(self, vvol_name):
+        self._execute(self._vvol_create_command(vvol_name))
+
+    def _vvol_create_command(self, vvol_name):
         # create a virtual-volume inside directory
         path = '/shares/' + vvol_name
-        command = ['virtual-volume', 'add', '--ensure', self.fs_name,
-                   vvol_name, path]
-        self._execute(command)
+        return ['virtual-volume', 'add', '--ensure', self.fs_name,
+                vvol_name, path]
 
     def vvol_delete(self, vvol_name):
         path = '/shares/' + vvol_name
@@ -316,11 +318,18 @@ class HNASSSHBackend(object):
                 raise e
 
     def quota_add(self, vvol_name, vvol_quota):
+        self._execute(self._quota_add_command(vvol_name, vvol_quota))
+
+    def vvol_create_with_quota(self, vvol_name, vvol_quota):
+        # create a virtual-volume and its quota in a single SSH exchange
+        self._execute_batch([self._vvol_create_command(vvol_name),
+                             self._quota_add_command(vvol_name, vvol_quota)])
+
+    def _quota_add_command(self, vvol_name, vvol_quota):
         str_quota = six.text_type(vvol_quota) + 'G'
-        command = ['quota', 'add', '--usage-limit',
-                   str_quota, '--usage-hard-limit',
-                   'yes', self.fs_name, vvol_name]
-        self._execute(command)
+        return ['quota', 'add', '--usage-limit',
+                str_quota, '--usage-hard-limit',
+                'yes', self.fs_name, vvol_name]
 
     def modify_quota(self, vvol_name, new_size):
         str_quota = six.text_type(new_size) + 'G'
@@ -445,8 +454,7 @@ class HNASSSHBackend(object):
             export_list.append(Export(items[i]))
         return export_list
 
-    @mutils.retry(exception=exception.HNASConnException, wait_random=True)
-    def _execute(self, commands):
+    def _ssc_command(self, commands):
         command = ['ssc', '127.0.0.1']
         if self.admin_ip0 is not None:
             command = ['ssc', '--smuauth', self.admin_ip0]
@@ -455,8 +463,23 @@ class HNASSSHBackend(object):
         commands = command + commands
 
         mutils.check_ssh_injection(commands)
-        commands = ' '.join(commands)
+        return ' '.join(commands)
 
+    def _execute(self, commands):
+        return self._ssh_execute(self._ssc_command(commands))
+
+    def _execute_batch(self, commands_list):
+        """Runs several SSC commands in a single SSH exchange.
+
+        Commands run in order and the batch stops at the first one that
+        fails, whose error is raised.
+        """
+        return self._ssh_execute(
+            ' && '.join(self._ssc_command(commands)
+                        for commands in commands_list))
+
+    @mutils.retry(exception=exception.HNASConnException, wait_random=True)
+    def _ssh_execute(self, commands):
         if not self.sshpool:
             self.sshpool = mutils.SSHPool(ip=self.ip,
                                           port=self.port,
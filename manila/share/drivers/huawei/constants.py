@@ -34,6 +34,8 @@ IP_ALLOCATIONS_DHSS_FALSE = 0
 IP_ALLOCATIONS_DHSS_TRUE = 1
 SOCKET_TIMEOUT = 52
 LOGIN_SOCKET_TIMEOUT = 4
+REST_CONNECTION_POOL_SIZE = 10
+ACCESS_QUERY_PAGE_SIZE = 100
 QOS_NAME_PREFIX = 'OpenStack_'
 SYSTEM_NAME_PREFIX = "Array-"
 MIN_ARRAY_VERSION_FOR_QOS = 'V300R003C00'
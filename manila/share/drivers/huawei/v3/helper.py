@@ -15,14 +15,15 @@
 
 import base64
 import copy
+import threading
 import time
 from xml.etree import ElementTree as ET
 
+import eventlet
 from oslo_log import log
 from oslo_serialization import jsonutils
+import requests
 import six
-from six.moves import http_cookiejar
-from six.moves.urllib import request as urlreq  # pylint: disable=E0611
 
 from manila import exception
 from manila.i18n import _, _LE, _LW
@@ -37,25 +38,41 @@ class RestHelper(object):
 
     def __init__(self, configuration):
         self.configuration = configuration
+        self._login_lock = threading.Lock()
         self.init_http_head()
 
     def init_http_head(self):
-        self.cookie = http_cookiejar.CookieJar()
+        self.session, self.headers = self._new_http_session()
         self.url = None
-        self.headers = {
+
+    def _new_http_session(self):
+        # NOTE: one session per login, its connections to the array are
+        # kept alive and shared by concurrent requests.
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_maxsize=constants.REST_CONNECTION_POOL_SIZE)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        headers = {
             "Connection": "keep-alive",
             "Content-Type": "application/json",
         }
+        return session, headers
 
     def do_call(self, url, data=None, method=None,
-                calltimeout=constants.SOCKET_TIMEOUT):
+                calltimeout=constants.SOCKET_TIMEOUT,
+                session=None, headers=None):
         """Send requests to server.
 
         Send HTTPS call, get response in JSON.
         Convert response into Python Object and return it.
+        Unless a session and headers are given, the request goes to
+        the array logged in to last, with the session of that login.
         """
-        if self.url:
-            url = self.url + url
+        if session is None:
+            session, headers, base_url = self.session, self.headers, self.url
+            if base_url:
+                url = base_url + url
         if "xx/sessions" not in url:
             LOG.debug('Request URL: %(url)s\n'
                       'Call Method: %(method)s\n'
@@ -63,16 +80,16 @@ class RestHelper(object):
                       {'url': url,
                        'method': method,
                        'data': data})
-        opener = urlreq.build_opener(urlreq.HTTPCookieProcessor(self.cookie))
-        urlreq.install_opener(opener)
+        if not method:
+            method = "POST" if data is not None else "GET"
         result = None
 
         try:
-            req = urlreq.Request(url, data, self.headers)
-            if method:
-                req.get_method = lambda: method
-            res_temp = urlreq.urlopen(req, timeout=calltimeout)
-            res = res_temp.read().decode("utf-8")
+            res_temp = session.request(method, url, data=data,
+                                       headers=headers,
+                                       timeout=calltimeout)
+            res_temp.raise_for_status()
+            res = res_temp.content.decode("utf-8")
 
             LOG.debug('Response Data: %(res)s.', {'res': res})
 
@@ -93,7 +110,12 @@ class RestHelper(object):
         return result
 
     def login(self):
-        """Login huawei array."""
+        """Login huawei array.
+
+        The session of the new login is only put in use once the login
+        succeeded, so that requests sent meanwhile by others keep using
+        the current one.
+        """
         login_info = self._get_login_info()
         urlstr = login_info['RestURL']
         url_list = urlstr.split(";")
@@ -103,9 +125,10 @@ class RestHelper(object):
             data = jsonutils.dumps({"username": login_info['UserName'],
                                     "password": login_info['UserPassword'],
                                     "scope": "0"})
-            self.init_http_head()
+            session, headers = self._new_http_session()
             result = self.do_call(url, data,
-                                  calltimeout=constants.LOGIN_SOCKET_TIMEOUT)
+                                  calltimeout=constants.LOGIN_SOCKET_TIMEOUT,
+                                  session=session, headers=headers)
 
             if((result['error']['code'] != 0)
                or ("data" not in result)
@@ -116,8 +139,10 @@ class RestHelper(object):
             LOG.debug('Login success: %(url)s\n',
                       {'url': item_url})
             deviceid = result['data']['deviceid']
+            headers['iBaseToken'] = result['data']['iBaseToken']
+            self.session = session
+            self.headers = headers
             self.url = item_url + deviceid
-            self.headers['iBaseToken'] = result['data']['iBaseToken']
             break
 
         if deviceid is None:
@@ -127,22 +152,25 @@ class RestHelper(object):
 
         return deviceid
 
-    @utils.synchronized('huawei_manila')
     def call(self, url, data=None, method=None):
         """Send requests to server.
 
         If fail, try another RestURL.
         """
-        deviceid = None
-        old_url = self.url
+        # NOTE: wait for a re-login in progress to finish.
+        with self._login_lock:
+            old_url = self.url
+            old_token = self.headers.get('iBaseToken')
         result = self.do_call(url, data, method)
         error_code = result['error']['code']
         if(error_code == constants.ERROR_CONNECT_TO_SERVER
            or error_code == constants.ERROR_UNAUTHORIZED_TO_SERVER):
-            LOG.error(_LE("Can't open the recent url, re-login."))
-            deviceid = self.login()
-
-        if deviceid is not None:
+            with self._login_lock:
+                # NOTE: log in again only if no concurrent request has
+                # already done it since this one was sent.
+                if self.headers.get('iBaseToken') == old_token:
+                    LOG.error(_LE("Can't open the recent url, re-login."))
+                    self.login()
             LOG.debug('Replace URL: \n'
                       'Old URL: %(old_url)s\n'
                       'New URL: %(new_url)s\n',
@@ -398,16 +426,18 @@ class RestHelper(object):
         share_client_type = self._get_share_client_type(share_proto)
         count = self._get_access_count(share_id, share_client_type)
 
+        def _get_range(range_begin):
+            return self._get_access_from_share_range(share_id, range_begin,
+                                                     share_client_type)
+
+        # Pages are retrieved concurrently
+        pool = eventlet.GreenPool(constants.REST_CONNECTION_POOL_SIZE)
         access_ids = []
-        range_begin = 0
-        while count > 0:
-            access_range = self._get_access_from_share_range(share_id,
-                                                             range_begin,
-                                                             share_client_type)
+        for access_range in pool.imap(
+                _get_range,
+                range(0, count, constants.ACCESS_QUERY_PAGE_SIZE)):
             for item in access_range:
                 access_ids.append(item['ID'])
-            range_begin += 100
-            count -= 100
 
         return access_ids
 
@@ -436,7 +466,7 @@ class RestHelper(object):
     def _get_access_from_share_range(self, share_id,
                                      range_begin,
                                      share_client_type):
-        range_end = range_begin + 100
+        range_end = range_begin + constants.ACCESS_QUERY_PAGE_SIZE
         url = ("/" + share_client_type + "?filter=PARENTID::"
                + share_id + "&range=[" + six.text_type(range_begin)
                + "-" + six.text_type(range_end) + "]")
@@ -34,6 +34,7 @@ import os
 import re
 import socket
 
+import eventlet
 from oslo_config import cfg
 from oslo_log import log
 from oslo_utils import excutils
@@ -58,6 +59,11 @@ AVPATTERN = re.compile(r'\s*(?P<attr>\w+)\s*=\s*(?P<val>'
 
 ERR_FILE_NOT_FOUND = 2
 
+# keep one master SSH connection per NFS server alive between commands
+SSH_CONTROL_OPTIONS = ['-o', 'ControlMaster=auto',
+                       '-o', 'ControlPath=~/.ssh/manila-gpfs-%r@%h:%p',
+                       '-o', 'ControlPersist=600']
+
 gpfs_share_opts = [
     cfg.StrOpt('gpfs_share_export_ip',
                help='IP to be added to GPFS export string.'),
@@ -671,6 +677,8 @@ class KNFSHelper(NASHelperBase):
     def __init__(self, execute, config_object):
         super(KNFSHelper, self).__init__(execute, config_object)
         self._execute = execute
+        self._local_ip_list = None
+        self._exports = None
         try:
             self._execute('exportfs', check_exit_code=True, run_as_root=True)
         except exception.ProcessExecutionError as e:
@@ -679,24 +687,61 @@ class KNFSHelper(NASHelperBase):
             raise exception.GPFSException(msg)
 
     def _publish_access(self, *cmd):
-        for server in self.configuration.gpfs_nfs_server_list:
-            localserver_iplist = socket.gethostbyname_ex(
+        if self._local_ip_list is None:
+            self._local_ip_list = socket.gethostbyname_ex(
                 socket.gethostname())[2]
-            run_local = True
-            if server not in localserver_iplist:
+
+        def _publish(server):
+            if server in self._local_ip_list:
+                server_cmd = list(cmd)
+                run_local = True
+            else:
                 sshlogin = self.configuration.gpfs_ssh_login
                 remote_login = sshlogin + '@' + server
-                cmd = ['ssh', remote_login] + list(cmd)
+                server_cmd = (['ssh'] + SSH_CONTROL_OPTIONS +
+                              [remote_login] + list(cmd))
                 run_local = False
             try:
-                utils.execute(*cmd,
+                utils.execute(*server_cmd,
                               run_as_root=run_local,
                               check_exit_code=True)
-            except exception.ProcessExecutionError:
-                raise
+            except exception.ProcessExecutionError as e:
+                return e
+
+        # Publish to all the NFS servers concurrently, then raise the first
+        # failure if any.
+        servers = self.configuration.gpfs_nfs_server_list
+        pool = eventlet.GreenPool(len(servers) or 1)
+        for error in pool.imap(_publish, servers):
+            if error is not None:
+                raise error
+
+    def _get_exports(self, refresh=False):
+        """Returns the set of (path, host) exported by the NFS server.
+
+        The export table is read once and then kept up to date with the
+        changes made by this helper, unless a refresh is requested.
+        """
+        if self._exports is None or refresh:
+            out, __ = self._execute('exportfs', run_as_root=True)
+            exports = set()
+            path = None
+            for line in out.splitlines():
+                items = line.split()
+                if not items:
+                    continue
+                if not line[0].isspace():
+                    path = items.pop(0)
+                if items and path:
+                    exports.add((path, items[0]))
+            self._exports = exports
+        return self._exports
 
     def remove_export(self, local_path, share):
         """Remove export."""
+        if self._exports is not None:
+            self._exports = set(export for export in self._exports
+                                if export[0] != local_path)
 
     def allow_access(self, local_path, share, access):
         """Allow access to one or more vm instances."""
@@ -707,17 +752,20 @@ class KNFSHelper(NASHelperBase):
 
         # check if present in export
         try:
-            out, __ = self._execute('exportfs', run_as_root=True)
+            cached = self._exports is not None
+            exports = self._get_exports()
+            if cached and (local_path, access['access_to']) in exports:
+                # NOTE: exports removed outside of manila, or lost by a
+                # restart of the NFS server, are only seen by reading the
+                # export table again.
+                exports = self._get_exports(refresh=True)
         except exception.ProcessExecutionError as e:
             msg = (_('Failed to check exports on the systems. '
                      ' Error: %s.') % e)
             LOG.error(msg)
             raise exception.GPFSException(msg)
 
-        out = re.search(re.escape(local_path) + '[\s\n]*'
-                        + re.escape(access['access_to']), out)
-
-        if out is not None:
+        if (local_path, access['access_to']) in exports:
             access_type = access['access_type']
             access_to = access['access_to']
             raise exception.ShareAccessExists(access_type=access_type,
@@ -731,12 +779,14 @@ class KNFSHelper(NASHelperBase):
         try:
             self._publish_access(*cmd)
         except exception.ProcessExecutionError as e:
+            self._exports = None
             msg = (_('Failed to allow access for share %(sharename)s. '
                      'Error: %(excmsg)s.') %
                    {'sharename': share['name'],
                     'excmsg': e})
             LOG.error(msg)
             raise exception.GPFSException(msg)
+        exports.add((local_path, access['access_to']))
 
     def deny_access(self, local_path, share, access, force=False):
         """Remove access for one or more vm instances."""
@@ -744,12 +794,15 @@ class KNFSHelper(NASHelperBase):
         try:
             self._publish_access(*cmd)
         except exception.ProcessExecutionError as e:
+            self._exports = None
             msg = (_('Failed to deny access for share %(sharename)s. '
                      'Error: %(excmsg)s.') %
                    {'sharename': share['name'],
                     'excmsg': e})
             LOG.error(msg)
             raise exception.GPFSException(msg)
+        if self._exports is not None:
+            self._exports.discard((local_path, access['access_to']))
 
 
 class CESHelper(NASHelperBase):
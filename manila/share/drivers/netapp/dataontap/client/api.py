@@ -19,11 +19,14 @@ Contains classes required to issue API calls to Data ONTAP and OnCommand DFM.
 """
 
 import copy
+import threading
+import time
 
 from lxml import etree
 from oslo_log import log
+import requests
+from requests import adapters
 import six
-from six.moves import urllib
 
 from manila import exception
 from manila.i18n import _
@@ -50,6 +53,56 @@ ERELATION_NOT_QUIESCED = '17127'
 ESOURCE_IS_DIFFERENT = '17105'
 EVOL_CLONE_BEING_SPLIT = '17151'
 
+DEFAULT_POOL_SIZE = 10
+
+
+class NaConnectionPool(object):
+    """Keep-alive HTTP connections to a storage system.
+
+    A pool is shared by all NaServer instances that talk to the same
+    storage system with the same credentials, such as the per-vserver
+    clients of a back end, and keeps latency statistics per API.
+    """
+
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, username, password, pool_size):
+        self.session = requests.Session()
+        self.session.auth = (username, password)
+        adapter = adapters.HTTPAdapter(pool_connections=1,
+                                       pool_maxsize=pool_size,
+                                       pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._api_stats = {}
+
+    @classmethod
+    def get(cls, url, username, password, pool_size):
+        """Get the pool of connections to a URL, creating it if needed."""
+        key = (url, username, password)
+        with cls._pools_lock:
+            pool = cls._pools.get(key)
+            if not pool:
+                pool = cls._pools[key] = cls(username, password, pool_size)
+        return pool
+
+    def __deepcopy__(self, memo):
+        # NOTE: clients are deep copied to target other vservers, the copies
+        # keep sharing the connections of the original.
+        return self
+
+    def record_latency(self, api_name, seconds):
+        stats = self._api_stats.setdefault(
+            api_name, {'count': 0, 'total': 0.0, 'max': 0.0})
+        stats['count'] += 1
+        stats['total'] += seconds
+        stats['max'] = max(stats['max'], seconds)
+
+    def get_api_stats(self):
+        """Return the number of calls and their total and max latencies."""
+        return copy.deepcopy(self._api_stats)
+
 
 class NaServer(object):
     """Encapsulates server connection logic."""
@@ -67,7 +120,8 @@ class NaServer(object):
     def __init__(self, host, server_type=SERVER_TYPE_FILER,
                  transport_type=TRANSPORT_TYPE_HTTP,
                  style=STYLE_LOGIN_PASSWORD, username=None,
-                 password=None, port=None, trace=False):
+                 password=None, port=None, trace=False,
+                 pool_size=DEFAULT_POOL_SIZE):
         self._host = host
         self.set_server_type(server_type)
         self.set_transport_type(transport_type)
@@ -79,6 +133,8 @@ class NaServer(object):
         self._trace = trace
         self._refresh_conn = True
         self._trace = trace
+        self._pool_size = pool_size
+        self._pool = None
 
         LOG.debug('Using NetApp controller: %s', self._host)
 
@@ -226,22 +282,26 @@ class NaServer(object):
         if self._trace:
             LOG.debug("Request: %s", request_element.to_string(pretty=True))
 
-        if not hasattr(self, '_opener') or not self._opener \
-                or self._refresh_conn:
-            self._build_opener()
+        if not self._pool or self._refresh_conn:
+            self._build_pool()
+        start = time.time()
         try:
-            if hasattr(self, '_timeout'):
-                response = self._opener.open(request, timeout=self._timeout)
-            else:
-                response = self._opener.open(request)
-        except urllib.error.HTTPError as e:
-            raise NaApiError(e.code, e.msg)
-        except urllib.error.URLError as e:
+            response = self._pool.session.post(
+                self._get_url(), data=request,
+                headers={'Content-Type': 'text/xml', 'charset': 'utf-8'},
+                timeout=self.get_timeout())
+        except (requests.ConnectionError, requests.Timeout) as e:
             raise exception.StorageCommunicationException(six.text_type(e))
         except Exception as e:
             raise NaApiError(message=e)
+        finally:
+            self._pool.record_latency(na_element.get_name(),
+                                      time.time() - start)
 
-        response_xml = response.read()
+        if response.status_code != requests.codes.ok:
+            raise NaApiError(response.status_code, response.reason)
+
+        response_xml = response.content
         response_element = self._get_result(response_xml)
 
         if self._trace:
@@ -280,10 +340,7 @@ class NaServer(object):
         if enable_tunneling:
             self._enable_tunnel_request(netapp_elem)
         netapp_elem.add_child_elem(na_element)
-        request_d = netapp_elem.to_string()
-        request = urllib.request.Request(
-            self._get_url(), data=request_d,
-            headers={'Content-Type': 'text/xml', 'charset': 'utf-8'})
+        request = netapp_elem.to_string()
         return request, netapp_elem
 
     def _enable_tunnel_request(self, netapp_elem):
@@ -323,23 +380,18 @@ class NaServer(object):
         return '%s://%s:%s/%s' % (self._protocol, self._host, self._port,
                                   self._url)
 
-    def _build_opener(self):
-        if self._auth_style == NaServer.STYLE_LOGIN_PASSWORD:
-            auth_handler = self._create_basic_auth_handler()
-        else:
-            auth_handler = self._create_certificate_auth_handler()
-        opener = urllib.request.build_opener(auth_handler)
-        self._opener = opener
-
-    def _create_basic_auth_handler(self):
-        password_man = urllib.request.HTTPPasswordMgrWithDefaultRealm()
-        password_man.add_password(None, self._get_url(), self._username,
-                                  self._password)
-        auth_handler = urllib.request.HTTPBasicAuthHandler(password_man)
-        return auth_handler
-
-    def _create_certificate_auth_handler(self):
-        raise NotImplementedError()
+    def _build_pool(self):
+        if self._auth_style != NaServer.STYLE_LOGIN_PASSWORD:
+            raise NotImplementedError()
+        self._pool = NaConnectionPool.get(self._get_url(), self._username,
+                                          self._password, self._pool_size)
+        self._refresh_conn = False
+
+    def get_api_stats(self):
+        """Get the latency statistics per API of this storage system."""
+        if not self._pool:
+            return {}
+        return self._pool.get_api_stats()
 
     def __str__(self):
         return "server: %s" % (self._host)
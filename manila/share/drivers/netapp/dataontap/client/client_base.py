@@ -33,7 +33,9 @@ class NetAppBaseClient(object):
             port=kwargs['port'],
             username=kwargs['username'],
             password=kwargs['password'],
-            trace=kwargs.get('trace', False))
+            trace=kwargs.get('trace', False),
+            pool_size=kwargs.get('pool_size',
+                                 netapp_api.DEFAULT_POOL_SIZE))
 
     def get_ontapi_version(self, cached=True):
         """Gets the supported ontapi version."""
@@ -119,8 +119,7 @@ class NetAppCmodeClient(client_base.NetAppBaseClient):
 
         # Get remaining pages, saving data into first page
         while next_tag is not None:
-            next_api_args = copy.deepcopy(api_args)
-            next_api_args['tag'] = next_tag
+            next_api_args = dict(api_args, tag=next_tag)
             next_result = self.send_request(api_name, next_api_args)
 
             next_attributes_list = next_result.get_child_by_name(
@@ -137,6 +136,30 @@ class NetAppCmodeClient(client_base.NetAppBaseClient):
         result.get_child_by_name('next-tag').set_content('')
         return result
 
+    def send_iter_records(self, api_name, api_args=None,
+                          max_page_length=DEFAULT_MAX_PAGE_LENGTH):
+        """Invoke an iterator-style getter API, yielding its records.
+
+        Unlike send_iter_request, pages are not merged into one result, so
+        records are yielded as each page is received and the previous pages
+        can be released by the caller.
+        """
+
+        api_args = dict(api_args or {}, **{'max-records': max_page_length})
+
+        while True:
+            result = self.send_request(api_name, api_args)
+
+            attributes_list = result.get_child_by_name(
+                'attributes-list') or netapp_api.NaElement('none')
+            for record in attributes_list.get_children():
+                yield record
+
+            next_tag = result.get_child_content('next-tag')
+            if not next_tag:
+                return
+            api_args = dict(api_args, tag=next_tag)
+
     @na_utils.trace
     def create_vserver(self, vserver_name, root_volume_aggregate_name,
                        root_volume_name, aggregate_names, ipspace_name):
@@ -760,11 +783,8 @@ class NetAppCmodeClient(client_base.NetAppBaseClient):
                 },
             },
         }
-        result = self.send_iter_request('net-interface-get-iter', api_args)
-        lif_info_list = result.get_child_by_name(
-            'attributes-list') or netapp_api.NaElement('none')
         return [lif_info.get_child_content('interface-name') for lif_info
-                in lif_info_list.get_children()]
+                in self.send_iter_records('net-interface-get-iter', api_args)]
 
     @na_utils.trace
     def get_network_interfaces(self, protocols=None):
@@ -1042,11 +1062,7 @@ class NetAppCmodeClient(client_base.NetAppBaseClient):
         if desired_attributes:
             api_args['desired-attributes'] = desired_attributes
 
-        result = self.send_iter_request('aggr-get-iter', api_args)
-        if not self._has_records(result):
-            return []
-        else:
-            return result.get_child_by_name('attributes-list').get_children()
+        return list(self.send_iter_records('aggr-get-iter', api_args))
 
     @na_utils.trace
     def setup_security_services(self, security_services, vserver_client,
@@ -2086,14 +2102,10 @@ class NetAppCmodeClient(client_base.NetAppBaseClient):
                 },
             },
         }
-        result = self.send_iter_request('snapshot-get-iter', api_args)
-
-        attributes_list = result.get_child_by_name(
-            'attributes-list') or netapp_api.NaElement('none')
-
         # Build a map of snapshots, one list of snapshots per vserver
         snapshot_map = {}
-        for snapshot_info in attributes_list.get_children():
+        for snapshot_info in self.send_iter_records('snapshot-get-iter',
+                                                    api_args):
             vserver = snapshot_info.get_child_content('vserver')
             snapshot_list = snapshot_map.get(vserver, [])
             snapshot_list.append({
@@ -3043,11 +3055,7 @@ class NetAppCmodeClient(client_base.NetAppBaseClient):
         if desired_attributes:
             api_args['desired-attributes'] = desired_attributes
 
-        result = self.send_iter_request('snapmirror-get-iter', api_args)
-        if not self._has_records(result):
-            return []
-        else:
-            return result.get_child_by_name('attributes-list').get_children()
+        return list(self.send_iter_records('snapmirror-get-iter', api_args))
 
     @na_utils.trace
     def get_snapmirrors(self, source_vserver, source_volume,
@@ -74,7 +74,8 @@ def get_client_for_backend(backend_name, vserver_name=None):
         hostname=config.netapp_server_hostname,
         port=config.netapp_server_port,
         vserver=vserver_name or config.netapp_vserver,
-        trace=na_utils.TRACE_API)
+        trace=na_utils.TRACE_API,
+        pool_size=config.netapp_connection_pool_size)
 
     return client
 
@@ -139,6 +139,9 @@ class NetAppCmodeMultiSvmShareDriver(driver.ShareDriver):
                         share_server=None):
         raise NotImplementedError()
 
+    def update_replica_states(self, context, replicas):
+        raise NotImplementedError()
+
     def update_replica_state(self, context, replica_list, replica,
                              access_rules, replica_snapshots,
                              share_server=None):
@@ -143,6 +143,9 @@ class NetAppCmodeSingleSvmShareDriver(driver.ShareDriver):
                                             access_rules,
                                             share_server=share_server)
 
+    def update_replica_states(self, context, replicas):
+        return self.library.update_replica_states(context, replicas)
+
     def update_replica_state(self, context, replica_list, replica,
                              access_rules, replica_snapshots,
                              share_server=None):
@@ -131,7 +131,8 @@ class NetAppCmodeFileStorageLibrary(object):
                 hostname=self.configuration.netapp_server_hostname,
                 port=self.configuration.netapp_server_port,
                 vserver=vserver,
-                trace=na_utils.TRACE_API)
+                trace=na_utils.TRACE_API,
+                pool_size=self.configuration.netapp_connection_pool_size)
             self._clients[vserver] = client
 
         return client
@@ -234,8 +235,25 @@ class NetAppCmodeFileStorageLibrary(object):
             data['replication_type'] = 'dr'
             data['replication_domain'] = self.configuration.replication_domain
 
+        self._log_api_stats()
         return data
 
+    def _log_api_stats(self):
+        """Log the number and latency of the API calls made so far."""
+        api_stats = self._client.connection.get_api_stats()
+        if not api_stats:
+            return
+
+        summary = ', '.join(
+            '%(api)s: %(count)d calls, avg %(avg).3fs, max %(max).3fs' % {
+                'api': api_name,
+                'count': stats['count'],
+                'avg': stats['total'] / stats['count'],
+                'max': stats['max'],
+            } for api_name, stats in sorted(api_stats.items()))
+        LOG.debug('API latency of back end %(backend)s: %(summary)s',
+                  {'backend': self._backend_name, 'summary': summary})
+
     @na_utils.trace
     def get_share_server_pools(self, share_server):
         """Return list of pools related to a particular share server.
@@ -1304,6 +1322,12 @@ class NetAppCmodeFileStorageLibrary(object):
                 LOG.exception(_LE("Could not resync snapmirror."))
                 return constants.STATUS_ERROR
 
+        return self._get_snapmirrored_replica_state(
+            vserver_client, share_name, snapmirror, share_snapshots)
+
+    def _get_snapmirrored_replica_state(self, vserver_client, share_name,
+                                        snapmirror, share_snapshots):
+        """Returns the state of a replica with a healthy snapmirror."""
         last_update_timestamp = float(
             snapmirror.get('last-transfer-end-timestamp', 0))
         # TODO(ameade): Have a configurable RPO for replicas, for now it is
@@ -1324,6 +1348,72 @@ class NetAppCmodeFileStorageLibrary(object):
 
         return constants.REPLICA_STATE_IN_SYNC
 
+    def update_replica_states(self, context, replicas):
+        """Returns the states of many replicas on this backend.
+
+        The snapmirrors of the replicas are read with one request per
+        vserver. Replicas whose snapmirror is missing or broken are left
+        out, so that update_replica_state() sets it up again.
+        """
+        dm_session = data_motion.DataMotionSession()
+        vservers = {}
+        for update_data in replicas:
+            share_server = update_data['share_server']
+            key = share_server['id'] if share_server else None
+            if key not in vservers:
+                vserver, vserver_client = self._get_vserver(
+                    share_server=share_server)
+                vservers[key] = (vserver, vserver_client, [])
+            vservers[key][2].append(update_data)
+
+        replica_states = {}
+        for vserver, vserver_client, vserver_replicas in vservers.values():
+            try:
+                snapmirrors = vserver_client.get_snapmirrors(
+                    None, None, vserver, None,
+                    desired_attributes=['relationship-status',
+                                        'mirror-state',
+                                        'source-vserver',
+                                        'source-volume',
+                                        'destination-volume',
+                                        'last-transfer-end-timestamp'])
+            except netapp_api.NaApiError:
+                LOG.exception(_LE("Could not get snapmirrors of vserver "
+                                  "%s."), vserver)
+                continue
+            snapmirrors = {
+                (snapmirror.get('source-vserver'),
+                 snapmirror.get('source-volume'),
+                 snapmirror.get('destination-volume')): snapmirror
+                for snapmirror in snapmirrors}
+
+            for update_data in vserver_replicas:
+                replica = update_data['replica']
+                share_name = self._get_backend_share_name(replica['id'])
+                active_replica = self._find_active_replica(
+                    update_data['replica_list'])
+                src_volume, src_vserver, __ = (
+                    dm_session.get_backend_info_for_share(active_replica))
+                snapmirror = snapmirrors.get(
+                    (src_vserver, src_volume, share_name))
+                if not snapmirror:
+                    continue
+                if snapmirror.get('mirror-state') != 'snapmirrored':
+                    if (snapmirror.get('relationship-status') ==
+                            'transferring'):
+                        replica_states[replica['id']] = (
+                            constants.REPLICA_STATE_OUT_OF_SYNC)
+                    continue
+                try:
+                    replica_states[replica['id']] = (
+                        self._get_snapmirrored_replica_state(
+                            vserver_client, share_name, snapmirror,
+                            update_data['replica_snapshots']))
+                except netapp_api.NaApiError:
+                    LOG.exception(_LE("Could not check snapshots of "
+                                      "replica %s."), replica['id'])
+        return replica_states
+
     def promote_replica(self, context, replica_list, replica, access_rules,
                         share_server=None):
         """Switch SnapMirror relationships and allow r/w ops on replica.
@@ -36,7 +36,13 @@ netapp_connection_opts = [
     cfg.PortOpt('netapp_server_port',
                 help=('The TCP port to use for communication with the storage '
                       'system or proxy server. If not specified, Data ONTAP '
-                      'drivers will use 80 for HTTP and 443 for HTTPS.')), ]
+                      'drivers will use 80 for HTTP and 443 for HTTPS.')),
+    cfg.IntOpt('netapp_connection_pool_size',
+               min=1,
+               default=10,
+               help=('The maximum number of concurrent keep-alive HTTP '
+                     'connections to the storage system. The connections are '
+                     'shared by all Vservers of a back end.')), ]
 
 netapp_transport_opts = [
     cfg.StrOpt('netapp_transport_type',
@@ -27,6 +27,7 @@ from oslo_log import log
 from oslo_utils import importutils
 from oslo_utils import strutils
 from oslo_utils import timeutils
+from oslo_utils import units
 
 from manila.common import constants
 from manila import exception
@@ -350,15 +351,21 @@ class ZFSonLinuxShareDriver(zfs_utils.ExecuteMixin, driver.ShareDriver):
     def _get_pools_info(self):
         """Returns info about all pools used by backend."""
         pools = []
+        # NOTE: one call with exact values in bytes for all the zpools.
+        out, err = self.execute(
+            'sudo', 'zpool', 'list', '-H', '-p', '-o', 'name,size,free',
+            *self.zpool_list)
+        sizes = {}
+        for line in out.splitlines():
+            values = line.split()
+            if len(values) == 3:
+                sizes[values[0]] = values[1:]
         for zpool in self.zpool_list:
-            free_size = self.get_zpool_option(zpool, 'free')
-            free_size = utils.translate_string_size_to_float(free_size)
-            total_size = self.get_zpool_option(zpool, 'size')
-            total_size = utils.translate_string_size_to_float(total_size)
+            total_size, free_size = sizes[zpool]
             pool = {
                 'pool_name': zpool,
-                'total_capacity_gb': float(total_size),
-                'free_capacity_gb': float(free_size),
+                'total_capacity_gb': float(total_size) / units.Gi,
+                'free_capacity_gb': float(free_size) / units.Gi,
                 'reserved_percentage':
                     self.configuration.reserved_share_percentage,
             }
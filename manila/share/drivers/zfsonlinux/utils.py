@@ -140,6 +140,22 @@ class ExecuteMixin(driver.ExecuteMixin):
         """Returns value of requested zfs dataset option."""
         return self._get_option(dataset_name, option_name, False, **kwargs)
 
+    def dataset_exists(self, dataset_name, **kwargs):
+        """Says whether given ZFS dataset exists or not.
+
+        Only the requested dataset is queried, so the cost does not depend
+        on the amount of datasets in its zpool.
+        """
+        try:
+            out, err = self.zfs(
+                'get', '-H', '-p', '-o', 'value', 'name', dataset_name,
+                **kwargs)
+        except exception.ProcessExecutionError as e:
+            if 'dataset does not exist' in (e.stderr or ''):
+                return False
+            raise
+        return out.strip() == dataset_name
+
     def zfs(self, *cmd, **kwargs):
         """ZFS shell commands executor."""
         return self.execute('sudo', 'zfs', *cmd, **kwargs)
@@ -292,13 +308,8 @@ class NFSviaZFSHelper(ExecuteMixin, NASHelperBase):
                 rules.append("%s:ro,no_root_squash" % rule)
             rules_str = "sharenfs=" + (' '.join(rules) or 'off')
 
-        out, err = self.zfs(
-            'list', '-r', dataset_name.split('/')[0], executor=executor)
-        data = self.parse_zfs_answer(out)
-        for datum in data:
-            if datum['NAME'] == dataset_name:
-                self.zfs("set", rules_str, dataset_name)
-                break
+        if self.dataset_exists(dataset_name, executor=executor):
+            self.zfs("set", rules_str, dataset_name)
         else:
             LOG.warning(
                 _LW("Dataset with '%(name)s' NAME is absent on backend. "
@@ -23,6 +23,7 @@ import copy
 import datetime
 import functools
 
+import eventlet
 from oslo_config import cfg
 from oslo_log import log
 from oslo_serialization import jsonutils
@@ -96,6 +97,12 @@ share_manager_opts = [
                help='This value, specified in seconds, determines how often '
                     'the share manager will poll for the health '
                     '(replica_state) of each replica instance.'),
+    cfg.IntOpt('ensure_share_workers',
+               default=4,
+               min=1,
+               help='Number of share instances re-exported concurrently on '
+                    'share service start, when the share driver does not '
+                    'support ensuring shares in bulk.'),
     cfg.IntOpt('migration_driver_continue_update_interval',
                default=60,
                help='This value, specified in seconds, determines how often '
@@ -186,7 +193,7 @@ def add_hooks(f):
 class ShareManager(manager.SchedulerDependentManager):
     """Manages NAS storages."""
 
-    RPC_API_VERSION = '1.12'
+    RPC_API_VERSION = '1.13'
 
     def __init__(self, share_driver=None, service_name=None, *args, **kwargs):
         """Load the driver from args, or from flags."""
@@ -216,6 +223,13 @@ class ShareManager(manager.SchedulerDependentManager):
         )
 
         self.access_helper = access.ShareInstanceAccess(self.db, self.driver)
+        # NOTE: replicas are only polled in bulk if the driver implements
+        # update_replica_states; this is turned off if the driver fails
+        # it, so that the data it needs is not gathered in vain on every
+        # run of periodic_share_replica_update.
+        self._replica_states_bulk_supported = (
+            self.driver._has_redefined_driver_methods(
+                'update_replica_states'))
 
         self.hooks = []
         self._init_hook_drivers()
@@ -283,11 +297,20 @@ class ShareManager(manager.SchedulerDependentManager):
         else:
             self.driver.initialized = True
 
-        share_instances = self.db.share_instances_get_all_by_host(ctxt,
-                                                                  self.host)
-        LOG.debug("Re-exporting %s shares", len(share_instances))
+        # NOTE: publish capabilities before re-exporting existing shares,
+        # so that the scheduler does not wait for it to place new shares.
+        self.publish_service_capabilities(ctxt)
+
+        start_time = timeutils.utcnow()
+        share_instances = self.db.share_instances_get_all_by_host(
+            ctxt, self.host, with_share_data=True)
+        shares = {
+            share['id']: share for share in self.db.share_get_all_by_ids(
+                ctxt, [si['share_id'] for si in share_instances])
+        }
+        instances_to_ensure = []
         for share_instance in share_instances:
-            share_ref = self.db.share_get(ctxt, share_instance['share_id'])
+            share_ref = shares[share_instance['share_id']]
 
             if (share_ref['task_state'] == (
                     constants.TASK_STATE_MIGRATION_DRIVER_IN_PROGRESS) and
@@ -312,10 +335,100 @@ class ShareManager(manager.SchedulerDependentManager):
                 )
                 continue
 
+            instances_to_ensure.append(share_instance)
+
+        LOG.debug("Re-exporting %s shares", len(instances_to_ensure))
+        ensured = self._ensure_share_instances(ctxt, instances_to_ensure)
+
+        self.publish_service_capabilities(ctxt)
+        LOG.info(_LI("Finished initialization of driver: '%(driver)s"
+                     "@%(host)s'. Re-exported %(ensured)s of %(total)s "
+                     "shares in %(seconds).1f seconds."),
+                 {"driver": self.driver.__class__.__name__,
+                  "host": self.host,
+                  "ensured": ensured,
+                  "total": len(instances_to_ensure),
+                  "seconds": timeutils.delta_seconds(
+                      start_time, timeutils.utcnow())})
+
+    def _ensure_share_instances(self, ctxt, share_instances):
+        """Re-exports share instances and syncs their access rules.
+
+        The driver is first asked to ensure all shares in bulk. Drivers
+        without bulk support get ensure_share() calls for each share, made by
+        a pool of 'ensure_share_workers' green threads.
+
+        :returns: number of share instances that were re-exported
+        """
+        share_servers = {}
+        ensure_list = []
+        for share_instance in share_instances:
+            has_pool = share_utils.extract_host(
+                share_instance['host'], 'pool') is not None
             self._ensure_share_instance_has_pool(ctxt, share_instance)
-            share_server = self._get_share_server(ctxt, share_instance)
-            share_instance = self.db.share_instance_get(
-                ctxt, share_instance['id'], with_share_data=True)
+            if not has_pool:
+                share_instance = self.db.share_instance_get(
+                    ctxt, share_instance['id'], with_share_data=True)
+
+            share_server_id = share_instance['share_server_id']
+            if share_server_id and share_server_id in share_servers:
+                share_server = share_servers[share_server_id]
+            else:
+                share_server = self._get_share_server(ctxt, share_instance)
+                share_servers[share_server_id] = share_server
+            ensure_list.append(
+                {'share': share_instance, 'share_server': share_server})
+
+        if not ensure_list:
+            return 0
+
+        try:
+            bulk_updates = self.driver.ensure_shares(ctxt, ensure_list) or {}
+        except NotImplementedError:
+            bulk_updates = None
+        except Exception as e:
+            LOG.error(
+                _LE("Caught exception trying to ensure shares in bulk, "
+                    "ensuring them one by one. Exception: \n%s."),
+                six.text_type(e))
+            bulk_updates = None
+
+        if bulk_updates:
+            export_locations = {}
+            for item in ensure_list:
+                instance_id = item['share']['id']
+                if bulk_updates.get(instance_id):
+                    export_locations[instance_id] = bulk_updates[instance_id]
+            if export_locations:
+                self.db.share_export_locations_update_bulk(
+                    ctxt, export_locations)
+
+        def _ensure(item):
+            return self._ensure_share_instance(
+                ctxt, item['share'], item['share_server'], bulk_updates)
+
+        ensured = 0
+        pool = eventlet.GreenPool(CONF.ensure_share_workers)
+        for done, (item, result) in enumerate(
+                zip(ensure_list, pool.imap(_ensure, ensure_list)), 1):
+            if result:
+                ensured += 1
+            LOG.debug("Share instance %(id)s: processed %(done)s of "
+                      "%(total)s shares.",
+                      {'id': item['share']['id'], 'done': done,
+                       'total': len(ensure_list)})
+        return ensured
+
+    def _ensure_share_instance(self, ctxt, share_instance, share_server,
+                               bulk_updates=None):
+        """Re-exports a share instance and syncs its access rules.
+
+        :param bulk_updates: result of driver's ensure_shares() call, or None
+            if the share has to be ensured with ensure_share(). Export
+            locations returned in bulk are expected to be already saved.
+        :returns: True if the share instance was re-exported
+        """
+        if bulk_updates is None:
             try:
                 export_locations = self.driver.ensure_share(
                     ctxt, share_instance, share_server=share_server)
@@ -325,31 +438,26 @@ class ShareManager(manager.SchedulerDependentManager):
                         "Exception: \n%(e)s."),
                     {'s_id': share_instance['id'], 'e': six.text_type(e)},
                 )
-                continue
+                return False
 
             if export_locations:
                 self.db.share_export_locations_update(
                     ctxt, share_instance['id'], export_locations)
 
-            if share_instance['access_rules_status'] == (
-                    constants.STATUS_OUT_OF_SYNC):
+        if share_instance['access_rules_status'] == (
+                constants.STATUS_OUT_OF_SYNC):
 
-                try:
-                    self.access_helper.update_access_rules(
-                        ctxt, share_instance['id'], share_server=share_server)
-                except Exception as e:
-                    LOG.error(
-                        _LE("Unexpected error occurred while updating access "
-                            "rules for share instance %(s_id)s. "
-                            "Exception: \n%(e)s."),
-                        {'s_id': share_instance['id'], 'e': six.text_type(e)},
-                    )
-
-        self.publish_service_capabilities(ctxt)
-        LOG.info(_LI("Finished initialization of driver: '%(driver)s"
-                     "@%(host)s'"),
-                 {"driver": self.driver.__class__.__name__,
-                  "host": self.host})
+            try:
+                self.access_helper.update_access_rules(
+                    ctxt, share_instance['id'], share_server=share_server)
+            except Exception as e:
+                LOG.error(
+                    _LE("Unexpected error occurred while updating access "
+                        "rules for share instance %(s_id)s. "
+                        "Exception: \n%(e)s."),
+                    {'s_id': share_instance['id'], 'e': six.text_type(e)},
+                )
+        return True
 
     def _provide_share_server_for_share(self, context, share_network_id,
                                         share_instance, snapshot=None,
@@ -938,9 +1046,24 @@ class ShareManager(manager.SchedulerDependentManager):
 
         readonly_support = self.driver.configuration.safe_get(
             'migration_readonly_rules_support')
-
-        helper.change_to_read_only(src_share_instance, share_server,
-                                   readonly_support, self.driver)
+        writable_passes = self.driver.configuration.safe_get(
+            'migration_writable_copy_passes') or 0
+        if writable_passes and not readonly_support:
+            # NOTE: without read-only rules the source is made read-only by
+            # removing all of its access rules, which would also remove the
+            # rule that grants the Data Service access to it for the last
+            # copy pass.
+            LOG.warning(_LW("Ignoring migration_writable_copy_passes for "
+                            "migration of share %s, as the back end does "
+                            "not support read-only access rules."),
+                        share['id'])
+            writable_passes = 0
+
+        # NOTE: with writable copy passes, the Data Service requests the
+        # source to be made read-only before its last copy pass.
+        if not writable_passes:
+            helper.change_to_read_only(src_share_instance, share_server,
+                                       readonly_support, self.driver)
 
         try:
             dest_share_instance = helper.create_instance_and_wait(
@@ -977,7 +1100,7 @@ class ShareManager(manager.SchedulerDependentManager):
             data_rpc.migration_start(
                 context, share['id'], ignore_list, src_share_instance['id'],
                 dest_share_instance['id'], src_connection_info,
-                dest_connection_info)
+                dest_connection_info, writable_passes=writable_passes)
 
         except Exception:
             msg = _("Failed to obtain migration info from backends or"
@@ -1042,6 +1165,27 @@ class ShareManager(manager.SchedulerDependentManager):
 
         self._check_delete_share_server(context, share_instance)
 
+    @utils.require_driver_initialized
+    def migration_change_to_read_only(self, context, src_instance_id):
+
+        src_share_instance = self.db.share_instance_get(
+            context, src_instance_id, with_share_data=True)
+        share_ref = self.db.share_get(context, src_share_instance['share_id'])
+
+        LOG.info(_LI("Changing share %s to read-only for the last data copy "
+                     "pass of its migration."), share_ref['id'])
+
+        helper = migration.ShareMigrationHelper(context, self.db, share_ref)
+
+        share_server = self._get_share_server(context.elevated(),
+                                              src_share_instance)
+
+        readonly_support = self.driver.configuration.safe_get(
+            'migration_readonly_rules_support')
+
+        helper.change_to_read_only(src_share_instance, share_server,
+                                   readonly_support, self.driver)
+
     @utils.require_driver_initialized
     def migration_complete(self, context, src_instance_id, dest_instance_id):
 
@@ -1761,18 +1905,32 @@ class ShareManager(manager.SchedulerDependentManager):
     @utils.require_driver_initialized
     def periodic_share_replica_update(self, context):
         LOG.debug("Updating status of share replica instances.")
-        replicas = self.db.share_replicas_get_all(context,
-                                                  with_share_data=True)
-
-        # Filter only non-active replicas belonging to this backend
-        def qualified_replica(r):
-            return (share_utils.extract_host(r['host']) ==
-                    share_utils.extract_host(self.host))
-
-        replicas = list(filter(lambda x: qualified_replica(x), replicas))
+        start_time = timeutils.utcnow()
+
+        # Only non-active replicas belonging to this backend are polled,
+        # they are re-read from the database before being updated.
+        replicas = self.db.share_replicas_get_all_by_host(
+            context, share_utils.extract_host(self.host), exclude_active=True)
+
+        replica_states = None
+        if replicas and self._replica_states_bulk_supported:
+            replica_states = self._get_share_replica_states(
+                context, replicas)
+        replica_states = replica_states or {}
         for replica in replicas:
-            self._share_replica_update(
-                context, replica, share_id=replica['share_id'])
+            if replica['id'] not in replica_states:
+                self._share_replica_update(
+                    context, replica, share_id=replica['share_id'])
+            elif replica_states[replica['id']]:
+                self._set_share_replica_state(
+                    context, replica, replica_states[replica['id']],
+                    share_id=replica['share_id'])
+
+        LOG.debug("Updated status of %(count)s share replica instances in "
+                  "%(seconds).1f seconds.",
+                  {'count': len(replicas),
+                   'seconds': timeutils.delta_seconds(
+                       start_time, timeutils.utcnow())})
 
     @add_hooks
     @utils.require_driver_initialized
@@ -1783,8 +1941,15 @@ class ShareManager(manager.SchedulerDependentManager):
             with_share_server=True)
         self._share_replica_update(context, share_replica, share_id=share_id)
 
-    @locked_share_replica_operation
-    def _share_replica_update(self, context, share_replica, share_id=None):
+    def _get_share_replica_update_data(self, context, share_replica,
+                                       share_data=None):
+        """Gathers the data needed by the driver to update a replica's state.
+
+        :param share_data: optional dict, used to cache the data gathered for
+            each share between calls for replicas of the same share
+        :returns: dict with the arguments of the driver's
+            update_replica_state(), or None if the replica must not be polled
+        """
         share_server = self._get_share_server(context, share_replica)
 
         # Re-grab the replica:
@@ -1803,43 +1968,62 @@ class ShareManager(manager.SchedulerDependentManager):
                 constants.REPLICA_STATE_ACTIVE):
             return
 
-        access_rules = self.db.share_access_get_all_for_share(
-            context, share_replica['share_id'])
-
-        LOG.debug("Updating status of share share_replica %s: ",
-                  share_replica['id'])
-
-        replica_list = (
-            self.db.share_replicas_get_all_by_share(
-                context, share_replica['share_id'],
-                with_share_data=True, with_share_server=True)
-        )
+        share_id = share_replica['share_id']
+        if share_data is None or share_id not in share_data:
+            data = {
+                'access_rules': self.db.share_access_get_all_for_share(
+                    context, share_id),
+                'replica_list': self.db.share_replicas_get_all_by_share(
+                    context, share_id,
+                    with_share_data=True, with_share_server=True),
+                # Get snapshots for the share.
+                'share_snapshots': self.db.share_snapshot_get_all_for_share(
+                    context, share_id),
+            }
+            if share_data is not None:
+                share_data[share_id] = data
+        else:
+            data = share_data[share_id]
 
-        _active_replica = [x for x in replica_list
+        _active_replica = [x for x in data['replica_list']
                            if x['replica_state'] ==
                            constants.REPLICA_STATE_ACTIVE][0]
 
-        # Get snapshots for the share.
-        share_snapshots = self.db.share_snapshot_get_all_for_share(
-            context, share_id)
-
         # Get the required data for snapshots that have 'aggregate_status'
         # set to 'available'.
         available_share_snapshots = [
             self._get_replica_snapshots_for_snapshot(
                 context, x['id'], _active_replica['id'], share_replica['id'])
-            for x in share_snapshots
+            for x in data['share_snapshots']
             if x['aggregate_status'] == constants.STATUS_AVAILABLE]
 
         replica_list = [self._get_share_replica_dict(context, r)
-                        for r in replica_list]
+                        for r in data['replica_list']]
+
+        return {
+            'replica_list': replica_list,
+            'replica': self._get_share_replica_dict(context, share_replica),
+            'access_rules': data['access_rules'],
+            'replica_snapshots': available_share_snapshots,
+            'share_server': share_server,
+        }
 
-        share_replica = self._get_share_replica_dict(context, share_replica)
+    @locked_share_replica_operation
+    def _share_replica_update(self, context, share_replica, share_id=None):
+        update_data = self._get_share_replica_update_data(
+            context, share_replica)
+        if not update_data:
+            return
+        share_replica = update_data['replica']
+
+        LOG.debug("Updating status of share share_replica %s: ",
+                  share_replica['id'])
 
         try:
             replica_state = self.driver.update_replica_state(
-                context, replica_list, share_replica, access_rules,
-                available_share_snapshots, share_server=share_server)
+                context, update_data['replica_list'], share_replica,
+                update_data['access_rules'], update_data['replica_snapshots'],
+                share_server=update_data['share_server'])
         except Exception:
             msg = _LE("Driver error when updating replica "
                       "state for replica %s.")
@@ -1850,17 +2034,82 @@ class ShareManager(manager.SchedulerDependentManager):
                  'status': constants.STATUS_ERROR})
             return
 
+        self._save_share_replica_state(
+            context, share_replica['id'], replica_state)
+
+    def _save_share_replica_state(self, context, share_replica_id,
+                                  replica_state):
         if replica_state in (constants.REPLICA_STATE_IN_SYNC,
                              constants.REPLICA_STATE_OUT_OF_SYNC,
                              constants.STATUS_ERROR):
-            self.db.share_replica_update(context, share_replica['id'],
+            self.db.share_replica_update(context, share_replica_id,
                                          {'replica_state': replica_state})
         elif replica_state:
             msg = (_LW("Replica %(id)s cannot be set to %(state)s "
                        "through update call.") %
-                   {'id': share_replica['id'], 'state': replica_state})
+                   {'id': share_replica_id, 'state': replica_state})
             LOG.warning(msg)
 
+    @locked_share_replica_operation
+    def _set_share_replica_state(self, context, share_replica, replica_state,
+                                 share_id=None):
+        """Saves a replica state reported by the driver in bulk."""
+        # Re-grab the replica, it may have changed since it was polled:
+        try:
+            share_replica = self.db.share_replica_get(
+                context, share_replica['id'])
+        except exception.ShareReplicaNotFound:
+            return
+
+        if (share_replica['status'] in constants.TRANSITIONAL_STATUSES
+            or share_replica['replica_state'] ==
+                constants.REPLICA_STATE_ACTIVE):
+            return
+
+        self._save_share_replica_state(
+            context, share_replica['id'], replica_state)
+
+    def _get_share_replica_states(self, context, share_replicas):
+        """Asks the driver for the states of many replicas at once.
+
+        :returns: None if the driver does not support polling replicas in
+            bulk, otherwise a dict mapping IDs of replicas to their states.
+            Replicas not to be polled are mapped to None, and replicas the
+            driver did not report on are left out.
+        """
+        replica_states = {}
+        share_data = {}
+        update_list = []
+        for share_replica in share_replicas:
+            update_data = self._get_share_replica_update_data(
+                context, share_replica, share_data=share_data)
+            if update_data:
+                update_list.append(update_data)
+            else:
+                replica_states[share_replica['id']] = None
+
+        if not update_list:
+            return replica_states
+
+        try:
+            driver_states = self.driver.update_replica_states(
+                context, update_list)
+        except NotImplementedError:
+            self._replica_states_bulk_supported = False
+            return None
+        except Exception:
+            LOG.exception(_LE("Driver error when updating states of replicas "
+                              "in bulk, updating them one by one from now "
+                              "on."))
+            self._replica_states_bulk_supported = False
+            return None
+
+        for update_data in update_list:
+            replica_id = update_data['replica']['id']
+            if (driver_states or {}).get(replica_id):
+                replica_states[replica_id] = driver_states[replica_id]
+        return replica_states
+
     @add_hooks
     @utils.require_driver_initialized
     def manage_share(self, context, share_id, driver_options):
@@ -2429,44 +2678,56 @@ class ShareManager(manager.SchedulerDependentManager):
     @utils.require_driver_initialized
     def periodic_share_replica_snapshot_update(self, context):
         LOG.debug("Updating status of share replica snapshots.")
+        start_time = timeutils.utcnow()
         transitional_statuses = (constants.STATUS_CREATING,
                                  constants.STATUS_DELETING)
-        replicas = self.db.share_replicas_get_all(context,
-                                                  with_share_data=True)
 
-        def qualified_replica(r):
-            # Filter non-active replicas belonging to this backend
-            return (share_utils.extract_host(r['host']) ==
-                    share_utils.extract_host(self.host) and
-                    r['replica_state'] != constants.REPLICA_STATE_ACTIVE)
+        # Non-active replicas belonging to this backend
+        host_replicas = {
+            replica['id']: replica
+            for replica in self.db.share_replicas_get_all_by_host(
+                context, share_utils.extract_host(self.host),
+                exclude_active=True)
+        }
 
-        host_replicas = list(filter(
-            lambda x: qualified_replica(x), replicas))
+        # Get snapshot instances of these replicas that are in 'creating'
+        # or 'deleting' states, and all instances of their snapshots.
         transitional_replica_snapshots = []
-
-        # Get snapshot instances for each replica that are in 'creating' or
-        # 'deleting' states.
-        for replica in host_replicas:
+        snapshot_instances = {}
+        if host_replicas:
             filters = {
-                'share_instance_ids': replica['id'],
+                'share_instance_ids': list(host_replicas),
                 'statuses': transitional_statuses,
             }
-            replica_snapshots = (
+            transitional_replica_snapshots = (
                 self.db.share_snapshot_instance_get_all_with_filters(
-                    context, filters, with_share_data=True)
+                    context, filters)
             )
-            transitional_replica_snapshots.extend(replica_snapshots)
+        if transitional_replica_snapshots:
+            filters = {
+                'snapshot_ids': list(set(
+                    replica_snapshot['snapshot_id']
+                    for replica_snapshot in transitional_replica_snapshots)),
+            }
+            for instance in (
+                    self.db.share_snapshot_instance_get_all_with_filters(
+                        context, filters)):
+                snapshot_instances.setdefault(
+                    instance['snapshot_id'], []).append(instance)
 
         for replica_snapshot in transitional_replica_snapshots:
-            replica_snapshots = (
-                self.db.share_snapshot_instance_get_all_with_filters(
-                    context,
-                    {'snapshot_ids': replica_snapshot['snapshot_id']})
-            )
-            share_id = replica_snapshot['share']['share_id']
+            replica = host_replicas[replica_snapshot['share_instance_id']]
             self._update_replica_snapshot(
                 context, replica_snapshot,
-                replica_snapshots=replica_snapshots, share_id=share_id)
+                replica_snapshots=snapshot_instances.get(
+                    replica_snapshot['snapshot_id']),
+                share_id=replica['share_id'])
+
+        LOG.debug("Updated status of %(count)s share replica snapshots in "
+                  "%(seconds).1f seconds.",
+                  {'count': len(transitional_replica_snapshots),
+                   'seconds': timeutils.delta_seconds(
+                       start_time, timeutils.utcnow())})
 
     @locked_share_replica_operation
     def _update_replica_snapshot(self, context, replica_snapshot,
@@ -64,6 +64,7 @@ class ShareAPI(object):
             update migration_cancel(), migration_complete() and
             migration_get_progress method signature, rename
             migration_get_info() to connection_get_info()
+        1.13 - Add migration_change_to_read_only()
     """
 
     BASE_RPC_API_VERSION = '1.0'
@@ -72,7 +73,7 @@ class ShareAPI(object):
         super(ShareAPI, self).__init__()
         target = messaging.Target(topic=CONF.share_topic,
                                   version=self.BASE_RPC_API_VERSION)
-        self.client = rpc.get_client(target, version_cap='1.12')
+        self.client = rpc.get_client(target, version_cap='1.13')
 
     def create_share_instance(self, context, share_instance, host,
                               request_spec, filter_properties,
@@ -325,6 +326,13 @@ class ShareAPI(object):
                                  src_instance_id=src_share_instance['id'],
                                  dest_instance_id=dest_instance_id)
 
+    def migration_change_to_read_only(self, context, src_share_instance):
+        new_host = utils.extract_host(src_share_instance['host'])
+        call_context = self.client.prepare(server=new_host, version='1.13')
+        call_context.call(context,
+                          'migration_change_to_read_only',
+                          src_instance_id=src_share_instance['id'])
+
     def provide_share_server(self, context, share_instance, share_network_id,
                              snapshot_id=None):
         new_host = utils.extract_host(share_instance['host'])
@@ -194,6 +194,31 @@ class PaginationParamsTest(test.TestCase):
                          common.get_pagination_params(req))
 
 
+class PaginationFiltersTest(test.TestCase):
+    """Unit tests for `manila.api.common.get_pagination_filters` method."""
+
+    def test_no_params(self):
+        req = webob.Request.blank('/')
+        self.assertEqual({'limit': 1000, 'offset': 0},
+                         common.get_pagination_filters(req))
+
+    def test_valid_params(self):
+        marker = '263abb28-1de6-412f-b00b-f0ee0c4333c2'
+        req = webob.Request.blank('/?limit=20&offset=5&marker=%s' % marker)
+        self.assertEqual({'marker': marker, 'limit': 20, 'offset': 5},
+                         common.get_pagination_filters(req))
+
+    def test_limit_over_max(self):
+        req = webob.Request.blank('/?limit=20')
+        self.assertEqual({'limit': 10, 'offset': 0},
+                         common.get_pagination_filters(req, max_limit=10))
+
+    def test_invalid_offset(self):
+        req = webob.Request.blank('/?offset=-2')
+        self.assertRaises(
+            webob.exc.HTTPBadRequest, common.get_pagination_filters, req)
+
+
 class MiscFunctionsTest(test.TestCase):
 
     def test_remove_major_version_from_href(self):
@@ -17,6 +17,10 @@
 Tests dealing with HTTP rate-limiting.
 """
 
+import shutil
+import tempfile
+
+import mock
 from oslo_serialization import jsonutils
 import six
 from six import moves
@@ -550,6 +554,57 @@ class LimiterTest(BaseLimitTestSuite):
         self.assertEqual(expected, results)
 
 
+class SharedLimiterTest(BaseLimitTestSuite):
+    """Tests for the `limits.SharedLimiter` class."""
+
+    def setUp(self):
+        """Run before each test."""
+        super(SharedLimiterTest, self).setUp()
+        self.state_path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.state_path)
+        # Limiters of two API workers
+        self.limiters = [
+            limits.SharedLimiter(TEST_LIMITS, state_path=self.state_path)
+            for i in range(2)]
+
+    def _check(self, num, verb, url, username=None):
+        """Check and yield results from checks, alternating limiters."""
+        for x in moves.range(num):
+            limiter = self.limiters[x % 2]
+            yield limiter.check_for_delay(verb, url, username)[0]
+
+    def test_delay_PUT_shared(self):
+        expected = [None] * 10 + [6.0]
+        results = list(self._check(11, "PUT", "/anything"))
+
+        self.assertEqual(expected, results)
+
+    def test_multiple_users_shared(self):
+        expected = [None] * 10 + [6.0]
+        results = list(self._check(11, "PUT", "/anything", "user1"))
+        self.assertEqual(expected, results)
+
+        expected = [None] * 10
+        results = list(self._check(10, "PUT", "/anything", "user2"))
+        self.assertEqual(expected, results)
+
+    def test_get_limits_shared(self):
+        list(self._check(4, "PUT", "/anything"))
+
+        result = self.limiters[0].get_limits()
+
+        self.assertEqual(6, result[3]['remaining'])
+
+    def test_state_of_other_limits_ignored(self):
+        list(self._check(10, "PUT", "/anything"))
+        limiter = limits.SharedLimiter(TEST_LIMITS[:4],
+                                       state_path=self.state_path)
+
+        delay = limiter.check_for_delay("PUT", "/anything")
+
+        self.assertEqual((None, None), delay)
+
+
 class WsgiLimiterTest(BaseLimitTestSuite):
     """Tests for `limits.WsgiLimiter` class."""
 
@@ -641,6 +696,9 @@ class FakeHttplibConnection(object):
         self.app = app
         self.host = host
 
+    def close(self):
+        pass
+
     def request(self, method, path, body="", headers=None):
         """Translate request to WSGI app.
 
@@ -744,6 +802,27 @@ class WsgiLimiterProxyTest(BaseLimitTestSuite):
 
         self.assertEqual(expected, (delay, error))
 
+    def test_connection_reused(self):
+        self.mock_object(http_client, 'HTTPConnection',
+                         mock.Mock(side_effect=http_client.HTTPConnection))
+
+        self.proxy.check_for_delay("GET", "/anything")
+        self.proxy.check_for_delay("GET", "/anything")
+
+        http_client.HTTPConnection.assert_called_once_with("169.254.0.1:80")
+
+    def test_connection_reconnect(self):
+        self.proxy.check_for_delay("GET", "/anything")
+        conn = self.proxy._connections[0]
+        self.mock_object(conn, 'request',
+                         mock.Mock(side_effect=http_client.BadStatusLine('')))
+
+        delay = self.proxy.check_for_delay("GET", "/anything")
+
+        self.assertEqual((None, None), delay)
+        self.assertNotIn(conn, self.proxy._connections)
+        self.assertEqual(1, len(self.proxy._connections))
+
     def tearDown(self):
         # restore original HTTPConnection object
         http_client.HTTPConnection = self.oldHTTPConnection
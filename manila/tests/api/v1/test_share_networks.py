@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import datetime
+
 import ddt
 import mock
 from oslo_db import exception as db_exception
@@ -342,7 +344,8 @@ class ShareNetworkAPITest(test.TestCase):
 
             db_api.share_network_get_all_by_project.assert_called_once_with(
                 self.context,
-                self.context.project_id)
+                self.context.project_id,
+                filters={'limit': 1000, 'offset': 0})
 
             self.assertEqual(1, len(result[share_networks.RESOURCES_NAME]))
             self._check_share_network_view_shortened(
@@ -359,7 +362,8 @@ class ShareNetworkAPITest(test.TestCase):
 
             db_api.share_network_get_all_by_project.assert_called_once_with(
                 self.context,
-                self.context.project_id)
+                self.context.project_id,
+                filters={'limit': 1000, 'offset': 0})
 
             self.assertEqual(1, len(result[share_networks.RESOURCES_NAME]))
             self._check_share_network_view(
@@ -376,7 +380,8 @@ class ShareNetworkAPITest(test.TestCase):
         result = self.controller.index(req)
         db_api.share_network_get_all_by_security_service.\
             assert_called_once_with(req.environ['manila.context'],
-                                    'fake-ss-id')
+                                    'fake-ss-id',
+                                    filters={'limit': 1000, 'offset': 0})
         self.assertEqual(1, len(result[share_networks.RESOURCES_NAME]))
         self._check_share_network_view_shortened(
             result[share_networks.RESOURCES_NAME][0],
@@ -398,7 +403,8 @@ class ShareNetworkAPITest(test.TestCase):
             use_admin_context=True)
         result = self.controller.index(req)
         db_api.share_network_get_all.assert_called_once_with(
-            req.environ['manila.context'])
+            req.environ['manila.context'],
+            filters={'limit': 1000, 'offset': 0})
         self.assertEqual(1, len(result[share_networks.RESOURCES_NAME]))
         self._check_share_network_view_shortened(
             result[share_networks.RESOURCES_NAME][0],
@@ -415,7 +421,6 @@ class ShareNetworkAPITest(test.TestCase):
     @mock.patch.object(db_api, 'share_network_get_all_by_project', mock.Mock())
     def test_index_filter_by_project_id_admin_context(self):
         db_api.share_network_get_all_by_project.return_value = [
-            fake_share_network,
             fake_share_network_with_ss,
         ]
         req = fakes.HTTPRequest.blank(
@@ -423,7 +428,8 @@ class ShareNetworkAPITest(test.TestCase):
             use_admin_context=True)
         result = self.controller.index(req)
         db_api.share_network_get_all_by_project.assert_called_once_with(
-            req.environ['manila.context'], 'fake')
+            req.environ['manila.context'], 'fake',
+            filters={'project_id': 'fake', 'limit': 1000, 'offset': 0})
         self.assertEqual(1, len(result[share_networks.RESOURCES_NAME]))
         self._check_share_network_view_shortened(
             result[share_networks.RESOURCES_NAME][0],
@@ -433,7 +439,6 @@ class ShareNetworkAPITest(test.TestCase):
                        mock.Mock())
     def test_index_filter_by_ss_and_project_id_admin_context(self):
         db_api.share_network_get_all_by_security_service.return_value = [
-            fake_share_network,
             fake_share_network_with_ss,
         ]
         req = fakes.HTTPRequest.blank(
@@ -441,8 +446,9 @@ class ShareNetworkAPITest(test.TestCase):
             use_admin_context=True)
         result = self.controller.index(req)
         db_api.share_network_get_all_by_security_service.\
-            assert_called_once_with(req.environ['manila.context'],
-                                    'fake-ss-id')
+            assert_called_once_with(
+                req.environ['manila.context'], 'fake-ss-id',
+                filters={'project_id': 'fake', 'limit': 1000, 'offset': 0})
         self.assertEqual(1, len(result[share_networks.RESOURCES_NAME]))
         self._check_share_network_view_shortened(
             result[share_networks.RESOURCES_NAME][0],
@@ -463,8 +469,13 @@ class ShareNetworkAPITest(test.TestCase):
             'name': 'test-sn'
         }
         db_api.share_network_get_all_by_project.return_value = [
-            fake_share_network,
             fake_share_network_with_ss]
+        expected_filters = dict(
+            valid_filter_opts,
+            created_before=datetime.datetime(2001, 2, 2),
+            created_since=datetime.datetime(1999, 1, 1),
+            limit=1000,
+            offset=0)
 
         query_string = '/share-networks?' + parse.urlencode(sorted(
             [(k, v) for (k, v) in list(valid_filter_opts.items())]))
@@ -474,12 +485,35 @@ class ShareNetworkAPITest(test.TestCase):
             result = self.controller.index(req)
             db_api.share_network_get_all_by_project.assert_called_with(
                 req.environ['manila.context'],
-                'fake')
+                'fake',
+                filters=expected_filters)
             self.assertEqual(1, len(result[share_networks.RESOURCES_NAME]))
             self._check_share_network_view_shortened(
                 result[share_networks.RESOURCES_NAME][0],
                 fake_sn_with_ss_shortened)
 
+    @mock.patch.object(db_api, 'share_network_get_all_by_project',
+                       mock.Mock())
+    def test_index_filter_opts_not_supported_by_db(self):
+        db_api.share_network_get_all_by_project.return_value = [
+            dict(fake_share_network, gateway='10.0.0.1'),
+            dict(fake_share_network_with_ss, gateway='8.0.0.1'),
+            dict(fake_share_network_with_ss, id='sn-id-2', gateway='8.0.0.1'),
+        ]
+        req = fakes.HTTPRequest.blank(
+            '/share-networks?description=fake%20description'
+            '&gateway=8.0.0.1&limit=1')
+
+        result = self.controller.index(req)
+
+        db_api.share_network_get_all_by_project.assert_called_once_with(
+            req.environ['manila.context'], 'fake',
+            filters={'description': 'fake description'})
+        self.assertEqual(1, len(result[share_networks.RESOURCES_NAME]))
+        self._check_share_network_view_shortened(
+            result[share_networks.RESOURCES_NAME][0],
+            fake_sn_with_ss_shortened)
+
     @mock.patch.object(db_api, 'share_network_get', mock.Mock())
     def test_update_nominal(self):
         share_nw = 'fake network id'
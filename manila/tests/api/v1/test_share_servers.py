@@ -23,6 +23,7 @@ from manila.db import api as db_api
 from manila import exception
 from manila import policy
 from manila import test
+from manila.tests.api import fakes
 
 
 fake_share_server_list = {
@@ -100,6 +101,9 @@ class FakeShareServer(object):
     def __getitem__(self, item):
         return getattr(self, item)
 
+    def __contains__(self, item):
+        return hasattr(self, item)
+
 
 def fake_share_server_get_all():
     fake_share_servers = [
@@ -122,6 +126,7 @@ def fake_share_server_get():
 class FakeRequestAdmin(object):
     environ = {"manila.context": CONTEXT}
     GET = {}
+    params = {}
 
 
 class FakeRequestWithHost(FakeRequestAdmin):
@@ -167,56 +172,58 @@ class ShareServerAPITest(test.TestCase):
         result = self.controller.index(FakeRequestAdmin)
         policy.check_policy.assert_called_once_with(
             CONTEXT, self.resource_name, 'index')
-        db_api.share_server_get_all.assert_called_once_with(CONTEXT)
+        db_api.share_server_get_all.assert_called_once_with(
+            CONTEXT, filters={})
         self.assertEqual(fake_share_server_list, result)
 
-    def test_index_host_filter(self):
-        result = self.controller.index(FakeRequestWithHost)
+    def _index_db_filter(self, request, index):
+        db_api.share_server_get_all.return_value = [
+            fake_share_server_get_all()[index]]
+        result = self.controller.index(request)
         policy.check_policy.assert_called_once_with(
             CONTEXT, self.resource_name, 'index')
-        db_api.share_server_get_all.assert_called_once_with(CONTEXT)
-        self.assertEqual([fake_share_server_list['share_servers'][0]],
+        db_api.share_server_get_all.assert_called_once_with(
+            CONTEXT, filters=request.GET)
+        self.assertEqual([fake_share_server_list['share_servers'][index]],
                          result['share_servers'])
 
+    def test_index_host_filter(self):
+        self._index_db_filter(FakeRequestWithHost, 0)
+
     def test_index_status_filter(self):
-        result = self.controller.index(FakeRequestWithStatus)
-        policy.check_policy.assert_called_once_with(
-            CONTEXT, self.resource_name, 'index')
-        db_api.share_server_get_all.assert_called_once_with(CONTEXT)
-        self.assertEqual([fake_share_server_list['share_servers'][1]],
-                         result['share_servers'])
+        self._index_db_filter(FakeRequestWithStatus, 1)
 
     def test_index_project_id_filter(self):
-        result = self.controller.index(FakeRequestWithProjectId)
-        policy.check_policy.assert_called_once_with(
-            CONTEXT, self.resource_name, 'index')
-        db_api.share_server_get_all.assert_called_once_with(CONTEXT)
-        self.assertEqual([fake_share_server_list['share_servers'][0]],
-                         result['share_servers'])
+        self._index_db_filter(FakeRequestWithProjectId, 0)
 
     def test_index_share_network_filter_by_name(self):
-        result = self.controller.index(FakeRequestWithShareNetworkName)
-        policy.check_policy.assert_called_once_with(
-            CONTEXT, self.resource_name, 'index')
-        db_api.share_server_get_all.assert_called_once_with(CONTEXT)
-        self.assertEqual([fake_share_server_list['share_servers'][0]],
-                         result['share_servers'])
+        self._index_db_filter(FakeRequestWithShareNetworkName, 0)
 
     def test_index_share_network_filter_by_id(self):
-        result = self.controller.index(FakeRequestWithShareNetworkId)
-        policy.check_policy.assert_called_once_with(
-            CONTEXT, self.resource_name, 'index')
-        db_api.share_server_get_all.assert_called_once_with(CONTEXT)
-        self.assertEqual([fake_share_server_list['share_servers'][0]],
-                         result['share_servers'])
+        self._index_db_filter(FakeRequestWithShareNetworkId, 0)
 
     def test_index_fake_filter(self):
         result = self.controller.index(FakeRequestWithFakeFilter)
         policy.check_policy.assert_called_once_with(
             CONTEXT, self.resource_name, 'index')
-        db_api.share_server_get_all.assert_called_once_with(CONTEXT)
+        db_api.share_server_get_all.assert_called_once_with(
+            CONTEXT, filters={})
         self.assertEqual(0, len(result['share_servers']))
 
+    def test_index_with_links(self):
+        req = fakes.HTTPRequest.blank('/share-servers?limit=2',
+                                      use_admin_context=True)
+
+        result = self.controller.index(req)
+
+        self.assertEqual(fake_share_server_list['share_servers'],
+                         result['share_servers'])
+        self.assertEqual(
+            [{'rel': 'next',
+              'href': 'http://localhost/v1/fake/share-servers'
+                      '?limit=2&marker=fake_server_id_2'}],
+            result['share_servers_links'])
+
     def test_show(self):
         self.mock_object(db_api, 'share_server_get',
                          mock.Mock(return_value=fake_share_server_get()))
@@ -194,7 +194,7 @@ class ShareSnapshotAPITest(test.TestCase):
              'status': 'fake_status', 'share_id': 'fake_share_id'},
         ]
         self.mock_object(share_api.API, 'get_all_snapshots',
-                         mock.Mock(return_value=snapshots))
+                         mock.Mock(return_value=[snapshots[1]]))
 
         result = self.controller.index(req)
 
@@ -202,6 +202,8 @@ class ShareSnapshotAPITest(test.TestCase):
             'display_name': search_opts['name'],
             'status': search_opts['status'],
             'share_id': search_opts['share_id'],
+            'limit': 1,
+            'offset': 1,
         }
         if use_admin_context:
             search_opts_expected.update({'fake_key': 'fake_value'})
@@ -255,7 +257,7 @@ class ShareSnapshotAPITest(test.TestCase):
         ]
 
         self.mock_object(share_api.API, 'get_all_snapshots',
-                         mock.Mock(return_value=snapshots))
+                         mock.Mock(return_value=[snapshots[1]]))
 
         result = self.controller.detail(req)
 
@@ -263,6 +265,8 @@ class ShareSnapshotAPITest(test.TestCase):
             'display_name': search_opts['name'],
             'status': search_opts['status'],
             'share_id': search_opts['share_id'],
+            'limit': 1,
+            'offset': 1,
         }
         if use_admin_context:
             search_opts_expected.update({'fake_key': 'fake_value'})
@@ -197,7 +197,7 @@ class ShareSnapshotAPITest(test.TestCase):
             {'id': 'id3', 'display_name': 'n3', 'status': 'fake_status', },
         ]
         self.mock_object(share_api.API, 'get_all_snapshots',
-                         mock.Mock(return_value=snapshots))
+                         mock.Mock(return_value=[snapshots[1]]))
 
         result = self.controller.index(req)
 
@@ -205,6 +205,8 @@ class ShareSnapshotAPITest(test.TestCase):
             'display_name': search_opts['name'],
             'status': search_opts['status'],
             'share_id': search_opts['share_id'],
+            'limit': 1,
+            'offset': 1,
         }
         if use_admin_context:
             search_opts_expected.update({'fake_key': 'fake_value'})
@@ -256,7 +258,7 @@ class ShareSnapshotAPITest(test.TestCase):
         ]
 
         self.mock_object(share_api.API, 'get_all_snapshots',
-                         mock.Mock(return_value=snapshots))
+                         mock.Mock(return_value=[snapshots[1]]))
 
         result = self.controller.detail(req)
 
@@ -264,6 +266,8 @@ class ShareSnapshotAPITest(test.TestCase):
             'display_name': search_opts['name'],
             'status': search_opts['status'],
             'share_id': search_opts['share_id'],
+            'limit': 1,
+            'offset': 1,
         }
         if use_admin_context:
             search_opts_expected.update({'fake_key': 'fake_value'})
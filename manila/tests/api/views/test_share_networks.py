@@ -28,7 +28,7 @@ class ViewBuilderTestCase(test.TestCase):
         self.builder = share_networks.ViewBuilder()
 
     def test__collection_name(self):
-        self.assertEqual('share_networks', self.builder._collection_name)
+        self.assertEqual('share-networks', self.builder._collection_name)
 
     @ddt.data(
         {'id': 'fake_sn_id', 'name': 'fake_sn_name'},
@@ -117,6 +117,28 @@ class ViewBuilderTestCase(test.TestCase):
 
         self.assertEqual(expected, result)
 
+    @ddt.data(('/share-networks?limit=2', True),
+              ('/share-networks?limit=3', False),
+              ('/share-networks', False))
+    @ddt.unpack
+    def test_build_share_networks_links(self, url, has_links):
+        req = fakes.HTTPRequest.blank(url, version="2.18")
+        share_networks = [{'id': 'id1', 'name': 'name1'},
+                          {'id': 'id2', 'name': 'name2'}]
+
+        result = self.builder.build_share_networks(
+            req, share_networks, False)
+
+        self.assertEqual(2, len(result['share_networks']))
+        if has_links:
+            self.assertEqual(
+                [{'rel': 'next',
+                  'href': 'http://localhost/v1/fake/share-networks'
+                          '?limit=2&marker=id2'}],
+                result['share_networks_links'])
+        else:
+            self.assertNotIn('share_networks_links', result)
+
     @ddt.data(
         {'id': 'fake_sn_id', 'name': 'fake_sn_name'},
         {'id': 'fake_sn_id', 'name': 'fake_sn_name', 'fake_extra_key': 'foo'},
@@ -116,7 +116,7 @@ class DataManagerTestCase(test.TestCase):
 
         self.manager._copy_share_data.assert_called_once_with(
             self.context, 'fake_copy', self.share, 'ins1_id', 'ins2_id',
-            'info_src', 'info_dest')
+            'info_src', 'info_dest', writable_passes=0)
 
         if exc:
             share_rpc.ShareAPI.migration_complete.assert_called_once_with(
@@ -243,6 +243,57 @@ class DataManagerTestCase(test.TestCase):
             mock.call([access], self.share['instance']),
             mock.call([access], self.share['instance'])])
 
+    @ddt.data(True, False)
+    def test__copy_share_data_writable_passes(self, cancelled):
+
+        access = db_utils.create_access(share_id=self.share['id'])
+        connection_info_src = {'mount': 'mount_cmd_src',
+                               'unmount': 'unmount_cmd_src'}
+        connection_info_dest = {'mount': 'mount_cmd_dest',
+                                'unmount': 'unmount_cmd_dest'}
+        fake_copy = mock.MagicMock(cancelled=cancelled)
+
+        # mocks
+        self.mock_object(db, 'share_update')
+        self.mock_object(db, 'share_instance_get',
+                         mock.Mock(side_effect=[self.share['instance'],
+                                                self.share['instance']]))
+        self.mock_object(helper.DataServiceHelper,
+                         'allow_access_to_data_service',
+                         mock.Mock(return_value=[access]))
+        self.mock_object(helper.DataServiceHelper, 'mount_share_instance')
+        self.mock_object(helper.DataServiceHelper, 'unmount_share_instance')
+        self.mock_object(helper.DataServiceHelper,
+                         'deny_access_to_data_service')
+        self.mock_object(fake_copy, 'get_progress',
+                         mock.Mock(return_value={'total_progress': 100}))
+        self.mock_object(share_rpc.ShareAPI, 'migration_change_to_read_only')
+
+        # run
+        if cancelled:
+            self.assertRaises(
+                exception.ShareDataCopyCancelled,
+                self.manager._copy_share_data, self.context, fake_copy,
+                self.share, 'ins1_id', 'ins2_id', connection_info_src,
+                connection_info_dest, writable_passes=2)
+        else:
+            self.manager._copy_share_data(
+                self.context, fake_copy, self.share, 'ins1_id', 'ins2_id',
+                connection_info_src, connection_info_dest, writable_passes=2)
+
+        # asserts
+        if cancelled:
+            fake_copy.run.assert_called_once_with()
+            self.assertFalse(
+                share_rpc.ShareAPI.migration_change_to_read_only.called)
+        else:
+            self.assertEqual(3, fake_copy.run.call_count)
+            (share_rpc.ShareAPI.migration_change_to_read_only.
+                assert_called_once_with(self.context, self.share['instance']))
+            db.share_update.assert_called_with(
+                self.context, self.share['id'],
+                {'task_state': constants.TASK_STATE_DATA_COPYING_COMPLETED})
+
     def test__copy_share_data_exception_access(self):
 
         connection_info_src = {'mount': 'mount_cmd_src',
@@ -124,32 +124,64 @@ class CopyClassTestCase(test.TestCase):
     def test_get_total_size(self):
         self._copy.total_size = 0
 
-        values = [("folder1/\nitem/\nfile1\nitem", ""),
-                  ("", ""),
-                  ("10000", "")]
+        # mocks
+        self.mock_object(utils, 'execute', mock.Mock(
+            return_value=("d 4096 1.5 folder1\0f 10000 1.5 folder1/file 1\0"
+                          "l 7 1.5 link\0", "")))
 
-        def get_output(*args, **kwargs):
-            return values.pop(0)
+        # run
+        self._copy.get_total_size(self._copy.src)
+
+        # asserts
+        self.assertEqual(10007, self._copy.total_size)
+        self.assertEqual(0, self._copy.current_size)
+        self.assertEqual(['folder1'], self._copy.dirs)
+        self.assertEqual([{'path': 'folder1/file 1', 'size': 10000,
+                           'manifest': ('f', '10000', '1.5')},
+                          {'path': 'link', 'size': 7,
+                           'manifest': ('l', '7', '1.5')}], self._copy.files)
+        self.assertEqual([], self._copy.removed)
+
+        utils.execute.assert_called_once_with(
+            "find", self._copy.src, "-mindepth", "1", "-name", "item",
+            "-prune", "-o", "-printf", "%y %s %T@ %P\\0", run_as_root=True)
+
+    def test_get_total_size_changed(self):
+        self._copy.manifest = {
+            'folder1': ('d', None, None),
+            'folder1/same': ('f', '10', '1.5'),
+            'folder1/resized': ('f', '10', '1.5'),
+            'folder1/touched': ('f', '10', '1.5'),
+            'link': ('l', '7', '1.5'),
+            'now_folder': ('f', '10', '1.5'),
+            'deleted': ('d', None, None),
+            'deleted/file': ('f', '10', '1.5'),
+        }
 
         # mocks
         self.mock_object(utils, 'execute', mock.Mock(
-            side_effect=get_output))
+            return_value=("d 4096 2.5 folder1\0f 10 1.5 folder1/same\0"
+                          "f 20 2.5 folder1/resized\0"
+                          "f 10 2.5 folder1/touched\0l 8 2.5 link\0"
+                          "d 4096 2.5 now_folder\0f 1 2.5 new\0", "")))
 
         # run
         self._copy.get_total_size(self._copy.src)
 
         # asserts
-        self.assertEqual(self._copy.total_size, 10000)
-
-        utils.execute.assert_has_calls([
-            mock.call("ls", "-pA1", "--group-directories-first",
-                      self._copy.src, run_as_root=True),
-            mock.call("ls", "-pA1", "--group-directories-first",
-                      os.path.join(self._copy.src, "folder1/"),
-                      run_as_root=True),
-            mock.call("stat", "-c", "%s",
-                      os.path.join(self._copy.src, "file1"), run_as_root=True)
-        ])
+        self.assertEqual(39, self._copy.total_size)
+        self.assertEqual(['folder1', 'now_folder'], self._copy.dirs)
+        self.assertEqual(
+            ['folder1/resized', 'folder1/touched', 'link', 'new'],
+            [item['path'] for item in self._copy.files])
+        self.assertEqual(['link', 'now_folder', 'deleted', 'deleted/file'],
+                         sorted(self._copy.removed[:2]) +
+                         sorted(self._copy.removed[2:]))
+        self.assertEqual(
+            {'folder1': ('d', None, None),
+             'folder1/same': ('f', '10', '1.5'),
+             'folder1/resized': ('f', '10', '1.5'),
+             'folder1/touched': ('f', '10', '1.5')}, self._copy.manifest)
 
     def test_get_total_size_cancelled_1(self):
         self._copy.total_size = 0
@@ -168,13 +200,13 @@ class CopyClassTestCase(test.TestCase):
     def test_get_total_size_cancelled_2(self):
         self._copy.total_size = 0
 
-        def ls_output(*args, **kwargs):
+        def find_output(*args, **kwargs):
             self._copy.cancelled = True
-            return "folder1/", ""
+            return "f 10 file1\0", ""
 
         # mocks
         self.mock_object(utils, 'execute', mock.Mock(
-            side_effect=ls_output))
+            side_effect=find_output))
 
         # run
         self._copy.get_total_size(self._copy.src)
@@ -182,31 +214,24 @@ class CopyClassTestCase(test.TestCase):
         # asserts
         self.assertEqual(self._copy.total_size, 0)
         utils.execute.assert_called_once_with(
-            "ls", "-pA1", "--group-directories-first", self._copy.src,
-            run_as_root=True)
+            "find", self._copy.src, "-mindepth", "1", "-name", "item",
+            "-prune", "-o", "-printf", "%y %s %T@ %P\\0", run_as_root=True)
 
         # reset
         self._copy.total_size = 10000
         self._copy.cancelled = False
 
     def test_copy_data(self):
-
-        values = [("folder1/\nitem/\nfile1\nitem", ""),
-                  "",
-                  ("", ""),
-                  ("10000", ""),
-                  "",
-                  ""]
-
-        def get_output(*args, **kwargs):
-            return values.pop(0)
+        self._copy.dirs = ['folder1', 'folder1/folder2']
+        self._copy.files = [{'path': 'folder1/file1', 'size': 10000,
+                             'manifest': ('f', '10000', '1.5')}]
+        self._copy.current_size = 0
 
         # mocks
         self.mock_object(data_utils, '_validate_item',
                          mock.Mock(side_effect=[exception.ShareDataCopyFailed(
                              reason='fake'), None]))
-        self.mock_object(utils, 'execute', mock.Mock(
-            side_effect=get_output))
+        self.mock_object(utils, 'execute', mock.Mock(return_value=("", "")))
         self.mock_object(self._copy, 'get_progress')
 
         # run
@@ -214,142 +239,219 @@ class CopyClassTestCase(test.TestCase):
 
         # asserts
         self._copy.get_progress.assert_called_once_with()
-
+        self.assertEqual(10000, self._copy.current_size)
+        self.assertEqual(
+            {'file_path': os.path.join(self._copy.dest, "folder1/file1"),
+             'size': 10000}, self._copy.current_copy)
+
+        self.assertEqual({'folder1': ('d', None, None),
+                          'folder1/folder2': ('d', None, None),
+                          'folder1/file1': ('f', '10000', '1.5')},
+                         self._copy.manifest)
         utils.execute.assert_has_calls([
-            mock.call("ls", "-pA1", "--group-directories-first",
-                      self._copy.src, run_as_root=True),
-            mock.call("mkdir", "-p", os.path.join(self._copy.dest, "folder1/"),
+            mock.call("mkdir", "-p", os.path.join(self._copy.dest, "folder1"),
+                      os.path.join(self._copy.dest, "folder1/folder2"),
                       run_as_root=True),
-            mock.call("ls", "-pA1", "--group-directories-first",
-                      os.path.join(self._copy.src, "folder1/"),
-                      run_as_root=True),
-            mock.call("stat", "-c", "%s",
-                      os.path.join(self._copy.src, "file1"), run_as_root=True),
             mock.call("cp", "-P", "--preserve=all",
-                      os.path.join(self._copy.src, "file1"),
-                      os.path.join(self._copy.dest, "file1"),
+                      os.path.join(self._copy.src, "folder1/file1"),
+                      os.path.join(self._copy.dest, "folder1/file1"),
                       run_as_root=True),
             mock.call("cp", "-P", "--preserve=all",
-                      os.path.join(self._copy.src, "file1"),
-                      os.path.join(self._copy.dest, "file1"), run_as_root=True)
+                      os.path.join(self._copy.src, "folder1/file1"),
+                      os.path.join(self._copy.dest, "folder1/file1"),
+                      run_as_root=True)
         ])
 
+    def test_copy_data_changed(self):
+        self._copy.manifest = {'folder1': ('d', None, None)}
+        self._copy.dirs = ['folder1', 'folder2']
+        self._copy.removed = ['deleted', 'link']
+
+        # mocks
+        self.mock_object(utils, 'execute', mock.Mock(return_value=("", "")))
+
+        # run
+        self._copy.copy_data(self._copy.src)
+
+        # asserts
+        self.assertEqual([
+            mock.call("rm", "-rf", os.path.join(self._copy.dest, "deleted"),
+                      os.path.join(self._copy.dest, "link"),
+                      run_as_root=True),
+            mock.call("mkdir", "-p", os.path.join(self._copy.dest, "folder2"),
+                      run_as_root=True),
+        ], utils.execute.call_args_list)
+
+    def test_copy_data_parallel(self):
+        self._copy.workers = 3
+        self._copy.files = [{'path': 'file%d' % i, 'size': 10,
+                             'manifest': ('f', '10', '1.5')}
+                            for i in range(10)]
+        self._copy.current_size = 0
+
+        # mocks
+        self.mock_object(utils, 'execute', mock.Mock(return_value=("", "")))
+        self.mock_object(data_utils, '_validate_item')
+        self.mock_object(self._copy, 'get_progress')
+
+        # run
+        self._copy.copy_data(self._copy.src)
+
+        # asserts
+        self.assertEqual(100, self._copy.current_size)
+        self.assertEqual(10, utils.execute.call_count)
+        self.assertEqual(10, self._copy.get_progress.call_count)
+
+    def test_copy_data_error(self):
+        self._copy.workers = 2
+        self._copy.files = [{'path': 'file1', 'size': 10,
+                             'manifest': ('f', '10', '1.5')},
+                            {'path': 'file2', 'size': 10,
+                             'manifest': ('f', '10', '1.5')}]
+
+        # mocks
+        self.mock_object(utils, 'execute', mock.Mock(
+            side_effect=[("", ""), exception.ProcessExecutionError]))
+        self.mock_object(data_utils, '_validate_item')
+        self.mock_object(self._copy, 'get_progress')
+
+        # run
+        self.assertRaises(exception.ProcessExecutionError,
+                          self._copy.copy_data, self._copy.src)
+
+    def test_copy_data_error_stops_copying(self):
+        self._copy.workers = 2
+        self._copy.files = [{'path': 'file%d' % i, 'size': 10,
+                             'manifest': ('f', '10', '1.5')}
+                            for i in range(6)]
+
+        # mocks
+        self.mock_object(utils, 'execute', mock.Mock(
+            side_effect=[exception.ProcessExecutionError] +
+            [("", "")] * 5))
+        self.mock_object(data_utils, '_validate_item')
+        self.mock_object(self._copy, 'get_progress')
+
+        # run
+        self.assertRaises(exception.ProcessExecutionError,
+                          self._copy.copy_data, self._copy.src)
+
+        # asserts
+        self.assertEqual(1, utils.execute.call_count)
+        self.assertEqual({}, self._copy.manifest)
+
     def test__validate_item(self):
 
         self.mock_object(utils, 'execute', mock.Mock(
-            side_effect=[("abcxyz", ""), ("defrst", "")]))
+            return_value=("abcxyz  src\ndefrst  dest\n", "")))
 
         self.assertRaises(exception.ShareDataCopyFailed,
                           data_utils._validate_item, 'src', 'dest')
 
-        utils.execute.assert_has_calls([
-            mock.call("sha256sum", "src", run_as_root=True),
-            mock.call("sha256sum", "dest", run_as_root=True),
-        ])
+        utils.execute.assert_called_once_with(
+            "sha256sum", "src", "dest", run_as_root=True)
+
+    def test__validate_item_matching(self):
+
+        self.mock_object(utils, 'execute', mock.Mock(
+            return_value=("abcxyz  src\nabcxyz  dest\n", "")))
+
+        data_utils._validate_item('src', 'dest')
 
     def test_copy_data_cancelled_1(self):
 
         self._copy.cancelled = True
+        self.mock_object(utils, 'execute')
 
         # run
         self._copy.copy_data(self._copy.src)
 
+        # asserts
+        self.assertFalse(utils.execute.called)
+
         # reset
         self._copy.cancelled = False
 
     def test_copy_data_cancelled_2(self):
+        self._copy.files = [{'path': 'file1', 'size': 10,
+                             'manifest': ('f', '10', '1.5')},
+                            {'path': 'file2', 'size': 10,
+                             'manifest': ('f', '10', '1.5')}]
 
-        def ls_output(*args, **kwargs):
+        def cp_output(*args, **kwargs):
             self._copy.cancelled = True
-            return "folder1/", ""
+            return "", ""
 
         # mocks
         self.mock_object(utils, 'execute', mock.Mock(
-            side_effect=ls_output))
+            side_effect=cp_output))
+        self.mock_object(data_utils, '_validate_item')
+        self.mock_object(self._copy, 'get_progress')
 
         # run
         self._copy.copy_data(self._copy.src)
 
         # asserts
         utils.execute.assert_called_once_with(
-            "ls", "-pA1", "--group-directories-first", self._copy.src,
-            run_as_root=True)
+            "cp", "-P", "--preserve=all",
+            os.path.join(self._copy.src, "file1"),
+            os.path.join(self._copy.dest, "file1"), run_as_root=True)
 
         # reset
         self._copy.cancelled = False
 
     def test_copy_stats(self):
-
-        values = [("folder1/\nitem/\nfile1\nitem", ""),
-                  ("", ""),
-                  "",
-                  "",
-                  "",
-                  "",
-                  "",
-                  ""]
-
-        def get_output(*args, **kwargs):
-            return values.pop(0)
+        self._copy.dirs = ['folder1', 'folder1/folder2']
 
         # mocks
-        self.mock_object(utils, 'execute', mock.Mock(
-            side_effect=get_output))
+        self.mock_object(utils, 'execute', mock.Mock(return_value=("", "")))
 
         # run
         self._copy.copy_stats(self._copy.src)
 
         # asserts
-        utils.execute.assert_has_calls([
-            mock.call("ls", "-pA1", "--group-directories-first",
-                      self._copy.src, run_as_root=True),
-            mock.call("ls", "-pA1", "--group-directories-first",
-                      os.path.join(self._copy.src, "folder1/"),
-                      run_as_root=True),
-            mock.call(
-                "chmod",
-                "--reference=%s" % os.path.join(self._copy.src, "folder1/"),
-                os.path.join(self._copy.dest, "folder1/"),
-                run_as_root=True),
-            mock.call(
-                "touch",
-                "--reference=%s" % os.path.join(self._copy.src, "folder1/"),
-                os.path.join(self._copy.dest, "folder1/"),
-                run_as_root=True),
-            mock.call(
-                "chown",
-                "--reference=%s" % os.path.join(self._copy.src, "folder1/"),
-                os.path.join(self._copy.dest, "folder1/"),
-                run_as_root=True),
-        ])
+        calls = []
+        for folder in ('folder1/folder2', 'folder1'):
+            for command in ('chmod', 'touch', 'chown'):
+                calls.append(mock.call(
+                    command,
+                    "--reference=%s" % os.path.join(self._copy.src, folder),
+                    os.path.join(self._copy.dest, folder),
+                    run_as_root=True))
+        self.assertEqual(calls, utils.execute.call_args_list)
 
     def test_copy_stats_cancelled_1(self):
 
         self._copy.cancelled = True
+        self._copy.dirs = ['folder1']
+        self.mock_object(utils, 'execute')
 
         # run
         self._copy.copy_stats(self._copy.src)
 
+        # asserts
+        self.assertFalse(utils.execute.called)
+
         # reset
         self._copy.cancelled = False
 
     def test_copy_stats_cancelled_2(self):
+        self._copy.dirs = ['folder1', 'folder2']
 
-        def ls_output(*args, **kwargs):
-            self._copy.cancelled = True
-            return "folder1/", ""
+        def chown_output(*args, **kwargs):
+            if args[0] == 'chown':
+                self._copy.cancelled = True
+            return "", ""
 
         # mocks
         self.mock_object(utils, 'execute', mock.Mock(
-            side_effect=ls_output))
+            side_effect=chown_output))
 
         # run
         self._copy.copy_stats(self._copy.src)
 
         # asserts
-        utils.execute.assert_called_once_with(
-            "ls", "-pA1", "--group-directories-first", self._copy.src,
-            run_as_root=True)
+        self.assertEqual(3, utils.execute.call_count)
 
         # reset
         self._copy.cancelled = False
@@ -38,6 +38,7 @@ import datetime
 
 from oslo_utils import uuidutils
 import six
+import sqlalchemy as sa
 from sqlalchemy import exc as sa_exc
 
 from manila.db.migrations import utils
@@ -1081,3 +1082,24 @@ class MoveShareTypeIdToInstancesCheck(BaseMigrationChecks):
                 next((x for x in self.some_shares if share['id'] == x['id']),
                      None)['share_type_id'],
                 share['share_type_id'])
+
+
+@map_to_migration('d67d9e34560b')
+class ShareInstancesHostIndexCheck(BaseMigrationChecks):
+    table_name = 'share_instances'
+    index_name = 'ix_share_instances_host'
+
+    def _get_index_names(self, engine):
+        return [index['name'] for index in
+                sa.inspect(engine).get_indexes(self.table_name)]
+
+    def setup_upgrade_data(self, engine):
+        pass
+
+    def check_upgrade(self, engine, data):
+        self.test_case.assertIn(
+            self.index_name, self._get_index_names(engine))
+
+    def check_downgrade(self, engine):
+        self.test_case.assertNotIn(
+            self.index_name, self._get_index_names(engine))
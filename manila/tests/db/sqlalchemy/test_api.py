@@ -17,12 +17,16 @@
 
 """Testing of SQLAlchemy backend."""
 
+import re
+
 import ddt
 import mock
 
 from oslo_db import exception as db_exception
 from oslo_utils import uuidutils
 import six
+from sqlalchemy import event
+from sqlalchemy.dialects import mysql
 
 from manila.common import constants
 from manila import context
@@ -133,6 +137,35 @@ class ShareAccessDatabaseAPITestCase(test.TestCase):
         access = db_api.share_access_get(self.ctxt, access['id'])
         self.assertEqual(key_value, access['access_key'])
 
+    def test_share_instance_access_delete_all_by_access_ids(self):
+        share = db_utils.create_share()
+        instance_1 = share.instance
+        instance_2 = db_utils.create_share_instance(share_id=share['id'])
+        rules = [db_utils.create_access(share_id=share['id'])
+                 for i in range(3)]
+        delete_ids = [rules[0]['id'], rules[1]['id']]
+
+        db_api.share_instance_access_delete_all_by_access_ids(
+            self.ctxt, instance_1['id'], delete_ids)
+
+        result = db_api.share_access_get_all_for_instance(
+            self.ctxt, instance_1['id'])
+        self.assertEqual([rules[2]['id']], [r['id'] for r in result])
+        # Rules are still mapped to the other instance
+        for access_id in delete_ids:
+            db_api.share_access_get(self.ctxt, access_id)
+
+        db_api.share_instance_access_delete_all_by_access_ids(
+            self.ctxt, instance_2['id'], delete_ids)
+
+        result = db_api.share_access_get_all_for_instance(
+            self.ctxt, instance_2['id'])
+        self.assertEqual([rules[2]['id']], [r['id'] for r in result])
+        for access_id in delete_ids:
+            self.assertRaises(exception.NotFound, db_api.share_access_get,
+                              self.ctxt, access_id)
+        db_api.share_access_get(self.ctxt, rules[2]['id'])
+
 
 @ddt.ddt
 class ShareDatabaseAPITestCase(test.TestCase):
@@ -142,6 +175,20 @@ class ShareDatabaseAPITestCase(test.TestCase):
         super(ShareDatabaseAPITestCase, self).setUp()
         self.ctxt = context.get_admin_context()
 
+    def test_share_get_all_by_ids(self):
+        shares = [db_utils.create_share() for i in range(3)]
+
+        result = db_api.share_get_all_by_ids(
+            self.ctxt, [shares[0]['id'], shares[2]['id'], 'fake_id'])
+
+        self.assertEqual(sorted([shares[0]['id'], shares[2]['id']]),
+                         sorted(share['id'] for share in result))
+
+    def test_share_get_all_by_ids_empty(self):
+        db_utils.create_share()
+
+        self.assertEqual([], db_api.share_get_all_by_ids(self.ctxt, []))
+
     def test_share_filter_by_host_with_pools(self):
         share_instances = [[
             db_api.share_create(self.ctxt, {'host': value}).instance
@@ -225,13 +272,27 @@ class ShareDatabaseAPITestCase(test.TestCase):
 
     def test_share_instance_get_all_by_host_not_found_exception(self):
         db_utils.create_share()
-        self.mock_object(db_api, 'share_get', mock.Mock(
-                         side_effect=exception.NotFound))
+        self.mock_object(db_api, '_share_get_all_by_ids',
+                         mock.Mock(return_value={}))
         instances = db_api.share_instances_get_all_by_host(
             self.ctxt, 'fake_host', True)
 
         self.assertEqual(0, len(instances))
 
+    def test_share_instances_get_size_sum_by_host(self):
+        db_utils.create_share(size=1, host='host1#pool0')
+        share = db_utils.create_share(size=2, host='host1#pool0')
+        db_utils.create_share_instance(share_id=share['id'],
+                                       host='host1#pool1')
+        db_utils.create_share(size=4, host='host2#pool0')
+        deleted = db_utils.create_share(size=8, host='host2#pool0')
+        db_api.share_instance_delete(self.ctxt, deleted.instance['id'])
+
+        sizes = db_api.share_instances_get_size_sum_by_host(self.ctxt)
+
+        self.assertEqual(
+            {'host1#pool0': 3, 'host1#pool1': 2, 'host2#pool0': 4}, sizes)
+
     def test_share_instance_get_all_by_consistency_group(self):
         cg = db_utils.create_consistency_group()
         db_utils.create_share(consistency_group_id=cg['id'])
@@ -256,6 +317,106 @@ class ShareDatabaseAPITestCase(test.TestCase):
         self.assertEqual(2, len(actual_result))
         self.assertEqual(shares[0]['id'], actual_result[1]['id'])
 
+    def test_share_get_all_filter_by_share_and_instance_fields(self):
+        shares = [
+            db_utils.create_share(display_name=name, host=host, status=status)
+            for name, host, status in (
+                ('foo', 'host1', constants.STATUS_AVAILABLE),
+                ('foo', 'host2', constants.STATUS_AVAILABLE),
+                ('foo', 'host1', constants.STATUS_ERROR),
+                ('bar', 'host1', constants.STATUS_AVAILABLE))
+        ]
+
+        actual_result = db_api.share_get_all(
+            self.ctxt, filters={'display_name': 'foo', 'host': 'host1',
+                                'status': constants.STATUS_AVAILABLE})
+
+        self.assertEqual([shares[0]['id']],
+                         [share['id'] for share in actual_result])
+
+    @ddt.data('asc', 'desc')
+    def test_share_get_all_paginated(self, sort_dir):
+        for size in range(5):
+            db_utils.create_share(size=size)
+        expected = [share['id'] for share in db_api.share_get_all(
+            self.ctxt, sort_key='size', sort_dir=sort_dir)]
+
+        by_offset = db_api.share_get_all(
+            self.ctxt, filters={'limit': 2, 'offset': 1},
+            sort_key='size', sort_dir=sort_dir)
+        by_marker = db_api.share_get_all(
+            self.ctxt, filters={'limit': 2, 'marker': expected[2]},
+            sort_key='size', sort_dir=sort_dir)
+
+        self.assertEqual(expected[1:3], [share['id'] for share in by_offset])
+        self.assertEqual(expected[3:], [share['id'] for share in by_marker])
+
+    @ddt.data('size', 'host')
+    def test_share_get_all_paginated_replicated_share(self, sort_key):
+        shares = [db_utils.create_share(size=size, host='host%s' % size)
+                  for size in range(3)]
+        for host in ('host1', 'host5'):
+            db_utils.create_share_replica(share_id=shares[0]['id'],
+                                          host=host)
+
+        first_page = db_api.share_get_all(
+            self.ctxt, filters={'limit': 2, 'host': ['host1', 'host0',
+                                                     'host2']},
+            sort_key=sort_key, sort_dir='asc')
+        second_page = db_api.share_get_all(
+            self.ctxt, filters={'limit': 2,
+                                'marker': first_page[-1]['id']},
+            sort_key=sort_key, sort_dir='asc')
+
+        self.assertEqual([shares[0]['id'], shares[1]['id']],
+                         [share['id'] for share in first_page])
+        self.assertEqual([shares[2]['id']],
+                         [share['id'] for share in second_page])
+
+    def test_share_get_all_paginated_extra_specs(self):
+        share_type = db_api.share_type_create(self.ctxt, {
+            'name': 'fake_type',
+            'extra_specs': {'foo': 'true', 'driver_handles_share_servers': 'f',
+                            'snapshot_support': 'true'}})
+        shares = [db_utils.create_share(size=size,
+                                        share_type_id=share_type['id'])
+                  for size in range(3)]
+
+        actual_result = db_api.share_get_all(
+            self.ctxt, filters={'limit': 2,
+                                'extra_specs': {'foo': 'true'}},
+            sort_key='size', sort_dir='asc')
+
+        self.assertEqual([shares[0]['id'], shares[1]['id']],
+                         [share['id'] for share in actual_result])
+
+    @ddt.data('asc', 'desc')
+    def test_share_get_all_paginated_null_sort_values(self, sort_dir):
+        for name in (None, 'a', None, 'b', None):
+            db_utils.create_share(display_name=name)
+        expected = [share['id'] for share in db_api.share_get_all(
+            self.ctxt, sort_key='display_name', sort_dir=sort_dir)]
+
+        actual_result = []
+        marker = None
+        while True:
+            page = db_api.share_get_all(
+                self.ctxt, filters={'limit': 2, 'marker': marker},
+                sort_key='display_name', sort_dir=sort_dir)
+            if not page:
+                break
+            actual_result.extend(share['id'] for share in page)
+            marker = page[-1]['id']
+
+        self.assertEqual(5, len(expected))
+        self.assertEqual(expected, actual_result)
+
+    def test_share_get_all_marker_not_found(self):
+        db_utils.create_share()
+
+        self.assertRaises(exception.InvalidInput, db_api.share_get_all,
+                          self.ctxt, filters={'marker': 'fake_marker'})
+
     @ddt.data(None, 'writable')
     def test_share_get_has_replicas_field(self, replication_type):
         share = db_utils.create_share(replication_type=replication_type)
@@ -314,6 +475,31 @@ class ShareDatabaseAPITestCase(test.TestCase):
                         with_share_data,
                         expected_share_keys.issubset(replica.keys()))
 
+    @ddt.data(True, False)
+    def test_share_replicas_get_all_by_host(self, exclude_active):
+        share_1 = db_utils.create_share(host='fake@backend#pool1')
+        share_2 = db_utils.create_share(host='fake@backend2#pool1')
+        active = db_utils.create_share_replica(
+            replica_state=constants.REPLICA_STATE_ACTIVE,
+            share_id=share_1['id'], host='fake@backend#pool1')
+        in_sync = db_utils.create_share_replica(
+            replica_state=constants.REPLICA_STATE_IN_SYNC,
+            share_id=share_1['id'], host='fake@backend#pool2')
+        no_pool = db_utils.create_share_replica(
+            replica_state=constants.REPLICA_STATE_OUT_OF_SYNC,
+            share_id=share_2['id'], host='fake@backend')
+        db_utils.create_share_replica(
+            replica_state=constants.REPLICA_STATE_IN_SYNC,
+            share_id=share_2['id'], host='fake@backend2#pool1')
+        expected = {in_sync['id'], no_pool['id']}
+        if not exclude_active:
+            expected.add(active['id'])
+
+        share_replicas = db_api.share_replicas_get_all_by_host(
+            self.ctxt, 'fake@backend', exclude_active=exclude_active)
+
+        self.assertEqual(expected, set(r['id'] for r in share_replicas))
+
     @ddt.data({'with_share_data': False, 'with_share_server': False},
               {'with_share_data': False, 'with_share_server': True},
               {'with_share_data': True, 'with_share_server': False},
@@ -548,6 +734,121 @@ class ShareDatabaseAPITestCase(test.TestCase):
                     self.ctxt, rule_id, instance['id']))
 
 
+@ddt.ddt
+class ListingQueryCountTestCase(test.TestCase):
+    """Pins the number of queries issued by listings.
+
+    Relationships of listed rows must be loaded in batches, so the number of
+    queries must not depend on the number of rows returned.
+    """
+
+    def setUp(self):
+        super(ListingQueryCountTestCase, self).setUp()
+        self.ctxt = context.get_admin_context()
+
+    def _create_shares(self, count):
+        shares = []
+        for i in range(count):
+            share = db_utils.create_share()
+            db_api.share_export_locations_update(
+                self.ctxt, share.instance['id'], ['/fake/path/%s' % i],
+                False)
+            snapshot = db_utils.create_snapshot(share_id=share['id'])
+            db_utils.create_snapshot_instance(
+                snapshot['id'], share_instance_id=share.instance['id'])
+            db_utils.create_access(share_id=share['id'])
+            shares.append(share)
+        return shares
+
+    def _count_queries(self, func, *args, **kwargs):
+        statements = []
+
+        def _before_cursor_execute(conn, cursor, statement, *args):
+            # NOTE: connection liveness checks are not listing queries.
+            if statement != 'SELECT 1':
+                statements.append(statement)
+
+        engine = db_api.get_engine()
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            event.remove(
+                engine, 'before_cursor_execute', _before_cursor_execute)
+        return len(statements), result
+
+    @ddt.data(1, 5)
+    def test_share_get_all(self, count):
+        self._create_shares(count)
+
+        queries, result = self._count_queries(db_api.share_get_all, self.ctxt)
+
+        self.assertEqual(count, len(result))
+        self.assertEqual(5, queries)
+
+    @ddt.data(1, 5)
+    def test_share_instances_get_all(self, count):
+        self._create_shares(count)
+
+        queries, result = self._count_queries(
+            db_api.share_instances_get_all, self.ctxt)
+
+        self.assertEqual(count, len(result))
+        self.assertEqual(4, queries)
+
+    @ddt.data(1, 5)
+    def test_share_instances_get_all_by_host_with_share_data(self, count):
+        shares = self._create_shares(count)
+
+        queries, result = self._count_queries(
+            db_api.share_instances_get_all_by_host, self.ctxt, 'fake_host',
+            with_share_data=True)
+
+        self.assertEqual(count, len(result))
+        self.assertEqual(5, queries)
+        for share, instance in zip(shares, result):
+            self.assertEqual(share['size'], instance['size'])
+            self.assertEqual(share['project_id'], instance['project_id'])
+
+    @ddt.data(1, 5)
+    def test_share_replicas_get_all_with_share_data(self, count):
+        for i in range(count):
+            db_utils.create_share(replication_type='readable',
+                                  replica_state=constants.REPLICA_STATE_ACTIVE,
+                                  size=i + 1)
+
+        queries, result = self._count_queries(
+            db_api.share_replicas_get_all, self.ctxt, with_share_data=True)
+
+        self.assertEqual(count, len(result))
+        self.assertEqual(5, queries)
+        self.assertEqual(set(range(1, count + 1)),
+                         set(replica['size'] for replica in result))
+
+    @ddt.data(1, 5)
+    def test_share_snapshot_get_all(self, count):
+        self._create_shares(count)
+
+        queries, result = self._count_queries(
+            db_api.share_snapshot_get_all, self.ctxt)
+
+        self.assertEqual(count, len(result))
+        self.assertEqual(11, queries)
+
+    @ddt.data(1, 5)
+    def test_share_access_get_all_for_share(self, count):
+        share = self._create_shares(1)[0]
+        for i in range(count - 1):
+            db_utils.create_access(share_id=share['id'],
+                                   access_to='fake_IP_%s' % i)
+
+        queries, result = self._count_queries(
+            db_api.share_access_get_all_for_share, self.ctxt, share['id'])
+
+        self.assertEqual(count, len(result))
+        self.assertEqual(6, queries)
+
+
 @ddt.ddt
 class ConsistencyGroupDatabaseAPITestCase(test.TestCase):
 
@@ -1008,6 +1309,21 @@ class ShareSnapshotDatabaseAPITestCase(test.TestCase):
             self.assertEqual(1, len(snapshot['instances']))
             self.assertEqual(first_instance_id, snapshot['instance']['id'])
 
+    def test_share_snapshot_get_all_with_filters(self):
+        for snapshot_id, status in (('id1', constants.STATUS_AVAILABLE),
+                                    ('id2', constants.STATUS_AVAILABLE),
+                                    ('id3', constants.STATUS_ERROR)):
+            db_utils.create_snapshot(id=snapshot_id, with_share=True,
+                                     display_name='foo', status=status)
+
+        result = db_api.share_snapshot_get_all(
+            self.ctxt, filters={'display_name': 'foo',
+                                'status': constants.STATUS_AVAILABLE,
+                                'limit': 1, 'marker': 'id2'},
+            sort_key='id', sort_dir='desc')
+
+        self.assertEqual(['id1'], [snapshot['id'] for snapshot in result])
+
 
 class ShareExportLocationsDatabaseAPITestCase(test.TestCase):
 
@@ -1043,6 +1359,122 @@ class ShareExportLocationsDatabaseAPITestCase(test.TestCase):
 
         self.assertTrue(actual_result == [initial_location])
 
+    def test_update_unchanged_is_write_free(self):
+        share = db_utils.create_share()
+        locations = [
+            {'path': 'fake1/1/', 'is_admin_only': True,
+             'metadata': {'preferred': True}},
+            {'path': 'fake2/2', 'is_admin_only': False,
+             'metadata': {'foo': 'bar'}},
+        ]
+        db_api.share_export_locations_update(self.ctxt, share.instance['id'],
+                                             locations, True)
+        session = db_api.get_session()
+        self.mock_object(db_api, 'get_session',
+                         mock.Mock(return_value=session))
+        self.mock_object(session, 'bulk_insert_mappings')
+        self.mock_object(session, 'bulk_update_mappings')
+
+        result = db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'], locations, True)
+
+        self.assertEqual({'fake1/1/', 'fake2/2'}, result)
+        self.assertFalse(session.bulk_insert_mappings.called)
+        self.assertFalse(session.bulk_update_mappings.called)
+
+    def test_update_reorder(self):
+        share = db_utils.create_share()
+        db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'], ['fake1', 'fake2'], True)
+
+        db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'], ['fake3', 'fake2', 'fake1'],
+            True)
+
+        self.assertEqual(
+            ['fake3', 'fake2', 'fake1'],
+            db_api.share_export_locations_get(self.ctxt, share['id']))
+
+    def test_update_keeps_not_reported_first(self):
+        share = db_utils.create_share()
+        db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'], ['fake1', 'fake2'], False)
+
+        result = db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'], ['fake3', 'fake1'], False)
+
+        self.assertEqual({'fake1', 'fake2', 'fake3'}, result)
+        self.assertEqual(
+            ['fake2', 'fake3', 'fake1'],
+            db_api.share_export_locations_get(self.ctxt, share['id']))
+
+    def test_update_admin_only_and_metadata(self):
+        share = db_utils.create_share()
+        db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'],
+            [{'path': 'fake1', 'is_admin_only': False,
+              'metadata': {'foo': 'bar', 'quuz': 'quux'}},
+             'fake2'], True)
+
+        db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'],
+            [{'path': 'fake1', 'is_admin_only': True,
+              'metadata': {'foo': 'baz', 'new': 'key'}},
+             'fake2'], True)
+
+        els = db_api.share_export_locations_get_by_share_instance_id(
+            self.ctxt, share.instance['id'])
+        self.assertEqual(['fake1', 'fake2'], [el['path'] for el in els])
+        self.assertTrue(els[0]['is_admin_only'])
+        self.assertEqual({'foo': 'baz', 'new': 'key', 'quuz': 'quux'},
+                         els[0]['el_metadata'])
+        self.assertFalse(els[1]['is_admin_only'])
+
+    def test_update_delete_removes_metadata(self):
+        share = db_utils.create_share()
+        db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'],
+            [{'path': 'fake1', 'metadata': {'foo': 'bar'}}], True)
+        el_uuid = db_api.share_export_locations_get_by_share_instance_id(
+            self.ctxt, share.instance['id'])[0]['uuid']
+
+        result = db_api.share_export_locations_update(
+            self.ctxt, share.instance['id'], ['fake2'], True)
+
+        self.assertEqual({'fake2'}, result)
+        self.assertEqual(
+            ['fake2'],
+            db_api.share_export_locations_get(self.ctxt, share['id']))
+        metadata = db_api.model_query(
+            self.ctxt, models.ShareInstanceExportLocationsMetadata,
+            read_deleted="no").join(
+            models.ShareInstanceExportLocations).filter(
+            models.ShareInstanceExportLocations.uuid == el_uuid).all()
+        self.assertEqual([], metadata)
+
+    def test_update_bulk(self):
+        share1 = db_utils.create_share()
+        share2 = db_utils.create_share()
+        db_api.share_export_locations_update(
+            self.ctxt, share1.instance['id'], ['fake1', 'fake2'], True)
+
+        result = db_api.share_export_locations_update_bulk(
+            self.ctxt, {
+                share1.instance['id']: ['fake2', 'fake3'],
+                share2.instance['id']: [
+                    {'path': 'fake4', 'metadata': {'foo': 'bar'}}],
+            }, True)
+
+        self.assertEqual({share1.instance['id']: {'fake2', 'fake3'},
+                          share2.instance['id']: {'fake4'}}, result)
+        self.assertEqual(
+            ['fake2', 'fake3'],
+            db_api.share_export_locations_get(self.ctxt, share1['id']))
+        els = db_api.share_export_locations_get_by_share_instance_id(
+            self.ctxt, share2.instance['id'])
+        self.assertEqual(['fake4'], [el['path'] for el in els])
+        self.assertEqual({'foo': 'bar'}, els[0]['el_metadata'])
+
     def test_get_admin_export_locations(self):
         ctxt_user = context.RequestContext(
             user_id='fake user', project_id='fake project', is_admin=False)
@@ -1512,6 +1944,21 @@ class ShareNetworkDatabaseAPITestCase(BaseDatabaseAPITestCase):
         self.assertEqual(1, len(result))
         self._check_fields(expected=share_nw_dict2, actual=result[0])
 
+    def test_get_all_by_project_with_filters(self):
+        for i in range(3):
+            share_nw_dict = dict(self.share_nw_dict)
+            share_nw_dict['id'] = 'fake share nw id%s' % i
+            share_nw_dict['neutron_subnet_id'] = 'fake subnet id%s' % i
+            share_nw_dict['ip_version'] = 4 if i else 6
+            db_api.share_network_create(self.fake_context, share_nw_dict)
+
+        result = db_api.share_network_get_all_by_project(
+            self.fake_context, self.share_nw_dict['project_id'],
+            filters={'ip_version': 4, 'limit': 1})
+
+        self.assertEqual(1, len(result))
+        self.assertEqual(4, result[0]['ip_version'])
+
     def test_add_security_service(self):
         security_dict1 = {'id': 'fake security service id1',
                           'project_id': self.fake_context.project_id,
@@ -1941,6 +2388,26 @@ class ShareServerDatabaseAPITestCase(test.TestCase):
         servers = db_api.share_server_get_all(self.ctxt)
         self.assertEqual(2, len(servers))
 
+    def test_get_all_with_filters(self):
+        share_network = db_utils.create_share_network(
+            id='fake_sn_id', name='fake_sn_name', project_id='fake_project')
+        servers = [
+            db_utils.create_share_server(
+                share_network_id=share_network['id'], host=host,
+                status=constants.STATUS_ACTIVE)
+            for host in ('host1', 'host1', 'host2')
+        ]
+        db_utils.create_share_server(host='host1')
+
+        result = db_api.share_server_get_all(
+            self.ctxt, filters={'host': 'host1', 'project_id': 'fake_project',
+                                'share_network': 'fake_sn_name',
+                                'limit': 1, 'offset': 1})
+
+        self.assertEqual(1, len(result))
+        self.assertIn(result[0]['id'],
+                      [server['id'] for server in servers[:2]])
+
     def test_backend_details_set(self):
         details = {
             'value1': '1',
@@ -2164,3 +2631,81 @@ class NetworkAllocationsDatabaseAPITestCase(test.TestCase):
         )
         for na in result:
             self.assertIn(na.label, ('admin', 'user', None))
+
+    def test_network_allocations_get_ip_addresses(self):
+        self._setup_network_allocations_get_for_share_server()
+        allocation = db_api.network_allocations_get_by_ip_address(
+            self.ctxt, '4.4.4.4')[0]
+        db_api.network_allocation_delete(self.ctxt, allocation['id'])
+
+        result = db_api.network_allocations_get_ip_addresses(self.ctxt)
+
+        self.assertEqual(['1.1.1.1', '2.2.2.2', '3.3.3.3'], sorted(result))
+
+    def test_network_allocation_create_if_ip_free(self):
+        self._setup_network_allocations_get_for_share_server()
+        allocation = db_api.network_allocations_get_by_ip_address(
+            self.ctxt, '4.4.4.4')[0]
+        db_api.network_allocation_delete(self.ctxt, allocation['id'])
+        values = dict(self.admin_network_allocations[1])
+        values.pop('id')
+
+        result = db_api.network_allocation_create_if_ip_free(
+            self.ctxt, values)
+
+        self.assertEqual('4.4.4.4', result['ip_address'])
+        self.assertEqual('admin', result['label'])
+        self.assertEqual(self.share_server_id, result['share_server_id'])
+        self.assertEqual(
+            1, len(db_api.network_allocations_get_by_ip_address(
+                self.ctxt, '4.4.4.4')))
+
+    def test_network_allocation_create_if_ip_free_ip_in_use(self):
+        self._setup_network_allocations_get_for_share_server()
+
+        values = dict(self.admin_network_allocations[1])
+        values.pop('id')
+
+        result = db_api.network_allocation_create_if_ip_free(
+            self.ctxt, values)
+
+        self.assertIsNone(result)
+        self.assertEqual(
+            1, len(db_api.network_allocations_get_by_ip_address(
+                self.ctxt, '4.4.4.4')))
+
+    def test_network_allocation_create_if_ip_free_concurrent(self):
+        self._setup_network_allocations_get_for_share_server()
+        values = dict(self.admin_network_allocations[1])
+        values.pop('id')
+        table = models.NetworkAllocation.__table__
+
+        # Concurrent transactions do not see each other's allocations.
+        def _insert(values):
+            return table.insert().values(
+                **{column: values[column] for column in values
+                   if column in table.c})
+
+        self.mock_object(db_api, '_network_allocation_insert_if_ip_free',
+                         mock.Mock(side_effect=_insert))
+
+        result = db_api.network_allocation_create_if_ip_free(
+            self.ctxt, values)
+
+        self.assertIsNone(result)
+        self.assertEqual(
+            1, len(db_api.network_allocations_get_by_ip_address(
+                self.ctxt, '4.4.4.4')))
+
+    def test_network_allocation_insert_if_ip_free_mysql(self):
+        values = {'id': 'fake_id', 'ip_address': '4.4.4.4',
+                  'deleted': 'False'}
+
+        insert = db_api._network_allocation_insert_if_ip_free(values)
+        sql = six.text_type(insert.compile(dialect=mysql.dialect()))
+
+        self.assertIsNotNone(re.match(
+            r'^INSERT INTO network_allocations \(deleted, id, ip_address.*\) '
+            r'SELECT .+ FROM \(SELECT .+ AS one\) AS one_row '
+            r'WHERE NOT \(EXISTS \(SELECT \* FROM network_allocations '
+            r'WHERE .+\)\)$', ' '.join(sql.split())))
@@ -350,9 +350,9 @@ class StandaloneNetworkPluginTest(test.TestCase):
         with test_utils.create_temp_config_with_opts(data):
             instance = plugin.StandaloneNetworkPlugin()
         self.mock_object(instance.db, 'share_network_update')
-        self.mock_object(instance.db, 'network_allocation_create')
+        self.mock_object(instance.db, 'network_allocation_create_if_ip_free')
         self.mock_object(
-            instance.db, 'network_allocations_get_by_ip_address',
+            instance.db, 'network_allocations_get_ip_addresses',
             mock.Mock(return_value=[]))
 
         allocations = instance.allocate_network(
@@ -369,24 +369,16 @@ class StandaloneNetworkPluginTest(test.TestCase):
         }
         instance.db.share_network_update.assert_called_once_with(
             fake_context, fake_share_network['id'], na_data)
-        instance.db.network_allocations_get_by_ip_address.assert_has_calls(
-            [mock.call(fake_context, '10.0.0.2')])
-        instance.db.network_allocation_create.assert_called_once_with(
-            fake_context,
-            dict(share_server_id=fake_share_server['id'],
-                 ip_address='10.0.0.2', status=constants.STATUS_ACTIVE,
-                 label='user', **na_data))
+        instance.db.network_allocations_get_ip_addresses.\
+            assert_called_once_with(fake_context)
+        instance.db.network_allocation_create_if_ip_free.\
+            assert_called_once_with(
+                fake_context,
+                dict(share_server_id=fake_share_server['id'],
+                     ip_address='10.0.0.2', status=constants.STATUS_ACTIVE,
+                     label='user', **na_data))
 
     def test_allocate_network_two_ip_addresses_ipv4_two_usages_exist(self):
-        ctxt = type('FakeCtxt', (object,), {'fake': ['10.0.0.2', '10.0.0.4']})
-
-        def fake_get_allocations_by_ip_address(context, ip_address):
-            if ip_address not in context.fake:
-                context.fake.append(ip_address)
-                return []
-            else:
-                return context.fake
-
         data = {
             'DEFAULT': {
                 'standalone_network_plugin_gateway': '10.0.0.1',
@@ -396,13 +388,14 @@ class StandaloneNetworkPluginTest(test.TestCase):
         with test_utils.create_temp_config_with_opts(data):
             instance = plugin.StandaloneNetworkPlugin()
         self.mock_object(instance.db, 'share_network_update')
-        self.mock_object(instance.db, 'network_allocation_create')
+        self.mock_object(instance.db, 'network_allocation_create_if_ip_free')
         self.mock_object(
-            instance.db, 'network_allocations_get_by_ip_address',
-            mock.Mock(side_effect=fake_get_allocations_by_ip_address))
+            instance.db, 'network_allocations_get_ip_addresses',
+            mock.Mock(return_value=['10.0.0.4', '10.0.0.2', '10.0.1.3',
+                                    '2001:db8::3', 'fake']))
 
         allocations = instance.allocate_network(
-            ctxt, fake_share_server, fake_share_network, count=2)
+            fake_context, fake_share_server, fake_share_network, count=2)
 
         self.assertEqual(2, len(allocations))
         na_data = {
@@ -414,23 +407,69 @@ class StandaloneNetworkPluginTest(test.TestCase):
             'mtu': 1500,
         }
         instance.db.share_network_update.assert_called_once_with(
-            ctxt, fake_share_network['id'], dict(**na_data))
-        instance.db.network_allocations_get_by_ip_address.assert_has_calls(
-            [mock.call(ctxt, '10.0.0.2'), mock.call(ctxt, '10.0.0.3'),
-             mock.call(ctxt, '10.0.0.4'), mock.call(ctxt, '10.0.0.5')])
-        instance.db.network_allocation_create.assert_has_calls([
+            fake_context, fake_share_network['id'], dict(**na_data))
+        instance.db.network_allocations_get_ip_addresses.\
+            assert_called_once_with(fake_context)
+        instance.db.network_allocation_create_if_ip_free.assert_has_calls([
             mock.call(
-                ctxt,
+                fake_context,
                 dict(share_server_id=fake_share_server['id'],
                      ip_address='10.0.0.3', status=constants.STATUS_ACTIVE,
                      label='user', **na_data)),
             mock.call(
-                ctxt,
+                fake_context,
                 dict(share_server_id=fake_share_server['id'],
                      ip_address='10.0.0.5', status=constants.STATUS_ACTIVE,
                      label='user', **na_data)),
         ])
 
+    def test_allocate_network_ip_address_taken_concurrently(self):
+        data = {
+            'DEFAULT': {
+                'standalone_network_plugin_gateway': '10.0.0.1',
+                'standalone_network_plugin_mask': '24',
+            },
+        }
+        with test_utils.create_temp_config_with_opts(data):
+            instance = plugin.StandaloneNetworkPlugin()
+        self.mock_object(instance.db, 'share_network_update')
+        self.mock_object(
+            instance.db, 'network_allocation_create_if_ip_free',
+            mock.Mock(side_effect=[None, 'fake_allocation']))
+        self.mock_object(
+            instance.db, 'network_allocations_get_ip_addresses',
+            mock.Mock(side_effect=[[], ['10.0.0.2']]))
+
+        allocations = instance.allocate_network(
+            fake_context, fake_share_server, fake_share_network)
+
+        self.assertEqual(['fake_allocation'], allocations)
+        self.assertEqual(
+            ['10.0.0.2', '10.0.0.3'],
+            [c[0][1]['ip_address'] for c in
+             instance.db.network_allocation_create_if_ip_free.call_args_list])
+        self.assertEqual(
+            2, instance.db.network_allocations_get_ip_addresses.call_count)
+
+    def test_get_available_ips_multiple_ranges(self):
+        data = {
+            'DEFAULT': {
+                'standalone_network_plugin_gateway': '10.0.0.1',
+                'standalone_network_plugin_mask': '24',
+                'standalone_network_plugin_allowed_ip_ranges': (
+                    '10.0.0.10-10.0.0.12,10.0.0.20-10.0.0.21'),
+            },
+        }
+        with test_utils.create_temp_config_with_opts(data):
+            instance = plugin.StandaloneNetworkPlugin()
+        self.mock_object(
+            instance.db, 'network_allocations_get_ip_addresses',
+            mock.Mock(return_value=['10.0.0.10', '10.0.0.12', '10.0.0.20']))
+
+        ips = instance._get_available_ips(fake_context, 2)
+
+        self.assertEqual(['10.0.0.11', '10.0.0.21'], ips)
+
     def test_allocate_network_no_available_ipv4_addresses(self):
         data = {
             'DEFAULT': {
@@ -441,10 +480,10 @@ class StandaloneNetworkPluginTest(test.TestCase):
         with test_utils.create_temp_config_with_opts(data):
             instance = plugin.StandaloneNetworkPlugin()
         self.mock_object(instance.db, 'share_network_update')
-        self.mock_object(instance.db, 'network_allocation_create')
+        self.mock_object(instance.db, 'network_allocation_create_if_ip_free')
         self.mock_object(
-            instance.db, 'network_allocations_get_by_ip_address',
-            mock.Mock(return_value=['not empty list']))
+            instance.db, 'network_allocations_get_ip_addresses',
+            mock.Mock(return_value=['10.0.0.2']))
 
         self.assertRaises(
             exception.NetworkBadConfigurationException,
@@ -458,5 +497,7 @@ class StandaloneNetworkPluginTest(test.TestCase):
                  gateway=six.text_type(instance.gateway),
                  ip_version=4,
                  mtu=1500))
-        instance.db.network_allocations_get_by_ip_address.assert_has_calls(
-            [mock.call(fake_context, '10.0.0.2')])
+        instance.db.network_allocations_get_ip_addresses.\
+            assert_called_once_with(fake_context)
+        self.assertFalse(
+            instance.db.network_allocation_create_if_ip_free.called)
@@ -13,6 +13,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import mock
+
 from manila import exception
 from manila.scheduler.evaluator import evaluator
 from manila import test
@@ -138,3 +140,26 @@ class EvaluatorTestCase(test.TestCase):
         self.assertRaises(exception.EvaluatorParseException,
                           evaluator.evaluate,
                           "7 / 0")
+
+    def test_parsed_expression_cached(self):
+        evaluator._cache.clear()
+        evaluator.evaluate("1")
+        self.mock_object(evaluator._parser, 'parseString',
+                         mock.Mock(side_effect=evaluator._parser.parseString))
+
+        self.assertEqual(3, evaluator.evaluate("stats.x + 1", stats={'x': 2}))
+        self.assertEqual(5, evaluator.evaluate("stats.x + 1", stats={'x': 4}))
+
+        evaluator._parser.parseString.assert_called_once_with(
+            "stats.x + 1", parseAll=True)
+
+    def test_parsed_expression_cache_size(self):
+        evaluator._cache.clear()
+        self.mock_object(evaluator, '_CACHE_SIZE', 2)
+
+        evaluator.evaluate("1")
+        evaluator.evaluate("2")
+        evaluator.evaluate("1")
+        evaluator.evaluate("3")
+
+        self.assertEqual(["1", "3"], list(evaluator._cache))
@@ -139,6 +139,13 @@ class TestBaseFilterHandler(test.TestCase):
         result = self._get_filtered_objects(filter_classes)
         self.assertEqual(filter_objs_expected, result)
 
+    def test_get_filtered_objects_filter_objects(self):
+        filter_objs_expected = [1, 2, 3, 4]
+        filters = [FakeFilter1(), FakeFilter2(), FakeFilter3(),
+                   FakeFilter4()]
+        result = self._get_filtered_objects(filters)
+        self.assertEqual(filter_objs_expected, result)
+
     def test_get_filtered_objects_with_filter_run_once(self):
         filter_objs_expected = [1, 2, 3, 4]
         filter_classes = [FakeFilter5]
@@ -18,9 +18,11 @@ Tests For CapabilitiesFilter.
 """
 
 import ddt
+import mock
 from oslo_context import context
 
 from manila.scheduler.filters import capabilities
+from manila.scheduler.filters import extra_specs_ops
 from manila import test
 from manila.tests.scheduler import fakes
 
@@ -166,3 +168,25 @@ class HostFiltersTestCase(test.TestCase):
             ecaps={'scope_lv0': {'opt1': [True, False]}},
             especs={'capabilities:scope_lv1:opt1': '<is> True'},
             passes=False)
+
+    def test_capability_filter_filter_all(self):
+        hosts = [
+            fakes.FakeHostState('host%d' % i,
+                                {'capabilities': {'opt1': opt1,
+                                                  'opt2': ['1', '2']}})
+            for i, opt1 in enumerate((True, 1, True, '1', False, True))
+        ]
+        filter_properties = {'resource_type': {
+            'name': 'fake_type',
+            'extra_specs': {'opt1': '1', 'capabilities:opt2': '2',
+                            'vendor:opt3': 'ignored'},
+        }}
+        self.mock_object(extra_specs_ops, 'match',
+                         mock.Mock(side_effect=extra_specs_ops.match))
+
+        result = list(self.filter.filter_all(hosts, filter_properties))
+
+        self.assertEqual(['host0', 'host2', 'host3', 'host5'],
+                         [host.host for host in result])
+        # One match per distinct requirement and typed capability value
+        self.assertEqual(6, extra_specs_ops.match.call_count)
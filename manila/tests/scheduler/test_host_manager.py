@@ -75,6 +75,38 @@ class HostManagerTestCase(test.TestCase):
         self.assertEqual(1, len(filter_classes))
         self.assertEqual('FakeFilterClass2', filter_classes[0].__name__)
 
+    def test_choose_host_filters_cached(self):
+        self.host_manager.filter_classes = [FakeFilterClass1,
+                                            FakeFilterClass2]
+        filter_classes = self.host_manager._choose_host_filters(
+            ['FakeFilterClass2', 'FakeFilterClass1'])
+        self.host_manager.filter_classes = []
+
+        self.assertIs(filter_classes, self.host_manager._choose_host_filters(
+            ('FakeFilterClass2', 'FakeFilterClass1')))
+        self.assertEqual([FakeFilterClass2, FakeFilterClass1],
+                         filter_classes)
+        self.assertRaises(exception.SchedulerHostFilterNotFound,
+                          self.host_manager._choose_host_filters,
+                          'FakeFilterClass1')
+
+    def test_get_filtered_hosts_reuses_filters(self):
+        self.flags(scheduler_default_filters=['FakeFilterClass1'])
+        self.host_manager.filter_classes = [FakeFilterClass1]
+        self.mock_object(self.host_manager.filter_handler,
+                         'get_filtered_objects')
+
+        self.host_manager.get_filtered_hosts(self.fake_hosts, {})
+        self.host_manager.get_filtered_hosts(self.fake_hosts, {})
+
+        calls = self.host_manager.filter_handler.get_filtered_objects.\
+            call_args_list
+        self.assertEqual(2, len(calls))
+        filters = calls[0][0][0]
+        self.assertEqual(1, len(filters))
+        self.assertIsInstance(filters[0], FakeFilterClass1)
+        self.assertIs(filters, calls[1][0][0])
+
     def _verify_result(self, info, result):
         for x in info['got_fprops']:
             self.assertEqual(info['expected_fprops'], x)
@@ -928,3 +960,78 @@ class PoolStateTestCase(test.TestCase):
                              fake_pool.allocated_capacity_gb)
             self.assertEqual(share_capability['provisioned_capacity_gb'],
                              fake_pool.provisioned_capacity_gb)
+
+    def test_update_from_share_capability_cached_provisioned_capacity(self):
+        fake_context = context.RequestContext('user', 'project', is_admin=True)
+        self.mock_object(db, 'share_instances_get_all_by_host')
+        self.mock_object(
+            db, 'share_instances_get_size_sum_by_host',
+            mock.Mock(return_value={'host1#pool0': 40, 'host1#pool1': 8}))
+        provisioned_capacity = host_manager.ProvisionedCapacity()
+        provisioned_capacity.refresh(fake_context)
+        fake_pool = host_manager.PoolState(
+            'host1', None, 'pool0', provisioned_capacity=provisioned_capacity)
+        share_capability = {'total_capacity_gb': 1024,
+                            'free_capacity_gb': 512,
+                            'reserved_percentage': 0,
+                            'timestamp': None}
+
+        fake_pool.update_from_share_capability(share_capability,
+                                               context=fake_context)
+        fake_pool.consume_from_share({'size': 2})
+
+        self.assertEqual(40, fake_pool.provisioned_capacity_gb)
+        self.assertEqual(510, fake_pool.free_capacity_gb)
+        self.assertEqual(42, provisioned_capacity.get('host1#pool0'))
+        self.assertEqual(8, provisioned_capacity.get('host1#pool1'))
+        self.assertFalse(db.share_instances_get_all_by_host.called)
+
+
+class ProvisionedCapacityTestCase(test.TestCase):
+    """Test case for ProvisionedCapacity class."""
+
+    def setUp(self):
+        super(ProvisionedCapacityTestCase, self).setUp()
+        self.context = context.RequestContext('user', 'project',
+                                              is_admin=True)
+        self.provisioned_capacity = host_manager.ProvisionedCapacity()
+        self.mock_object(
+            db, 'share_instances_get_size_sum_by_host',
+            mock.Mock(side_effect=lambda ctxt: {'host1#pool0': 10}))
+
+    def test_get(self):
+        self.provisioned_capacity.refresh(self.context)
+
+        self.assertEqual(10, self.provisioned_capacity.get('host1#pool0'))
+        self.assertEqual(0, self.provisioned_capacity.get('host2#pool0'))
+
+    def test_consume(self):
+        self.provisioned_capacity.refresh(self.context)
+
+        self.provisioned_capacity.consume('host1#pool0', 5)
+        self.provisioned_capacity.consume('host2#pool0', 3)
+
+        self.assertEqual(15, self.provisioned_capacity.get('host1#pool0'))
+        self.assertEqual(3, self.provisioned_capacity.get('host2#pool0'))
+
+    def test_refresh_within_interval(self):
+        self.provisioned_capacity.refresh(self.context)
+        self.provisioned_capacity.consume('host1#pool0', 5)
+
+        self.provisioned_capacity.refresh(self.context)
+
+        self.assertEqual(15, self.provisioned_capacity.get('host1#pool0'))
+        self.assertEqual(
+            1, db.share_instances_get_size_sum_by_host.call_count)
+
+    def test_refresh_after_interval(self):
+        self.provisioned_capacity.refresh(self.context)
+        self.provisioned_capacity.consume('host1#pool0', 5)
+        self.mock_object(timeutils, 'is_older_than',
+                         mock.Mock(return_value=True))
+
+        self.provisioned_capacity.refresh(self.context)
+
+        self.assertEqual(10, self.provisioned_capacity.get('host1#pool0'))
+        self.assertEqual(
+            2, db.share_instances_get_size_sum_by_host.call_count)
@@ -304,6 +304,11 @@ class DummyDriver(driver.ShareDriver):
         """Update the replica_state of a replica."""
         return constants.REPLICA_STATE_IN_SYNC
 
+    def update_replica_states(self, context, replicas):
+        """Report the replica_state of many replicas at once."""
+        return {r["replica"]["id"]: constants.REPLICA_STATE_IN_SYNC
+                for r in replicas}
+
     def create_replicated_snapshot(self, context, replica_list,
                                    replica_snapshots, share_server=None):
         """Create a snapshot on active instance and update across the replicas.
@@ -13,6 +13,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import copy
 import re
 
 import mock
@@ -106,6 +107,15 @@ class GaneshaConfigTests(test.TestCase):
         ret = manager._conf2json(test_ganesha_cnf_with_comment)
         self.assertEqual(test_dict_unicode, jsonutils.loads(ret))
 
+    def test_conf2json_quoted_string(self):
+        ret = manager._conf2json('EXPORT { Path = "/fake # \\"path\\""; }')
+        self.assertEqual({'EXPORT': {'Path': '/fake # "path"'}},
+                         jsonutils.loads(ret))
+
+    def test_conf2json_error_unterminated_quote(self):
+        self.assertRaises(RuntimeError, manager._conf2json,
+                          'EXPORT { Path = "/fake; }')
+
     def test_parseconf_ganesha_cnf_input(self):
         ret = manager.parseconf(test_ganesha_cnf)
         self.assertEqual(test_dict_unicode, ret)
@@ -344,26 +354,108 @@ class GaneshaManagerTestCase(test.TestCase):
             'RemoveExport', 'uint16:101')
         self.assertIsNone(ret)
 
+    def test_update_index(self):
+        test_index = ('%include /fakedir0/export.d/fakefile.conf\n'
+                      '%include /fakedir0/export.d/fakeadd.conf\n'
+                      '%include /fakedir0/export.d/fakerm.conf\n')
+        self.mock_object(self._manager, 'execute',
+                         mock.Mock(return_value=(test_index, '')))
+        self.mock_object(self._manager, '_write_conf_file')
+        ret = self._manager._update_index(add=['fakeadd'],
+                                          remove=['fakerm'])
+        self._manager.execute.assert_called_once_with(
+            'cat', '/fakedir0/export.d/INDEX.conf', makelog=False,
+            message='reading index')
+        self._manager._write_conf_file.assert_called_once_with(
+            'INDEX', '%include /fakedir0/export.d/fakefile.conf\n'
+                     '%include /fakedir0/export.d/fakeadd.conf\n')
+        self.assertIsNone(ret)
+
+    def test_update_index_no_index(self):
+        test_ls_output = 'fakefile.conf\nfakerm.conf'
+        self.mock_object(self._manager, 'execute', mock.Mock(side_effect=[
+            exception.GaneshaCommandFailure, (test_ls_output, '')]))
+        self.mock_object(self._manager, '_write_conf_file')
+        ret = self._manager._update_index(add=['fakeadd'],
+                                          remove=['fakerm'])
+        self._manager.execute.assert_has_calls([
+            mock.call('cat', '/fakedir0/export.d/INDEX.conf', makelog=False,
+                      message='reading index'),
+            mock.call('ls', '/fakedir0/export.d', run_as_root=False)])
+        self._manager._write_conf_file.assert_called_once_with(
+            'INDEX', '%include /fakedir0/export.d/fakefile.conf\n'
+                     '%include /fakedir0/export.d/fakeadd.conf\n')
+        self.assertIsNone(ret)
+
+    def test_update_index_noop(self):
+        self.mock_object(self._manager, 'execute')
+        ret = self._manager._update_index(add=[], remove=[])
+        self.assertFalse(self._manager.execute.called)
+        self.assertIsNone(ret)
+
     def test_add_export(self):
         self.mock_object(self._manager, '_write_export_file',
                          mock.Mock(return_value=test_path))
         self.mock_object(self._manager, '_dbus_send_ganesha')
-        self.mock_object(self._manager, '_mkindex')
+        self.mock_object(self._manager, '_update_index')
         ret = self._manager.add_export(test_name, test_dict_str)
         self._manager._write_export_file.assert_called_once_with(
             test_name, test_dict_str)
         self._manager._dbus_send_ganesha.assert_called_once_with(
             'AddExport', 'string:' + test_path,
             'string:EXPORT(Export_Id=101)')
-        self._manager._mkindex.assert_called_once_with()
+        self._manager._update_index.assert_called_once_with(
+            add=[test_name])
         self.assertIsNone(ret)
 
-    def test_add_export_error_during_mkindex(self):
+    def test_add_exports(self):
+        test_dict_str2 = copy.deepcopy(test_dict_str)
+        test_dict_str2['EXPORT']['Export_Id'] = 102
         self.mock_object(self._manager, '_write_export_file',
                          mock.Mock(return_value=test_path))
         self.mock_object(self._manager, '_dbus_send_ganesha')
+        self.mock_object(self._manager, '_update_index')
+        ret = self._manager.add_exports([(test_name, test_dict_str),
+                                         ('fakename2', test_dict_str2)])
+        self._manager._write_export_file.assert_has_calls([
+            mock.call(test_name, test_dict_str),
+            mock.call('fakename2', test_dict_str2)])
+        self._manager._dbus_send_ganesha.assert_has_calls([
+            mock.call('AddExport', 'string:' + test_path,
+                      'string:EXPORT(Export_Id=101)'),
+            mock.call('AddExport', 'string:' + test_path,
+                      'string:EXPORT(Export_Id=102)')])
+        self._manager._update_index.assert_called_once_with(
+            add=[test_name, 'fakename2'])
+        self.assertIsNone(ret)
+
+    def test_add_exports_error_keeps_previous_exports(self):
+        test_dict_str2 = copy.deepcopy(test_dict_str)
+        test_dict_str2['EXPORT']['Export_Id'] = 102
         self.mock_object(
-            self._manager, '_mkindex',
+            self._manager, '_write_export_file',
+            mock.Mock(side_effect=[test_path,
+                                   exception.GaneshaCommandFailure]))
+        self.mock_object(self._manager, '_dbus_send_ganesha')
+        self.mock_object(self._manager, '_update_index')
+        self.mock_object(self._manager, '_rm_export_file')
+        self.assertRaises(exception.GaneshaCommandFailure,
+                          self._manager.add_exports,
+                          [(test_name, test_dict_str),
+                           ('fakename2', test_dict_str2)])
+        self._manager._dbus_send_ganesha.assert_called_once_with(
+            'AddExport', 'string:' + test_path,
+            'string:EXPORT(Export_Id=101)')
+        self._manager._update_index.assert_called_once_with(
+            add=[test_name])
+        self.assertFalse(self._manager._rm_export_file.called)
+
+    def test_add_export_error_during_update_index(self):
+        self.mock_object(self._manager, '_write_export_file',
+                         mock.Mock(return_value=test_path))
+        self.mock_object(self._manager, '_dbus_send_ganesha')
+        self.mock_object(
+            self._manager, '_update_index',
             mock.Mock(side_effect=exception.GaneshaCommandFailure))
         self.mock_object(self._manager, '_rm_export_file')
         self.mock_object(self._manager, '_remove_export_dbus')
@@ -374,7 +466,8 @@ class GaneshaManagerTestCase(test.TestCase):
         self._manager._dbus_send_ganesha.assert_called_once_with(
             'AddExport', 'string:' + test_path,
             'string:EXPORT(Export_Id=101)')
-        self._manager._mkindex.assert_called_once_with()
+        self._manager._update_index.assert_called_once_with(
+            add=[test_name])
         self._manager._rm_export_file.assert_called_once_with(test_name)
         self._manager._remove_export_dbus.assert_called_once_with(
             test_export_id)
@@ -384,7 +477,7 @@ class GaneshaManagerTestCase(test.TestCase):
             self._manager, '_write_export_file',
             mock.Mock(side_effect=exception.GaneshaCommandFailure))
         self.mock_object(self._manager, '_dbus_send_ganesha')
-        self.mock_object(self._manager, '_mkindex')
+        self.mock_object(self._manager, '_update_index')
         self.mock_object(self._manager, '_rm_export_file')
         self.mock_object(self._manager, '_remove_export_dbus')
         self.assertRaises(exception.GaneshaCommandFailure,
@@ -392,7 +485,7 @@ class GaneshaManagerTestCase(test.TestCase):
         self._manager._write_export_file.assert_called_once_with(
             test_name, test_dict_str)
         self.assertFalse(self._manager._dbus_send_ganesha.called)
-        self._manager._mkindex.assert_called_once_with()
+        self._manager._update_index.assert_called_once_with(add=[])
         self.assertFalse(self._manager._rm_export_file.called)
         self.assertFalse(self._manager._remove_export_dbus.called)
 
@@ -402,7 +495,7 @@ class GaneshaManagerTestCase(test.TestCase):
         self.mock_object(
             self._manager, '_dbus_send_ganesha',
             mock.Mock(side_effect=exception.GaneshaCommandFailure))
-        self.mock_object(self._manager, '_mkindex')
+        self.mock_object(self._manager, '_update_index')
         self.mock_object(self._manager, '_rm_export_file')
         self.mock_object(self._manager, '_remove_export_dbus')
         self.assertRaises(exception.GaneshaCommandFailure,
@@ -413,13 +506,13 @@ class GaneshaManagerTestCase(test.TestCase):
             'AddExport', 'string:' + test_path,
             'string:EXPORT(Export_Id=101)')
         self._manager._rm_export_file.assert_called_once_with(test_name)
-        self._manager._mkindex.assert_called_once_with()
+        self._manager._update_index.assert_called_once_with(add=[])
         self.assertFalse(self._manager._remove_export_dbus.called)
 
     def test_remove_export(self):
         self.mock_object(self._manager, '_read_export_file',
                          mock.Mock(return_value=test_dict_unicode))
-        methods = ('_remove_export_dbus', '_rm_export_file', '_mkindex')
+        methods = ('_remove_export_dbus', '_rm_export_file', '_update_index')
         for method in methods:
             self.mock_object(self._manager, method)
         ret = self._manager.remove_export(test_name)
@@ -427,14 +520,31 @@ class GaneshaManagerTestCase(test.TestCase):
         self._manager._remove_export_dbus.assert_called_once_with(
             test_dict_unicode['EXPORT']['Export_Id'])
         self._manager._rm_export_file.assert_called_once_with(test_name)
-        self._manager._mkindex.assert_called_once_with()
+        self._manager._update_index.assert_called_once_with(
+            remove=[test_name])
+        self.assertIsNone(ret)
+
+    def test_remove_exports(self):
+        self.mock_object(self._manager, '_read_export_file',
+                         mock.Mock(return_value=test_dict_unicode))
+        methods = ('_remove_export_dbus', '_rm_export_file', '_update_index')
+        for method in methods:
+            self.mock_object(self._manager, method)
+        ret = self._manager.remove_exports([test_name, 'fakename2'])
+        self._manager._read_export_file.assert_has_calls([
+            mock.call(test_name), mock.call('fakename2')])
+        self.assertEqual(2, self._manager._remove_export_dbus.call_count)
+        self._manager._rm_export_file.assert_has_calls([
+            mock.call(test_name), mock.call('fakename2')])
+        self._manager._update_index.assert_called_once_with(
+            remove=[test_name, 'fakename2'])
         self.assertIsNone(ret)
 
     def test_remove_export_error_during_read_export_file(self):
         self.mock_object(
             self._manager, '_read_export_file',
             mock.Mock(side_effect=exception.GaneshaCommandFailure))
-        methods = ('_remove_export_dbus', '_rm_export_file', '_mkindex')
+        methods = ('_remove_export_dbus', '_rm_export_file', '_update_index')
         for method in methods:
             self.mock_object(self._manager, method)
         self.assertRaises(exception.GaneshaCommandFailure,
@@ -442,7 +552,8 @@ class GaneshaManagerTestCase(test.TestCase):
         self._manager._read_export_file.assert_called_once_with(test_name)
         self.assertFalse(self._manager._remove_export_dbus.called)
         self._manager._rm_export_file.assert_called_once_with(test_name)
-        self._manager._mkindex.assert_called_once_with()
+        self._manager._update_index.assert_called_once_with(
+            remove=[test_name])
 
     def test_remove_export_error_during_remove_export_dbus(self):
         self.mock_object(self._manager, '_read_export_file',
@@ -450,7 +561,7 @@ class GaneshaManagerTestCase(test.TestCase):
         self.mock_object(
             self._manager, '_remove_export_dbus',
             mock.Mock(side_effect=exception.GaneshaCommandFailure))
-        methods = ('_rm_export_file', '_mkindex')
+        methods = ('_rm_export_file', '_update_index')
         for method in methods:
             self.mock_object(self._manager, method)
         self.assertRaises(exception.GaneshaCommandFailure,
@@ -459,7 +570,8 @@ class GaneshaManagerTestCase(test.TestCase):
         self._manager._remove_export_dbus.assert_called_once_with(
             test_dict_unicode['EXPORT']['Export_Id'])
         self._manager._rm_export_file.assert_called_once_with(test_name)
-        self._manager._mkindex.assert_called_once_with()
+        self._manager._update_index.assert_called_once_with(
+            remove=[test_name])
 
     def test_get_export_id(self):
         self.mock_object(self._manager, 'execute',
@@ -467,10 +579,17 @@ class GaneshaManagerTestCase(test.TestCase):
         ret = self._manager.get_export_id()
         self._manager.execute.assert_called_once_with(
             'sqlite3', self._manager.ganesha_db_path,
-            'update ganesha set value = value + 1;'
+            'update ganesha set value = value + 10;'
             'select * from ganesha where key = "exportid";',
             run_as_root=False)
-        self.assertEqual(101, ret)
+        self.assertEqual(92, ret)
+
+    def test_get_export_id_reserved(self):
+        self.mock_object(self._manager, 'execute',
+                         mock.Mock(return_value=('exportid|101', '')))
+        ret = [self._manager.get_export_id() for i in range(11)]
+        self.assertEqual(list(range(92, 102)) + [92], ret)
+        self.assertEqual(2, self._manager.execute.call_count)
 
     def test_get_export_id_nobump(self):
         self.mock_object(self._manager, 'execute',
@@ -492,7 +611,7 @@ class GaneshaManagerTestCase(test.TestCase):
             mock.ANY, mock.ANY)
         self._manager.execute.assert_called_once_with(
             'sqlite3', self._manager.ganesha_db_path,
-            'update ganesha set value = value + 1;'
+            'update ganesha set value = value + 10;'
             'select * from ganesha where key = "exportid";',
             run_as_root=False)
 
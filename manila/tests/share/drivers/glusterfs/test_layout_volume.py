@@ -16,6 +16,7 @@
 """ GlusterFS volume mapped share layout testcases.
 """
 
+import datetime
 import re
 import shutil
 import tempfile
@@ -23,6 +24,7 @@ import tempfile
 import ddt
 import mock
 from oslo_config import cfg
+from oslo_utils import timeutils
 
 from manila.common import constants
 from manila import context
@@ -62,6 +64,7 @@ def glusterXMLOut(**kwargs):
 
 FAKE_UUID1 = '11111111-1111-1111-1111-111111111111'
 FAKE_UUID2 = '22222222-2222-2222-2222-222222222222'
+FAKE_WIPE_PENDING = 'WIPE-PENDING:otherhost@otherbackend'
 
 
 @ddt.ddt
@@ -230,6 +233,81 @@ class GlusterfsVolumeMappedLayoutTestCase(test.TestCase):
         self.assertFalse(gmgr_vol2.get_vol_option.called)
         self.assertEqual(expected_output, ret)
 
+    def test_fetch_gluster_volumes_cached_marks(self):
+        vol1_qualified = 'root@host1:/manila-share-1-1G'
+        vol2_qualified = 'root@host2:/manila-share-2-2G'
+        gmgr_vol1 = common.GlusterManager(vol1_qualified)
+        gmgr_vol1.get_vol_option = mock.Mock()
+        gmgr_vol2 = common.GlusterManager(vol2_qualified)
+        gmgr_vol2.get_vol_option = mock.Mock()
+        self.mock_object(
+            self.gmgr1, 'gluster_call',
+            mock.Mock(return_value=(self.glusterfs_server1_volumes, '')))
+        self.mock_object(
+            self.gmgr2, 'gluster_call',
+            mock.Mock(return_value=(self.glusterfs_server2_volumes, '')))
+        _glustermanager_calls = (self.gmgr1, gmgr_vol1, self.gmgr2, gmgr_vol2)
+        self.mock_object(self._layout, '_glustermanager',
+                         mock.Mock(side_effect=_glustermanager_calls))
+        self._layout.gluster_vol_marks = {
+            vol1_qualified: 'NONE',
+            vol2_qualified: self._layout.wipe_pending_mark,
+            'root@host1:/manila-share-3-3G': FAKE_UUID1}
+        read_at = timeutils.utcnow()
+        self._layout.gluster_vol_marks_read_at = read_at
+
+        ret = self._layout._fetch_gluster_volumes()
+
+        self.assertFalse(gmgr_vol1.get_vol_option.called)
+        self.assertFalse(gmgr_vol2.get_vol_option.called)
+        self.assertEqual({vol1_qualified: {'size': 1}}, ret)
+        self.assertEqual({vol1_qualified: 'NONE',
+                          vol2_qualified: self._layout.wipe_pending_mark},
+                         self._layout.gluster_vol_marks)
+        self.assertEqual(read_at, self._layout.gluster_vol_marks_read_at)
+
+    @ddt.data({'mark': FAKE_UUID1, 'used_by_us': True},
+              {'mark': FAKE_UUID1, 'used_by_us': False},
+              {'mark': FAKE_WIPE_PENDING, 'used_by_us': False})
+    @ddt.unpack
+    def test_fetch_gluster_volumes_refresh_marks(self, mark, used_by_us):
+        vol1_qualified = 'root@host1:/manila-share-1-1G'
+        vol2_qualified = 'root@host2:/manila-share-2-2G'
+        gmgr_vol1 = common.GlusterManager(vol1_qualified)
+        gmgr_vol1.get_vol_option = mock.Mock(return_value='NONE')
+        gmgr_vol2 = common.GlusterManager(vol2_qualified)
+        gmgr_vol2.get_vol_option = mock.Mock(return_value='NONE')
+        self.mock_object(
+            self.gmgr1, 'gluster_call',
+            mock.Mock(return_value=(self.glusterfs_server1_volumes, '')))
+        self.mock_object(
+            self.gmgr2, 'gluster_call',
+            mock.Mock(return_value=(self.glusterfs_server2_volumes, '')))
+        _glustermanager_calls = (self.gmgr1, gmgr_vol1, self.gmgr2, gmgr_vol2)
+        self.mock_object(self._layout, '_glustermanager',
+                         mock.Mock(side_effect=_glustermanager_calls))
+        self._layout.gluster_vol_marks = {vol1_qualified: 'NONE',
+                                          vol2_qualified: mark}
+        if used_by_us:
+            self._layout.gluster_used_vols = set([vol2_qualified])
+        self._layout.gluster_vol_marks_read_at = (
+            timeutils.utcnow() - datetime.timedelta(
+                seconds=self._layout.configuration.
+                glusterfs_volume_mark_refresh_interval + 1))
+
+        ret = self._layout._fetch_gluster_volumes()
+
+        self.assertFalse(gmgr_vol1.get_vol_option.called)
+        if used_by_us:
+            self.assertFalse(gmgr_vol2.get_vol_option.called)
+            self.assertEqual({vol1_qualified: {'size': 1}}, ret)
+        else:
+            gmgr_vol2.get_vol_option.assert_called_once_with(
+                'user.manila-share')
+            self.assertEqual(self.glusterfs_volumes_dict, ret)
+        self.assertFalse(timeutils.is_older_than(
+            self._layout.gluster_vol_marks_read_at, 60))
+
     def test_fetch_gluster_volumes_no_keymatch(self):
         vol1_qualified = 'root@host1:/manila-share-1'
         gmgr_vol1 = common.GlusterManager(vol1_qualified)
@@ -278,17 +356,53 @@ class GlusterfsVolumeMappedLayoutTestCase(test.TestCase):
                          mock.Mock(return_value=('3', '6')))
         self.mock_object(self._layout, '_glustermanager',
                          mock.Mock(return_value=self.gmgr1))
+
+        def _fetch_gluster_volumes():
+            self._layout.gluster_vol_marks = dict.fromkeys(
+                self.glusterfs_volumes_dict, FAKE_UUID1)
+            return {}
+
         self.mock_object(self._layout, '_fetch_gluster_volumes',
-                         mock.Mock(return_value=self.glusterfs_volumes_dict))
+                         mock.Mock(side_effect=_fetch_gluster_volumes))
         self.mock_object(self._layout, '_check_mount_glusterfs')
+        self.mock_object(self._layout, '_schedule_gluster_vol_wipe')
         self._layout.gluster_used_vols = self.glusterfs_used_vols
         self.mock_object(layout_volume.LOG, 'warning')
 
         self._layout.do_setup(self._context)
 
-        self._layout._fetch_gluster_volumes.assert_called_once_with(
-            filter_used=False)
+        self._layout._fetch_gluster_volumes.assert_called_once_with()
         self._layout._check_mount_glusterfs.assert_called_once_with()
+        self.assertFalse(self._layout._schedule_gluster_vol_wipe.called)
+
+    def test_do_setup_pending_wipes(self):
+        self._layout.configuration.glusterfs_servers = [self.glusterfs_server1]
+        self.mock_object(self.gmgr1, 'get_gluster_version',
+                         mock.Mock(return_value=('3', '6')))
+        gmgr_vol = common.GlusterManager(self.glusterfs_target1)
+        self.mock_object(self._layout, '_glustermanager',
+                         mock.Mock(side_effect=[self.gmgr1, gmgr_vol]))
+
+        def _fetch_gluster_volumes():
+            self._layout.gluster_vol_marks = {
+                self.glusterfs_target1: self._layout.wipe_pending_mark,
+                self.glusterfs_target2: FAKE_WIPE_PENDING,
+                'root@host1:/gv3': FAKE_UUID1}
+            return {}
+
+        self.mock_object(self._layout, '_fetch_gluster_volumes',
+                         mock.Mock(side_effect=_fetch_gluster_volumes))
+        order = mock.Mock()
+        self.mock_object(self._layout, '_check_mount_glusterfs',
+                         order._check_mount_glusterfs)
+        self.mock_object(self._layout, '_schedule_gluster_vol_wipe',
+                         order._schedule_gluster_vol_wipe)
+
+        self._layout.do_setup(self._context)
+
+        self.assertEqual([mock.call._check_mount_glusterfs(),
+                          mock.call._schedule_gluster_vol_wipe(gmgr_vol)],
+                         order.mock_calls)
         self.gmgr1.get_gluster_version.assert_called_once_with()
 
     def test_do_setup_unsupported_glusterfs_version(self):
@@ -330,8 +444,7 @@ class GlusterfsVolumeMappedLayoutTestCase(test.TestCase):
         self.assertRaises(exception.GlusterfsException,
                           self._layout.do_setup, self._context)
 
-        self._layout._fetch_gluster_volumes.assert_called_once_with(
-            filter_used=False)
+        self._layout._fetch_gluster_volumes.assert_called_once_with()
 
     def test_share_manager(self):
         self.mock_object(self._layout, '_glustermanager',
@@ -370,6 +483,8 @@ class GlusterfsVolumeMappedLayoutTestCase(test.TestCase):
         self.assertIn(self.glusterfs_target1, self._layout.gluster_used_vols)
         gmgr1.set_vol_option.assert_called_once_with(
             'user.manila-share', share['id'])
+        self.assertEqual(share['id'], self._layout.gluster_vol_marks[
+            self.glusterfs_target1])
 
     @ddt.data({"voldict": {"host:/share2G": {"size": 2}}, "used_vols": set(),
                "size": 1, "expected": "host:/share2G"},
@@ -401,6 +516,7 @@ class GlusterfsVolumeMappedLayoutTestCase(test.TestCase):
     def test_pop_gluster_vol(self, voldict, used_vols, size, expected):
         gmgr = common.GlusterManager
         gmgr1 = gmgr(expected, self._execute, None, None)
+        gmgr1.get_vol_option = mock.Mock(return_value='NONE')
         self._layout._fetch_gluster_volumes = mock.Mock(return_value=voldict)
         self._layout.gluster_used_vols = used_vols
         self._layout._glustermanager = mock.Mock(return_value=gmgr1)
@@ -411,7 +527,33 @@ class GlusterfsVolumeMappedLayoutTestCase(test.TestCase):
         self.assertEqual(expected, result)
         self.assertIn(result, used_vols)
         self._layout._fetch_gluster_volumes.assert_called_once_with()
-        self._layout._glustermanager.assert_called_once_with(result)
+        self._layout._glustermanager.assert_called_with(result)
+        gmgr1.get_vol_option.assert_called_once_with('user.manila-share')
+
+    @ddt.data(FAKE_UUID1, FAKE_WIPE_PENDING)
+    def test_pop_gluster_vol_stale_mark(self, mark):
+        voldict = {'host:/share1': {'size': None},
+                   'host:/share2': {'size': None}}
+        gmgr1 = common.GlusterManager('host:/share1', self._execute,
+                                      None, None)
+        gmgr1.get_vol_option = mock.Mock(return_value=mark)
+        gmgr2 = common.GlusterManager('host:/share2', self._execute,
+                                      None, None)
+        gmgr2.get_vol_option = mock.Mock(return_value=None)
+        self._layout._fetch_gluster_volumes = mock.Mock(return_value=voldict)
+        self._layout.gluster_used_vols = set()
+        self._layout._glustermanager = mock.Mock(
+            side_effect=lambda vol: {'host:/share1': gmgr1,
+                                     'host:/share2': gmgr2}[vol])
+        self._layout.volume_pattern_keys = ['size']
+
+        result = self._layout._pop_gluster_vol()
+
+        self.assertEqual('host:/share2', result)
+        self.assertEqual(set(['host:/share2']),
+                         self._layout.gluster_used_vols)
+        self.assertEqual(mark,
+                         self._layout.gluster_vol_marks['host:/share1'])
 
     @ddt.data({"voldict": {"share2G": {"size": 2}},
                "used_vols": set(), "size": 3},
@@ -448,6 +590,98 @@ class GlusterfsVolumeMappedLayoutTestCase(test.TestCase):
                           self._layout._push_gluster_vol,
                           self.glusterfs_target2)
 
+    def test_schedule_gluster_vol_wipe(self):
+        gmgr1 = common.GlusterManager(self.glusterfs_target1, self._execute,
+                                      None, None)
+        self.mock_object(self._layout, '_wipe_pool')
+
+        self._layout._schedule_gluster_vol_wipe(gmgr1)
+        self._layout._schedule_gluster_vol_wipe(gmgr1)
+
+        self._layout._wipe_pool.spawn_n.assert_called_once_with(
+            self._layout._wipe_released_gluster_vol, gmgr1)
+        self.assertEqual(set([self.glusterfs_target1]),
+                         self._layout.gluster_wiping_vols)
+
+    def test_init_wipe_settings(self):
+        CONF.set_default('glusterfs_volume_wipe_workers', 2)
+        self.mock_object(layout_volume.eventlet, 'GreenPool')
+
+        with mock.patch.object(layout_volume.GlusterfsVolumeMappedLayout,
+                               '_glustermanager',
+                               side_effect=[self.gmgr1, self.gmgr2]):
+            _layout = layout_volume.GlusterfsVolumeMappedLayout(
+                self.fake_driver, configuration=self.fake_conf,
+                private_storage=self.fake_private_storage)
+
+        layout_volume.eventlet.GreenPool.assert_called_once_with(2)
+        self.assertEqual('WIPE-PENDING:%s@None' % CONF.host,
+                         _layout.wipe_pending_mark)
+
+    def test_wipe_released_gluster_vol(self):
+        gmgr1 = common.GlusterManager(self.glusterfs_target1, self._execute,
+                                      None, None)
+        gmgr1.set_vol_option = mock.Mock()
+        gmgr1.get_vol_option = mock.Mock(
+            return_value=self._layout.wipe_pending_mark)
+        self.mock_object(self._layout, '_wipe_gluster_vol')
+        self._layout.gluster_wiping_vols = set([self.glusterfs_target1])
+
+        self._layout._wipe_released_gluster_vol(gmgr1)
+
+        gmgr1.get_vol_option.assert_called_once_with('user.manila-share')
+        self._layout._wipe_gluster_vol.assert_called_once_with(gmgr1)
+        gmgr1.set_vol_option.assert_called_once_with(
+            'user.manila-share', 'NONE')
+        self.assertEqual({self.glusterfs_target1: 'NONE'},
+                         self._layout.gluster_vol_marks)
+        self.assertEqual(set(), self._layout.gluster_wiping_vols)
+
+    @ddt.data(FAKE_UUID1, FAKE_WIPE_PENDING, 'NONE')
+    def test_wipe_released_gluster_vol_mark_changed(self, mark):
+        gmgr1 = common.GlusterManager(self.glusterfs_target1, self._execute,
+                                      None, None)
+        gmgr1.set_vol_option = mock.Mock()
+        gmgr1.get_vol_option = mock.Mock(return_value=mark)
+        self.mock_object(self._layout, '_wipe_gluster_vol')
+        self.mock_object(layout_volume.LOG, 'warning')
+        self._layout.gluster_vol_marks = {
+            self.glusterfs_target1: self._layout.wipe_pending_mark}
+        self._layout.gluster_wiping_vols = set([self.glusterfs_target1])
+
+        self._layout._wipe_released_gluster_vol(gmgr1)
+
+        self.assertFalse(self._layout._wipe_gluster_vol.called)
+        self.assertFalse(gmgr1.set_vol_option.called)
+        self.assertTrue(layout_volume.LOG.warning.called)
+        self.assertEqual({self.glusterfs_target1: mark},
+                         self._layout.gluster_vol_marks)
+        self.assertEqual(set(), self._layout.gluster_wiping_vols)
+
+    def test_wipe_released_gluster_vol_error(self):
+        gmgr1 = common.GlusterManager(self.glusterfs_target1, self._execute,
+                                      None, None)
+        gmgr1.set_vol_option = mock.Mock()
+        gmgr1.get_vol_option = mock.Mock(
+            return_value=self._layout.wipe_pending_mark)
+        self.mock_object(
+            self._layout, '_wipe_gluster_vol',
+            mock.Mock(side_effect=exception.GlusterfsException))
+        self.mock_object(layout_volume.LOG, 'exception')
+        self._layout.gluster_vol_marks = {
+            self.glusterfs_target1: self._layout.wipe_pending_mark}
+        self._layout.gluster_wiping_vols = set([self.glusterfs_target1])
+
+        self._layout._wipe_released_gluster_vol(gmgr1)
+
+        self._layout._wipe_gluster_vol.assert_called_once_with(gmgr1)
+        self.assertFalse(gmgr1.set_vol_option.called)
+        self.assertTrue(layout_volume.LOG.exception.called)
+        self.assertEqual(
+            {self.glusterfs_target1: self._layout.wipe_pending_mark},
+            self._layout.gluster_vol_marks)
+        self.assertEqual(set(), self._layout.gluster_wiping_vols)
+
     @ddt.data({'vers_minor': '6',
                'cmd': ['find', '/tmp/tmpKGHKJ', '-mindepth', '1',
                        '-delete']},
@@ -582,7 +816,7 @@ class GlusterfsVolumeMappedLayoutTestCase(test.TestCase):
     @ddt.data(None, '', 'Eeyore')
     def test_delete_share(self, clone_of):
         self._layout._push_gluster_vol = mock.Mock()
-        self._layout._wipe_gluster_vol = mock.Mock()
+        self._layout._schedule_gluster_vol_wipe = mock.Mock()
         gmgr = common.GlusterManager
         gmgr1 = gmgr(self.glusterfs_target1, self._execute, None, None)
         gmgr1.set_vol_option = mock.Mock()
@@ -595,17 +829,21 @@ class GlusterfsVolumeMappedLayoutTestCase(test.TestCase):
 
         gmgr1.get_vol_option.assert_called_once_with(
             'user.manila-cloned-from')
-        self._layout._wipe_gluster_vol.assert_called_once_with(gmgr1)
+        self._layout._schedule_gluster_vol_wipe.assert_called_once_with(
+            gmgr1)
         self._layout._push_gluster_vol.assert_called_once_with(
             self.glusterfs_target1)
         self._layout.private_storage.delete.assert_called_once_with(
             self.share1['id'])
         gmgr1.set_vol_option.assert_called_once_with(
-            'user.manila-share', 'NONE')
+            'user.manila-share', self._layout.wipe_pending_mark)
+        self.assertEqual(
+            {self.glusterfs_target1: self._layout.wipe_pending_mark},
+            self._layout.gluster_vol_marks)
 
     def test_delete_share_clone(self):
         self._layout._push_gluster_vol = mock.Mock()
-        self._layout._wipe_gluster_vol = mock.Mock()
+        self._layout._schedule_gluster_vol_wipe = mock.Mock()
         gmgr = common.GlusterManager
         gmgr1 = gmgr(self.glusterfs_target1, self._execute, None, None)
         gmgr1.gluster_call = mock.Mock()
@@ -613,12 +851,14 @@ class GlusterfsVolumeMappedLayoutTestCase(test.TestCase):
         self.mock_object(self._layout, '_glustermanager',
                          mock.Mock(return_value=gmgr1))
         self._layout.gluster_used_vols = set([self.glusterfs_target1])
+        self._layout.gluster_vol_marks = {self.glusterfs_target1: FAKE_UUID2}
 
         self._layout.delete_share(self._context, self.share1)
 
         gmgr1.get_vol_option.assert_called_once_with(
             'user.manila-cloned-from')
-        self.assertFalse(self._layout._wipe_gluster_vol.called)
+        self.assertFalse(self._layout._schedule_gluster_vol_wipe.called)
+        self.assertEqual({}, self._layout.gluster_vol_marks)
         self._layout._push_gluster_vol.assert_called_once_with(
             self.glusterfs_target1)
         self._layout.private_storage.delete.assert_called_once_with(
@@ -627,13 +867,13 @@ class GlusterfsVolumeMappedLayoutTestCase(test.TestCase):
             'volume', 'delete', 'gv1')
 
     def test_delete_share_error(self):
-        self._layout._wipe_gluster_vol = mock.Mock()
-        self._layout._wipe_gluster_vol.side_effect = (
-            exception.GlusterfsException)
+        self._layout._schedule_gluster_vol_wipe = mock.Mock()
         self._layout._push_gluster_vol = mock.Mock()
         gmgr = common.GlusterManager
         gmgr1 = gmgr(self.glusterfs_target1, self._execute, None, None)
         gmgr1.get_vol_option = mock.Mock(return_value=None)
+        gmgr1.set_vol_option = mock.Mock(
+            side_effect=exception.GlusterfsException)
         self.mock_object(self._layout, '_glustermanager',
                          mock.Mock(return_value=gmgr1))
         self._layout.gluster_used_vols = set([self.glusterfs_target1])
@@ -642,7 +882,7 @@ class GlusterfsVolumeMappedLayoutTestCase(test.TestCase):
                           self._layout.delete_share, self._context,
                           self.share1)
 
-        self._layout._wipe_gluster_vol.assert_called_once_with(gmgr1)
+        self.assertFalse(self._layout._schedule_gluster_vol_wipe.called)
         self.assertFalse(self._layout._push_gluster_vol.called)
 
     def test_delete_share_missing_record(self):
@@ -858,6 +1098,8 @@ class GlusterfsVolumeMappedLayoutTestCase(test.TestCase):
         self.assertIn(
             new_vol_addr,
             self._layout.gluster_used_vols)
+        self.assertEqual(share['id'],
+                         self._layout.gluster_vol_marks[new_vol_addr])
         self.assertEqual('host1:/gv1', ret)
 
     def test_create_share_from_snapshot_error_unsupported_gluster_version(
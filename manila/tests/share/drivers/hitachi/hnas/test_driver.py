@@ -338,8 +338,8 @@ class HitachiHNASTestCase(test.TestCase):
     def test_create_share(self, share):
         self.mock_object(driver.HitachiHNASDriver, "_check_fs_mounted",
                          mock.Mock())
-        self.mock_object(ssh.HNASSSHBackend, "vvol_create", mock.Mock())
-        self.mock_object(ssh.HNASSSHBackend, "quota_add", mock.Mock())
+        self.mock_object(ssh.HNASSSHBackend, "vvol_create_with_quota",
+                         mock.Mock())
         self.mock_object(ssh.HNASSSHBackend, "nfs_export_add", mock.Mock(
             return_value='/shares/' + share['id']))
         self.mock_object(ssh.HNASSSHBackend, "cifs_share_add", mock.Mock())
@@ -347,9 +347,8 @@ class HitachiHNASTestCase(test.TestCase):
         result = self._driver.create_share('context', share)
 
         self.assertTrue(self.mock_log.debug.called)
-        ssh.HNASSSHBackend.vvol_create.assert_called_once_with(share['id'])
-        ssh.HNASSSHBackend.quota_add.assert_called_once_with(share['id'],
-                                                             share['size'])
+        ssh.HNASSSHBackend.vvol_create_with_quota.assert_called_once_with(
+            share['id'], share['size'])
         if share['share_proto'].lower() == 'nfs':
             self.assertEqual(self._driver.hnas_evs_ip + ":/shares/" +
                              share_nfs['id'], result)
@@ -366,8 +365,8 @@ class HitachiHNASTestCase(test.TestCase):
     def test_create_share_export_error(self):
         self.mock_object(driver.HitachiHNASDriver, "_check_fs_mounted",
                          mock.Mock())
-        self.mock_object(ssh.HNASSSHBackend, "vvol_create", mock.Mock())
-        self.mock_object(ssh.HNASSSHBackend, "quota_add", mock.Mock())
+        self.mock_object(ssh.HNASSSHBackend, "vvol_create_with_quota",
+                         mock.Mock())
         self.mock_object(ssh.HNASSSHBackend, "nfs_export_add", mock.Mock(
             side_effect=exception.HNASBackendException('msg')))
         self.mock_object(ssh.HNASSSHBackend, "vvol_delete", mock.Mock())
@@ -376,9 +375,8 @@ class HitachiHNASTestCase(test.TestCase):
                           self._driver.create_share, 'context', share_nfs)
         self.assertTrue(self.mock_log.debug.called)
         self.assertTrue(self.mock_log.exception.called)
-        ssh.HNASSSHBackend.vvol_create.assert_called_once_with(share_nfs['id'])
-        ssh.HNASSSHBackend.quota_add.assert_called_once_with(share_nfs['id'],
-                                                             share_nfs['size'])
+        ssh.HNASSSHBackend.vvol_create_with_quota.assert_called_once_with(
+            share_nfs['id'], share_nfs['size'])
         ssh.HNASSSHBackend.nfs_export_add.assert_called_once_with(
             share_nfs['id'])
         ssh.HNASSSHBackend.vvol_delete.assert_called_once_with(share_nfs['id'])
@@ -644,8 +642,8 @@ class HitachiHNASTestCase(test.TestCase):
     def test_create_share_from_snapshot(self, share, snapshot):
         self.mock_object(driver.HitachiHNASDriver, "_check_fs_mounted",
                          mock.Mock())
-        self.mock_object(ssh.HNASSSHBackend, "vvol_create", mock.Mock())
-        self.mock_object(ssh.HNASSSHBackend, "quota_add", mock.Mock())
+        self.mock_object(ssh.HNASSSHBackend, "vvol_create_with_quota",
+                         mock.Mock())
         self.mock_object(ssh.HNASSSHBackend, "tree_clone", mock.Mock())
         self.mock_object(ssh.HNASSSHBackend, "cifs_share_add", mock.Mock())
         self.mock_object(ssh.HNASSSHBackend, "nfs_export_add", mock.Mock())
@@ -654,9 +652,8 @@ class HitachiHNASTestCase(test.TestCase):
                                                          share,
                                                          snapshot)
 
-        ssh.HNASSSHBackend.vvol_create.assert_called_once_with(share['id'])
-        ssh.HNASSSHBackend.quota_add.assert_called_once_with(share['id'],
-                                                             share['size'])
+        ssh.HNASSSHBackend.vvol_create_with_quota.assert_called_once_with(
+            share['id'], share['size'])
         ssh.HNASSSHBackend.tree_clone.assert_called_once_with(
             '/snapshots/' + share['id'] + '/' + snapshot['id'],
             '/shares/' + share['id'])
@@ -675,8 +672,8 @@ class HitachiHNASTestCase(test.TestCase):
     def test_create_share_from_snapshot_empty_snapshot(self):
         self.mock_object(driver.HitachiHNASDriver, "_check_fs_mounted",
                          mock.Mock())
-        self.mock_object(ssh.HNASSSHBackend, "vvol_create", mock.Mock())
-        self.mock_object(ssh.HNASSSHBackend, "quota_add", mock.Mock())
+        self.mock_object(ssh.HNASSSHBackend, "vvol_create_with_quota",
+                         mock.Mock())
         self.mock_object(ssh.HNASSSHBackend, "tree_clone", mock.Mock(
             side_effect=exception.HNASNothingToCloneException('msg')))
         self.mock_object(ssh.HNASSSHBackend, "nfs_export_add", mock.Mock())
@@ -686,9 +683,8 @@ class HitachiHNASTestCase(test.TestCase):
 
         self.assertEqual('172.24.44.10:/shares/' + share_nfs['id'], result)
         self.assertTrue(self.mock_log.warning.called)
-        ssh.HNASSSHBackend.vvol_create.assert_called_once_with(share_nfs['id'])
-        ssh.HNASSSHBackend.quota_add.assert_called_once_with(share_nfs['id'],
-                                                             share_nfs['size'])
+        ssh.HNASSSHBackend.vvol_create_with_quota.assert_called_once_with(
+            share_nfs['id'], share_nfs['size'])
         ssh.HNASSSHBackend.tree_clone.assert_called_once_with(
             '/snapshots/' + share_nfs['id'] + '/' + snapshot_nfs['id'],
             '/shares/' + share_nfs['id'])
@@ -698,8 +694,8 @@ class HitachiHNASTestCase(test.TestCase):
     def test_create_share_from_snapshot_invalid_protocol(self):
         self.mock_object(driver.HitachiHNASDriver, "_check_fs_mounted",
                          mock.Mock())
-        self.mock_object(ssh.HNASSSHBackend, "vvol_create", mock.Mock())
-        self.mock_object(ssh.HNASSSHBackend, "quota_add", mock.Mock())
+        self.mock_object(ssh.HNASSSHBackend, "vvol_create_with_quota",
+                         mock.Mock())
         self.mock_object(ssh.HNASSSHBackend, "tree_clone", mock.Mock())
 
         ex = self.assertRaises(exception.ShareBackendException,
@@ -713,8 +709,7 @@ class HitachiHNASTestCase(test.TestCase):
 
         self.mock_object(driver.HitachiHNASDriver, "_check_fs_mounted",
                          mock.Mock())
-        self.mock_object(ssh.HNASSSHBackend, "vvol_create")
-        self.mock_object(ssh.HNASSSHBackend, "quota_add")
+        self.mock_object(ssh.HNASSSHBackend, "vvol_create_with_quota")
         self.mock_object(ssh.HNASSSHBackend, "tree_clone")
         self.mock_object(ssh.HNASSSHBackend, "vvol_delete")
         self.mock_object(ssh.HNASSSHBackend, "nfs_export_add", mock.Mock(
@@ -725,9 +720,7 @@ class HitachiHNASTestCase(test.TestCase):
                           self._driver.create_share_from_snapshot,
                           'context', share_nfs, snapshot_nfs)
 
-        ssh.HNASSSHBackend.vvol_create.assert_called_once_with(
-            share_nfs['id'])
-        ssh.HNASSSHBackend.quota_add.assert_called_once_with(
+        ssh.HNASSSHBackend.vvol_create_with_quota.assert_called_once_with(
             share_nfs['id'], share_nfs['size'])
         ssh.HNASSSHBackend.tree_clone.assert_called_once_with(
             dest_path, src_path)
@@ -954,6 +954,19 @@ class HNASSSHTestCase(test.TestCase):
 
         self._driver_ssh._execute.assert_called_with(fake_add_quota_command)
 
+    def test_vvol_create_with_quota(self):
+        fake_commands = [
+            ['virtual-volume', 'add', '--ensure', self.fs_name, 'vvol',
+             '/shares/vvol'],
+            ['quota', 'add', '--usage-limit', '1G', '--usage-hard-limit',
+             'yes', self.fs_name, 'vvol'],
+        ]
+        self.mock_object(ssh.HNASSSHBackend, "_execute_batch", mock.Mock())
+
+        self._driver_ssh.vvol_create_with_quota('vvol', 1)
+
+        self._driver_ssh._execute_batch.assert_called_once_with(fake_commands)
+
     def test_modify_quota(self):
         fake_modify_quota_command = ['quota', 'mod', '--usage-limit', '1G',
                                      self.fs_name, 'vvol']
@@ -1194,6 +1207,30 @@ class HNASSSHTestCase(test.TestCase):
         self.assertTrue(self.mock_log.debug.called)
         self.assertTrue(self.mock_log.error.called)
 
+    def test__execute_batch(self):
+        commands = [['virtual-volume', 'add', 'fs', 'vvol', '/vvol'],
+                    ['quota', 'add', 'fs', 'vvol']]
+        concat_command = ('ssc --smuauth fake console-context --evs 2 '
+                          'virtual-volume add fs vvol /vvol && '
+                          'ssc --smuauth fake console-context --evs 2 '
+                          'quota add fs vvol')
+        self.mock_object(paramiko.SSHClient, 'connect')
+        self.mock_object(putils, 'ssh_execute',
+                         mock.Mock(return_value=['', '']))
+
+        self._driver_ssh._execute_batch(commands)
+
+        putils.ssh_execute.assert_called_once_with(mock.ANY, concat_command,
+                                                   check_exit_code=True)
+
+    def test__execute_batch_injection(self):
+        self.mock_object(putils, 'ssh_execute')
+
+        self.assertRaises(exception.SSHInjectionThreat,
+                          self._driver_ssh._execute_batch,
+                          [['quota', 'list'], ['quota', 'add', 'a;b']])
+        self.assertFalse(putils.ssh_execute.called)
+
     def test__locked_selectfs_create_operation(self):
         exec_command = ['selectfs', self.fs_name, '\n', 'ssc', '127.0.0.1',
                         'console-context', '--evs', six.text_type(self.evs_id),
@@ -26,6 +26,7 @@ import xml.dom.minidom
 import ddt
 import mock
 from oslo_serialization import jsonutils
+import requests
 
 from manila.common import constants as common_constants
 from manila import context
@@ -334,7 +335,8 @@ class FakeHuaweiNasHelper(helper.RestHelper):
     def _change_file_mode(self, filepath):
         pass
 
-    def do_call(self, url, data=None, method=None, calltimeout=4):
+    def do_call(self, url, data=None, method=None, calltimeout=4,
+                session=None, headers=None):
         url = url.replace('http://100.115.10.69:8082/deviceManager/rest', '')
         url = url.replace('/210235G7J20000000000/', '')
 
@@ -1453,6 +1455,143 @@ class HuaweiShareDriverTestCase(test.TestCase):
         deviceid = self.driver.plugin.helper.login()
         self.assertEqual("210235G7J20000000000", deviceid)
 
+    @ddt.data(True, False)
+    def test_login_switches_session_on_success(self, success):
+        rest_helper = helper.RestHelper(self.configuration)
+        old_session = rest_helper.session
+        old_headers = rest_helper.headers
+        rest_helper.url = 'http://old_url/old_device'
+        old_headers['iBaseToken'] = 'old_token'
+        self.mock_object(rest_helper, '_get_login_info', mock.Mock(
+            return_value={'RestURL': 'http://url1/;http://url2/',
+                          'UserName': 'fake_user',
+                          'UserPassword': 'fake_password'}))
+        error = {"error": {"code": constants.ERROR_CONNECT_TO_SERVER}}
+        login = {"error": {"code": 0},
+                 "data": {"deviceid": "fake_device",
+                          "iBaseToken": "new_token"}}
+
+        def _do_call(url, data=None, calltimeout=None, session=None,
+                     headers=None):
+            # Requests sent meanwhile still use the current login.
+            self.assertIs(old_session, rest_helper.session)
+            self.assertIs(old_headers, rest_helper.headers)
+            self.assertEqual('http://old_url/old_device', rest_helper.url)
+            self.assertIsNot(old_session, session)
+            if success and url == 'http://url2/xx/sessions':
+                return login
+            return error
+
+        self.mock_object(rest_helper, 'do_call',
+                         mock.Mock(side_effect=_do_call))
+
+        if success:
+            deviceid = rest_helper.login()
+
+            self.assertEqual('fake_device', deviceid)
+            self.assertIs(rest_helper.do_call.call_args[1]['session'],
+                          rest_helper.session)
+            self.assertEqual('new_token', rest_helper.headers['iBaseToken'])
+            self.assertEqual('http://url2/fake_device', rest_helper.url)
+        else:
+            self.assertRaises(exception.InvalidShare, rest_helper.login)
+
+            self.assertIs(old_session, rest_helper.session)
+            self.assertEqual('old_token', rest_helper.headers['iBaseToken'])
+            self.assertEqual('http://old_url/old_device', rest_helper.url)
+        self.assertEqual(2, rest_helper.do_call.call_count)
+
+    def test_do_call_reuses_session(self):
+        rest_helper = helper.RestHelper(self.configuration)
+        rest_helper.url = 'http://fake_url/'
+        response = mock.Mock(content=b'{"error": {"code": 0}}')
+        self.mock_object(rest_helper.session, 'request',
+                         mock.Mock(return_value=response))
+
+        result1 = rest_helper.do_call('fake1', '{"ID": "1"}')
+        result2 = rest_helper.do_call('fake2', method='DELETE')
+
+        self.assertEqual({"error": {"code": 0}}, result1)
+        self.assertEqual({"error": {"code": 0}}, result2)
+        rest_helper.session.request.assert_has_calls([
+            mock.call('POST', 'http://fake_url/fake1', data='{"ID": "1"}',
+                      headers=rest_helper.headers,
+                      timeout=constants.SOCKET_TIMEOUT),
+            mock.call('DELETE', 'http://fake_url/fake2', data=None,
+                      headers=rest_helper.headers,
+                      timeout=constants.SOCKET_TIMEOUT),
+        ])
+        self.assertEqual(2, response.raise_for_status.call_count)
+
+    def test_do_call_connect_error(self):
+        rest_helper = helper.RestHelper(self.configuration)
+        self.mock_object(rest_helper.session, 'request',
+                         mock.Mock(side_effect=requests.ConnectionError))
+
+        result = rest_helper.do_call('http://fake_url/fake')
+
+        self.assertEqual(constants.ERROR_CONNECT_TO_SERVER,
+                         result['error']['code'])
+
+    def test_call_relogin(self):
+        rest_helper = self.driver.plugin.helper
+        rest_helper.login()
+        error = {"error": {"code": constants.ERROR_UNAUTHORIZED_TO_SERVER}}
+        success = {"error": {"code": 0}}
+        self.mock_object(rest_helper, 'do_call',
+                         mock.Mock(side_effect=[error, success]))
+
+        def _login():
+            rest_helper.headers['iBaseToken'] = 'new_token'
+
+        self.mock_object(rest_helper, 'login', mock.Mock(side_effect=_login))
+
+        result = rest_helper.call('/fake', method='GET')
+
+        self.assertEqual(success, result)
+        rest_helper.login.assert_called_once_with()
+        self.assertEqual(2, rest_helper.do_call.call_count)
+
+    def test_call_skip_relogin_done_concurrently(self):
+        rest_helper = self.driver.plugin.helper
+        rest_helper.login()
+        error = {"error": {"code": constants.ERROR_UNAUTHORIZED_TO_SERVER}}
+        success = {"error": {"code": 0}}
+
+        def _do_call(url, data=None, method=None):
+            if rest_helper.do_call.call_count == 1:
+                # Another request logs in while this one is in flight.
+                rest_helper.headers['iBaseToken'] = 'new_token'
+                return error
+            return success
+
+        self.mock_object(rest_helper, 'do_call',
+                         mock.Mock(side_effect=_do_call))
+        self.mock_object(rest_helper, 'login')
+
+        result = rest_helper.call('/fake', method='GET')
+
+        self.assertEqual(success, result)
+        self.assertFalse(rest_helper.login.called)
+        self.assertEqual(2, rest_helper.do_call.call_count)
+
+    def test_get_all_access_from_share_pages(self):
+        rest_helper = self.driver.plugin.helper
+        self.mock_object(rest_helper, '_get_access_count',
+                         mock.Mock(return_value=250))
+
+        def _get_range(share_id, range_begin, share_client_type):
+            return [{'ID': str(range_begin)}, {'ID': str(range_begin + 1)}]
+
+        self.mock_object(rest_helper, '_get_access_from_share_range',
+                         mock.Mock(side_effect=_get_range))
+
+        result = rest_helper._get_all_access_from_share('fake_id', 'NFS')
+
+        self.assertEqual(['0', '1', '100', '101', '200', '201'], result)
+        self.assertEqual(
+            3, rest_helper._get_access_from_share_range.call_count)
+
     def test_check_for_setup_success(self):
         self.driver.plugin.helper.login()
         self.driver.check_for_setup_error()
@@ -719,7 +719,6 @@ class GPFSShareDriverTestCase(test.TestCase):
         self._knfs_helper._execute = mock.Mock(
             return_value=['/fs0 <world>', 0]
         )
-        self.mock_object(re, 'search', mock.Mock(return_value=None))
         export_opts = None
         self._knfs_helper.get_export_options = mock.Mock(
             return_value=export_opts
@@ -731,27 +730,101 @@ class GPFSShareDriverTestCase(test.TestCase):
         self._knfs_helper.allow_access(local_path, self.share, access)
         self._knfs_helper._execute.assert_called_once_with('exportfs',
                                                            run_as_root=True)
-        self.assertTrue(re.search.called)
         self._knfs_helper.get_export_options.assert_any_call(
             self.share, access, 'KNFS',
             options_not_allowed)
         cmd = ['exportfs', '-o', export_opts, ':'.join([access['access_to'],
                                                        local_path])]
         self._knfs_helper._publish_access.assert_called_once_with(*cmd)
+        self.assertIn((local_path, access['access_to']),
+                      self._knfs_helper._exports)
+
+    def test_knfs_allow_access_export_table_cached(self):
+        access = self.access
+        local_path = self.fakesharepath
+        self._knfs_helper._execute = mock.Mock(
+            return_value=['/fs0 <world>', 0]
+        )
+        self._knfs_helper.get_export_options = mock.Mock(return_value='rw')
+        self._knfs_helper._publish_access = mock.Mock()
+        other_access = fake_share.fake_access(access_to='10.0.0.99')
+
+        self._knfs_helper.allow_access(local_path, self.share, access)
+        self._knfs_helper.allow_access(local_path, self.share, other_access)
+
+        self._knfs_helper._execute.assert_called_once_with('exportfs',
+                                                           run_as_root=True)
+        self._knfs_helper._publish_access.assert_has_calls([
+            mock.call('exportfs', '-o', 'rw',
+                      ':'.join([access['access_to'], local_path])),
+            mock.call('exportfs', '-o', 'rw',
+                      ':'.join(['10.0.0.99', local_path]))])
+
+    @ddt.data(True, False)
+    def test_knfs_allow_access_cached_export_reread(self, still_exported):
+        access = self.access
+        local_path = self.fakesharepath
+        out = '/fs0 <world>'
+        if still_exported:
+            out += '\n%s %s' % (local_path, access['access_to'])
+        self._knfs_helper._execute = mock.Mock(return_value=[out, 0])
+        self._knfs_helper.get_export_options = mock.Mock(return_value='rw')
+        self._knfs_helper._publish_access = mock.Mock()
+        self._knfs_helper._exports = set([(local_path, access['access_to'])])
+
+        if still_exported:
+            self.assertRaises(exception.ShareAccessExists,
+                              self._knfs_helper.allow_access,
+                              local_path, self.share, access)
+            self.assertFalse(self._knfs_helper._publish_access.called)
+        else:
+            self._knfs_helper.allow_access(local_path, self.share, access)
+            self._knfs_helper._publish_access.assert_called_once_with(
+                'exportfs', '-o', 'rw',
+                ':'.join([access['access_to'], local_path]))
+
+        self._knfs_helper._execute.assert_called_once_with('exportfs',
+                                                           run_as_root=True)
+        self.assertIn((local_path, access['access_to']),
+                      self._knfs_helper._exports)
+
+    def test_knfs_remove_export(self):
+        local_path = self.fakesharepath
+        self._knfs_helper._exports = set([(local_path, '10.0.0.1'),
+                                          (local_path, '10.0.0.2'),
+                                          ('/fs0', '<world>')])
+
+        self._knfs_helper.remove_export(local_path, self.share)
+
+        self.assertEqual(set([('/fs0', '<world>')]),
+                         self._knfs_helper._exports)
+
+    def test_knfs__get_exports(self):
+        out = ('/fs0          <world>\n'
+               '/gpfs0/share-a-very-long-share-name\n'
+               '\t\t10.0.0.1\n'
+               '/gpfs0/share-b   10.0.0.2\n')
+        self._knfs_helper._execute = mock.Mock(return_value=(out, ''))
+
+        exports = self._knfs_helper._get_exports()
+
+        self.assertEqual(set([('/fs0', '<world>'),
+                              ('/gpfs0/share-a-very-long-share-name',
+                               '10.0.0.1'),
+                              ('/gpfs0/share-b', '10.0.0.2')]), exports)
 
     def test_knfs_allow_access_access_exists(self):
-        out = ['/fs0 <world>', 0]
-        self._knfs_helper._execute = mock.Mock(return_value=out)
-        self.mock_object(re, 'search', mock.Mock(return_value="fake"))
-        self._knfs_helper.get_export_options = mock.Mock()
         access = self.access
         local_path = self.fakesharepath
+        out = ['\n'.join(['/fs0 <world>', local_path,
+                          '\t\t' + access['access_to']]), 0]
+        self._knfs_helper._execute = mock.Mock(return_value=out)
+        self._knfs_helper.get_export_options = mock.Mock()
         self.assertRaises(exception.ShareAccessExists,
                           self._knfs_helper.allow_access,
                           local_path, self.share, access)
         self._knfs_helper._execute.assert_any_call('exportfs',
                                                    run_as_root=True)
-        self.assertTrue(re.search.called)
         self.assertFalse(self._knfs_helper.get_export_options.called)
 
     def test_knfs_allow_access_invalid_access(self):
@@ -778,9 +851,11 @@ class GPFSShareDriverTestCase(test.TestCase):
         self._knfs_helper._publish_access = mock.Mock()
         access = self.access
         local_path = self.fakesharepath
+        self._knfs_helper._exports = set([(local_path, access['access_to'])])
         self._knfs_helper.deny_access(local_path, self.share, access)
         cmd = ['exportfs', '-u', ':'.join([access['access_to'], local_path])]
         self._knfs_helper._publish_access.assert_called_once_with(*cmd)
+        self.assertEqual(set(), self._knfs_helper._exports)
 
     def test_knfs_deny_access_exception(self):
         self._knfs_helper._publish_access = mock.Mock(
@@ -801,12 +876,22 @@ class GPFSShareDriverTestCase(test.TestCase):
         utils.execute.assert_any_call(*cmd, run_as_root=True,
                                       check_exit_code=True)
         remote_login = self.sshlogin + '@' + self.remote_ip
-        cmd = ['ssh', remote_login] + list(cmd)
+        cmd = ['ssh'] + gpfs.SSH_CONTROL_OPTIONS + [remote_login] + list(cmd)
         utils.execute.assert_any_call(*cmd, run_as_root=False,
                                       check_exit_code=True)
+        self.assertEqual(2, utils.execute.call_count)
         self.assertTrue(socket.gethostbyname_ex.called)
         self.assertTrue(socket.gethostname.called)
 
+    def test_knfs__publish_access_local_ips_cached(self):
+        self.mock_object(utils, 'execute')
+
+        self._knfs_helper._publish_access('fakecmd')
+        self._knfs_helper._publish_access('fakecmd')
+
+        socket.gethostbyname_ex.assert_called_once_with('testserver')
+        self.assertEqual(4, utils.execute.call_count)
+
     def test_knfs__publish_access_exception(self):
         self.mock_object(
             utils, 'execute',
@@ -816,8 +901,8 @@ class GPFSShareDriverTestCase(test.TestCase):
                           self._knfs_helper._publish_access, *cmd)
         self.assertTrue(socket.gethostbyname_ex.called)
         self.assertTrue(socket.gethostname.called)
-        utils.execute.assert_called_once_with(*cmd, run_as_root=True,
-                                              check_exit_code=True)
+        utils.execute.assert_any_call(*cmd, run_as_root=True,
+                                      check_exit_code=True)
 
     def test_ces_get_export_options(self):
         mock_out = {"ces:export_options": "squash=no_root_squash"}
@@ -18,9 +18,11 @@
 """
 Tests for NetApp API layer
 """
+import copy
+
 import ddt
 import mock
-from six.moves import urllib
+import requests
 
 from manila import exception
 from manila.share.drivers.netapp.dataontap.client import api
@@ -174,32 +176,30 @@ class NetAppApiServerTests(test.TestCase):
 
         self.assertRaises(ValueError, self.root.invoke_elem, na_element)
 
-    def test_invoke_elem_http_error(self):
-        """Tests handling of HTTPError"""
-        na_element = fake.FAKE_NA_ELEMENT
+    def _mock_post(self, **kwargs):
         self.mock_object(self.root, '_create_request', mock.Mock(
             return_value=('abc', fake.FAKE_NA_ELEMENT)))
         self.mock_object(api, 'LOG')
-        self.root._opener = fake.FAKE_HTTP_OPENER
-        self.mock_object(self.root, '_build_opener')
-        self.mock_object(self.root._opener, 'open', mock.Mock(
-            side_effect=urllib.error.HTTPError(url='', hdrs='',
-                                               fp=None, code='401',
-                                               msg='httperror')))
-
-        self.assertRaises(api.NaApiError, self.root.invoke_elem,
-                          na_element)
+        self.root._pool = api.NaConnectionPool('admin', 'pass', 1)
+        self.root._refresh_conn = False
+        return self.mock_object(self.root._pool.session, 'post',
+                                mock.Mock(**kwargs))
 
-    def test_invoke_elem_urlerror(self):
-        """Tests handling of URLError"""
+    def test_invoke_elem_http_error(self):
+        """Tests handling of HTTP errors"""
         na_element = fake.FAKE_NA_ELEMENT
-        self.mock_object(self.root, '_create_request', mock.Mock(
-            return_value=('abc', fake.FAKE_NA_ELEMENT)))
-        self.mock_object(api, 'LOG')
-        self.root._opener = fake.FAKE_HTTP_OPENER
-        self.mock_object(self.root, '_build_opener')
-        self.mock_object(self.root._opener, 'open', mock.Mock(
-            side_effect=urllib.error.URLError(reason='urlerror')))
+        self._mock_post(return_value=mock.Mock(status_code=401,
+                                               reason='httperror'))
+
+        error = self.assertRaises(api.NaApiError, self.root.invoke_elem,
+                                  na_element)
+        self.assertEqual(401, error.code)
+
+    @ddt.data(requests.ConnectionError, requests.Timeout)
+    def test_invoke_elem_connection_error(self, error):
+        """Tests handling of connection errors"""
+        na_element = fake.FAKE_NA_ELEMENT
+        self._mock_post(side_effect=error)
 
         self.assertRaises(exception.StorageCommunicationException,
                           self.root.invoke_elem,
@@ -208,13 +208,7 @@ class NetAppApiServerTests(test.TestCase):
     def test_invoke_elem_unknown_exception(self):
         """Tests handling of Unknown Exception"""
         na_element = fake.FAKE_NA_ELEMENT
-        self.mock_object(self.root, '_create_request', mock.Mock(
-            return_value=('abc', fake.FAKE_NA_ELEMENT)))
-        self.mock_object(api, 'LOG')
-        self.root._opener = fake.FAKE_HTTP_OPENER
-        self.mock_object(self.root, '_build_opener')
-        self.mock_object(self.root._opener, 'open', mock.Mock(
-            side_effect=Exception))
+        self._mock_post(side_effect=Exception)
 
         exception = self.assertRaises(api.NaApiError, self.root.invoke_elem,
                                       na_element)
@@ -224,17 +218,46 @@ class NetAppApiServerTests(test.TestCase):
         """Tests the method invoke_elem with valid parameters"""
         na_element = fake.FAKE_NA_ELEMENT
         self.root._trace = True
-        self.mock_object(self.root, '_create_request', mock.Mock(
-            return_value=('abc', fake.FAKE_NA_ELEMENT)))
-        self.mock_object(api, 'LOG')
-        self.root._opener = fake.FAKE_HTTP_OPENER
-        self.mock_object(self.root, '_build_opener')
+        self.root.set_timeout(30)
+        post = self._mock_post(return_value=mock.Mock(status_code=200,
+                                                      content='resp1'))
         self.mock_object(self.root, '_get_result', mock.Mock(
             return_value=fake.FAKE_NA_ELEMENT))
-        opener_mock = self.mock_object(
-            self.root._opener, 'open', mock.Mock())
-        opener_mock.read.side_effect = ['resp1', 'resp2']
 
         self.root.invoke_elem(na_element)
 
         self.assertEqual(2, api.LOG.debug.call_count)
+        post.assert_called_once_with(
+            self.root._get_url(), data='abc',
+            headers={'Content-Type': 'text/xml', 'charset': 'utf-8'},
+            timeout=30)
+        self.root._get_result.assert_called_once_with('resp1')
+        stats = self.root.get_api_stats()
+        self.assertEqual(1, stats[na_element.get_name()]['count'])
+
+    def test_invoke_elem_shared_pool(self):
+        """Tests that servers of the same system share connections"""
+        other = api.NaServer('127.0.0.1', username='admin', password='pass')
+        self.root.set_username('admin')
+        self.root.set_password('pass')
+        self.mock_object(api.NaConnectionPool, '_pools',
+                         {'fake_url': 'fake_pool'})
+
+        self.root._build_pool()
+        other._build_pool()
+
+        self.assertIs(self.root._pool, other._pool)
+        self.assertFalse(self.root._refresh_conn)
+        self.assertEqual(2, len(api.NaConnectionPool._pools))
+
+    def test_deepcopy_shares_pool(self):
+        self.root._build_pool()
+
+        server = copy.deepcopy(self.root)
+
+        self.assertIs(self.root._pool, server._pool)
+
+    def test_build_pool_certificate_auth(self):
+        self.root.set_style(api.NaServer.STYLE_CERTIFICATE)
+
+        self.assertRaises(NotImplementedError, self.root._build_pool)
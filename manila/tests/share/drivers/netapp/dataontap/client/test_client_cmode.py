@@ -229,6 +229,66 @@ class NetAppClientCmodeTestCase(test.TestCase):
                           self.client.send_iter_request,
                           'storage-disk-get-iter')
 
+    def test_send_iter_records(self):
+
+        api_responses = [
+            netapp_api.NaElement(fake.STORAGE_DISK_GET_ITER_RESPONSE_PAGE_1),
+            netapp_api.NaElement(fake.STORAGE_DISK_GET_ITER_RESPONSE_PAGE_2),
+            netapp_api.NaElement(fake.STORAGE_DISK_GET_ITER_RESPONSE_PAGE_3),
+        ]
+        mock_send_request = self.mock_object(
+            self.client, 'send_request',
+            mock.Mock(side_effect=api_responses))
+
+        storage_disk_get_iter_args = {
+            'desired-attributes': {
+                'storage-disk-info': {
+                    'disk-name': None,
+                }
+            }
+        }
+        result = self.client.send_iter_records(
+            'storage-disk-get-iter', api_args=storage_disk_get_iter_args,
+            max_page_length=10)
+
+        # Pages are only requested as records are consumed
+        self.assertFalse(mock_send_request.called)
+
+        records = list(result)
+
+        self.assertEqual(28, len(records))
+        self.assertEqual('storage-disk-info', records[0].get_name())
+
+        args1 = copy.deepcopy(storage_disk_get_iter_args)
+        args1['max-records'] = 10
+        args2 = copy.deepcopy(storage_disk_get_iter_args)
+        args2['max-records'] = 10
+        args2['tag'] = 'next_tag_1'
+        args3 = copy.deepcopy(storage_disk_get_iter_args)
+        args3['max-records'] = 10
+        args3['tag'] = 'next_tag_2'
+
+        mock_send_request.assert_has_calls([
+            mock.call('storage-disk-get-iter', args1),
+            mock.call('storage-disk-get-iter', args2),
+            mock.call('storage-disk-get-iter', args3),
+        ])
+        self.assertNotIn('max-records', storage_disk_get_iter_args)
+
+    def test_send_iter_records_not_found(self):
+
+        api_response = netapp_api.NaElement(fake.NO_RECORDS_RESPONSE)
+        mock_send_request = self.mock_object(
+            self.client, 'send_request',
+            mock.Mock(return_value=api_response))
+
+        result = list(self.client.send_iter_records('storage-disk-get-iter'))
+
+        self.assertEqual([], result)
+        mock_send_request.assert_called_once_with(
+            'storage-disk-get-iter',
+            {'max-records': client_cmode.DEFAULT_MAX_PAGE_LENGTH})
+
     def test_set_vserver(self):
         self.client.set_vserver(fake.VSERVER_NAME)
         self.client.connection.set_vserver.assert_has_calls(
@@ -1388,7 +1448,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
         api_response = netapp_api.NaElement(
             fake.NET_INTERFACE_GET_ITER_RESPONSE)
         self.mock_object(self.client,
-                         'send_iter_request',
+                         'send_request',
                          mock.Mock(return_value=api_response))
 
         net_interface_get_args = {
@@ -1401,7 +1461,9 @@ class NetAppClientCmodeTestCase(test.TestCase):
 
         result = self.client.list_network_interfaces()
 
-        self.client.send_iter_request.assert_has_calls([
+        net_interface_get_args['max-records'] = (
+            client_cmode.DEFAULT_MAX_PAGE_LENGTH)
+        self.client.send_request.assert_has_calls([
             mock.call('net-interface-get-iter', net_interface_get_args)])
         self.assertSequenceEqual(fake.LIF_NAMES, result)
 
@@ -1623,7 +1685,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
     def test_get_node_for_aggregate_api_not_found(self):
 
         self.mock_object(self.client,
-                         'send_iter_request',
+                         'send_request',
                          mock.Mock(side_effect=self._mock_api_error(
                              netapp_api.EAPINOTFOUND)))
 
@@ -1634,7 +1696,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
     def test_get_node_for_aggregate_api_error(self):
 
         self.mock_object(self.client,
-                         'send_iter_request',
+                         'send_request',
                          self._mock_api_error())
 
         self.assertRaises(netapp_api.NaApiError,
@@ -1645,7 +1707,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
 
         api_response = netapp_api.NaElement(fake.NO_RECORDS_RESPONSE)
         self.mock_object(self.client,
-                         'send_iter_request',
+                         'send_request',
                          mock.Mock(return_value=api_response))
 
         result = self.client.get_node_for_aggregate(fake.SHARE_AGGREGATE_NAME)
@@ -1786,13 +1848,14 @@ class NetAppClientCmodeTestCase(test.TestCase):
 
         api_response = netapp_api.NaElement(fake.AGGR_GET_ITER_RESPONSE)
         self.mock_object(self.client,
-                         'send_iter_request',
+                         'send_request',
                          mock.Mock(return_value=api_response))
 
         result = self.client._get_aggregates()
 
-        self.client.send_iter_request.assert_has_calls([
-            mock.call('aggr-get-iter', {})])
+        self.client.send_request.assert_has_calls([
+            mock.call('aggr-get-iter',
+                      {'max-records': client_cmode.DEFAULT_MAX_PAGE_LENGTH})])
         self.assertListEqual(
             [aggr.to_string() for aggr in api_response.get_child_by_name(
                 'attributes-list').get_children()],
@@ -1802,7 +1865,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
 
         api_response = netapp_api.NaElement(fake.AGGR_GET_SPACE_RESPONSE)
         self.mock_object(self.client,
-                         'send_iter_request',
+                         'send_request',
                          mock.Mock(return_value=api_response))
 
         desired_attributes = {
@@ -1827,8 +1890,9 @@ class NetAppClientCmodeTestCase(test.TestCase):
             },
             'desired-attributes': desired_attributes
         }
-
-        self.client.send_iter_request.assert_has_calls([
+        aggr_get_iter_args['max-records'] = (
+            client_cmode.DEFAULT_MAX_PAGE_LENGTH)
+        self.client.send_request.assert_has_calls([
             mock.call('aggr-get-iter', aggr_get_iter_args)])
         self.assertListEqual(
             [aggr.to_string() for aggr in api_response.get_child_by_name(
@@ -1839,13 +1903,14 @@ class NetAppClientCmodeTestCase(test.TestCase):
 
         api_response = netapp_api.NaElement(fake.NO_RECORDS_RESPONSE)
         self.mock_object(self.client,
-                         'send_iter_request',
+                         'send_request',
                          mock.Mock(return_value=api_response))
 
         result = self.client._get_aggregates()
 
-        self.client.send_iter_request.assert_has_calls([
-            mock.call('aggr-get-iter', {})])
+        self.client.send_request.assert_has_calls([
+            mock.call('aggr-get-iter',
+                      {'max-records': client_cmode.DEFAULT_MAX_PAGE_LENGTH})])
         self.assertListEqual([], result)
 
     def test_setup_security_services_ldap(self):
@@ -3562,7 +3627,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
         api_response = netapp_api.NaElement(
             fake.SNAPSHOT_GET_ITER_DELETED_RESPONSE)
         self.mock_object(self.client,
-                         'send_iter_request',
+                         'send_request',
                          mock.Mock(return_value=api_response))
 
         result = self.client._get_deleted_snapshots()
@@ -3582,7 +3647,9 @@ class NetAppClientCmodeTestCase(test.TestCase):
                 },
             },
         }
-        self.client.send_iter_request.assert_has_calls([
+        snapshot_get_iter_args['max-records'] = (
+            client_cmode.DEFAULT_MAX_PAGE_LENGTH)
+        self.client.send_request.assert_has_calls([
             mock.call('snapshot-get-iter', snapshot_get_iter_args)])
 
         expected = {
@@ -5138,7 +5205,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
 
         api_response = netapp_api.NaElement(fake.SNAPMIRROR_GET_ITER_RESPONSE)
         self.mock_object(self.client,
-                         'send_iter_request',
+                         'send_request',
                          mock.Mock(return_value=api_response))
 
         desired_attributes = {
@@ -5175,7 +5242,9 @@ class NetAppClientCmodeTestCase(test.TestCase):
                 },
             },
         }
-        self.client.send_iter_request.assert_has_calls([
+        snapmirror_get_iter_args['max-records'] = (
+            client_cmode.DEFAULT_MAX_PAGE_LENGTH)
+        self.client.send_request.assert_has_calls([
             mock.call('snapmirror-get-iter', snapmirror_get_iter_args)])
         self.assertEqual(1, len(result))
 
@@ -5183,13 +5252,14 @@ class NetAppClientCmodeTestCase(test.TestCase):
 
         api_response = netapp_api.NaElement(fake.NO_RECORDS_RESPONSE)
         self.mock_object(self.client,
-                         'send_iter_request',
+                         'send_request',
                          mock.Mock(return_value=api_response))
 
         result = self.client._get_snapmirrors()
 
-        self.client.send_iter_request.assert_has_calls([
-            mock.call('snapmirror-get-iter', {})])
+        self.client.send_request.assert_has_calls([
+            mock.call('snapmirror-get-iter',
+                      {'max-records': client_cmode.DEFAULT_MAX_PAGE_LENGTH})])
 
         self.assertEqual([], result)
 
@@ -5198,7 +5268,7 @@ class NetAppClientCmodeTestCase(test.TestCase):
         api_response = netapp_api.NaElement(
             fake.SNAPMIRROR_GET_ITER_FILTERED_RESPONSE)
         self.mock_object(self.client,
-                         'send_iter_request',
+                         'send_request',
                          mock.Mock(return_value=api_response))
 
         desired_attributes = ['source-vserver', 'source-volume',
@@ -5242,7 +5312,9 @@ class NetAppClientCmodeTestCase(test.TestCase):
             'schedule': 'daily',
         }]
 
-        self.client.send_iter_request.assert_has_calls([
+        snapmirror_get_iter_args['max-records'] = (
+            client_cmode.DEFAULT_MAX_PAGE_LENGTH)
+        self.client.send_request.assert_has_calls([
             mock.call('snapmirror-get-iter', snapmirror_get_iter_args)])
         self.assertEqual(expected, result)
 
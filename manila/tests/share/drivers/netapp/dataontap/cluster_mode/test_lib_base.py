@@ -335,6 +335,7 @@ class NetAppFileStorageLibraryTestCase(test.TestCase):
         self.mock_object(self.library,
                          '_get_pools',
                          mock.Mock(return_value=fake.POOLS))
+        mock_log_api_stats = self.mock_object(self.library, '_log_api_stats')
 
         result = self.library.get_share_stats()
 
@@ -349,6 +350,7 @@ class NetAppFileStorageLibraryTestCase(test.TestCase):
             'pools': fake.POOLS,
         }
         self.assertDictEqual(expected, result)
+        mock_log_api_stats.assert_called_once_with()
 
     def test_get_share_stats_with_replication(self):
 
@@ -356,6 +358,7 @@ class NetAppFileStorageLibraryTestCase(test.TestCase):
         self.mock_object(self.library,
                          '_get_pools',
                          mock.Mock(return_value=fake.POOLS))
+        self.mock_object(self.library, '_log_api_stats')
 
         result = self.library.get_share_stats()
 
@@ -373,6 +376,31 @@ class NetAppFileStorageLibraryTestCase(test.TestCase):
         }
         self.assertDictEqual(expected, result)
 
+    def test_log_api_stats(self):
+
+        self.mock_object(lib_base.LOG, 'debug')
+        self.library._client.connection.get_api_stats.return_value = {
+            'volume-get-iter': {'count': 4, 'total': 2.0, 'max': 1.5},
+            'aggr-get-iter': {'count': 1, 'total': 0.25, 'max': 0.25},
+        }
+
+        self.library._log_api_stats()
+
+        lib_base.LOG.debug.assert_called_once_with(
+            mock.ANY,
+            {'backend': fake.BACKEND_NAME,
+             'summary': 'aggr-get-iter: 1 calls, avg 0.250s, max 0.250s, '
+                        'volume-get-iter: 4 calls, avg 0.500s, max 1.500s'})
+
+    def test_log_api_stats_no_calls(self):
+
+        self.mock_object(lib_base.LOG, 'debug')
+        self.library._client.connection.get_api_stats.return_value = {}
+
+        self.library._log_api_stats()
+
+        self.assertFalse(lib_base.LOG.debug.called)
+
     def test_get_share_server_pools(self):
 
         self.mock_object(self.library,
@@ -2666,6 +2694,115 @@ class NetAppFileStorageLibraryTestCase(test.TestCase):
 
         self.assertEqual(constants.REPLICA_STATE_OUT_OF_SYNC, result)
 
+    def _fake_update_replica_states_data(self, replica_ids, snapshots=None):
+        active_replica = copy.deepcopy(fake.SHARE)
+        active_replica['id'] = 'active_id'
+        active_replica['replica_state'] = constants.REPLICA_STATE_ACTIVE
+        replicas = []
+        for replica_id in replica_ids:
+            replica = copy.deepcopy(fake.SHARE)
+            replica['id'] = replica_id
+            replicas.append({
+                'replica_list': [active_replica, replica],
+                'replica': replica,
+                'access_rules': [],
+                'replica_snapshots': snapshots or [],
+                'share_server': None,
+            })
+        self.mock_dm_session.get_backend_info_for_share = mock.Mock(
+            return_value=('active_volume', fake.VSERVER2, fake.BACKEND_NAME))
+        return replicas
+
+    def _fake_replica_snapmirror(self, replica_id, **kwargs):
+        snapmirror = {
+            'mirror-state': 'snapmirrored',
+            'relationship-status': 'idle',
+            'source-vserver': fake.VSERVER2,
+            'source-volume': 'active_volume',
+            'destination-volume': self.library._get_backend_share_name(
+                replica_id),
+            'last-transfer-end-timestamp': '%s' % float(time.time()),
+        }
+        snapmirror.update(kwargs)
+        return snapmirror
+
+    def test_update_replica_states(self):
+        replicas = self._fake_update_replica_states_data(
+            ['in_sync', 'transferring', 'broken', 'stale', 'missing',
+             'other_source'])
+        snapmirrors = [
+            self._fake_replica_snapmirror('in_sync'),
+            self._fake_replica_snapmirror(
+                'transferring', **{'mirror-state': 'uninitialized',
+                                   'relationship-status': 'transferring'}),
+            self._fake_replica_snapmirror(
+                'broken', **{'mirror-state': 'broken-off'}),
+            self._fake_replica_snapmirror(
+                'stale', **{'last-transfer-end-timestamp': '%s' % float(
+                    timeutils.utcnow_ts() - 10000)}),
+            self._fake_replica_snapmirror(
+                'other_source', **{'source-volume': 'old_active_volume'}),
+        ]
+        vserver_client = mock.Mock()
+        vserver_client.get_snapmirrors.return_value = snapmirrors
+        self.mock_object(self.library,
+                         '_get_vserver',
+                         mock.Mock(return_value=(fake.VSERVER1,
+                                                 vserver_client)))
+
+        result = self.library.update_replica_states(None, replicas)
+
+        self.assertEqual(
+            {'in_sync': constants.REPLICA_STATE_IN_SYNC,
+             'transferring': constants.REPLICA_STATE_OUT_OF_SYNC,
+             'stale': constants.REPLICA_STATE_OUT_OF_SYNC}, result)
+        self.library._get_vserver.assert_called_once_with(share_server=None)
+        vserver_client.get_snapmirrors.assert_called_once_with(
+            None, None, fake.VSERVER1, None, desired_attributes=mock.ANY)
+        self.assertFalse(vserver_client.resume_snapmirror.called)
+        self.assertFalse(vserver_client.resync_snapmirror.called)
+        self.assertFalse(self.mock_dm_session.create_snapmirror.called)
+
+    def test_update_replica_states_fail_to_get_snapmirrors(self):
+        replicas = self._fake_update_replica_states_data(['replica_id'])
+        vserver_client = mock.Mock()
+        vserver_client.get_snapmirrors.side_effect = (
+            netapp_api.NaApiError(code=0))
+        self.mock_object(self.library,
+                         '_get_vserver',
+                         mock.Mock(return_value=(fake.VSERVER1,
+                                                 vserver_client)))
+        mock_exception_log = self.mock_object(lib_base.LOG, 'exception')
+
+        result = self.library.update_replica_states(None, replicas)
+
+        self.assertEqual({}, result)
+        self.assertTrue(mock_exception_log.called)
+
+    @ddt.data(True, False)
+    def test_update_replica_states_with_snapshots(self, snapshot_exists):
+        fake_snapshot = copy.deepcopy(fake.SNAPSHOT)
+        snapshots = [{'share_replica_snapshot': fake_snapshot}]
+        replicas = self._fake_update_replica_states_data(
+            ['replica_id'], snapshots=snapshots)
+        vserver_client = mock.Mock()
+        vserver_client.get_snapmirrors.return_value = [
+            self._fake_replica_snapmirror('replica_id')]
+        vserver_client.snapshot_exists.return_value = snapshot_exists
+        self.mock_object(self.library,
+                         '_get_vserver',
+                         mock.Mock(return_value=(fake.VSERVER1,
+                                                 vserver_client)))
+
+        result = self.library.update_replica_states(None, replicas)
+
+        expected_state = (constants.REPLICA_STATE_IN_SYNC if snapshot_exists
+                          else constants.REPLICA_STATE_OUT_OF_SYNC)
+        self.assertEqual({'replica_id': expected_state}, result)
+        vserver_client.snapshot_exists.assert_called_once_with(
+            fake_snapshot['provider_location'],
+            self.library._get_backend_share_name('replica_id'))
+
     def test_promote_replica(self):
         self.mock_object(self.library,
                          '_get_vserver',
@@ -77,7 +77,8 @@ CLIENT_KWARGS = {
     'vserver': None,
     'transport_type': 'https',
     'password': 'pass',
-    'port': '443'
+    'port': '443',
+    'pool_size': 10,
 }
 
 SHARE = {
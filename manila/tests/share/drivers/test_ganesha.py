@@ -218,7 +218,7 @@ class GaneshaNASHelperTestCase(test.TestCase):
         ret = self._helper._fsal_hook('/fakepath', self.share, self.access)
         self.assertEqual({}, ret)
 
-    def test_allow_access(self):
+    def test_get_export(self):
         mock_ganesha_utils_patch = mock.Mock()
 
         def fake_patch_run(tmpl1, tmpl2, tmpl3):
@@ -231,17 +231,31 @@ class GaneshaNASHelperTestCase(test.TestCase):
                          mock.Mock(return_value='fakefsal'))
         self.mock_object(ganesha.ganesha_utils, 'patch',
                          mock.Mock(side_effect=fake_patch_run))
-        ret = self._helper._allow_access(fake_basepath, self.share,
-                                         self.access)
+        ret = self._helper._get_export(fake_basepath, self.share,
+                                       self.access)
         self._helper.ganesha.get_export_id.assert_called_once_with()
         self._helper._fsal_hook.assert_called_once_with(
             fake_basepath, self.share, self.access)
         mock_ganesha_utils_patch.assert_called_once_with(
             {}, self._helper.export_template, fake_output_template)
-        self._helper._fsal_hook.assert_called_once_with(
+        self.assertEqual((fake_export_name, fake_output_template), ret)
+
+    def test_get_export_error_invalid_share(self):
+        access = fake_share.fake_access(access_type='notip')
+        self.assertRaises(exception.InvalidShareAccess,
+                          self._helper._get_export, '/fakepath',
+                          self.share, access)
+        self.assertFalse(self._helper.ganesha.get_export_id.called)
+
+    def test_allow_access(self):
+        self.mock_object(self._helper, '_get_export',
+                         mock.Mock(return_value=('fakename', 'fakeconf')))
+        ret = self._helper._allow_access(fake_basepath, self.share,
+                                         self.access)
+        self._helper._get_export.assert_called_once_with(
             fake_basepath, self.share, self.access)
         self._helper.ganesha.add_export.assert_called_once_with(
-            fake_export_name, fake_output_template)
+            'fakename', 'fakeconf')
         self.assertIsNone(ret)
 
     def test_allow_access_error_invalid_share(self):
@@ -249,6 +263,7 @@ class GaneshaNASHelperTestCase(test.TestCase):
         self.assertRaises(exception.InvalidShareAccess,
                           self._helper._allow_access, '/fakepath',
                           self.share, access)
+        self.assertFalse(self._helper.ganesha.add_export.called)
 
     def test_deny_access(self):
         ret = self._helper._deny_access('/fakepath', self.share, self.access)
@@ -258,45 +273,49 @@ class GaneshaNASHelperTestCase(test.TestCase):
 
     @ddt.data({}, {'recovery': False})
     def test_update_access_for_allow(self, kwargs):
-        self.mock_object(self._helper, '_allow_access')
-        self.mock_object(self._helper, '_deny_access')
+        access2 = fake_share.fake_access(id='fakeaccid2')
+        self.mock_object(self._helper, '_get_export',
+                         mock.Mock(side_effect=lambda p, s, a: (a['id'], p)))
 
         self._helper.update_access(
-            '/some/path', 'aShare', add_rules=["example.com"], delete_rules=[],
-            **kwargs)
-
-        self._helper._allow_access.assert_called_once_with(
-            '/some/path', 'aShare', 'example.com')
-
-        self.assertFalse(self._helper._deny_access.called)
+            '/some/path', self.share, add_rules=[self.access, access2],
+            delete_rules=[], **kwargs)
+
+        self._helper._get_export.assert_has_calls([
+            mock.call('/some/path', self.share, self.access),
+            mock.call('/some/path', self.share, access2)])
+        self._helper.ganesha.add_exports.assert_called_once_with(
+            [('fakeaccid', '/some/path'), ('fakeaccid2', '/some/path')])
+        self.assertFalse(self._helper.ganesha.remove_exports.called)
         self.assertFalse(self._helper.ganesha.reset_exports.called)
         self.assertFalse(self._helper.ganesha.restart_service.called)
 
     def test_update_access_for_deny(self):
-        self.mock_object(self._helper, '_allow_access')
-        self.mock_object(self._helper, '_deny_access')
+        access2 = fake_share.fake_access(id='fakeaccid2')
+        self.mock_object(self._helper, '_get_export')
 
         self._helper.update_access(
-            '/some/path', 'aShare', [], delete_rules=["example.com"])
-
-        self._helper._deny_access.assert_called_once_with(
-            '/some/path', 'aShare', 'example.com')
+            '/some/path', self.share, [], delete_rules=[self.access, access2])
 
-        self.assertFalse(self._helper._allow_access.called)
+        self._helper.ganesha.remove_exports.assert_called_once_with(
+            ['fakename--fakeaccid', 'fakename--fakeaccid2'])
+        self.assertFalse(self._helper._get_export.called)
+        self.assertFalse(self._helper.ganesha.add_exports.called)
         self.assertFalse(self._helper.ganesha.reset_exports.called)
         self.assertFalse(self._helper.ganesha.restart_service.called)
 
     def test_update_access_recovery(self):
-        self.mock_object(self._helper, '_allow_access')
-        self.mock_object(self._helper, '_deny_access')
+        self.mock_object(self._helper, '_get_export',
+                         mock.Mock(return_value=('fakename', 'fakeconf')))
 
         self._helper.update_access(
-            '/some/path', 'aShare', add_rules=["example.com"], delete_rules=[],
-            recovery=True)
-
-        self._helper._allow_access.assert_called_once_with(
-            '/some/path', 'aShare', 'example.com')
-
-        self.assertFalse(self._helper._deny_access.called)
+            '/some/path', self.share, add_rules=[self.access],
+            delete_rules=[], recovery=True)
+
+        self._helper._get_export.assert_called_once_with(
+            '/some/path', self.share, self.access)
+        self._helper.ganesha.add_exports.assert_called_once_with(
+            [('fakename', 'fakeconf')])
+        self.assertFalse(self._helper.ganesha.remove_exports.called)
         self.assertTrue(self._helper.ganesha.reset_exports.called)
         self.assertTrue(self._helper.ganesha.restart_service.called)
@@ -117,20 +117,70 @@ class NFSHelperTestCase(test.TestCase):
         self._helper._ssh_exec.assert_has_calls([
             mock.call(self.server, ['sudo', 'exportfs']),
             mock.call(self.server, ['sudo', 'exportfs', '-u',
-                                    ':'.join(['3.3.3.3', local_path])]),
-            mock.call(self.server, ['sudo', 'exportfs', '-u',
+                                    ':'.join(['3.3.3.3', local_path]),
                                     ':'.join(['6.6.6.6/0.0.0.0',
                                               local_path])]),
             mock.call(self.server, ['sudo', 'exportfs', '-o',
                                     expected_mount_options % access_level,
-                                    ':'.join(['2.2.2.2', local_path])]),
-            mock.call(self.server, ['sudo', 'exportfs', '-o',
-                                    expected_mount_options % access_level,
+                                    ':'.join(['2.2.2.2', local_path]),
                                     ':'.join(['5.5.5.5/255.255.255.0',
                                               local_path])]),
         ])
-        self._helper._sync_nfs_temp_and_perm_files.assert_has_calls([
-            mock.call(self.server), mock.call(self.server)])
+        self.assertEqual(3, self._helper._ssh_exec.call_count)
+        self._helper._sync_nfs_temp_and_perm_files.assert_called_once_with(
+            self.server)
+
+    def test_update_access_mixed_levels(self):
+        self.mock_object(self._helper, '_sync_nfs_temp_and_perm_files')
+        local_path = os.path.join(CONF.share_mount_path, self.share_name)
+        exec_result = ' '.join([local_path, '2.2.2.2'])
+        self.mock_object(self._helper, '_ssh_exec',
+                         mock.Mock(return_value=(exec_result, '')))
+        add_rules = [
+            test_generic.get_fake_access_rule('1.1.1.1',
+                                              const.ACCESS_LEVEL_RO),
+            test_generic.get_fake_access_rule('2.2.2.2',
+                                              const.ACCESS_LEVEL_RO),
+            test_generic.get_fake_access_rule('3.3.3.3',
+                                              const.ACCESS_LEVEL_RW)]
+        delete_rules = [
+            test_generic.get_fake_access_rule('2.2.2.2',
+                                              const.ACCESS_LEVEL_RW)]
+
+        self._helper.update_access(self.server, self.share_name, add_rules,
+                                   add_rules=add_rules,
+                                   delete_rules=delete_rules)
+
+        self._helper._ssh_exec.assert_has_calls([
+            mock.call(self.server, ['sudo', 'exportfs']),
+            mock.call(self.server, ['sudo', 'exportfs', '-u',
+                                    ':'.join(['2.2.2.2', local_path])]),
+            mock.call(self.server, ['sudo', 'exportfs', '-o',
+                                    'rw,no_subtree_check,no_root_squash',
+                                    ':'.join(['3.3.3.3', local_path])]),
+            mock.call(self.server, ['sudo', 'exportfs', '-o',
+                                    'ro,no_subtree_check',
+                                    ':'.join(['1.1.1.1', local_path]),
+                                    ':'.join(['2.2.2.2', local_path])]),
+        ])
+        self._helper._sync_nfs_temp_and_perm_files.assert_called_once_with(
+            self.server)
+
+    def test_update_access_nothing_to_change(self):
+        self.mock_object(self._helper, '_sync_nfs_temp_and_perm_files')
+        local_path = os.path.join(CONF.share_mount_path, self.share_name)
+        exec_result = ' '.join([local_path, '1.1.1.1'])
+        self.mock_object(self._helper, '_ssh_exec',
+                         mock.Mock(return_value=(exec_result, '')))
+        add_rules = [test_generic.get_fake_access_rule(
+            '1.1.1.1', const.ACCESS_LEVEL_RW)]
+
+        self._helper.update_access(self.server, self.share_name, add_rules,
+                                   add_rules=add_rules, delete_rules=[])
+
+        self._helper._ssh_exec.assert_called_once_with(
+            self.server, ['sudo', 'exportfs'])
+        self.assertFalse(self._helper._sync_nfs_temp_and_perm_files.called)
 
     def test_update_access_invalid_type(self):
         access_rules = [test_generic.get_fake_access_rule(
@@ -167,6 +217,13 @@ class NFSHelperTestCase(test.TestCase):
         result = self._helper._get_host_list(fake_exportfs, '/shares/share-1')
         self.assertEqual(expected, result)
 
+    def test_get_host_list_padded(self):
+        fake_exportfs = ('/shares/share-1  20.0.0.3\n'
+                         '/shares/share-2\t10.0.0.2\n'
+                         '/shares/share-1\n')
+        result = self._helper._get_host_list(fake_exportfs, '/shares/share-1')
+        self.assertEqual(['20.0.0.3'], result)
+
     @ddt.data(const.ACCESS_LEVEL_RW, const.ACCESS_LEVEL_RO)
     def test_update_access_recovery_mode(self, access_level):
         expected_mount_options = '%s,no_subtree_check'
@@ -270,8 +270,10 @@ class ZFSonLinuxShareDriverTestCase(test.TestCase):
     @ddt.data(None, '', 'foo_replication_domain')
     def test__get_pools_info(self, replication_domain):
         self.mock_object(
-            self.driver, 'get_zpool_option',
-            mock.Mock(side_effect=['2G', '3G', '5G', '4G']))
+            self.driver, 'execute',
+            mock.Mock(return_value=(
+                'bar\t4294967296\t5368709120\n'
+                'foo\t3221225472\t2147483648\n', '')))
         self.configuration.replication_domain = replication_domain
         self.driver.zpool_list = ['foo', 'bar']
         expected = [
@@ -299,12 +301,9 @@ class ZFSonLinuxShareDriverTestCase(test.TestCase):
         result = self.driver._get_pools_info()
 
         self.assertEqual(expected, result)
-        self.driver.get_zpool_option.assert_has_calls([
-            mock.call('foo', 'free'),
-            mock.call('foo', 'size'),
-            mock.call('bar', 'free'),
-            mock.call('bar', 'size'),
-        ])
+        self.driver.execute.assert_called_once_with(
+            'sudo', 'zpool', 'list', '-H', '-p', '-o', 'name,size,free',
+            'foo', 'bar')
 
     @ddt.data(
         ([], {'compression': [True, False], 'dedupe': [True, False]}),
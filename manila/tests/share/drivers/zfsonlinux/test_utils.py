@@ -213,6 +213,32 @@ foo_res  opt_3           some_value       local"""
         self.driver._get_option.assert_called_once_with(
             dataset_name, opt_name, False)
 
+    @ddt.data(('foo/bar\n', True), ('', False))
+    @ddt.unpack
+    def test_dataset_exists(self, out, expected):
+        self.mock_object(self.driver, 'zfs', mock.Mock(return_value=(out, '')))
+
+        result = self.driver.dataset_exists('foo/bar', executor='fake')
+
+        self.assertEqual(expected, result)
+        self.driver.zfs.assert_called_once_with(
+            'get', '-H', '-p', '-o', 'value', 'name', 'foo/bar',
+            executor='fake')
+
+    def test_dataset_exists_absent(self):
+        self.mock_object(self.driver, 'zfs', mock.Mock(
+            side_effect=exception.ProcessExecutionError(
+                stderr="cannot open 'foo/bar': dataset does not exist")))
+
+        self.assertFalse(self.driver.dataset_exists('foo/bar'))
+
+    def test_dataset_exists_error(self):
+        self.mock_object(self.driver, 'zfs', mock.Mock(
+            side_effect=exception.ProcessExecutionError(stderr='fake')))
+
+        self.assertRaises(exception.ProcessExecutionError,
+                          self.driver.dataset_exists, 'foo/bar')
+
     def test_zfs(self):
         self.mock_object(self.driver, 'execute')
         self.mock_object(self.driver, 'execute_with_retry')
@@ -378,10 +404,7 @@ class NFSviaZFSHelperTestCase(test.TestCase):
         dataset_name = 'zpoolz/foo_dataset_name/fake'
         zfs_utils.utils.execute.side_effect = [
             modinfo_response,
-            ("""NAME            USED  AVAIL  REFER  MOUNTPOINT\n
-%(dn)s                2.58M  14.8G  27.5K  /%(dn)s\n
-%(dn)s_some_other     3.58M  15.8G  28.5K  /%(dn)s\n
-             """ % {'dn': dataset_name}, ''),
+            (dataset_name + '\n', ''),
             ('fake_set_opt_result', ''),
             ("""NAME                     PROPERTY    VALUE            SOURCE\n
 %s          mountpoint  /%s  default\n
@@ -421,7 +444,8 @@ class NFSviaZFSHelperTestCase(test.TestCase):
 
         zfs_utils.utils.execute.assert_has_calls([
             mock.call('modinfo', 'zfs'),
-            mock.call('zfs', 'list', '-r', 'zpoolz', run_as_root=True),
+            mock.call('zfs', 'get', '-H', '-p', '-o', 'value', 'name',
+                      dataset_name, run_as_root=True),
             mock.call(
                 'zfs', 'set',
                 access_str,
@@ -461,7 +485,8 @@ class NFSviaZFSHelperTestCase(test.TestCase):
         self.helper.update_access(dataset_name, access_rules, [], [])
 
         zfs_utils.utils.execute.assert_has_calls([
-            mock.call('zfs', 'list', '-r', 'zpoolz', run_as_root=True),
+            mock.call('zfs', 'get', '-H', '-p', '-o', 'value', 'name',
+                      dataset_name, run_as_root=True),
         ])
         zfs_utils.LOG.warning.assert_called_once_with(
             mock.ANY, {'name': dataset_name})
@@ -471,16 +496,15 @@ class NFSviaZFSHelperTestCase(test.TestCase):
         zfs_utils.utils.execute.reset_mock()
         dataset_name = 'zpoolz/foo_dataset_name/fake'
         zfs_utils.utils.execute.side_effect = [
-            ("""NAME            USED  AVAIL  REFER  MOUNTPOINT\n
-%s          2.58M  14.8G  27.5K  /%s\n
-             """ % (dataset_name, dataset_name), ''),
+            (dataset_name + '\n', ''),
             ('fake_set_opt_result', ''),
         ]
 
         self.helper.update_access(dataset_name, [], [], [])
 
         zfs_utils.utils.execute.assert_has_calls([
-            mock.call('zfs', 'list', '-r', 'zpoolz', run_as_root=True),
+            mock.call('zfs', 'get', '-H', '-p', '-o', 'value', 'name',
+                      dataset_name, run_as_root=True),
             mock.call('zfs', 'set', 'sharenfs=off', dataset_name,
                       run_as_root=True),
         ])
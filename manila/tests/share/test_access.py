@@ -25,6 +25,11 @@ from manila import test
 from manila.tests import db_utils
 
 
+def fake_request(add_rules=None, delete_rules=None):
+    return {'add_rules': add_rules or [], 'delete_rules': delete_rules or [],
+            'done': False, 'exc_info': None}
+
+
 @ddt.ddt
 class ShareInstanceAccessTestCase(test.TestCase):
     def setUp(self):
@@ -259,3 +264,135 @@ class ShareInstanceAccessTestCase(test.TestCase):
             mock.call(self.context, share_instance, original_rules,
                       add_rules=[], delete_rules=[], share_server=None)
         ])
+
+    def test_update_access_rules_coalesces_pending_changes(self):
+        share_instance = db_utils.create_share_instance(
+            access_rules_status=constants.STATUS_ACTIVE,
+            share_id=self.share['id'])
+        rules = [db_utils.create_access(share_id=self.share['id'])
+                 for i in range(4)]
+        pending_changes = self.share_access_helper._pending_changes
+
+        def _queue_changes(*args, **kwargs):
+            if mock_update_access.call_count > 1:
+                return
+            # Requests which arrive while the first one is in progress
+            pending_changes[share_instance['id']].extend(requests)
+
+        requests = [
+            fake_request([rules[1], rules[2]], []),
+            fake_request([], [rules[0], rules[2]]),
+            fake_request([rules[3]], []),
+        ]
+
+        self.mock_object(db, "share_instance_get", mock.Mock(
+            return_value=share_instance))
+        self.mock_object(db, "share_access_get_all_for_instance",
+                         mock.Mock(return_value=[]))
+        self.mock_object(db, "share_instance_update_access_status")
+        mock_update_access = self.mock_object(
+            self.driver, "update_access",
+            mock.Mock(side_effect=_queue_changes))
+        self.mock_object(self.share_access_helper, "_remove_access_rules")
+        self.mock_object(self.share_access_helper, '_check_needs_refresh',
+                         mock.Mock(return_value=False))
+
+        self.share_access_helper.update_access_rules(
+            self.context, share_instance['id'], add_rules=[rules[0]])
+
+        mock_update_access.assert_has_calls([
+            mock.call(self.context, share_instance, [],
+                      add_rules=[rules[0]], delete_rules=[],
+                      share_server=None),
+            mock.call(self.context, share_instance, [],
+                      add_rules=[rules[1], rules[3]],
+                      delete_rules=[rules[0], rules[2]],
+                      share_server=None),
+        ])
+        self.assertEqual(2, mock_update_access.call_count)
+        self.share_access_helper._check_needs_refresh.assert_called_once_with(
+            self.context, [], share_instance)
+        self.assertEqual({}, pending_changes)
+        for request in requests:
+            self.assertTrue(request['done'])
+            self.assertIsNone(request['exc_info'])
+
+    def test_update_access_rules_coalesced_changes_fail(self):
+        share_instance = db_utils.create_share_instance(
+            access_rules_status=constants.STATUS_ACTIVE,
+            share_id=self.share['id'])
+        rules = [db_utils.create_access(share_id=self.share['id'])
+                 for i in range(2)]
+        # A request of a concurrent caller which has not got the lock yet
+        request = fake_request([rules[1]])
+        self.share_access_helper._pending_changes[
+            share_instance['id']].append(request)
+        self.mock_object(db, "share_instance_get", mock.Mock(
+            return_value=share_instance))
+        self.mock_object(db, "share_access_get_all_for_instance",
+                         mock.Mock(return_value=[]))
+        self.mock_object(db, "share_instance_update_access_status")
+        mock_update_access = self.mock_object(
+            self.driver, "update_access",
+            mock.Mock(side_effect=exception.ManilaException))
+
+        self.assertRaises(exception.ManilaException,
+                          self.share_access_helper.update_access_rules,
+                          self.context, share_instance['id'],
+                          add_rules=[rules[0]])
+
+        mock_update_access.assert_called_once_with(
+            self.context, share_instance, [], add_rules=[rules[1], rules[0]],
+            delete_rules=[], share_server=None)
+        self.assertTrue(request['done'])
+        self.assertIsInstance(request['exc_info'][1],
+                              exception.ManilaException)
+
+    def test_update_access_rules_next_batch_fails(self):
+        share_instance = db_utils.create_share_instance(
+            access_rules_status=constants.STATUS_ACTIVE,
+            share_id=self.share['id'])
+        rules = [db_utils.create_access(share_id=self.share['id'])
+                 for i in range(2)]
+        request = fake_request(delete_rules='all')
+
+        def _update_access(*args, **kwargs):
+            if mock_update_access.call_count > 1:
+                raise exception.ManilaException()
+            # A request which arrives while the first one is in progress
+            self.share_access_helper._pending_changes[
+                share_instance['id']].append(request)
+
+        self.mock_object(db, "share_instance_get", mock.Mock(
+            return_value=share_instance))
+        self.mock_object(db, "share_access_get_all_for_instance",
+                         mock.Mock(return_value=[rules[1]]))
+        self.mock_object(db, "share_instance_update_access_status")
+        mock_update_access = self.mock_object(
+            self.driver, "update_access",
+            mock.Mock(side_effect=_update_access))
+        self.mock_object(self.share_access_helper, "_remove_access_rules")
+
+        self.share_access_helper.update_access_rules(
+            self.context, share_instance['id'], add_rules=[rules[0]])
+
+        self.assertEqual(2, mock_update_access.call_count)
+        self.assertTrue(request['done'])
+        self.assertIsInstance(request['exc_info'][1],
+                              exception.ManilaException)
+
+    @ddt.data('all', [])
+    def test_pop_pending_changes_not_merged(self, delete_rules):
+        pending_changes = self.share_access_helper._pending_changes
+        requests = [fake_request([], delete_rules),
+                    fake_request([self.rule], [])]
+        pending_changes['fake_id'].extend(requests)
+
+        result = self.share_access_helper._pop_pending_changes('fake_id')
+
+        self.assertEqual(([], delete_rules, requests[:1]), result)
+        result = self.share_access_helper._pop_pending_changes('fake_id')
+
+        self.assertEqual(([self.rule], [], requests[1:]), result)
+        self.assertIsNone(
+            self.share_access_helper._pop_pending_changes('fake_id'))
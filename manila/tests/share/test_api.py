@@ -389,30 +389,59 @@ class ShareAPITestCase(test.TestCase):
     def test_get_all_admin_filter_by_status(self):
         ctx = context.RequestContext('fake_uid', 'fake_pid_2', is_admin=True)
         self.mock_object(db_api, 'share_get_all_by_project',
-                         mock.Mock(return_value=_FAKE_LIST_OF_ALL_SHARES[1:]))
+                         mock.Mock(return_value=_FAKE_LIST_OF_ALL_SHARES[2:3]))
         shares = self.api.get_all(ctx, {'status': constants.STATUS_AVAILABLE})
         share_api.policy.check_policy.assert_has_calls([
             mock.call(ctx, 'share', 'get_all'),
         ])
         db_api.share_get_all_by_project.assert_called_once_with(
             ctx, sort_dir='desc', sort_key='created_at',
-            project_id='fake_pid_2', filters={}, is_public=False
+            project_id='fake_pid_2',
+            filters={'status': constants.STATUS_AVAILABLE}, is_public=False
         )
         self.assertEqual(_FAKE_LIST_OF_ALL_SHARES[2::4], shares)
 
     def test_get_all_admin_filter_by_status_and_all_tenants(self):
         ctx = context.RequestContext('fake_uid', 'fake_pid_2', is_admin=True)
-        self.mock_object(db_api, 'share_get_all',
-                         mock.Mock(return_value=_FAKE_LIST_OF_ALL_SHARES))
+        self.mock_object(
+            db_api, 'share_get_all',
+            mock.Mock(return_value=_FAKE_LIST_OF_ALL_SHARES[1::2]))
         shares = self.api.get_all(
             ctx, {'status': constants.STATUS_ERROR, 'all_tenants': 1})
         share_api.policy.check_policy.assert_has_calls([
             mock.call(ctx, 'share', 'get_all'),
         ])
         db_api.share_get_all.assert_called_once_with(
-            ctx, sort_dir='desc', sort_key='created_at', filters={})
+            ctx, sort_dir='desc', sort_key='created_at',
+            filters={'status': constants.STATUS_ERROR})
         self.assertEqual(_FAKE_LIST_OF_ALL_SHARES[1::2], shares)
 
+    def test_get_all_admin_filter_by_status_paginated_by_db(self):
+        ctx = context.RequestContext('fake_uid', 'fake_pid_2', is_admin=True)
+        self.mock_object(db_api, 'share_get_all',
+                         mock.Mock(return_value=_FAKE_LIST_OF_ALL_SHARES[3:]))
+        shares = self.api.get_all(
+            ctx, {'status': constants.STATUS_ERROR, 'all_tenants': 1,
+                  'limit': 1, 'offset': 1, 'marker': 'fake_marker'})
+        db_api.share_get_all.assert_called_once_with(
+            ctx, sort_dir='desc', sort_key='created_at',
+            filters={'status': constants.STATUS_ERROR, 'limit': 1,
+                     'offset': 1, 'marker': 'fake_marker'})
+        self.assertEqual(_FAKE_LIST_OF_ALL_SHARES[3:], shares)
+
+    def test_get_all_admin_filter_by_name_paginated_in_memory(self):
+        ctx = context.RequestContext('fake_uid', 'fake_pid_2', is_admin=True)
+        shares = [dict(share, id='id%s' % i)
+                  for i, share in enumerate(_FAKE_LIST_OF_ALL_SHARES)]
+        self.mock_object(db_api, 'share_get_all',
+                         mock.Mock(return_value=shares))
+        result = self.api.get_all(
+            ctx, {'name': 'foo', 'all_tenants': 1, 'limit': 1,
+                  'marker': 'id0'})
+        db_api.share_get_all.assert_called_once_with(
+            ctx, sort_dir='desc', sort_key='created_at', filters={})
+        self.assertEqual([shares[2]], result)
+
     def test_get_all_non_admin_filter_by_all_tenants(self):
         # Expected share list only by project of non-admin user
         ctx = context.RequestContext('fake_uid', 'fake_pid_2', is_admin=False)
@@ -439,7 +468,8 @@ class ShareAPITestCase(test.TestCase):
         ])
         db_api.share_get_all_by_project.assert_called_once_with(
             ctx, sort_dir='desc', sort_key='created_at',
-            project_id='fake_pid_2', filters={}, is_public=False
+            project_id='fake_pid_2',
+            filters={'status': constants.STATUS_ERROR}, is_public=False
         )
 
         # two items expected, one filtered
@@ -455,9 +485,13 @@ class ShareAPITestCase(test.TestCase):
         ])
         db_api.share_get_all_by_project.assert_has_calls([
             mock.call(ctx, sort_dir='desc', sort_key='created_at',
-                      project_id='fake_pid_2', filters={}, is_public=False),
+                      project_id='fake_pid_2',
+                      filters={'status': constants.STATUS_ERROR},
+                      is_public=False),
             mock.call(ctx, sort_dir='desc', sort_key='created_at',
-                      project_id='fake_pid_2', filters={}, is_public=False),
+                      project_id='fake_pid_2',
+                      filters={'status': constants.STATUS_AVAILABLE},
+                      is_public=False),
         ])
 
     @ddt.data('True', 'true', '1', 'yes', 'y', 'on', 't', True)
@@ -1566,21 +1600,38 @@ class ShareAPITestCase(test.TestCase):
             ctx, 'fakepid', sort_dir='desc', sort_key='share_id', filters={})
 
     def test_get_all_snapshots_not_admin_search_opts(self):
-        search_opts = {'size': 'fakesize'}
-        fake_objs = [{'name': 'fakename1'}, search_opts]
+        search_opts = {'size': 'fakesize', 'limit': 1, 'offset': 1}
+        fake_objs = [{'name': 'fakename1', 'size': 'fakesize'}]
         ctx = context.RequestContext('fakeuid', 'fakepid', is_admin=False)
         self.mock_object(db_api, 'share_snapshot_get_all_by_project',
                          mock.Mock(return_value=fake_objs))
 
-        result = self.api.get_all_snapshots(ctx, search_opts)
+        result = self.api.get_all_snapshots(ctx, search_opts.copy())
 
-        self.assertEqual([search_opts], result)
+        self.assertEqual(fake_objs, result)
         share_api.policy.check_policy.assert_called_once_with(
             ctx, 'share_snapshot', 'get_all_snapshots')
         db_api.share_snapshot_get_all_by_project.assert_called_once_with(
             ctx, 'fakepid', sort_dir='desc', sort_key='share_id',
             filters=search_opts)
 
+    def test_get_all_snapshots_not_admin_search_opts_paginated_in_memory(
+            self):
+        search_opts = {'fake_key': 'fake_value', 'limit': 1}
+        fake_objs = [{'id': 'id1', 'fake_key': 'fake_other_value'},
+                     {'id': 'id2', 'fake_key': 'fake_value'},
+                     {'id': 'id3', 'fake_key': 'fake_value'}]
+        ctx = context.RequestContext('fakeuid', 'fakepid', is_admin=False)
+        self.mock_object(db_api, 'share_snapshot_get_all_by_project',
+                         mock.Mock(return_value=fake_objs))
+
+        result = self.api.get_all_snapshots(ctx, search_opts)
+
+        self.assertEqual(fake_objs[1:2], result)
+        db_api.share_snapshot_get_all_by_project.assert_called_once_with(
+            ctx, 'fakepid', sort_dir='desc', sort_key='share_id',
+            filters={})
+
     def test_get_all_snapshots_with_sorting_valid(self):
         self.mock_object(
             db_api, 'share_snapshot_get_all_by_project',
@@ -580,6 +580,12 @@ class ShareDriverTestCase(test.TestCase):
                           share_driver.promote_replica,
                           'fake_context', [], 'fake_replica', [])
 
+    def test_update_replica_states(self):
+        share_driver = self._instantiate_share_driver(None, True)
+        self.assertRaises(NotImplementedError,
+                          share_driver.update_replica_states,
+                          'fake_context', [{'replica': 'fake_replica'}])
+
     def test_update_replica_state(self):
         share_driver = self._instantiate_share_driver(None, True)
         self.assertRaises(NotImplementedError,
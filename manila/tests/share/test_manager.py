@@ -174,7 +174,8 @@ class ShareManagerTestCase(test.TestCase):
         self.assertTrue(self.share_manager.driver.initialized)
         self.share_manager.db.share_instances_get_all_by_host.\
             assert_called_once_with(utils.IsAMatcher(context.RequestContext),
-                                    self.share_manager.host)
+                                    self.share_manager.host,
+                                    with_share_data=True)
         self.share_manager.driver.do_setup.assert_called_once_with(
             utils.IsAMatcher(context.RequestContext))
         self.share_manager.driver.check_for_setup_error.\
@@ -318,7 +319,8 @@ class ShareManagerTestCase(test.TestCase):
         # verification of call
         self.share_manager.db.share_instances_get_all_by_host.\
             assert_called_once_with(utils.IsAMatcher(context.RequestContext),
-                                    self.share_manager.host)
+                                    self.share_manager.host,
+                                    with_share_data=True)
         exports_update = self.share_manager.db.share_export_locations_update
         exports_update.assert_has_calls([
             mock.call(mock.ANY, instances[0]['id'], fake_export_locations),
@@ -342,9 +344,10 @@ class ShareManagerTestCase(test.TestCase):
             mock.call(utils.IsAMatcher(context.RequestContext), instances[2],
                       share_server=share_server),
         ])
-        self.share_manager.publish_service_capabilities.\
-            assert_called_once_with(
-                utils.IsAMatcher(context.RequestContext))
+        self.share_manager.publish_service_capabilities.assert_has_calls([
+            mock.call(utils.IsAMatcher(context.RequestContext)),
+            mock.call(utils.IsAMatcher(context.RequestContext)),
+        ])
         self.share_manager.access_helper.update_access_rules.assert_has_calls([
             mock.call(mock.ANY, instances[4]['id'], share_server=share_server),
         ])
@@ -376,7 +379,8 @@ class ShareManagerTestCase(test.TestCase):
         # verification of call
         self.share_manager.db.share_instances_get_all_by_host.\
             assert_called_once_with(utils.IsAMatcher(context.RequestContext),
-                                    self.share_manager.host)
+                                    self.share_manager.host,
+                                    with_share_data=True)
         self.share_manager.driver.do_setup.assert_called_once_with(
             utils.IsAMatcher(context.RequestContext))
         self.share_manager.driver.check_for_setup_error.assert_called_with()
@@ -394,9 +398,10 @@ class ShareManagerTestCase(test.TestCase):
             mock.call(utils.IsAMatcher(context.RequestContext), instances[2],
                       share_server=share_server),
         ])
-        self.share_manager.publish_service_capabilities.\
-            assert_called_once_with(
-                utils.IsAMatcher(context.RequestContext))
+        self.share_manager.publish_service_capabilities.assert_has_calls([
+            mock.call(utils.IsAMatcher(context.RequestContext)),
+            mock.call(utils.IsAMatcher(context.RequestContext)),
+        ])
         manager.LOG.info.assert_any_call(
             mock.ANY,
             {'task': constants.TASK_STATE_MIGRATION_IN_PROGRESS,
@@ -438,7 +443,7 @@ class ShareManagerTestCase(test.TestCase):
         # verification of call
         smanager.db.share_instances_get_all_by_host.\
             assert_called_once_with(utils.IsAMatcher(context.RequestContext),
-                                    smanager.host)
+                                    smanager.host, with_share_data=True)
         smanager.driver.do_setup.assert_called_once_with(
             utils.IsAMatcher(context.RequestContext))
         smanager.driver.check_for_setup_error.assert_called_with()
@@ -456,9 +461,10 @@ class ShareManagerTestCase(test.TestCase):
             mock.call(utils.IsAMatcher(context.RequestContext), instances[2],
                       share_server=share_server),
         ])
-        self.share_manager.publish_service_capabilities.\
-            assert_called_once_with(
-                utils.IsAMatcher(context.RequestContext))
+        self.share_manager.publish_service_capabilities.assert_has_calls([
+            mock.call(utils.IsAMatcher(context.RequestContext)),
+            mock.call(utils.IsAMatcher(context.RequestContext)),
+        ])
         manager.LOG.info.assert_any_call(
             mock.ANY,
             {'task': constants.TASK_STATE_MIGRATION_IN_PROGRESS,
@@ -476,6 +482,110 @@ class ShareManagerTestCase(test.TestCase):
             mock.call(mock.ANY, mock.ANY),
         ])
 
+    def test_init_host_with_bulk_ensure_shares(self):
+        instances = self._setup_init_mocks(setup_access_rules=False)
+        share_server = 'fake_share_server_type_does_not_matter'
+        fake_export_locations = ['fake/path/1', 'fake/path']
+        self.mock_object(self.share_manager.db,
+                         'share_instances_get_all_by_host',
+                         mock.Mock(return_value=instances))
+        self.mock_object(self.share_manager.db, 'share_instance_get',
+                         mock.Mock(side_effect=[instances[0], instances[2],
+                                                instances[4]]))
+        self.mock_object(self.share_manager.db,
+                         'share_export_locations_update')
+        self.mock_object(self.share_manager.db,
+                         'share_export_locations_update_bulk')
+        self.mock_object(
+            self.share_manager.driver, 'ensure_shares',
+            mock.Mock(return_value={instances[2]['id']: fake_export_locations})
+        )
+        self.mock_object(self.share_manager.driver, 'ensure_share')
+        self.mock_object(self.share_manager, '_ensure_share_instance_has_pool')
+        self.mock_object(self.share_manager, '_get_share_server',
+                         mock.Mock(return_value=share_server))
+        self.mock_object(self.share_manager, 'publish_service_capabilities')
+        self.mock_object(self.share_manager.access_helper,
+                         'update_access_rules')
+
+        self.share_manager.init_host()
+
+        self.share_manager.driver.ensure_shares.assert_called_once_with(
+            utils.IsAMatcher(context.RequestContext), [
+                {'share': instances[0], 'share_server': share_server},
+                {'share': instances[2], 'share_server': share_server},
+                {'share': instances[4], 'share_server': share_server},
+            ])
+        self.assertFalse(self.share_manager.driver.ensure_share.called)
+        self.assertFalse(
+            self.share_manager.db.share_export_locations_update.called)
+        self.share_manager.db.share_export_locations_update_bulk.\
+            assert_called_once_with(
+                utils.IsAMatcher(context.RequestContext),
+                {instances[2]['id']: fake_export_locations})
+        self.share_manager.access_helper.update_access_rules.\
+            assert_called_once_with(utils.IsAMatcher(context.RequestContext),
+                                    instances[4]['id'],
+                                    share_server=share_server)
+
+    def test_init_host_with_exception_on_bulk_ensure_shares(self):
+        instances = self._setup_init_mocks(setup_access_rules=False)
+        self.mock_object(self.share_manager.db,
+                         'share_instances_get_all_by_host',
+                         mock.Mock(return_value=instances))
+        self.mock_object(self.share_manager.db, 'share_instance_get',
+                         mock.Mock(side_effect=[instances[0], instances[2],
+                                                instances[4]]))
+        self.mock_object(self.share_manager.driver, 'ensure_shares',
+                         mock.Mock(side_effect=exception.ManilaException(
+                             message="Fake raise")))
+        self.mock_object(self.share_manager.driver, 'ensure_share',
+                         mock.Mock(return_value=None))
+        self.mock_object(self.share_manager, '_ensure_share_instance_has_pool')
+        self.mock_object(self.share_manager, 'publish_service_capabilities')
+        self.mock_object(self.share_manager.access_helper,
+                         'update_access_rules')
+        self.mock_object(manager.LOG, 'error')
+
+        self.share_manager.init_host()
+
+        self.share_manager.driver.ensure_share.assert_has_calls([
+            mock.call(utils.IsAMatcher(context.RequestContext), instances[0],
+                      share_server=None),
+            mock.call(utils.IsAMatcher(context.RequestContext), instances[2],
+                      share_server=None),
+            mock.call(utils.IsAMatcher(context.RequestContext), instances[4],
+                      share_server=None),
+        ])
+        manager.LOG.error.assert_called_once_with(mock.ANY, mock.ANY)
+
+    def test_init_host_gets_each_share_server_once(self):
+        server = db_utils.create_share_server()
+        instances = [
+            db_utils.create_share(status=constants.STATUS_AVAILABLE,
+                                  share_server_id=server['id'],
+                                  host='fake_host@backend#pool').instance
+            for i in range(3)
+        ]
+        self.mock_object(self.share_manager.db,
+                         'share_instances_get_all_by_host',
+                         mock.Mock(return_value=instances))
+        self.mock_object(self.share_manager.db, 'share_server_get',
+                         mock.Mock(return_value=server))
+        self.mock_object(self.share_manager.driver, 'ensure_share',
+                         mock.Mock(return_value=None))
+        self.mock_object(self.share_manager, 'publish_service_capabilities')
+
+        self.share_manager.init_host()
+
+        self.share_manager.db.share_server_get.assert_called_once_with(
+            utils.IsAMatcher(context.RequestContext), server['id'])
+        self.assertEqual(3, self.share_manager.driver.ensure_share.call_count)
+        for instance in instances:
+            self.share_manager.driver.ensure_share.assert_any_call(
+                utils.IsAMatcher(context.RequestContext), instance,
+                share_server=server)
+
     def test_create_share_instance_from_snapshot_with_server(self):
         """Test share can be created from snapshot if server exists."""
         network = db_utils.create_share_network()
@@ -1179,27 +1289,230 @@ class ShareManagerTestCase(test.TestCase):
         self.assertTrue(mock_info_log.called)
         self.assertFalse(mock_snap_instance_update.called)
 
-    @ddt.data('openstack1@watson#_pool0', 'openstack1@newton#_pool0')
+    @ddt.data('openstack1@watson#_pool0', 'openstack1@watson')
     def test_periodic_share_replica_update(self, host):
         mock_debug_log = self.mock_object(manager.LOG, 'debug')
         replicas = [
             fake_replica(host='openstack1@watson#pool4'),
             fake_replica(host='openstack1@watson#pool5'),
-            fake_replica(host='openstack1@newton#pool5'),
-            fake_replica(host='openstack1@newton#pool5'),
-
         ]
-        self.mock_object(self.share_manager.db, 'share_replicas_get_all',
+        self.mock_object(self.share_manager.db,
+                         'share_replicas_get_all_by_host',
                          mock.Mock(return_value=replicas))
+        self.mock_object(self.share_manager, '_get_share_replica_states',
+                         mock.Mock(return_value=None))
         mock_update_method = self.mock_object(
             self.share_manager, '_share_replica_update')
+        self.share_manager._replica_states_bulk_supported = True
 
         self.share_manager.host = host
 
         self.share_manager.periodic_share_replica_update(self.context)
 
-        self.assertEqual(2, mock_update_method.call_count)
-        self.assertEqual(1, mock_debug_log.call_count)
+        self.share_manager.db.share_replicas_get_all_by_host.\
+            assert_called_once_with(self.context, 'openstack1@watson',
+                                    exclude_active=True)
+        self.share_manager._get_share_replica_states.assert_called_once_with(
+            self.context, replicas)
+        mock_update_method.assert_has_calls([
+            mock.call(self.context, replicas[0],
+                      share_id=replicas[0]['share_id']),
+            mock.call(self.context, replicas[1],
+                      share_id=replicas[1]['share_id'])])
+        self.assertEqual(2, mock_debug_log.call_count)
+
+    @ddt.data(True, False)
+    def test_init_replica_states_bulk_supported(self, redefined):
+        self.mock_object(
+            self.share_manager.driver.__class__,
+            '_has_redefined_driver_methods',
+            mock.Mock(return_value=redefined))
+
+        share_manager = manager.ShareManager()
+
+        self.assertEqual(redefined,
+                         share_manager._replica_states_bulk_supported)
+        share_manager.driver._has_redefined_driver_methods.\
+            assert_called_once_with('update_replica_states')
+
+    def test_periodic_share_replica_update_bulk(self):
+        replicas = [fake_replica() for i in range(3)]
+        self.share_manager._replica_states_bulk_supported = True
+        self.mock_object(self.share_manager.db,
+                         'share_replicas_get_all_by_host',
+                         mock.Mock(return_value=replicas))
+        self.mock_object(
+            self.share_manager, '_get_share_replica_states',
+            mock.Mock(return_value={
+                replicas[0]['id']: constants.REPLICA_STATE_OUT_OF_SYNC,
+                replicas[2]['id']: None}))
+        mock_update_method = self.mock_object(
+            self.share_manager, '_share_replica_update')
+        mock_set_state_method = self.mock_object(
+            self.share_manager, '_set_share_replica_state')
+
+        self.share_manager.periodic_share_replica_update(self.context)
+
+        mock_set_state_method.assert_called_once_with(
+            self.context, replicas[0], constants.REPLICA_STATE_OUT_OF_SYNC,
+            share_id=replicas[0]['share_id'])
+        mock_update_method.assert_called_once_with(
+            self.context, replicas[1], share_id=replicas[1]['share_id'])
+
+    def test_periodic_share_replica_update_bulk_not_supported(self):
+        replicas = [fake_replica()]
+        self.mock_object(self.share_manager.db,
+                         'share_replicas_get_all_by_host',
+                         mock.Mock(return_value=replicas))
+        self.mock_object(self.share_manager, '_get_share_replica_states')
+        mock_update_method = self.mock_object(
+            self.share_manager, '_share_replica_update')
+        self.share_manager._replica_states_bulk_supported = False
+
+        self.share_manager.periodic_share_replica_update(self.context)
+
+        self.assertFalse(self.share_manager._get_share_replica_states.called)
+        mock_update_method.assert_called_once_with(
+            self.context, replicas[0], share_id=replicas[0]['share_id'])
+
+    def test_periodic_share_replica_update_no_replicas(self):
+        self.mock_object(self.share_manager.db,
+                         'share_replicas_get_all_by_host',
+                         mock.Mock(return_value=[]))
+        self.mock_object(self.share_manager, '_get_share_replica_states')
+
+        self.share_manager.periodic_share_replica_update(self.context)
+
+        self.assertFalse(self.share_manager._get_share_replica_states.called)
+
+    def _setup_share_replica_states_mocks(self, replicas):
+        active_replica = fake_replica(
+            id='fake_active', share_id=replicas[0]['share_id'],
+            replica_state=constants.REPLICA_STATE_ACTIVE)
+        self.mock_object(self.share_manager, '_get_share_server',
+                         mock.Mock(return_value='fake_share_server'))
+        self.mock_object(self.share_manager.db, 'share_replica_get',
+                         mock.Mock(side_effect=replicas))
+        self.mock_object(self.share_manager.db,
+                         'share_access_get_all_for_share',
+                         mock.Mock(return_value=['fake_rule']))
+        self.mock_object(
+            self.share_manager.db, 'share_replicas_get_all_by_share',
+            mock.Mock(return_value=[active_replica] + list(replicas)))
+        self.mock_object(self.share_manager.db,
+                         'share_snapshot_get_all_for_share',
+                         mock.Mock(return_value=[]))
+        self.mock_object(self.share_manager, '_get_share_replica_dict',
+                         mock.Mock(side_effect=lambda c, r: r))
+
+    def test__get_share_replica_states(self):
+        share_id = 'fake_share_id'
+        replicas = [
+            fake_replica(share_id=share_id,
+                         replica_state=constants.REPLICA_STATE_IN_SYNC),
+            fake_replica(share_id=share_id,
+                         replica_state=constants.REPLICA_STATE_OUT_OF_SYNC),
+            fake_replica(share_id=share_id,
+                         replica_state=constants.REPLICA_STATE_IN_SYNC),
+            fake_replica(share_id=share_id,
+                         status=constants.STATUS_DELETING,
+                         replica_state=constants.REPLICA_STATE_IN_SYNC),
+        ]
+        self._setup_share_replica_states_mocks(replicas)
+        self.mock_object(
+            self.share_manager.driver, 'update_replica_states',
+            mock.Mock(return_value={
+                replicas[0]['id']: constants.REPLICA_STATE_OUT_OF_SYNC,
+                replicas[1]['id']: constants.REPLICA_STATE_IN_SYNC,
+                replicas[2]['id']: None}))
+
+        retval = self.share_manager._get_share_replica_states(
+            self.context, replicas)
+
+        self.assertEqual(
+            {replicas[0]['id']: constants.REPLICA_STATE_OUT_OF_SYNC,
+             replicas[1]['id']: constants.REPLICA_STATE_IN_SYNC,
+             replicas[3]['id']: None},
+            retval)
+        update_list = (
+            self.share_manager.driver.update_replica_states.call_args[0][1])
+        self.assertEqual(replicas[:3], [r['replica'] for r in update_list])
+        for update_data in update_list:
+            self.assertEqual(['fake_rule'], update_data['access_rules'])
+            self.assertEqual('fake_share_server', update_data['share_server'])
+            self.assertEqual(5, len(update_data['replica_list']))
+            self.assertEqual([], update_data['replica_snapshots'])
+        # Data of the share is gathered only once
+        self.share_manager.db.share_access_get_all_for_share.\
+            assert_called_once_with(self.context, share_id)
+        self.share_manager.db.share_replicas_get_all_by_share.\
+            assert_called_once_with(self.context, share_id,
+                                    with_share_data=True,
+                                    with_share_server=True)
+
+    @ddt.data(NotImplementedError, exception.ManilaException)
+    def test__get_share_replica_states_driver_error(self, side_effect):
+        replicas = [fake_replica(
+            replica_state=constants.REPLICA_STATE_IN_SYNC)]
+        self._setup_share_replica_states_mocks(replicas)
+        self.mock_object(self.share_manager.driver, 'update_replica_states',
+                         mock.Mock(side_effect=side_effect))
+        mock_exception_log = self.mock_object(manager.LOG, 'exception')
+
+        retval = self.share_manager._get_share_replica_states(
+            self.context, replicas)
+
+        self.assertIsNone(retval)
+        self.assertEqual(side_effect is not NotImplementedError,
+                         mock_exception_log.called)
+        self.assertFalse(self.share_manager._replica_states_bulk_supported)
+
+    def test__get_share_replica_states_nothing_to_poll(self):
+        replica = fake_replica(replica_state=constants.REPLICA_STATE_ACTIVE)
+        self._setup_share_replica_states_mocks([replica])
+        self.mock_object(self.share_manager.driver, 'update_replica_states')
+
+        retval = self.share_manager._get_share_replica_states(
+            self.context, [replica])
+
+        self.assertEqual({replica['id']: None}, retval)
+        self.assertFalse(
+            self.share_manager.driver.update_replica_states.called)
+
+    @ddt.data(constants.REPLICA_STATE_IN_SYNC, constants.STATUS_ERROR)
+    def test__set_share_replica_state(self, replica_state):
+        replica = fake_replica(
+            replica_state=constants.REPLICA_STATE_OUT_OF_SYNC)
+        self.mock_object(self.share_manager.db, 'share_replica_get',
+                         mock.Mock(return_value=replica))
+        mock_db_update_call = self.mock_object(
+            self.share_manager.db, 'share_replica_update')
+
+        self.share_manager._set_share_replica_state(
+            self.context, replica, replica_state,
+            share_id=replica['share_id'])
+
+        mock_db_update_call.assert_called_once_with(
+            self.context, replica['id'], {'replica_state': replica_state})
+
+    @ddt.data({'replica_state': constants.REPLICA_STATE_ACTIVE},
+              {'status': constants.STATUS_DELETING},
+              None)
+    def test__set_share_replica_state_replica_changed(self, values):
+        replica = fake_replica(**(values or {}))
+        side_effect = (
+            [replica] if values
+            else exception.ShareReplicaNotFound(replica_id=replica['id']))
+        self.mock_object(self.share_manager.db, 'share_replica_get',
+                         mock.Mock(side_effect=side_effect))
+        mock_db_update_call = self.mock_object(
+            self.share_manager.db, 'share_replica_update')
+
+        self.share_manager._set_share_replica_state(
+            self.context, replica, constants.REPLICA_STATE_IN_SYNC,
+            share_id=replica['share_id'])
+
+        self.assertFalse(mock_db_update_call.called)
 
     @ddt.data(constants.REPLICA_STATE_IN_SYNC,
               constants.REPLICA_STATE_OUT_OF_SYNC)
@@ -3845,10 +4158,89 @@ class ShareManagerTestCase(test.TestCase):
                 self.context, new_instance)
             data_rpc.DataAPI.migration_start.assert_called_once_with(
                 self.context, share['id'], ['lost+found'], instance['id'],
-                new_instance['id'], src_connection_info, dest_connection_info)
+                new_instance['id'], src_connection_info, dest_connection_info,
+                writable_passes=0)
             migration_api.ShareMigrationHelper.\
                 cleanup_new_instance.assert_called_once_with(new_instance)
 
+    @ddt.data(True, False)
+    def test__migration_start_host_assisted_writable_passes(
+            self, readonly_support):
+        instance = db_utils.create_share_instance(
+            share_id='fake_id',
+            status=constants.STATUS_AVAILABLE,
+            share_server_id='fake_server_id')
+        new_instance = db_utils.create_share_instance(
+            share_id='new_fake_id',
+            status=constants.STATUS_AVAILABLE)
+        share = db_utils.create_share(id='fake_id', instances=[instance])
+        self.share_manager.driver.configuration.safe_get = mock.Mock(
+            side_effect=lambda name: {
+                'migration_readonly_rules_support': readonly_support,
+                'migration_writable_copy_passes': 2,
+                'migration_ignore_files': ['lost+found']}[name])
+
+        # mocks
+        self.mock_object(self.share_manager.db, 'share_server_get',
+                         mock.Mock(return_value='share_server'))
+        self.mock_object(self.share_manager.db, 'share_instance_update')
+        self.mock_object(migration_api.ShareMigrationHelper,
+                         'change_to_read_only')
+        self.mock_object(migration_api.ShareMigrationHelper,
+                         'create_instance_and_wait',
+                         mock.Mock(return_value=new_instance))
+        self.mock_object(self.share_manager.driver, 'connection_get_info',
+                         mock.Mock(return_value='src_fake_info'))
+        self.mock_object(rpcapi.ShareAPI, 'connection_get_info',
+                         mock.Mock(return_value='dest_fake_info'))
+        self.mock_object(data_rpc.DataAPI, 'migration_start')
+
+        # run
+        self.share_manager._migration_start_host_assisted(
+            self.context, share, instance, 'fake_host', 'fake_net_id',
+            'fake_az_id', 'fake_type_id')
+
+        # asserts
+        if readonly_support:
+            self.assertFalse(
+                migration_api.ShareMigrationHelper.change_to_read_only.called)
+        else:
+            (migration_api.ShareMigrationHelper.change_to_read_only.
+                assert_called_once_with(instance, 'share_server', False,
+                                        self.share_manager.driver))
+        data_rpc.DataAPI.migration_start.assert_called_once_with(
+            self.context, share['id'], ['lost+found'], instance['id'],
+            new_instance['id'], 'src_fake_info', 'dest_fake_info',
+            writable_passes=2 if readonly_support else 0)
+
+    def test_migration_change_to_read_only(self):
+        instance = db_utils.create_share_instance(
+            share_id='fake_id',
+            status=constants.STATUS_MIGRATING,
+            share_server_id='fake_server_id')
+        share = db_utils.create_share(id='fake_id', instances=[instance])
+
+        # mocks
+        self.mock_object(self.share_manager.db, 'share_get',
+                         mock.Mock(return_value=share))
+        self.mock_object(self.share_manager.db, 'share_instance_get',
+                         mock.Mock(return_value=instance))
+        self.mock_object(self.share_manager.db, 'share_server_get',
+                         mock.Mock(return_value='share_server'))
+        self.mock_object(migration_api.ShareMigrationHelper,
+                         'change_to_read_only')
+
+        # run
+        self.share_manager.migration_change_to_read_only(
+            self.context, instance['id'])
+
+        # asserts
+        self.share_manager.db.share_instance_get.assert_called_once_with(
+            self.context, instance['id'], with_share_data=True)
+        migration_api.ShareMigrationHelper.change_to_read_only.\
+            assert_called_once_with(instance, 'share_server', True,
+                                    self.share_manager.driver)
+
     @ddt.data({'share_network_id': 'fake_net_id', 'exc': None},
               {'share_network_id': None, 'exc': Exception('fake')},
               {'share_network_id': None, 'exc': None})
@@ -5087,29 +5479,54 @@ class ShareManagerTestCase(test.TestCase):
 
     def test_periodic_share_replica_snapshot_update(self):
         mock_debug_log = self.mock_object(manager.LOG, 'debug')
-        replicas = 3 * [
+        replicas = [
             fake_replica(host='malfoy@manor#_pool0',
                          replica_state=constants.REPLICA_STATE_IN_SYNC)
+            for i in range(2)
         ]
-        replicas.append(fake_replica(replica_state=constants.STATUS_ACTIVE))
         snapshot = fakes.fake_snapshot(create_instance=True,
                                        status=constants.STATUS_DELETING)
-        snapshot_instances = 3 * [
-            fakes.fake_snapshot_instance(base_snapshot=snapshot)
+        transitional_instances = [
+            fakes.fake_snapshot_instance(
+                base_snapshot=snapshot, share_instance_id=replica['id'],
+                status=constants.STATUS_DELETING)
+            for replica in replicas
         ]
-        self.mock_object(
-            db, 'share_replicas_get_all', mock.Mock(return_value=replicas))
+        other_instance = fakes.fake_snapshot_instance(
+            base_snapshot=snapshot, status=constants.STATUS_AVAILABLE)
+        snapshot_instances = transitional_instances + [other_instance]
+        self.mock_object(db, 'share_replicas_get_all_by_host',
+                         mock.Mock(return_value=replicas))
         self.mock_object(db, 'share_snapshot_instance_get_all_with_filters',
-                         mock.Mock(return_value=snapshot_instances))
+                         mock.Mock(side_effect=[transitional_instances,
+                                                snapshot_instances]))
         mock_snapshot_update_call = self.mock_object(
             self.share_manager, '_update_replica_snapshot')
+        self.share_manager.host = 'malfoy@manor'
 
         retval = self.share_manager.periodic_share_replica_snapshot_update(
             self.context)
 
         self.assertIsNone(retval)
-        self.assertEqual(1, mock_debug_log.call_count)
-        self.assertEqual(0, mock_snapshot_update_call.call_count)
+        self.assertEqual(2, mock_debug_log.call_count)
+        db.share_replicas_get_all_by_host.assert_called_once_with(
+            self.context, 'malfoy@manor', exclude_active=True)
+        db.share_snapshot_instance_get_all_with_filters.assert_has_calls([
+            mock.call(self.context,
+                      {'share_instance_ids': mock.ANY,
+                       'statuses': (constants.STATUS_CREATING,
+                                    constants.STATUS_DELETING)}),
+            mock.call(self.context, {'snapshot_ids': [snapshot['id']]}),
+        ])
+        self.assertEqual(
+            sorted(replica['id'] for replica in replicas),
+            sorted(db.share_snapshot_instance_get_all_with_filters.
+                   call_args_list[0][0][1]['share_instance_ids']))
+        mock_snapshot_update_call.assert_has_calls([
+            mock.call(self.context, instance,
+                      replica_snapshots=snapshot_instances,
+                      share_id=replica['share_id'])
+            for instance, replica in zip(transitional_instances, replicas)])
 
     @ddt.data(True, False)
     def test_periodic_share_replica_snapshot_update_nothing_to_update(
@@ -5119,16 +5536,11 @@ class ShareManagerTestCase(test.TestCase):
             fake_replica(host='malfoy@manor#_pool0',
                          replica_state=constants.REPLICA_STATE_IN_SYNC)
         ]
-        replicas.append(fake_replica(replica_state=constants.STATUS_ACTIVE))
-        snapshot = fakes.fake_snapshot(create_instance=True,
-                                       status=constants.STATUS_DELETING)
-        snapshot_instances = 3 * [
-            fakes.fake_snapshot_instance(base_snapshot=snapshot)
-        ]
-        self.mock_object(db, 'share_replicas_get_all',
-                         mock.Mock(side_effect=[[], replicas]))
+        self.mock_object(db, 'share_replicas_get_all_by_host',
+                         mock.Mock(return_value=replicas if has_instances
+                                   else []))
         self.mock_object(db, 'share_snapshot_instance_get_all_with_filters',
-                         mock.Mock(side_effect=[snapshot_instances, []]))
+                         mock.Mock(return_value=[]))
         mock_snapshot_update_call = self.mock_object(
             self.share_manager, '_update_replica_snapshot')
 
@@ -5136,7 +5548,10 @@ class ShareManagerTestCase(test.TestCase):
             self.context)
 
         self.assertIsNone(retval)
-        self.assertEqual(1, mock_debug_log.call_count)
+        self.assertEqual(2, mock_debug_log.call_count)
+        self.assertEqual(
+            1 if has_instances else 0,
+            db.share_snapshot_instance_get_all_with_filters.call_count)
         self.assertEqual(0, mock_snapshot_update_call.call_count)
 
     def test__update_replica_snapshot_replica_deleted_from_database(self):
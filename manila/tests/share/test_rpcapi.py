@@ -277,6 +277,12 @@ class ShareRpcAPITestCase(test.TestCase):
                              src_share_instance=self.fake_share['instance'],
                              dest_instance_id='new_fake_ins_id')
 
+    def test_migration_change_to_read_only(self):
+        self._test_share_api('migration_change_to_read_only',
+                             rpc_method='call',
+                             version='1.13',
+                             src_share_instance=self.fake_share['instance'])
+
     def test_migration_cancel(self):
         self._test_share_api('migration_cancel',
                              rpc_method='cast',
@@ -76,6 +76,24 @@ class QuotaIntegrationTestCase(test.TestCase):
         for share_id in share_ids:
             db.share_delete(self.context, share_id)
 
+    def test_reserve_and_commit(self):
+        reservations = quota.QUOTAS.reserve(self.context, shares=1,
+                                            gigabytes=10)
+
+        usages = db.quota_usage_get_all_by_project(self.context,
+                                                   self.project_id)
+        self.assertEqual({'in_use': 0, 'reserved': 10}, usages['gigabytes'])
+        self.assertEqual(2, len(reservations))
+
+        quota.QUOTAS.commit(self.context, reservations)
+
+        usages = db.quota_usage_get_all_by_project(self.context,
+                                                   self.project_id)
+        self.assertEqual({'in_use': 1, 'reserved': 0}, usages['shares'])
+        self.assertEqual({'in_use': 10, 'reserved': 0}, usages['gigabytes'])
+        self.assertRaises(exception.OverQuota, quota.QUOTAS.reserve,
+                          self.context, shares=2)
+
 
 class FakeContext(object):
     def __init__(self, project_id, quota_class):
@@ -1168,11 +1186,9 @@ class QuotaReserveSqlAlchemyTestCase(test.TestCase):
         def fake_get_session():
             return FakeSession()
 
-        def fake_get_project_quota_usages(context, session, project_id):
-            return self.usages.copy()
-
-        def fake_get_user_quota_usages(context, session, project_id, user_id):
-            return self.usages.copy()
+        def fake_get_quota_usages(context, session, project_id, user_id,
+                                  resources):
+            return self.usages.copy(), self.usages.copy()
 
         def fake_quota_usage_create(context, project_id, user_id, resource,
                                     in_use, reserved, until_refresh,
@@ -1185,26 +1201,22 @@ class QuotaReserveSqlAlchemyTestCase(test.TestCase):
 
             return quota_usage_ref
 
-        def fake_reservation_create(context, uuid, usage_id, project_id,
-                                    user_id, resource, delta, expire,
-                                    session=None):
-            reservation_ref = self._make_reservation(
-                uuid, usage_id, project_id, user_id, resource, delta, expire,
-                timeutils.utcnow(), timeutils.utcnow())
-
-            self.reservations_created[resource] = reservation_ref
+        def fake_reservations_create(context, values_list, session):
+            for values in values_list:
+                reservation_ref = self._make_reservation(
+                    created_at=timeutils.utcnow(),
+                    updated_at=timeutils.utcnow(), **values)
 
-            return reservation_ref
+                self.reservations_created[values['resource']] = (
+                    reservation_ref)
 
         self.mock_object(sqa_api, 'get_session', fake_get_session)
-        self.mock_object(sqa_api, '_get_project_quota_usages',
-                         fake_get_project_quota_usages)
-        self.mock_object(sqa_api, '_get_user_quota_usages',
-                         fake_get_user_quota_usages)
+        self.mock_object(sqa_api, '_get_quota_usages',
+                         fake_get_quota_usages)
         self.mock_object(sqa_api, '_quota_usage_create',
                          fake_quota_usage_create)
-        self.mock_object(sqa_api, '_reservation_create',
-                         fake_reservation_create)
+        self.mock_object(sqa_api, '_reservations_create',
+                         fake_reservations_create)
 
         self.patcher = mock.patch.object(timeutils, 'utcnow')
         self.mock_utcnow = self.patcher.start()
@@ -1311,11 +1323,11 @@ class QuotaReserveSqlAlchemyTestCase(test.TestCase):
         self.compare_reservation(
             result,
             [dict(resource='shares',
-                  usage_id=self.usages_created['shares'],
+                  usage_id=self.usages_created['shares'].id,
                   project_id='test_project',
                   delta=2),
              dict(resource='gigabytes',
-                  usage_id=self.usages_created['gigabytes'],
+                  usage_id=self.usages_created['gigabytes'].id,
                   delta=2 * 1024), ])
 
     def test_quota_reserve_negative_in_use(self):
@@ -1345,11 +1357,11 @@ class QuotaReserveSqlAlchemyTestCase(test.TestCase):
         self.assertEqual({}, self.usages_created)
         self.compare_reservation(result,
                                  [dict(resource='shares',
-                                       usage_id=self.usages['shares'],
+                                       usage_id=self.usages['shares'].id,
                                        project_id='test_project',
                                        delta=2),
                                   dict(resource='gigabytes',
-                                       usage_id=self.usages['gigabytes'],
+                                       usage_id=self.usages['gigabytes'].id,
                                        delta=2 * 1024), ])
 
     def test_quota_reserve_until_refresh(self):
@@ -1377,11 +1389,11 @@ class QuotaReserveSqlAlchemyTestCase(test.TestCase):
         self.assertEqual({}, self.usages_created)
         self.compare_reservation(result,
                                  [dict(resource='shares',
-                                       usage_id=self.usages['shares'],
+                                       usage_id=self.usages['shares'].id,
                                        project_id='test_project',
                                        delta=2),
                                   dict(resource='gigabytes',
-                                       usage_id=self.usages['gigabytes'],
+                                       usage_id=self.usages['gigabytes'].id,
                                        delta=2 * 1024), ])
 
     def test_quota_reserve_max_age(self):
@@ -1413,13 +1425,35 @@ class QuotaReserveSqlAlchemyTestCase(test.TestCase):
         self.assertEqual({}, self.usages_created)
         self.compare_reservation(result,
                                  [dict(resource='shares',
-                                       usage_id=self.usages['shares'],
+                                       usage_id=self.usages['shares'].id,
                                        project_id='test_project',
                                        delta=2),
                                   dict(resource='gigabytes',
-                                       usage_id=self.usages['gigabytes'],
+                                       usage_id=self.usages['gigabytes'].id,
                                        delta=2 * 1024), ])
 
+    def test_quota_reserve_max_age_not_expired(self):
+        max_age = 3600
+        record_updated = (timeutils.utcnow() -
+                          datetime.timedelta(seconds=max_age - 1))
+        self.init_usage('test_project', 'test_user', 'shares', 3, 0,
+                        created_at=record_updated, updated_at=record_updated)
+        self.init_usage('test_project', 'test_user', 'gigabytes', 3, 0,
+                        created_at=record_updated, updated_at=record_updated)
+        context = FakeContext('test_project', 'test_class')
+        quotas = dict(shares=5, gigabytes=10 * 1024, )
+        deltas = dict(shares=2, gigabytes=2 * 1024, )
+        sqa_api.quota_reserve(context, self.resources, quotas, quotas,
+                              deltas, self.expire, 0, max_age)
+
+        self.assertEqual(set(), self.sync_called)
+        self.compare_usage(self.usages, [dict(resource='shares',
+                                              in_use=3,
+                                              reserved=2),
+                                         dict(resource='gigabytes',
+                                              in_use=3,
+                                              reserved=2 * 1024), ])
+
     def test_quota_reserve_no_refresh(self):
         self.init_usage('test_project', 'test_user', 'shares', 3, 0)
         self.init_usage('test_project', 'test_user', 'gigabytes', 3, 0)
@@ -1443,11 +1477,11 @@ class QuotaReserveSqlAlchemyTestCase(test.TestCase):
         self.assertEqual({}, self.usages_created)
         self.compare_reservation(result,
                                  [dict(resource='shares',
-                                       usage_id=self.usages['shares'],
+                                       usage_id=self.usages['shares'].id,
                                        project_id='test_project',
                                        delta=2),
                                   dict(resource='gigabytes',
-                                       usage_id=self.usages['gigabytes'],
+                                       usage_id=self.usages['gigabytes'].id,
                                        delta=2 * 1024), ])
 
     def test_quota_reserve_unders(self):
@@ -1473,11 +1507,11 @@ class QuotaReserveSqlAlchemyTestCase(test.TestCase):
         self.assertEqual({}, self.usages_created)
         self.compare_reservation(result,
                                  [dict(resource='shares',
-                                       usage_id=self.usages['shares'],
+                                       usage_id=self.usages['shares'].id,
                                        project_id='test_project',
                                        delta=-2),
                                   dict(resource='gigabytes',
-                                       usage_id=self.usages['gigabytes'],
+                                       usage_id=self.usages['gigabytes'].id,
                                        delta=-2 * 1024), ])
 
     def test_quota_reserve_overs(self):
@@ -1530,10 +1564,10 @@ class QuotaReserveSqlAlchemyTestCase(test.TestCase):
         self.assertEqual({}, self.usages_created)
         self.compare_reservation(result,
                                  [dict(resource='shares',
-                                       usage_id=self.usages['shares'],
+                                       usage_id=self.usages['shares'].id,
                                        project_id='test_project',
                                        delta=-2),
                                   dict(resource='gigabytes',
-                                       usage_id=self.usages['gigabytes'],
+                                       usage_id=self.usages['gigabytes'].id,
                                        project_id='test_project',
                                        delta=-2 * 1024), ])
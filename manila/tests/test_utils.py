@@ -196,6 +196,25 @@ class GetFromPathTestCase(test.TestCase):
         self.assertEqual(['b_1'], f(input, "a/b"))
 
 
+@ddt.ddt
+class PaginateTestCase(test.TestCase):
+
+    items = [{'id': 'id%s' % i} for i in range(5)]
+
+    @ddt.data(({}, items),
+              ({'limit': 2}, items[:2]),
+              ({'offset': 1, 'limit': 2}, items[1:3]),
+              ({'marker': 'id1'}, items[2:]),
+              ({'marker': 'id1', 'offset': 1, 'limit': 1}, items[3:4]))
+    @ddt.unpack
+    def test_paginate(self, pagination, expected):
+        self.assertEqual(expected, utils.paginate(self.items, **pagination))
+
+    def test_paginate_marker_not_found(self):
+        self.assertRaises(exception.InvalidInput, utils.paginate,
+                          self.items, marker='fake_marker')
+
+
 @ddt.ddt
 class GenericUtilsTestCase(test.TestCase):
     def test_read_cached_file(self):
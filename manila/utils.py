@@ -269,6 +269,32 @@ def get_from_path(items, path):
         return get_from_path(results, remainder)
 
 
+def paginate(items, limit=None, offset=None, marker=None):
+    """Returns a page of already sorted items.
+
+    Used for listings that could not be paginated by the database because
+    some of their filters had to be applied to the loaded items.
+
+    :param items: sorted list of items having an 'id' key
+    :param limit: maximum number of items to return
+    :param offset: number of items to skip
+    :param marker: 'id' of the last item of the previous page
+    :raises: exception.InvalidInput if marker is not found among items
+    """
+    start = 0
+    if marker is not None:
+        for i, item in enumerate(items):
+            if item['id'] == marker:
+                start = i + 1
+                break
+        else:
+            msg = _("Marker '%s' not found.") % marker
+            raise exception.InvalidInput(reason=msg)
+    start += offset or 0
+    end = None if limit is None else start + limit
+    return items[start:end]
+
+
 def is_eventlet_bug105():
     """Check if eventlet support IPv6 addresses.
 